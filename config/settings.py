@@ -2,7 +2,6 @@
 项目配置文件
 """
 
-import os
 from pathlib import Path
 
 # 项目根目录
@@ -15,9 +14,18 @@ DOUYIN_DATA_DIR = DATA_DIR / "douyin_data"
 OUTPUT_DIR = PROJECT_ROOT / "output"
 LOGS_DIR = PROJECT_ROOT / "logs"
 
-# 确保目录存在
-for dir_path in [DATA_DIR, BILIBILI_DATA_DIR, DOUYIN_DATA_DIR, OUTPUT_DIR, LOGS_DIR]:
-    dir_path.mkdir(exist_ok=True)
+# 爬取结果文件与浏览器配置目录（均相对项目根目录，多台工作机各自使用自己的检出目录）
+BILIBILI_RESULT_FILE = PROJECT_ROOT / "1.txt"  # B站提取结果
+DOUYIN_CONTENT_FILE = PROJECT_ROOT / "2.txt"  # 抖音视频URL与文案
+DOUYIN_STATS_FILE = PROJECT_ROOT / "3.txt"  # 抖音统计数据
+DOUYIN_STATS_DEBUG_FILE = PROJECT_ROOT / "3_debug.txt"  # 抖音统计区域的页面片段（浏览器提取时的调试信息）
+CHROME_PROFILE_DIR = PROJECT_ROOT / "chrome_user_data"  # 保持登录状态的Chrome配置目录
+
+
+def ensure_dirs():
+    """确保数据、输出、日志目录存在（导入配置时不再自动创建，由需要写文件的命令调用）"""
+    for dir_path in [DATA_DIR, BILIBILI_DATA_DIR, DOUYIN_DATA_DIR, OUTPUT_DIR, LOGS_DIR]:
+        dir_path.mkdir(exist_ok=True)
 
 # 目标URL
 BILIBILI_URL = "https://space.bilibili.com/420831218/dynamic"
@@ -41,12 +49,20 @@ BROWSER_CONFIG = {
     "user_agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
     "disable_images": False,  # 是否禁用图片加载
     "disable_javascript": False,  # 是否禁用JavaScript
+    "backend": "selenium",  # 浏览器后端：selenium（经chromedriver）或 cdp（直连DevTools协议）
+    "chrome_path": None,  # cdp后端使用的Chrome路径，None时自动查找
+    "replay_dir": "data/recordings/latest",  # replay后端回放的录制目录（由 --record 生成）
+    "replay_latency": 0.0,  # 回放时每条浏览器命令的模拟延迟（秒）
 }
 
 # 爬取配置
 CRAWLER_CONFIG = {
     "max_retries": 3,
-    "retry_delay": 2,  # 重试延迟（秒）
+    "retry_delay": 2,  # 重试退避基础延迟（秒），第n次重试前等待 [0, retry_delay×2^(n-1)] 内的随机时间
+    "retry_max_delay": 60,  # 重试退避上限（秒）
+    "breaker_threshold": 5,  # 同一域名连续失败多少次后熔断
+    "breaker_reset": 120,  # 熔断后多久放行一次试探（秒）
+    "dead_letter_dir": str(DATA_DIR / "dead_letter"),  # 最终失败条目的记录目录
     "scroll_delay": 2,  # 滚动延迟（秒）
     "request_delay": 1,  # 请求延迟（秒）
     "max_scroll_times": 50,  # 最大滚动次数
@@ -55,37 +71,208 @@ CRAWLER_CONFIG = {
 # 日志配置
 LOG_CONFIG = {
     "level": "INFO",
-    "format": "{time:YYYY-MM-DD HH:mm:ss} | {level} | {name}:{function}:{line} | {message}",
-    "rotation": "10 MB",
-    "retention": "7 days",
+    "format": "%(asctime)s | %(levelname)s | %(name)s:%(funcName)s:%(lineno)d | %(message)s",  # 控制台格式
+    "file": str(LOGS_DIR / "crawler.jsonl"),  # JSON日志文件，每行一条记录
+    "rotation": "10 MB",  # 单个文件达到该大小时轮转
+    "backup_count": 20,  # 最多保留的轮转文件数
+    "retention": "7 days",  # 超过该时间的轮转文件在初始化时删除
+    "sampled_loggers": [".cards"],  # 按级别采样的logger名称后缀（逐卡片日志）
+    "sampling": {"DEBUG": 0.0, "INFO": 0.1},  # 各级别保留比例，未列出的级别全部保留
+}
+
+# HTTP客户端缓存配置（非浏览器请求）
+HTTP_CACHE_CONFIG = {
+    "cache_dir": str(DATA_DIR / "http_cache"),
+    "default_ttl": 0,  # 响应未声明max-age时的新鲜期（秒），0表示每次发条件请求重新验证
+    "ttl_overrides": [  # 按URL类别覆盖有效期（秒），按顺序匹配
+        (r"hdslb\.com/bfs/", 30 * 24 * 3600),  # B站图片，地址随内容变化
+        (r"douyinpic\.com|douyinstatic\.com", 30 * 24 * 3600),  # 抖音图片、静态资源
+    ],
+    "pool_connections": 10,  # 连接池数量（按域名）
+    "pool_maxsize": 10,  # 每个连接池最大连接数
+    "timeout": 15,  # 请求超时（秒）
+}
+
+# 常驻爬取服务配置
+DAEMON_CONFIG = {
+    "host": "127.0.0.1",  # 只监听本机
+    "port": 8765,
+}
+
+# 登录态会话库配置
+SESSION_CONFIG = {
+    "vault_dir": str(DATA_DIR / "session_vault"),
+    "key_env": "ALIPAY_VAULT_KEY",  # 加密密钥环境变量，未设置时在会话库目录生成 .key 文件
+    "probe_interval": 600,  # 探测成功后多久内不再重复探测（秒）
+    "probe_timeout": 5,  # 探测请求超时（秒）
+    "platforms": {
+        "bilibili": {
+            "domain": ".bilibili.com",
+            "home_url": "https://www.bilibili.com/",
+            "auth_cookies": ["SESSDATA", "bili_jct"],  # 判断已登录所需的Cookie
+            "probe_url": "https://api.bilibili.com/x/web-interface/nav",
+        },
+        "douyin": {
+            "domain": ".douyin.com",
+            "home_url": "https://www.douyin.com/",
+            "auth_cookies": ["sessionid"],
+            "probe_url": "https://www.douyin.com/passport/web/account/info/",
+        },
+    },
+}
+
+# 分布式任务表配置（多台工作机共享）
+WORK_QUEUE_CONFIG = {
+    "dsn_env": "ALIPAY_QUEUE_DSN",  # 任务表地址环境变量，生产环境设置为 postgresql://...
+    "dsn": f"sqlite:///{DATA_DIR / 'work_queue.db'}",  # 未设置环境变量时使用（可放在共享卷上）
+    "lease_seconds": 300,  # 租约时长（秒）
+    "heartbeat_interval": 60,  # 续约间隔（秒）
+    "max_attempts": 3,  # 每个单元的最大尝试次数（含租约过期）
+    "retry_delay": 30,  # 失败后重新排队的退避基础延迟（秒）
+    "retry_max_delay": 600,  # 退避上限（秒）
+    "poll_interval": 10,  # 没有可领取单元时的等待间隔（秒）
+    "browserless": True,  # 抖音视频单元是否优先免浏览器获取
+}
+
+# 性能分析配置（各入口的 --profile 开关）
+PROFILE_CONFIG = {
+    "output_dir": str(OUTPUT_DIR / "profiles"),  # 每次运行在其下按启动时间新建子目录
+    "mode": "sample",  # sample：采样调用栈，开销低，可在生产环境使用；cprofile：逐次调用计时，开销较高
+    "interval": 0.005,  # 采样间隔（秒）
+    "top_n": 20,  # 汇总中列出的热点数
+}
+
+# 浏览器命令追踪配置（--trace-commands）
+COMMAND_TRACE_CONFIG = {
+    "output_dir": str(OUTPUT_DIR / "command_trace"),  # 每次运行在其下按启动时间新建子目录
+    "latency_buckets_ms": [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000],  # 耗时直方图分桶上界
+    "top_n": 30,  # 报告中列出的 命令 × 调用位置 数
+}
+
+# 文案标签索引配置（话题、@提及、【活动名】 → 内容）
+CAPTION_INDEX_CONFIG = {
+    "db_path": str(DATA_DIR / "caption_index.db"),
+}
+
+# 文案全文检索配置（SQLite FTS5）
+SEARCH_CONFIG = {
+    "db_path": str(DATA_DIR / "caption_search.db"),
+    "tokenizer": "trigram",  # trigram：SQLite内置三字切分；jieba：结巴分词（需 pip install jieba）
+    "index_on_store": True,  # B站爬取结果保存时同步写入索引
+}
+
+# 卡片截图存档配置（crawl --screenshots）
+SCREENSHOT_CONFIG = {
+    "output_dir": str(OUTPUT_DIR / "card_screenshots"),  # 每次运行在其下按启动时间新建子目录
+    "format": "webp",  # webp / avif（需要 Pillow 支持 AVIF）/ png
+    "quality": 80,
+    "workers": None,  # 编码进程数，None 为CPU核数
+}
+
+# 热门内容评论采集配置（comments 子命令）
+COMMENT_CONFIG = {
+    "db_path": str(DATA_DIR / "comments.db"),
+    "top_n": 10,  # 每月每个平台采集评论的内容数（按互动量）
+    "concurrency": 8,  # 同时在途的请求数上限
+    "per_post_limit": 500,  # 每条内容每次最多采集的新评论数
+    "page_size": 20,  # 每页评论数
+    "timeout": 15,  # 请求超时（秒）
+    "max_retries": 3,  # 单页请求失败后的最大重试次数
+    "headers": {"User-Agent": BROWSER_CONFIG["user_agent"]},
+    "endpoints": {  # 平台 → 评论接口地址、附加参数
+        "bilibili": {"url": "https://api.bilibili.com/x/v2/reply/main", "params": {"type": 17}},
+        "douyin": {"url": "https://www.douyin.com/aweme/v1/web/comment/list/", "params": {"aid": 6383}},
+    },
+}
+
+# 跨平台内容匹配配置（match 子命令）
+MATCH_CONFIG = {
+    "threshold": 0.3,  # 文案相似度阈值（n-gram 精确Jaccard），LSH分桶参数按阈值选取
+    "num_perm": 128,  # MinHash签名长度
+}
+
+# 内容变更事件日志配置（新内容、计数变化、缺失内容）
+CHANGE_LOG_CONFIG = {
+    "enabled": True,  # B站按时间范围爬取、抖音批量统计结束时写入事件
+    "log_dir": str(DATA_DIR / "change_log"),
+    "segment_bytes": 8 * 1024 * 1024,  # 段文件大小上限（字节）
+    "poll_interval": 1,  # changes tail --follow 没有新事件时的等待间隔（秒）
+}
+
+# 无限滚动列表配置（跳到底部后等待页面加载新卡片）
+SCROLL_CONFIG = {
+    "timeout": 10,  # 每轮等待新卡片的超时（秒），需小于浏览器脚本超时（selenium默认30秒）
+    "max_idle_rounds": 2,  # 连续多少轮没有新卡片视为列表结束
+    "feeds": {  # 平台 → 卡片、列表容器、结束标记、加载中标记选择器（容器为None时观察整个页面）
+        "bilibili": {
+            "cards": ".bili-dyn-item__main",  # 与 BILIBILI_SELECTORS["dynamic_card"] 一致，爬取时使用注册表中的卡片选择器
+            "container": ".bili-dyn-list",
+            "end": ".bili-dyn-list__nomore",
+            "loading": ".bili-dyn-list__loading",
+        },
+        "douyin": {  # 用户主页作品列表
+            "cards": "[data-e2e='user-post-list'] li",
+            "container": "[data-e2e='user-post-list']",
+            "end": None,
+            "loading": None,
+        },
+    },
 }
 
 # 数据存储配置
 STORAGE_CONFIG = {
-    "format": "json",  # 存储格式：json, csv, excel
+    "format": "json",  # 存储格式：json, csv, excel, parquet
     "encoding": "utf-8",
     "indent": 2,  # JSON缩进
 }
 
-# B站特定配置
+# B站特定配置：字段 → 按优先级排列的备选选择器（由 SelectorRegistry 按命中情况调整顺序）
 BILIBILI_SELECTORS = {
-    "dynamic_card": ".card-box",
-    "publish_time": ".pub-time",
-    "content_text": ".text-con",
-    "images": ".img-box img",
-    "like_count": ".like-info",
-    "comment_count": ".comment-info",
-    "repost_count": ".repost-info",
-    "dynamic_type": ".dynamic-type",
+    "dynamic_card": [".bili-dyn-item__main"],
+    "content_id": [".dyn-card-opus[dyn-id]", "[dyn-id]"],
+    "author": [".bili-dyn-title__text"],
+    "publish_time": [".bili-dyn-time"],
+    "content_text": [".bili-dyn-content .bili-rich-text__content"],
+    "video_desc": [".bili-dyn-card-video__desc"],
+    "like_count": [".bili-dyn-action.like"],
+    "comment_count": [".bili-dyn-action.comment"],
+    "repost_count": [".bili-dyn-action.forward"],
+    # B站图片结构复杂，需要多种选择器
+    "images": [
+        "picture.b-img__inner img",                    # B站新版图片结构
+        ".b-img__inner img",                           # B站新版图片结构（不限定picture标签）
+        "picture img[src*='hdslb.com']",               # picture标签中的B站CDN图片
+        ".bili-album__preview__picture__img img",      # 相册预览图
+        ".bili-dyn-card-img img",                      # 动态卡片图片
+        ".bili-rich-text__content img",                # 富文本内容中的图片
+        ".img-box img",                                # 图片盒子
+        ".album__image img",                           # 相册图片
+        ".bili-dyn-card__image img",                   # 动态卡片图片
+        ".dyn-card-opus img",                          # opus类型动态的图片
+        ".bili-dyn-content img",                       # 动态内容中的图片
+        "img[src*='hdslb.com']",                       # B站CDN图片
+        "img[src*='i0.hdslb.com']",                    # B站图片服务器
+        "img[src*='i1.hdslb.com']",                    # B站图片服务器
+        "img[src*='i2.hdslb.com']",                    # B站图片服务器
+        "img[src*='bfs/new_dyn']",                     # B站新版动态图片路径
+        "img[srcset*='hdslb.com']",                    # 带srcset属性的B站图片
+        "source[srcset*='hdslb.com']",                 # source标签中的B站图片
+    ],
 }
 
-# 抖音特定配置
+# 抖音特定配置：视频详情页
 DOUYIN_SELECTORS = {
-    "video_card": "[data-e2e='user-post-list'] > div",
-    "publish_time": "[data-e2e='browse-video-desc']",
-    "description": "[data-e2e='browse-video-desc']",
-    "cover_image": "img",
-    "like_count": "[data-e2e='video-like-count']",
-    "comment_count": "[data-e2e='video-comment-count']",
-    "share_count": "[data-e2e='video-share-count']",
+    # 统计区域，依次为点赞、评论、收藏、转发
+    "stats_block": ["div.fcEX2ARL"],
+    "publish_time": [
+        "span.MsN3XzkF[data-e2e='detail-video-publish-time']",
+        "[data-e2e='detail-video-publish-time']",
+    ],
+}
+
+# 选择器注册表配置
+SELECTOR_CONFIG = {
+    "stats_file": str(DATA_DIR / "selector_stats.json"),  # 命中统计与学到的顺序
+    "dead_after": 50,  # 连续未命中多少次视为失效并报告
+    "smoothing": 0.1,  # 命中率滑动平均系数
 }
\ No newline at end of file
@@ -2,14 +2,49 @@
 # -*- coding: utf-8 -*-
 
 import re
-import pandas as pd
 from datetime import datetime
-from docx import Document
-from docx.shared import Pt, RGBColor
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.oxml.shared import OxmlElement, qn
 import os
 
+from config.settings import BILIBILI_RESULT_FILE
+from src.common.profiling import profile_stage
+from src.common.records import BilibiliDynamic
+from src.export_service.export_engine import ExportEngine
+from src.export_service.parquet_sink import ParquetSink, bilibili_records
+from src.export_service.sinks import ExportLayout, build_sinks
+
+
+def _render_word(sink, item):
+    """Word中单条内容的排版"""
+    sink.add_field('发布时间', item.publish_date or item.publish_time_raw, bold=True)
+    sink.add_field('文案内容', item.text_content)
+    sink.add_field('统计数据', f'点赞：{item.like_count} | 评论：{item.comment_count} | 转发：{item.repost_count}',
+                   size=10, muted=True)
+    # 如果有视频链接，添加视频链接
+    if item.video_url:
+        sink.add_field('视频链接', item.video_url)
+    # 如果是视频类型，添加视频描述
+    if item.content_type == '视频' and item.video_description:
+        sink.add_field('视频描述', item.video_description)
+
+
+# 1.txt导出排版：中文列名，Word直接按1.txt的原始顺序摆放
+TXT_LAYOUT = ExportLayout(
+    basename='bilibili',
+    columns=[
+        ('内容ID', lambda item: item.content_id),
+        ('内容类型', lambda item: item.content_type),
+        ('文案内容', lambda item: item.text_content),
+        ('发布时间', lambda item: item.publish_date or item.publish_time_raw),
+        ('点赞数', lambda item: item.like_count),
+        ('评论数', lambda item: item.comment_count),
+        ('转发数', lambda item: item.repost_count),
+        ('图片链接', lambda item: item.image_urls),
+        ('平台标识', lambda item: item.platform),
+    ],
+    word_title='支付宝B站动态内容汇总（2025年5月1日 - 2025年11月1日）',
+    render_word=_render_word,
+)
+
 class BilibiliDataExporter:
     """B站数据导出器"""
     
@@ -83,24 +118,21 @@ class BilibiliDataExporter:
             # 图片链接
             image_link_match = re.search(r'图片链接: (.+?)(?=\s*视频链接:|\s*卡片高度:|\s*提取轮次:|$)', block)
             if image_link_match:
-                data_item['image_link'] = image_link_match.group(1).strip()
+                data_item['image_urls'] = image_link_match.group(1).strip()
             
             # 视频链接
             video_link_match = re.search(r'视频链接: (.+?)(?=\s*卡片高度:|\s*提取轮次:|$)', block)
             if video_link_match:
-                data_item['video_link'] = video_link_match.group(1).strip()
-            
-            # 平台标识
-            data_item['platform'] = 'bilibili'
+                data_item['video_url'] = video_link_match.group(1).strip()
             
             if data_item.get('content_id'):
-                self.data.append(data_item)
+                self.data.append(BilibiliDynamic(**data_item))
         
         print(f"成功解析 {len(self.data)} 条数据")
         return self.data
     
-    def _parse_publish_time(self, time_str: str) -> str:
-        """解析发布时间为标准格式"""
+    def _parse_publish_time(self, time_str: str):
+        """解析发布时间，无法解析时返回None（原始文本保留在 publish_time_raw）"""
         try:
             # 处理 "MM月DD日" 格式
             if '月' in time_str and '日' in time_str:
@@ -108,111 +140,54 @@ class BilibiliDataExporter:
                 month_day = time_str.replace(' · 投稿了视频', '').strip()
                 month = int(re.search(r'(\d+)月', month_day).group(1))
                 day = int(re.search(r'(\d+)日', month_day).group(1))
-                return f"2025-{month:02d}-{day:02d}"
+                return datetime(2025, month, day)
         except:
             pass
         
-        return time_str
+        return None
     
     def export_to_excel(self, output_path: str = 'bilibili_data.xlsx'):
         """导出到Excel文件"""
-        if not self.data:
-            self.parse_txt_data()
-        
-        # 创建DataFrame
-        df_data = []
-        for item in self.data:
-            row = {
-                '内容ID': item.get('content_id', ''),
-                '内容类型': item.get('content_type', ''),
-                '文案内容': item.get('text_content', ''),
-                '发布时间': item.get('publish_time', ''),
-                '点赞数': item.get('like_count', 0),
-                '评论数': item.get('comment_count', 0),
-                '转发数': item.get('repost_count', 0),
-                '图片链接': item.get('image_link', ''),
-                '平台标识': item.get('platform', 'bilibili')
-            }
-            df_data.append(row)
-        
-        df = pd.DataFrame(df_data)
-        
-        # 导出到Excel
-        df.to_excel(output_path, index=False, engine='openpyxl')
-        print(f"Excel文件已导出: {output_path}")
-        return output_path
+        return self._export(['excel'], {'excel': output_path})['excel']
     
     def export_to_word(self, output_path: str = 'bilibili_content.docx'):
         """导出到Word文件"""
-        if not self.data:
-            self.parse_txt_data()
-        
-        # 创建Word文档
-        doc = Document()
+        return self._export(['word'], {'word': output_path})['word']
+    
+    def export_all(self, formats=None, output_dir: str = '.', with_parquet: bool = False):
+        """
+        导出所有格式（数据只解析一次，一次遍历写入Excel、Word等所有导出目标），返回 格式名 → 文件路径
         
-        # 设置标题
-        title = doc.add_heading('支付宝B站动态内容汇总（2025年5月1日 - 2025年11月1日）', 0)
-        title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        with_parquet 为True时同时写入 output_dir/parquet 下按平台、月份分区的Parquet数据集
+        """
+        return self._export(formats, output_dir=output_dir, with_parquet=with_parquet)
+    
+    def _export(self, formats=None, filenames=None, output_dir: str = '.', with_parquet: bool = False):
+        """按1.txt的原始顺序导出指定格式"""
+        if not self.data:
+            with profile_stage("parse_txt"):
+                self.parse_txt_data()
         
-        # 直接按1.txt的原始顺序添加内容
-        for item in self.data:
-            # 发布时间
-            time_para = doc.add_paragraph()
-            time_para.add_run('【发布时间】').bold = True
-            time_para.add_run(f' {item.get("publish_time", "")}')
-            
-            # 文案内容
-            content_para = doc.add_paragraph()
-            content_para.add_run('【文案内容】').bold = True
-            content_para.add_run(f' {item.get("text_content", "")}')
-            
-            # 添加统计数据
-            stats_para = doc.add_paragraph()
-            stats_para.add_run('【统计数据】').bold = True
-            stats_run = stats_para.add_run(f' 点赞：{item.get("like_count", 0)} | 评论：{item.get("comment_count", 0)} | 转发：{item.get("repost_count", 0)}')
-            stats_run.font.size = Pt(10)
-            stats_run.font.color.rgb = RGBColor(128, 128, 128)  # 灰色字体
-            
-            # 如果有视频链接，添加视频链接
-            if item.get('video_link'):
-                video_para = doc.add_paragraph()
-                video_para.add_run('【视频链接】').bold = True
-                video_para.add_run(f' {item.get("video_link", "")}')
-            
-            # 如果是视频类型，添加视频描述
-            if item.get('content_type') == '视频' and item.get('video_description'):
-                video_desc_para = doc.add_paragraph()
-                video_desc_para.add_run('【视频描述】').bold = True
-                video_desc_para.add_run(f' {item.get("video_description", "")}')
-            
-            # 添加空行分隔
-            doc.add_paragraph()
+        sinks = build_sinks(TXT_LAYOUT, output_dir, formats, filenames)
+        if with_parquet:
+            sinks.append(ParquetSink(os.path.join(output_dir, 'parquet'), bilibili_records))
+        engine = ExportEngine(sinks, sort_key=None)
+        results = engine.run(self.data)
         
-        # 保存文档
-        doc.save(output_path)
-        print(f"Word文件已导出: {output_path}")
-        return output_path
-    
-    def _get_month(self, publish_time: str) -> str:
-        """从发布时间中提取月份"""
-        try:
-            if '-' in publish_time:
-                parts = publish_time.split('-')
-                if len(parts) >= 2:
-                    year = parts[0]
-                    month = parts[1]
-                    return f"{year}年{int(month)}月"
-        except:
-            pass
-        return '未知月份'
-    
-    def export_all(self):
-        """导出所有格式"""
-        excel_path = self.export_to_excel()
-        word_path = self.export_to_word()
-        return excel_path, word_path
+        for name, seconds in engine.timings.items():
+            print(f"{name} 导出用时: {seconds:.2f} 秒")
+        return results
 
 if __name__ == "__main__":
+    import argparse
+
+    from src.common.profiling import add_profile_arguments, profiling_session
+
+    parser = argparse.ArgumentParser(description="导出B站提取结果（1.txt）")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
     # 使用示例
-    exporter = BilibiliDataExporter('/Users/Zhuanz/projects/PythonWS/Alipay/1.txt')
-    exporter.export_all()
\ No newline at end of file
+    with profiling_session(args):
+        exporter = BilibiliDataExporter(str(BILIBILI_RESULT_FILE))
+        exporter.export_all()
\ No newline at end of file
@@ -0,0 +1,4 @@
+"""
+分析服务模块
+提供跨平台内容匹配等数据分析功能
+"""
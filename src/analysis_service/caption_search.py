@@ -0,0 +1,254 @@
+"""
+文案全文检索
+
+B站文案内容、视频描述和抖音文案写入 SQLite FTS5 全文索引，代替打开导出的Word逐个 Ctrl-F：
+- 分词器 trigram（默认，SQLite 3.34+ 内置）：按三字切分，中文不依赖分词词典；
+  少于三个字的检索词（如“苏超”）改用 LIKE 匹配索引内容
+- 分词器 jieba（可选依赖）：写入和查询前用结巴分词切为空格分隔的词，索引体积更小
+- 增量更新：按内容键（平台:内容ID）覆盖，文案没有变化的内容不重写；B站爬取保存结果时自动写入
+- 查询按 bm25 相关度排序，可按平台、发布日期范围过滤
+
+    with CaptionSearchIndex("data/caption_search.db") as index:
+        index.add_records(records)
+        index.search("出境 返现", platform="douyin", start="2024-09-01")
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.common.records import BilibiliDynamic, DouyinVideo
+
+logger = logging.getLogger(__name__)
+
+TRIGRAM = "trigram"
+JIEBA = "jieba"
+
+# 检索词按空白切分，每个词作为短语匹配（FTS5查询语法字符按普通文字处理）
+_TERM_SPLIT = re.compile(r"\s+")
+
+
+def _load_jieba():
+    try:
+        import jieba
+    except ImportError as e:
+        raise ImportError("jieba 分词需要安装 jieba：pip install jieba") from e
+    jieba.setLogLevel(logging.WARNING)
+    return jieba
+
+
+def _quote(term: str) -> str:
+    """FTS5 短语（双引号转义），避免检索词被当作查询语法"""
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _like(term: str) -> str:
+    return "%" + re.sub(r"([%_\\])", r"\\\1", term) + "%"
+
+
+class CaptionSearchIndex:
+    """文案全文索引"""
+
+    def __init__(self, db_path: str, tokenizer: str = TRIGRAM):
+        """
+        打开（或新建）索引
+
+        Args:
+            db_path: 索引文件路径，":memory:" 为内存索引
+            tokenizer: trigram 或 jieba，已有索引以建立时的分词器为准
+        """
+        if tokenizer not in (TRIGRAM, JIEBA):
+            raise ValueError(f"未知的分词器: {tokenizer}（可用: {TRIGRAM}, {JIEBA}）")
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'tokenizer'").fetchone()
+            self.tokenizer = row[0] if row else tokenizer
+            fts_tokenizer = "trigram" if self.tokenizer == TRIGRAM else "unicode61"
+            self._conn.execute("INSERT OR IGNORE INTO meta VALUES ('tokenizer', ?)", (self.tokenizer,))
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS docs (
+                    post_key TEXT PRIMARY KEY,
+                    platform TEXT NOT NULL,
+                    content_id TEXT NOT NULL,
+                    publish_date TEXT,
+                    author TEXT,
+                    url TEXT,
+                    text TEXT,
+                    description TEXT,
+                    text_hash TEXT NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS docs_by_date ON docs (platform, publish_date)")
+            self._conn.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(text, description, "
+                f"tokenize='{fts_tokenizer}')"
+            )
+        self._jieba = _load_jieba() if self.tokenizer == JIEBA else None
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _segment(self, text: str) -> str:
+        if self._jieba is None:
+            return text
+        return " ".join(token for token in self._jieba.cut_for_search(text) if token.strip())
+
+    # ---------- 写入 ----------
+
+    @staticmethod
+    def _doc(record: Any) -> Tuple[str, str, str, str, str, str, str, str]:
+        if isinstance(record, DouyinVideo):
+            text, description, url = record.content_text, "", record.video_url
+        else:
+            text, description = record.text_content, record.video_description
+            url = record.video_url or f"https://t.bilibili.com/{record.content_id}"
+        return (f"{record.platform}:{record.content_id}", record.platform, record.content_id, record.publish_date,
+                record.author, url, text or "", description or "")
+
+    def add_records(self, records: Iterable[Any]) -> int:
+        """
+        增量写入内容记录（BilibiliDynamic / DouyinVideo），没有ID或没有文字的记录跳过
+
+        Returns:
+            int: 新增或文案有变化而重写的记录数
+        """
+        docs = []
+        for record in records:
+            if not isinstance(record, (BilibiliDynamic, DouyinVideo)) or not record.content_id:
+                continue
+            doc = self._doc(record)
+            if doc[6] or doc[7]:
+                docs.append(doc)
+
+        changed = 0
+        with self._lock, self._conn:
+            for doc in docs:
+                text_hash = hashlib.sha1(f"{doc[6]}\0{doc[7]}\0{doc[3]}".encode("utf-8")).hexdigest()
+                row = self._conn.execute("SELECT rowid, text_hash FROM docs WHERE post_key = ?", (doc[0],)).fetchone()
+                if row and row[1] == text_hash:
+                    continue
+                if row:
+                    self._conn.execute("DELETE FROM docs_fts WHERE rowid = ?", (row[0],))
+                    self._conn.execute("UPDATE docs SET platform = ?, content_id = ?, publish_date = ?, author = ?, "
+                                       "url = ?, text = ?, description = ?, text_hash = ? WHERE rowid = ?",
+                                       doc[1:] + (text_hash, row[0]))
+                    rowid = row[0]
+                else:
+                    rowid = self._conn.execute("INSERT INTO docs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                               doc + (text_hash,)).lastrowid
+                self._conn.execute("INSERT INTO docs_fts (rowid, text, description) VALUES (?, ?, ?)",
+                                   (rowid, self._segment(doc[6]), self._segment(doc[7])))
+                changed += 1
+        return changed
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    # ---------- 查询 ----------
+
+    def _match_clause(self, query: str) -> Tuple[List[str], List[Any]]:
+        """检索词 → WHERE 条件（多个词之间为“与”）"""
+        terms = [term for term in _TERM_SPLIT.split(query.strip()) if term]
+        if self._jieba is not None:
+            terms = [token for term in terms for token in self._segment(term).split()]
+
+        phrases = [term for term in terms if self.tokenizer == JIEBA or len(term) >= 3]
+        short = [term for term in terms if term not in phrases]
+        clauses, params = [], []
+        if phrases:
+            clauses.append("docs_fts MATCH ?")
+            params.append(" AND ".join(_quote(term) for term in phrases))
+        for term in short:
+            # trigram 无法为少于三个字的词建立索引，在候选结果（或全部内容）上用 LIKE 匹配
+            clauses.append("(docs_fts.text LIKE ? ESCAPE '\\' OR docs_fts.description LIKE ? ESCAPE '\\')")
+            params.extend([_like(term), _like(term)])
+        return clauses, params
+
+    def search(self, query: str, platform: Optional[str] = None, start: Optional[str] = None,
+               end: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        全文检索
+
+        Args:
+            query: 检索词，空格分隔的多个词需同时出现
+            platform: 只查某个平台（bilibili / douyin）
+            start: 发布日期下限（YYYY-MM-DD，含）
+            end: 发布日期上限（YYYY-MM-DD，含）
+            limit: 返回数量
+
+        Returns:
+            List[Dict]: 按相关度排序的结果，含 platform、content_id、publish_date、author、url、
+                        text、description、snippet（命中位置前后的片段，命中处用 [ ] 标出）、score
+        """
+        clauses, params = self._match_clause(query)
+        if not clauses:
+            return []
+        for condition, value in (("d.platform = ?", platform), ("d.publish_date >= ?", start),
+                                 ("d.publish_date <= ?", end)):
+            if value:
+                clauses.append(condition)
+                params.append(value)
+        ranked = any(clause.startswith("docs_fts MATCH") for clause in clauses)
+        order = "bm25(docs_fts)" if ranked else "d.publish_date DESC"
+        snippet = "snippet(docs_fts, -1, '[', ']', '…', 16)" if ranked else "NULL"
+        sql = (f"SELECT d.platform, d.content_id, d.publish_date, d.author, d.url, d.text, d.description, "
+               f"{snippet}, {order if ranked else '0'} "
+               f"FROM docs_fts JOIN docs d ON d.rowid = docs_fts.rowid "
+               f"WHERE {' AND '.join(clauses)} ORDER BY {order} LIMIT ?")
+        with self._lock:
+            rows = self._conn.execute(sql, params + [limit]).fetchall()
+        return [{
+            "platform": platform_name,
+            "content_id": content_id,
+            "publish_date": publish_date,
+            "author": author,
+            "url": url,
+            "text": text,
+            "description": description,
+            "snippet": snippet_text or (text or description)[:48],
+            "score": round(-score, 4),
+        } for platform_name, content_id, publish_date, author, url, text, description, snippet_text, score in rows]
+
+
+def search_index_from_config() -> CaptionSearchIndex:
+    """按 SEARCH_CONFIG 打开全文索引"""
+    from config.settings import SEARCH_CONFIG
+
+    return CaptionSearchIndex(SEARCH_CONFIG["db_path"], tokenizer=SEARCH_CONFIG["tokenizer"])
+
+
+def index_stored_posts(records: List[Any]):
+    """
+    保存爬取结果后把内容写入全文索引（SEARCH_CONFIG["index_on_store"] 关闭时不写入），失败只记录警告
+
+    Args:
+        records: 刚保存的内容记录
+    """
+    from config.settings import SEARCH_CONFIG
+
+    if not SEARCH_CONFIG["index_on_store"] or not records:
+        return
+    try:
+        with search_index_from_config() as index:
+            changed = index.add_records(records)
+        logger.info(f"🔍 全文索引已更新 {changed} 条内容")
+    except Exception as e:
+        logger.warning(f"更新全文索引失败: {str(e)}")
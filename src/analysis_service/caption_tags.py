@@ -0,0 +1,254 @@
+"""
+文案标签索引
+
+从抖音文案、B站文案内容中提取话题标签（#苏超#、#出境玩家大集结）、@提及和【活动名】标签，
+写入持久化的倒排索引（SQLite）：标签 → 内容，活动级查询（如“惠出境的全部内容和总互动量”、
+按月统计）直接走索引，不需要扫描导出文件的全文。
+
+提取只用一个预编译的正则，对每条文案扫描一遍：
+    #话题#     闭合话题（抖音、B站通用）
+    #话题      未闭合话题，到空白、标点或下一个 #、@ 为止
+    （话题后面的 # 不计入匹配，可能是紧接着的下一个话题的开头，如 #碰一下#苏超）
+    @用户名    提及，到空白、标点为止
+    【活动名】 活动标签
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.common.records import BilibiliDynamic, DouyinVideo, engagement_of
+
+# 标签类型
+HASHTAG = "hashtag"
+MENTION = "mention"
+TOPIC = "topic"
+
+# 标签的终止字符：空白和常见中英文标点
+_STOP = r"\s#@，。！？、；：,.!?;:“”\"'（）()《》【】\[\]…~～|"
+
+_TAG_PATTERN = re.compile(
+    rf"#(?P<{HASHTAG}>[^{_STOP}]{{1,40}})"
+    rf"|@(?P<{MENTION}>[^{_STOP}]{{1,30}})"
+    rf"|【(?P<{TOPIC}>[^【】\n]{{1,30}})】"
+)
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS posts (
+        post_key TEXT PRIMARY KEY,
+        platform TEXT NOT NULL,
+        content_id TEXT NOT NULL,
+        month TEXT,
+        publish_date TEXT,
+        engagement INTEGER NOT NULL,
+        url TEXT,
+        text TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS post_tags (
+        kind TEXT NOT NULL,
+        tag TEXT NOT NULL,
+        post_key TEXT NOT NULL,
+        PRIMARY KEY (kind, tag, post_key)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS post_tags_by_tag ON post_tags (tag, post_key)",
+    "CREATE INDEX IF NOT EXISTS post_tags_by_post ON post_tags (post_key)",
+]
+
+
+def extract_tags(text: str) -> List[Tuple[str, str]]:
+    """
+    提取文案中的标签
+
+    Args:
+        text: 文案
+
+    Returns:
+        List[Tuple[str, str]]: (类型, 标签) 列表，按出现顺序去重；英文字母统一小写
+    """
+    if not text:
+        return []
+    tags: Dict[Tuple[str, str], None] = {}
+    for match in _TAG_PATTERN.finditer(text):
+        kind = match.lastgroup
+        tag = match.group(kind).strip().lower()
+        if tag:
+            tags[(kind, tag)] = None
+    return list(tags)
+
+
+def _post_row(record: Any) -> Tuple[str, str, str, Optional[str], str, int, str, str]:
+    if isinstance(record, DouyinVideo):
+        text, url = record.content_text, record.video_url
+    else:
+        text = "\n".join(part for part in (record.text_content, record.video_description) if part)
+        url = record.video_url or f"https://t.bilibili.com/{record.content_id}"
+    month = record.publish_time.strftime("%Y-%m") if record.publish_time else None
+    return (f"{record.platform}:{record.content_id}", record.platform, record.content_id, month,
+            record.publish_date, engagement_of(record), url, text)
+
+
+class CaptionTagIndex:
+    """标签倒排索引（SQLite文件，重复索引同一内容时覆盖旧标签）"""
+
+    def __init__(self, db_path: str):
+        """
+        打开（或新建）索引
+
+        Args:
+            db_path: 索引文件路径，":memory:" 为内存索引
+        """
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add_records(self, records: Iterable[Any]) -> int:
+        """
+        索引内容记录（BilibiliDynamic / DouyinVideo），没有ID的记录跳过
+
+        Returns:
+            int: 索引的记录数
+        """
+        posts, tags, keys = [], [], []
+        for record in records:
+            if not isinstance(record, (BilibiliDynamic, DouyinVideo)) or not record.content_id:
+                continue
+            row = _post_row(record)
+            posts.append(row)
+            keys.append((row[0],))
+            tags.extend((kind, tag, row[0]) for kind, tag in extract_tags(row[-1]))
+
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM post_tags WHERE post_key = ?", keys)
+            self._conn.executemany("INSERT OR REPLACE INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?)", posts)
+            self._conn.executemany("INSERT OR IGNORE INTO post_tags VALUES (?, ?, ?)", tags)
+        return len(posts)
+
+    def _tag_filter(self, tag: str, kind: Optional[str], contains: bool) -> Tuple[str, List[Any]]:
+        tag = tag.lstrip("#@【").rstrip("#】").lower()
+        if contains:
+            clause, params = "t.tag LIKE ? ESCAPE '\\'", ["%" + re.sub(r"([%_\\])", r"\\\1", tag) + "%"]
+        else:
+            clause, params = "t.tag = ?", [tag]
+        if kind:
+            clause += " AND t.kind = ?"
+            params.append(kind)
+        return clause, params
+
+    def query(self, tag: str, kind: Optional[str] = None, contains: bool = False,
+              platform: Optional[str] = None) -> Dict[str, Any]:
+        """
+        查询一个标签（活动）的全部内容、总互动量和按月统计
+
+        Args:
+            tag: 标签（可带 #、@、【】），英文不区分大小写
+            kind: 只查某种标签（hashtag / mention / topic）
+            contains: 为True时匹配包含该文字的所有标签（如 惠出境 匹配 #支付宝惠出境#）
+            platform: 只查某个平台（bilibili / douyin）
+
+        Returns:
+            Dict: tag、post_count、engagement、by_month（月份 → 内容数、互动量）、tags（命中的标签）、
+                  posts（按互动量降序）
+        """
+        clause, params = self._tag_filter(tag, kind, contains)
+        if platform:
+            clause += " AND p.platform = ?"
+            params.append(platform)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT p.post_key, p.platform, p.content_id, p.month, p.publish_date, p.engagement, p.url, p.text, "
+                "GROUP_CONCAT(t.kind || ':' || t.tag) "
+                f"FROM post_tags t JOIN posts p ON p.post_key = t.post_key WHERE {clause} "
+                "GROUP BY p.post_key ORDER BY p.engagement DESC", params
+            ).fetchall()
+
+        by_month: Dict[str, Dict[str, int]] = {}
+        matched_tags = set()
+        posts = []
+        for post_key, platform_name, content_id, month, publish_date, engagement, url, text, hits in rows:
+            stats = by_month.setdefault(month or "未知", {"posts": 0, "engagement": 0})
+            stats["posts"] += 1
+            stats["engagement"] += engagement
+            matched_tags.update(hits.split(","))
+            posts.append({"platform": platform_name, "content_id": content_id, "publish_date": publish_date,
+                          "engagement": engagement, "url": url, "text": text})
+        return {
+            "tag": tag,
+            "post_count": len(posts),
+            "engagement": sum(post["engagement"] for post in posts),
+            "by_month": dict(sorted(by_month.items())),
+            "tags": sorted(matched_tags),
+            "posts": posts,
+        }
+
+    def top_tags(self, kind: Optional[str] = None, month: Optional[str] = None,
+                 limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        按内容数排序的标签
+
+        Args:
+            kind: 只统计某种标签
+            month: 只统计某个月（YYYY-MM）
+            limit: 返回数量
+
+        Returns:
+            List[Dict]: kind、tag、posts、engagement
+        """
+        clauses, params = [], []
+        if kind:
+            clauses.append("t.kind = ?")
+            params.append(kind)
+        if month:
+            clauses.append("p.month = ?")
+            params.append(month)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT t.kind, t.tag, COUNT(*), SUM(p.engagement) "
+                f"FROM post_tags t JOIN posts p ON p.post_key = t.post_key {where} "
+                "GROUP BY t.kind, t.tag ORDER BY COUNT(*) DESC, SUM(p.engagement) DESC LIMIT ?", params + [limit]
+            ).fetchall()
+        return [{"kind": kind_name, "tag": tag, "posts": count, "engagement": engagement}
+                for kind_name, tag, count, engagement in rows]
+
+    def monthly_counts(self, tag: str, kind: Optional[str] = None) -> Dict[str, int]:
+        """
+        标签每月的内容数
+
+        Returns:
+            Dict: 月份（YYYY-MM）→ 内容数
+        """
+        clause, params = self._tag_filter(tag, kind, contains=False)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT COALESCE(p.month, '未知'), COUNT(DISTINCT p.post_key) "
+                f"FROM post_tags t JOIN posts p ON p.post_key = t.post_key WHERE {clause} "
+                "GROUP BY p.month ORDER BY p.month", params
+            ).fetchall()
+        return dict(rows)
+
+
+def caption_index_from_config() -> CaptionTagIndex:
+    """按 CAPTION_INDEX_CONFIG 打开标签索引"""
+    from config.settings import CAPTION_INDEX_CONFIG
+
+    return CaptionTagIndex(CAPTION_INDEX_CONFIG["db_path"])
@@ -0,0 +1,398 @@
+"""
+热门内容评论采集
+
+每月互动量最高的内容需要评论原文做舆情复盘，逐条在浏览器里翻评论太慢，这里直接请求评论接口：
+- 内容来自B站、抖音的爬取结果（BilibiliDynamic / DouyinVideo），按月、按平台取互动量前N条
+- asyncio + aiohttp 并发请求，信号量限制同时在途的请求数；同一内容的评论页按游标依次翻页
+- 每条内容每次最多采集 per_post_limit 条新评论
+- 评论按 (平台, 内容ID, 评论ID) 存入 SQLite（WITHOUT ROWID 表，只存时间、点赞数、作者、正文）
+- 增量刷新：评论按时间倒序翻页，遇到已经存过的评论即停止，只请求新评论所在的页
+
+评论接口：
+- B站 x/v2/reply/main（mode=2 按时间排序，游标 cursor.next / cursor.is_end），oid 为动态ID
+  （type=17，图文动态；视频动态的评论挂在稿件上，需改用稿件aid和 type=1）
+- 抖音 aweme/v1/web/comment/list（cursor / has_more），请求带会话库中的登录态
+
+    with CommentStore("data/comments.db") as store:
+        crawler = CommentCrawler(store, concurrency=8)
+        crawler.crawl(top_posts(records, top_n=10))
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import aiohttp
+
+from src.common.retry import FetchError, backoff_delay
+from src.common.records import BilibiliDynamic, DouyinVideo, engagement_of
+
+logger = logging.getLogger(__name__)
+
+# 一条评论：(评论ID, 发布时间戳, 点赞数, 作者, 正文)
+Comment = Tuple[str, int, int, str, str]
+
+# 一条待采集内容：(平台, 内容ID)
+Post = Tuple[str, str]
+
+
+class CommentSource:
+    """一个平台的评论接口：请求参数和响应解析"""
+
+    platform = ""
+
+    def __init__(self, url: str, **params: Any):
+        """
+        Args:
+            url: 评论接口地址
+            params: 每次请求附带的固定参数
+        """
+        self.url = url
+        self.params = params
+
+    def page_params(self, post_id: str, cursor: Any, page_size: int) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def parse_page(self, payload: Dict[str, Any]) -> Tuple[List[Comment], Any]:
+        """
+        解析一页评论
+
+        Returns:
+            Tuple: (评论列表, 下一页游标，没有下一页时为None)
+        """
+        raise NotImplementedError
+
+
+class BilibiliCommentSource(CommentSource):
+    """B站评论接口（按时间倒序）"""
+
+    platform = "bilibili"
+
+    def page_params(self, post_id: str, cursor: Any, page_size: int) -> Dict[str, Any]:
+        return {"type": 17, "mode": 2, **self.params, "oid": post_id, "next": cursor or 0, "ps": page_size}
+
+    def parse_page(self, payload: Dict[str, Any]) -> Tuple[List[Comment], Any]:
+        if payload.get("code", 0) != 0:
+            raise FetchError(f"B站评论接口返回错误: {payload.get('code')} {payload.get('message', '')}")
+        data = payload.get("data") or {}
+        comments = [
+            (str(reply["rpid"]), int(reply.get("ctime") or 0), int(reply.get("like") or 0),
+             (reply.get("member") or {}).get("uname", ""), (reply.get("content") or {}).get("message", ""))
+            for reply in data.get("replies") or []
+        ]
+        cursor = data.get("cursor") or {}
+        return comments, None if cursor.get("is_end", True) else cursor.get("next")
+
+
+class DouyinCommentSource(CommentSource):
+    """抖音评论接口"""
+
+    platform = "douyin"
+
+    def page_params(self, post_id: str, cursor: Any, page_size: int) -> Dict[str, Any]:
+        return {**self.params, "aweme_id": post_id, "cursor": cursor or 0, "count": page_size}
+
+    def parse_page(self, payload: Dict[str, Any]) -> Tuple[List[Comment], Any]:
+        if payload.get("status_code", 0) != 0:
+            raise FetchError(f"抖音评论接口返回错误: {payload.get('status_code')} {payload.get('status_msg', '')}")
+        comments = [
+            (str(item["cid"]), int(item.get("create_time") or 0), int(item.get("digg_count") or 0),
+             (item.get("user") or {}).get("nickname", ""), item.get("text", ""))
+            for item in payload.get("comments") or []
+        ]
+        return comments, payload.get("cursor") if payload.get("has_more") else None
+
+
+SOURCE_TYPES = {source.platform: source for source in (BilibiliCommentSource, DouyinCommentSource)}
+
+
+def top_posts(records: Iterable[Any], top_n: int = 10, month: Optional[str] = None) -> List[Post]:
+    """
+    按月、按平台取互动量最高的内容
+
+    Args:
+        records: 内容记录（BilibiliDynamic / DouyinVideo）
+        top_n: 每月每个平台取的条数
+        month: 只取某个月（YYYY-MM）
+
+    Returns:
+        List[Post]: (平台, 内容ID)，按月份、平台、互动量排序
+    """
+    groups = defaultdict(list)
+    for record in records:
+        if not isinstance(record, (BilibiliDynamic, DouyinVideo)) or not record.publish_time:
+            continue
+        if not record.content_id or record.content_id == "未知":
+            continue
+        record_month = record.publish_time.strftime("%Y-%m")
+        if month and record_month != month:
+            continue
+        groups[(record_month, record.platform)].append(record)
+
+    posts = []
+    for key in sorted(groups):
+        ranked = sorted(groups[key], key=engagement_of, reverse=True)[:top_n]
+        posts.extend((record.platform, record.content_id) for record in ranked)
+    return posts
+
+
+class CommentStore:
+    """评论库"""
+
+    def __init__(self, db_path: str):
+        """
+        打开（或新建）评论库
+
+        Args:
+            db_path: 数据库文件路径，":memory:" 为内存库
+        """
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path)
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS comments (
+                    platform TEXT NOT NULL,
+                    post_id TEXT NOT NULL,
+                    comment_id TEXT NOT NULL,
+                    ctime INTEGER NOT NULL,
+                    likes INTEGER NOT NULL,
+                    author TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    PRIMARY KEY (platform, post_id, comment_id)
+                ) WITHOUT ROWID
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS crawled_posts (
+                    platform TEXT NOT NULL,
+                    post_id TEXT NOT NULL,
+                    crawled_at TEXT NOT NULL,
+                    PRIMARY KEY (platform, post_id)
+                ) WITHOUT ROWID
+                """
+            )
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def was_crawled(self, platform: str, post_id: str) -> bool:
+        row = self._conn.execute("SELECT 1 FROM crawled_posts WHERE platform = ? AND post_id = ?",
+                                 (platform, post_id)).fetchone()
+        return row is not None
+
+    def add_comments(self, platform: str, post_id: str, comments: Sequence[Comment]) -> int:
+        """
+        写入一页评论，已存在的评论不覆盖
+
+        Returns:
+            int: 新写入的评论数
+        """
+        with self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO comments VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                   [(platform, post_id) + tuple(comment) for comment in comments])
+            return self._conn.total_changes - before
+
+    def mark_crawled(self, platform: str, post_id: str):
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO crawled_posts VALUES (?, ?, ?)",
+                               (platform, post_id, time.strftime("%Y-%m-%d %H:%M:%S")))
+
+    def comments(self, platform: str, post_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        一条内容的评论（按时间倒序）
+
+        Returns:
+            List[Dict]: comment_id、ctime、likes、author、text
+        """
+        rows = self._conn.execute(
+            "SELECT comment_id, ctime, likes, author, text FROM comments WHERE platform = ? AND post_id = ? "
+            "ORDER BY ctime DESC, comment_id DESC LIMIT ?",
+            (platform, post_id, -1 if limit is None else limit),
+        ).fetchall()
+        return [{"comment_id": comment_id, "ctime": ctime, "likes": likes, "author": author, "text": text}
+                for comment_id, ctime, likes, author, text in rows]
+
+    def count(self, platform: Optional[str] = None, post_id: Optional[str] = None) -> int:
+        sql, params = "SELECT COUNT(*) FROM comments WHERE 1 = 1", []
+        for column, value in (("platform", platform), ("post_id", post_id)):
+            if value:
+                sql += f" AND {column} = ?"
+                params.append(value)
+        return self._conn.execute(sql, params).fetchone()[0]
+
+    def export_jsonl(self, path: str) -> int:
+        """
+        按内容导出评论（每行一条内容：platform、post_id、comments），供舆情复盘使用
+
+        Returns:
+            int: 导出的内容数
+        """
+        import orjson
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        posts = self._conn.execute("SELECT platform, post_id FROM crawled_posts ORDER BY platform, post_id").fetchall()
+        with open(path, "wb") as f:
+            for platform, post_id in posts:
+                line = {"platform": platform, "post_id": post_id, "comments": self.comments(platform, post_id)}
+                f.write(orjson.dumps(line) + b"\n")
+        return len(posts)
+
+
+class CommentCrawler:
+    """并发评论采集"""
+
+    def __init__(self, store: CommentStore, sources: Optional[Dict[str, CommentSource]] = None,
+                 concurrency: int = 8, per_post_limit: int = 500, page_size: int = 20, timeout: float = 15,
+                 max_retries: int = 3, base_delay: float = 1, max_delay: float = 30,
+                 headers: Optional[Dict[str, str]] = None, cookies: Optional[Dict[str, Dict[str, str]]] = None):
+        """
+        初始化采集器
+
+        Args:
+            store: 评论库
+            sources: 平台 → 评论接口，默认使用正式接口
+            concurrency: 同时在途的请求数上限
+            per_post_limit: 每条内容每次最多采集的新评论数
+            page_size: 每页评论数
+            timeout: 单次请求超时（秒）
+            max_retries: 单页请求失败后的最大重试次数
+            base_delay: 重试退避基础延迟（秒）
+            max_delay: 重试退避上限（秒）
+            headers: 请求头
+            cookies: 平台 → 登录态Cookie
+        """
+        self.store = store
+        self.sources = sources or {
+            "bilibili": BilibiliCommentSource("https://api.bilibili.com/x/v2/reply/main"),
+            "douyin": DouyinCommentSource("https://www.douyin.com/aweme/v1/web/comment/list/"),
+        }
+        self.concurrency = concurrency
+        self.per_post_limit = per_post_limit
+        self.page_size = page_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.headers = headers or {}
+        self.cookies = cookies or {}
+        self.requests = 0
+
+    async def _fetch_page(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                          source: CommentSource, post_id: str, cursor: Any) -> Tuple[List[Comment], Any]:
+        """请求一页评论，失败时按退避重试"""
+        params = source.page_params(post_id, cursor, self.page_size)
+        attempt = 0
+        while True:
+            try:
+                async with semaphore:
+                    self.requests += 1
+                    async with session.get(source.url, params=params,
+                                           cookies=self.cookies.get(source.platform)) as response:
+                        if response.status != 200:
+                            raise FetchError(f"HTTP {response.status}")
+                        payload = await response.json(content_type=None)
+                return source.parse_page(payload)
+            except (FetchError, aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise FetchError(f"{source.platform}:{post_id} 游标 {cursor} 请求失败: {str(e)}") from e
+                await asyncio.sleep(backoff_delay(attempt, self.base_delay, self.max_delay))
+
+    async def _crawl_post(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                          platform: str, post_id: str) -> int:
+        """按游标翻页采集一条内容的新评论"""
+        source = self.sources[platform]
+        refresh = self.store.was_crawled(platform, post_id)
+        added, cursor = 0, None
+        while added < self.per_post_limit:
+            comments, cursor = await self._fetch_page(session, semaphore, source, post_id, cursor)
+            page = comments[:self.per_post_limit - added]
+            new = self.store.add_comments(platform, post_id, page)
+            added += new
+            # 按时间倒序翻页：出现已存过的评论说明之后都是旧评论
+            if cursor is None or not comments or (refresh and new < len(page)):
+                break
+        self.store.mark_crawled(platform, post_id)
+        return added
+
+    async def crawl_async(self, posts: Iterable[Post]) -> Dict[str, Any]:
+        """并发采集多条内容的评论，见 crawl"""
+        posts = list(dict.fromkeys(post for post in posts if post[0] in self.sources))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        async with aiohttp.ClientSession(headers=self.headers, timeout=timeout, connector=connector) as session:
+            results = await asyncio.gather(
+                *(self._crawl_post(session, semaphore, platform, post_id) for platform, post_id in posts),
+                return_exceptions=True,
+            )
+
+        summary = {"posts": len(posts), "new_comments": 0, "requests": self.requests, "failed": []}
+        for (platform, post_id), result in zip(posts, results):
+            if isinstance(result, Exception):
+                logger.warning(f"评论采集失败 {platform}:{post_id}: {str(result)}")
+                summary["failed"].append(f"{platform}:{post_id}")
+            else:
+                summary["new_comments"] += result
+        return summary
+
+    def crawl(self, posts: Iterable[Post]) -> Dict[str, Any]:
+        """
+        并发采集多条内容的评论（增量：已采集过的内容只取新评论）
+
+        Args:
+            posts: (平台, 内容ID)，没有配置评论接口的平台跳过
+
+        Returns:
+            Dict: posts（内容数）、new_comments（新评论数）、requests（请求数）、failed（失败的内容）
+        """
+        self.requests = 0
+        start = time.perf_counter()
+        summary = asyncio.run(self.crawl_async(posts))
+        logger.info(f"💬 评论采集完成: {summary['posts']} 条内容，新增 {summary['new_comments']} 条评论，"
+                    f"{summary['requests']} 次请求，失败 {len(summary['failed'])} 条，"
+                    f"耗时 {time.perf_counter() - start:.1f} 秒")
+        return summary
+
+
+def _vault_cookies(platform: str) -> Optional[Dict[str, str]]:
+    """会话库中的登录态Cookie（名称 → 值），失败时以未登录状态请求"""
+    try:
+        from src.common.session_vault import get_session_vault
+
+        session = get_session_vault().load(platform)
+    except Exception as e:
+        logger.warning(f"读取会话库登录态失败: {str(e)}")
+        return None
+    if not session:
+        return None
+    return {cookie["name"]: cookie["value"] for cookie in session["cookies"]}
+
+
+def comment_crawler_from_config(store: CommentStore) -> CommentCrawler:
+    """按 COMMENT_CONFIG 创建采集器（请求带会话库中的登录态）"""
+    from config.settings import COMMENT_CONFIG
+
+    sources = {platform: SOURCE_TYPES[platform](endpoint["url"], **endpoint.get("params", {}))
+               for platform, endpoint in COMMENT_CONFIG["endpoints"].items()}
+    cookies = {platform: _vault_cookies(platform) for platform in sources}
+    return CommentCrawler(store, sources=sources, concurrency=COMMENT_CONFIG["concurrency"],
+                          per_post_limit=COMMENT_CONFIG["per_post_limit"], page_size=COMMENT_CONFIG["page_size"],
+                          timeout=COMMENT_CONFIG["timeout"], max_retries=COMMENT_CONFIG["max_retries"],
+                          headers=COMMENT_CONFIG["headers"],
+                          cookies={platform: value for platform, value in cookies.items() if value})
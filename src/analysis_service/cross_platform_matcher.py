@@ -0,0 +1,370 @@
+"""
+跨平台内容匹配模块
+
+同一活动文案（如“支付宝碰一下”“惠出境”）通常同时发布在B站和抖音。
+本模块对规范化后的文案做MinHash签名，并用LSH分桶只比较同桶候选，
+避免所有内容两两比较，匹配耗时随内容数量近似线性增长。
+LSH的 band × 行数 按相似度阈值选取，候选对再按n-gram集合的精确Jaccard相似度验证；
+簇内任意两条内容都必须是验证通过的相似对，不会经由中间内容把弱相关的内容串成一簇。
+"""
+
+import json
+import random
+import re
+import zlib
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from src.common.records import BilibiliDynamic, DouyinVideo
+
+
+# 梅森素数，作为MinHash线性哈希的模数
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# 文案规范化：去掉链接、@提及、空白和标点，只保留文字和数字
+_URL_PATTERN = re.compile(r"https?://\S+")
+_MENTION_PATTERN = re.compile(r"@\S+")
+_NON_WORD_PATTERN = re.compile(r"[^\w]+")
+
+
+def normalize_caption(text: str) -> str:
+    """
+    规范化文案文本
+
+    Args:
+        text: 原始文案
+
+    Returns:
+        str: 去掉链接、@提及、标点、空白并转小写后的文本
+    """
+    if not text:
+        return ""
+    text = _URL_PATTERN.sub(" ", text)
+    text = _MENTION_PATTERN.sub(" ", text)
+    text = _NON_WORD_PATTERN.sub("", text)
+    return text.lower()
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """
+    将文本切分为字符级n-gram集合（中文不依赖分词）
+
+    Args:
+        text: 规范化后的文本
+        size: n-gram长度
+
+    Returns:
+        Set[str]: n-gram集合
+    """
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class MinHasher:
+    """MinHash签名生成器"""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        """
+        初始化签名生成器
+
+        Args:
+            num_perm: 哈希函数数量（签名长度）
+            seed: 随机种子，索引和查询必须使用相同的种子
+        """
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._params = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, tokens: Iterable[str]) -> Tuple[int, ...]:
+        """
+        计算token集合的MinHash签名
+
+        Args:
+            tokens: token集合
+
+        Returns:
+            Tuple[int, ...]: 签名，空集合返回全最大值
+        """
+        hashed = [zlib.crc32(token.encode("utf-8")) for token in tokens]
+        if not hashed:
+            return tuple([_MAX_HASH] * self.num_perm)
+        return tuple(
+            min(((a * value + b) % _MERSENNE_PRIME) & _MAX_HASH for value in hashed)
+            for a, b in self._params
+        )
+
+
+def estimate_similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    """根据两个MinHash签名估算Jaccard相似度"""
+    if not sig_a:
+        return 0.0
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+def jaccard(set_a: Set[str], set_b: Set[str]) -> float:
+    """两个n-gram集合的精确Jaccard相似度"""
+    if not set_a or not set_b:
+        return 0.0
+    return len(set_a & set_b) / len(set_a | set_b)
+
+
+def _integrate(func, start: float, end: float, steps: int = 100) -> float:
+    """中点法数值积分"""
+    width = (end - start) / steps
+    return sum(func(start + (i + 0.5) * width) for i in range(steps)) * width
+
+
+@lru_cache(maxsize=None)
+def lsh_params(threshold: float, num_perm: int = 128, false_positive_weight: float = 0.5,
+               false_negative_weight: float = 0.5) -> Tuple[int, int]:
+    """
+    按相似度阈值选取 LSH 的 band 数和每个 band 的行数
+
+    相似度为 s 的两条内容成为候选的概率为 1 - (1 - s^行数)^band数（S形曲线，拐点约在 (1/band数)^(1/行数)）；
+    在 band数 × 行数 ≤ num_perm 的组合中，选阈值以下误入候选（假阳性）与阈值以上漏掉（假阴性）的
+    加权面积最小的一组
+
+    Args:
+        threshold: 相似度阈值
+        num_perm: 签名长度
+        false_positive_weight: 假阳性权重
+        false_negative_weight: 假阴性权重
+
+    Returns:
+        Tuple[int, int]: (band数, 每个band的行数)
+    """
+    if not 0 < threshold < 1:
+        raise ValueError("threshold必须在0和1之间")
+    best = None
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            false_positive = _integrate(lambda s: 1 - (1 - s ** rows) ** bands, 0.0, threshold)
+            false_negative = _integrate(lambda s: (1 - s ** rows) ** bands, threshold, 1.0)
+            error = false_positive_weight * false_positive + false_negative_weight * false_negative
+            if best is None or error < best[0]:
+                best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class MinHashLSHIndex:
+    """MinHash LSH索引：签名按band分桶，同桶即为候选"""
+
+    def __init__(self, num_perm: int = 128, threshold: float = 0.3, bands: Optional[int] = None,
+                 rows: Optional[int] = None, seed: int = 1):
+        """
+        初始化索引
+
+        bands越多、每个band的行数越少，召回越高、候选越多；默认按 threshold 由 lsh_params 选取，
+        使候选概率的S形曲线拐点落在阈值附近（阈值0.3、签名长度128时为 37 × 3 行）
+
+        Args:
+            num_perm: 签名长度
+            threshold: 相似度阈值
+            bands: band数量，默认按阈值选取
+            rows: 每个band的行数，默认 num_perm // bands
+            seed: 随机种子
+        """
+        if bands is None:
+            bands, rows = lsh_params(threshold, num_perm)
+        rows = rows or num_perm // bands
+        if bands * rows > num_perm or rows < 1:
+            raise ValueError("bands × rows 不能超过num_perm")
+        self.hasher = MinHasher(num_perm=num_perm, seed=seed)
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self.signatures: Dict[str, Tuple[int, ...]] = {}
+        self._buckets: List[Dict[Tuple[int, ...], List[str]]] = [defaultdict(list) for _ in range(bands)]
+
+    def _band_keys(self, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def add(self, key: str, text: str) -> Tuple[int, ...]:
+        """
+        添加一条文案
+
+        Args:
+            key: 内容唯一标识
+            text: 原始文案
+
+        Returns:
+            Tuple[int, ...]: 文案的MinHash签名
+        """
+        signature = self.hasher.signature(shingles(normalize_caption(text)))
+        self.signatures[key] = signature
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band][band_key].append(key)
+        return signature
+
+    def candidate_pairs(self) -> Set[Tuple[str, str]]:
+        """获取所有同桶候选对（每对只出现一次）"""
+        pairs: Set[Tuple[str, str]] = set()
+        for buckets in self._buckets:
+            for keys in buckets.values():
+                if len(keys) < 2:
+                    continue
+                for i in range(len(keys)):
+                    for j in range(i + 1, len(keys)):
+                        pairs.add((keys[i], keys[j]) if keys[i] < keys[j] else (keys[j], keys[i]))
+        return pairs
+
+    def query(self, text: str, threshold: Optional[float] = None) -> List[Tuple[str, float]]:
+        """
+        查询与指定文案相似的已索引内容
+
+        Args:
+            text: 原始文案
+            threshold: 估算相似度阈值，默认为索引的阈值
+
+        Returns:
+            List[Tuple[str, float]]: (内容标识, 相似度)，按相似度降序
+        """
+        threshold = self.threshold if threshold is None else threshold
+        signature = self.hasher.signature(shingles(normalize_caption(text)))
+        candidates = set()
+        for band, band_key in self._band_keys(signature):
+            candidates.update(self._buckets[band].get(band_key, []))
+        scored = [(key, estimate_similarity(signature, self.signatures[key])) for key in candidates]
+        return sorted([item for item in scored if item[1] >= threshold], key=lambda item: -item[1])
+
+
+def _bilibili_posts(contents: List[Any]) -> List[Dict[str, Any]]:
+    """从B站数据（提取得到的 BilibiliDynamic 记录或导出解析结果）中取出匹配所需字段"""
+    posts = []
+    for i, item in enumerate(contents):
+        if isinstance(item, BilibiliDynamic):
+            content_id, text, publish_date = item.content_id, item.text_content, item.publish_date
+        else:
+            content_id = item.get("内容ID") or item.get("content_id")
+            text = item.get("文案内容") or item.get("text_content", "")
+            publish_date = item.get("发布时间_解析") or item.get("publish_time", "")
+        content_id = content_id or f"card_{i}"
+        posts.append({
+            "key": f"bilibili:{content_id}",
+            "platform": "bilibili",
+            "content_id": content_id,
+            "text": text,
+            "publish_date": publish_date,
+        })
+    return posts
+
+
+def _douyin_posts(data: List[DouyinVideo]) -> List[Dict[str, Any]]:
+    """从抖音数据（parse_douyin_data 返回的记录）中取出匹配所需字段"""
+    return [
+        {
+            "key": f"douyin:{item.content_id}",
+            "platform": "douyin",
+            "content_id": item.content_id,
+            "video_url": item.video_url,
+            "text": item.content_text,
+            "publish_date": item.publish_date,
+        }
+        for item in data
+    ]
+
+
+def match_cross_platform(bilibili_contents: List[Any], douyin_data: List[DouyinVideo],
+                         threshold: float = 0.3, num_perm: int = 128,
+                         bands: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    匹配两个平台的同一活动内容，输出跨平台活动簇
+
+    LSH候选对按n-gram集合的精确Jaccard相似度验证，相似度不低于阈值的为验证通过的相似对；
+    相似对按相似度从高到低合并簇，只有两簇之间的每一对内容都验证通过时才合并（全连接），
+    同平台的系列文案满足条件时也会并入同一簇；只输出同时包含B站和抖音内容的簇
+
+    Args:
+        bilibili_contents: B站内容列表（BilibiliDynamic 记录，或含“文案内容”/ text_content 的字典）
+        douyin_data: 抖音视频记录
+        threshold: 相似度阈值
+        num_perm: 签名长度
+        bands: LSH band数量，默认按阈值选取（见 lsh_params）
+
+    Returns:
+        List[Dict]: 活动簇列表，每个簇包含成员和成员间相似度，按最高相似度降序
+    """
+    posts = {post["key"]: post for post in _bilibili_posts(bilibili_contents) + _douyin_posts(douyin_data)
+             if normalize_caption(post["text"])}
+
+    index = MinHashLSHIndex(num_perm=num_perm, threshold=threshold, bands=bands)
+    grams = {}
+    for key, post in posts.items():
+        index.add(key, post["text"])
+        grams[key] = shingles(normalize_caption(post["text"]))
+
+    verified: Dict[FrozenSet[str], float] = {}
+    for key_a, key_b in index.candidate_pairs():
+        score = jaccard(grams[key_a], grams[key_b])
+        if score >= threshold:
+            verified[frozenset((key_a, key_b))] = score
+
+    # 全连接合并：相似度高的对先合并，两簇之间存在未验证的内容对时不合并
+    cluster_of = {key: {key} for key in posts}
+    for pair, _ in sorted(verified.items(), key=lambda item: (-item[1], sorted(item[0]))):
+        key_a, key_b = sorted(pair)
+        members_a, members_b = cluster_of[key_a], cluster_of[key_b]
+        if members_a is members_b:
+            continue
+        if all(frozenset((a, b)) in verified for a in members_a for b in members_b):
+            members_a |= members_b
+            for key in members_b:
+                cluster_of[key] = members_a
+
+    clusters = []
+    seen = set()
+    for members in cluster_of.values():
+        if id(members) in seen:
+            continue
+        seen.add(id(members))
+        platforms = {posts[key]["platform"] for key in members}
+        if platforms != {"bilibili", "douyin"}:
+            continue
+        keys = sorted(members)
+        pairs = sorted(
+            [(key_a, key_b, verified[frozenset((key_a, key_b))])
+             for i, key_a in enumerate(keys) for key_b in keys[i + 1:]],
+            key=lambda pair: -pair[2],
+        )
+        clusters.append({
+            "members": [
+                {name: value for name, value in posts[key].items() if name != "key"}
+                for key in keys
+            ],
+            "pairs": [
+                {"a": key_a, "b": key_b, "similarity": round(score, 4)}
+                for key_a, key_b, score in pairs
+            ],
+            "max_similarity": round(pairs[0][2], 4),
+        })
+
+    clusters.sort(key=lambda cluster: -cluster["max_similarity"])
+    for cluster_id, cluster in enumerate(clusters, 1):
+        cluster["cluster_id"] = cluster_id
+    return clusters
+
+
+def export_clusters(clusters: List[Dict[str, Any]], output_path: str,
+                    encoding: str = "utf-8", indent: Optional[int] = 2) -> str:
+    """
+    将活动簇导出为JSON文件
+
+    Args:
+        clusters: match_cross_platform 的结果
+        output_path: 输出路径
+        encoding: 文件编码
+        indent: JSON缩进
+
+    Returns:
+        str: 输出文件路径
+    """
+    with open(output_path, "w", encoding=encoding) as f:
+        json.dump(clusters, f, ensure_ascii=False, indent=indent)
+    return output_path
@@ -0,0 +1,307 @@
+"""
+月度分析报告模块
+
+将导出或存储的数据一次性加载为pandas列式数据，用向量化分组计算：
+- 各平台每月发布数量
+- 每月互动总量（点赞、评论、转发，抖音另含收藏）及互动中位数
+- 每月互动最高的Top N内容
+
+聚合结果按输入数据哈希缓存，数据不变时直接复用；
+图表在独立进程中并行渲染为PNG，最后生成静态HTML报告
+"""
+
+import hashlib
+import html
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from src.common.records import ENGAGEMENT_FIELDS
+
+
+# 聚合逻辑变化时递增，使旧缓存失效
+AGGREGATE_VERSION = 2
+
+COUNT_COLUMNS = ["like_count", "comment_count", "repost_count", "collect_count"]
+
+# 记录字段在数据集、导出表中的列名（抖音的转发数与B站共用 repost_count 列）
+_RECORD_FIELD_COLUMNS = {"share_count": "repost_count"}
+
+# 两个平台导出文件的列名映射到统一列名
+_COLUMN_ALIASES = {
+    "内容ID": "content_id",
+    "视频URL": "video_url",
+    "文案内容": "text_content",
+    "发布时间": "publish_time",
+    "点赞数": "like_count",
+    "评论数": "comment_count",
+    "转发数": "repost_count",
+    "收藏数": "collect_count",
+    "内容类型": "content_type",
+    "平台标识": "platform",
+    "平台": "platform",
+}
+
+_PLATFORM_ALIASES = {"抖音": "douyin", "B站": "bilibili"}
+
+
+def _finalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """统一列类型并计算月份、互动量等派生列"""
+    df = df.rename(columns=_COLUMN_ALIASES)
+    df["platform"] = df["platform"].astype(str).replace(_PLATFORM_ALIASES).astype("category")
+    if "content_id" not in df.columns:
+        df["content_id"] = df["video_url"].astype(str).str.rsplit("/", n=1).str[-1]
+    if "text_content" not in df.columns:
+        df["text_content"] = ""
+    df["text_content"] = df["text_content"].fillna("").astype(str)
+    df["publish_time"] = pd.to_datetime(df["publish_time"], errors="coerce")
+    for column in COUNT_COLUMNS:
+        if column not in df.columns:
+            df[column] = 0
+        df[column] = pd.to_numeric(df[column], errors="coerce").fillna(0).astype(np.int64)
+    # 互动量与标签索引、评论采集使用同一定义（records.ENGAGEMENT_FIELDS）
+    df["engagement"] = np.int64(0)
+    for platform, fields in ENGAGEMENT_FIELDS.items():
+        rows = (df["platform"] == platform).to_numpy()
+        columns = [_RECORD_FIELD_COLUMNS.get(name, name) for name in fields]
+        df.loc[rows, "engagement"] = df.loc[rows, columns].to_numpy().sum(axis=1)
+    df = df.dropna(subset=["publish_time"])
+    df["month"] = df["publish_time"].dt.strftime("%Y-%m")
+    return df[["platform", "content_id", "text_content", "publish_time", "month", "engagement"] + COUNT_COLUMNS]
+
+
+def load_from_parquet(dataset_dir: str) -> pd.DataFrame:
+    """
+    从Parquet数据集加载数据
+
+    Args:
+        dataset_dir: parquet_sink 写入的数据集根目录
+
+    Returns:
+        DataFrame: 统一列结构的数据
+    """
+    from src.export_service.parquet_sink import read_parquet_dataset
+
+    columns = ["platform", "content_id", "text_content", "publish_time"] + COUNT_COLUMNS
+    return _finalize_frame(read_parquet_dataset(dataset_dir, columns=columns).to_pandas())
+
+
+def load_from_excel(paths: List[str]) -> pd.DataFrame:
+    """
+    从导出的xlsx文件加载数据（兼容中英文列名）
+
+    Args:
+        paths: xlsx文件路径列表
+
+    Returns:
+        DataFrame: 统一列结构的数据
+    """
+    frames = []
+    for path in paths:
+        frame = pd.read_excel(path, engine="openpyxl")
+        if "平台" not in frame.columns and "平台标识" not in frame.columns and "platform" not in frame.columns:
+            frame["platform"] = "douyin" if "视频URL" in frame.columns else "bilibili"
+        frames.append(frame.rename(columns=_COLUMN_ALIASES))
+    return _finalize_frame(pd.concat(frames, ignore_index=True))
+
+
+def data_hash(df: pd.DataFrame) -> str:
+    """计算数据内容哈希，作为聚合缓存的键"""
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha256(row_hashes.tobytes()).hexdigest()
+
+
+def compute_aggregates(df: pd.DataFrame, top_n: int = 10) -> Dict[str, pd.DataFrame]:
+    """
+    计算月度聚合指标
+
+    Args:
+        df: 统一列结构的数据
+        top_n: 每个平台每月保留的Top内容数
+
+    Returns:
+        Dict: monthly（月度统计）、top_posts（每月Top N内容）
+    """
+    grouped = df.groupby(["platform", "month"], observed=True)
+    monthly = grouped.agg(
+        posts=("content_id", "size"),
+        like_total=("like_count", "sum"),
+        comment_total=("comment_count", "sum"),
+        repost_total=("repost_count", "sum"),
+        engagement_total=("engagement", "sum"),
+        engagement_median=("engagement", "median"),
+    ).reset_index()
+
+    top_posts = (
+        df.sort_values("engagement", ascending=False, kind="stable")
+        .groupby(["platform", "month"], observed=True)
+        .head(top_n)
+        .sort_values(["platform", "month", "engagement"], ascending=[True, False, False])
+        .reset_index(drop=True)
+    )
+
+    return {"monthly": monthly, "top_posts": top_posts}
+
+
+def cached_aggregates(df: pd.DataFrame, cache_dir: str, top_n: int = 10) -> Dict[str, pd.DataFrame]:
+    """
+    获取月度聚合指标，按输入数据哈希缓存
+
+    Args:
+        df: 统一列结构的数据
+        cache_dir: 缓存目录
+        top_n: 每个平台每月保留的Top内容数
+
+    Returns:
+        Dict: 与 compute_aggregates 相同
+    """
+    key = hashlib.sha256(f"{data_hash(df)}:{top_n}:{AGGREGATE_VERSION}".encode("utf-8")).hexdigest()
+    cache_path = os.path.join(cache_dir, f"aggregates_{key[:16]}.pkl")
+
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, "rb") as f:
+                aggregates = pickle.load(f)
+            logger.info(f"📦 使用缓存的聚合结果: {cache_path}")
+            return aggregates
+        except (OSError, pickle.UnpicklingError, EOFError):
+            logger.warning(f"聚合缓存损坏，重新计算: {cache_path}")
+
+    aggregates = compute_aggregates(df, top_n=top_n)
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(cache_path, "wb") as f:
+        pickle.dump(aggregates, f)
+    return aggregates
+
+
+def _setup_matplotlib():
+    """在渲染进程中初始化matplotlib（无界面后端、中文字体）"""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.rcParams["font.sans-serif"] = ["PingFang SC", "Microsoft YaHei", "SimHei",
+                                       "Noto Sans CJK SC", "Arial Unicode MS", "DejaVu Sans"]
+    plt.rcParams["axes.unicode_minus"] = False
+    return plt
+
+
+def _render_monthly_chart(monthly: pd.DataFrame, value_column: str, title: str,
+                          output_path: str, kind: str = "bar") -> str:
+    """渲染按平台分组的月度指标图（在子进程中运行）"""
+    plt = _setup_matplotlib()
+
+    pivot = monthly.pivot(index="month", columns="platform", values=value_column).fillna(0).sort_index()
+    fig, ax = plt.subplots(figsize=(10, 5))
+    if kind == "line":
+        pivot.plot(kind="line", ax=ax, marker="o")
+    else:
+        pivot.plot(kind=kind, ax=ax)
+    ax.set_title(title)
+    ax.set_xlabel("月份")
+    ax.set_ylabel(title)
+    ax.legend(title="平台")
+    fig.tight_layout()
+    fig.savefig(output_path, dpi=120)
+    plt.close(fig)
+    return output_path
+
+
+# 报告包含的图表：(文件名, 指标列, 标题, 图表类型)
+CHARTS = [
+    ("posts.png", "posts", "每月发布数量", "bar"),
+    ("engagement_total.png", "engagement_total", "每月互动总量", "line"),
+    ("engagement_median.png", "engagement_median", "每月互动中位数", "bar"),
+]
+
+
+def render_charts(monthly: pd.DataFrame, output_dir: str, max_workers: Optional[int] = None) -> List[str]:
+    """
+    在独立进程中并行渲染所有图表
+
+    Args:
+        monthly: 月度统计
+        output_dir: 图表输出目录
+        max_workers: 最大进程数，默认每张图一个进程
+
+    Returns:
+        List[str]: 图表文件路径
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=max_workers or len(CHARTS)) as executor:
+        futures = [
+            executor.submit(_render_monthly_chart, monthly, column, title,
+                            os.path.join(output_dir, filename), kind)
+            for filename, column, title, kind in CHARTS
+        ]
+        return [future.result() for future in futures]
+
+
+def _write_html(aggregates: Dict[str, pd.DataFrame], chart_paths: List[str], output_path: str) -> str:
+    """生成静态HTML报告"""
+    top_posts = aggregates["top_posts"].copy()
+    top_posts["text_content"] = top_posts["text_content"].str.slice(0, 60)
+    top_posts["publish_time"] = top_posts["publish_time"].dt.strftime("%Y-%m-%d")
+
+    images = "\n".join(
+        f'<img src="{html.escape(os.path.basename(path))}" alt="{html.escape(title)}">'
+        for path, (_, _, title, _) in zip(chart_paths, CHARTS)
+    )
+    document = f"""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<title>支付宝社交媒体月度报告</title>
+<style>
+body {{ font-family: -apple-system, "PingFang SC", "Microsoft YaHei", sans-serif; margin: 24px; }}
+table {{ border-collapse: collapse; margin-bottom: 24px; font-size: 13px; }}
+th, td {{ border: 1px solid #ddd; padding: 4px 8px; }}
+img {{ max-width: 100%; display: block; margin-bottom: 16px; }}
+</style>
+</head>
+<body>
+<h1>支付宝社交媒体月度报告</h1>
+<p>生成时间: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p>
+<h2>图表</h2>
+{images}
+<h2>月度统计</h2>
+{aggregates["monthly"].to_html(index=False, float_format=lambda value: f"{value:.1f}")}
+<h2>每月互动Top内容</h2>
+{top_posts.to_html(index=False)}
+</body>
+</html>
+"""
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(document)
+    return output_path
+
+
+def build_report(df: pd.DataFrame, output_dir: str, cache_dir: Optional[str] = None,
+                 top_n: int = 10) -> str:
+    """
+    生成月度分析报告
+
+    Args:
+        df: load_from_parquet / load_from_excel 加载的数据
+        output_dir: 报告输出目录
+        cache_dir: 聚合缓存目录，默认为 output_dir/.cache
+        top_n: 每个平台每月保留的Top内容数
+
+    Returns:
+        str: HTML报告路径
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    aggregates = cached_aggregates(df, cache_dir or os.path.join(output_dir, ".cache"), top_n=top_n)
+    chart_paths = render_charts(aggregates["monthly"], output_dir)
+    report_path = _write_html(aggregates, chart_paths, os.path.join(output_dir, "index.html"))
+
+    logger.info(f"✅ 月度报告已生成: {report_path}")
+    logger.info(f"📊 共 {len(df)} 条内容，{len(aggregates['monthly'])} 个平台月份")
+    return report_path
@@ -1,22 +1,56 @@
 """
 数据导出模块
-用于将提取的B站数据导出为Excel和Word格式
+用于将提取的B站数据导出为Excel、Word、CSV、JSONL格式
 """
 
-import pandas as pd
-from docx import Document
-from docx.shared import Pt, RGBColor
-from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
-from datetime import datetime
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from loguru import logger
 
+from config.settings import DATA_DIR
+from src.common.records import BilibiliDynamic
+from src.export_service.export_engine import ExportEngine, by_publish_time
+from src.export_service.parquet_sink import ParquetSink, bilibili_records
+from src.export_service.sinks import DocxSink, ExportLayout, build_sinks
+
+
+def _render_word(sink: DocxSink, row: BilibiliDynamic):
+    """Word中单条B站动态的排版"""
+    if row.publish_time_raw:
+        sink.add_field("发布时间", row.publish_time_raw, bold=True)
+    if row.text_content:
+        sink.add_field("文案内容", row.text_content)
+    sink.add_field("统计数据", f"点赞：{row.like_count} | 评论：{row.comment_count} | 转发：{row.repost_count}",
+                   size=10, muted=True)
+    # 如果是视频，添加视频描述
+    if row.content_type == "视频" and row.video_description:
+        sink.add_field("视频描述", row.video_description, italic=True)
+
+
+# B站导出排版：Word按月份分组（记录已按发布时间倒序，同月记录连续）
+BILIBILI_LAYOUT = ExportLayout(
+    basename="bilibili",
+    columns=[
+        ("content_id", lambda row: row.content_id),
+        ("content_type", lambda row: row.export_content_type),
+        ("text_content", lambda row: row.text_content),
+        ("publish_time", lambda row: row.publish_time),
+        ("like_count", lambda row: row.like_count),
+        ("comment_count", lambda row: row.comment_count),
+        ("repost_count", lambda row: row.repost_count),
+        ("image_urls", lambda row: row.image_urls),
+        ("platform", lambda row: row.platform),
+    ],
+    word_title="支付宝B站动态内容汇总（2024年5月1日 - 2024年11月1日）",
+    render_word=_render_word,
+    word_group_by=lambda row: row.month_key,
+)
+
 
 class DataExporter:
     """数据导出器"""
     
-    def __init__(self, output_dir: str = "/Users/Zhuanz/projects/PythonWS/Alipay/data"):
+    def __init__(self, output_dir: str = str(DATA_DIR)):
         """
         初始化数据导出器
         
@@ -29,235 +63,74 @@ class DataExporter:
         # 确保输出目录存在
         os.makedirs(self.bilibili_data_dir, exist_ok=True)
         
-    def export_to_excel(self, contents_data: List[Dict[str, Any]], filename: str = "bilibili_data.xlsx") -> str:
+    def normalize_contents(self, contents_data: List[Any]) -> List[BilibiliDynamic]:
         """
-        将数据导出为Excel格式
+        将提取结果整理为导出行，供各导出格式共享
         
         Args:
-            contents_data: 提取的内容数据列表
-            filename: 输出文件名
+            contents_data: 提取的内容记录列表（也接受旧的中文键字典）
             
         Returns:
-            str: 输出文件的完整路径
+            List[BilibiliDynamic]: 按发布时间倒序排列的记录
         """
-        try:
-            # 准备Excel数据
-            excel_data = []
-            
-            for content in contents_data:
-                # 提取图片链接（如果有的话）
-                image_urls = content.get("图片链接", "")
-                
-                # 确定内容类型
-                content_type = content.get("内容类型", "动态")
-                if content_type == "视频":
-                    content_type = "视频"
-                else:
-                    content_type = "图文"
-                
-                # 解析发布时间
-                publish_time = content.get("发布时间_解析", "")
-                if publish_time:
-                    try:
-                        # 尝试转换为datetime格式
-                        publish_dt = datetime.strptime(publish_time, "%Y-%m-%d")
-                        publish_time = publish_dt
-                    except ValueError:
-                        publish_time = ""
-                
-                # 构建Excel行数据
-                excel_row = {
-                    "content_id": content.get("内容ID", ""),
-                    "content_type": content_type,
-                    "text_content": content.get("文案内容", ""),
-                    "publish_time": publish_time,
-                    "like_count": self._extract_number(content.get("点赞数", "0")),
-                    "comment_count": self._extract_number(content.get("评论数", "0")),
-                    "repost_count": self._extract_number(content.get("转发数", "0")),
-                    "image_urls": image_urls,
-                    "platform": "bilibili"
-                }
-                
-                excel_data.append(excel_row)
-            
-            # 创建DataFrame
-            df = pd.DataFrame(excel_data)
-            
-            # 按发布时间倒序排列
-            if not df.empty and 'publish_time' in df.columns:
-                df = df.sort_values('publish_time', ascending=False)
-            
-            # 保存到Excel文件
-            output_path = os.path.join(self.bilibili_data_dir, filename)
-            df.to_excel(output_path, index=False, engine='openpyxl')
-            
-            logger.info(f"✅ Excel文件已导出: {output_path}")
-            logger.info(f"📊 共导出 {len(excel_data)} 条数据")
-            
-            return output_path
-            
-        except Exception as e:
-            logger.error(f"导出Excel文件时发生错误: {str(e)}")
-            raise
+        rows = [content if isinstance(content, BilibiliDynamic) else BilibiliDynamic.from_dict(content)
+                for content in contents_data]
+        
+        # 按发布时间倒序排列，没有发布时间的排在最后
+        rows.sort(key=by_publish_time, reverse=True)
+        return rows
     
-    def export_to_word(self, contents_data: List[Dict[str, Any]], filename: str = "bilibili_content.docx") -> str:
+    def export_to_excel(self, contents_data: List[Any], filename: str = "bilibili_data.xlsx") -> str:
         """
-        将数据导出为Word格式，按月份分组
+        将数据导出为Excel格式
         
         Args:
-            contents_data: 提取的内容数据列表
+            contents_data: 提取的内容记录列表
             filename: 输出文件名
             
         Returns:
             str: 输出文件的完整路径
         """
-        try:
-            # 创建Word文档
-            doc = Document()
-            
-            # 设置标题
-            title = doc.add_heading('支付宝B站动态内容汇总（2024年5月1日 - 2024年11月1日）', 0)
-            title.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-            
-            # 按月份分组数据
-            monthly_data = self._group_by_month(contents_data)
-            
-            # 按月份倒序排列（11月到5月）
-            months = ["2024年11月", "2024年10月", "2024年9月", "2024年8月", "2024年7月", "2024年6月", "2024年5月"]
-            
-            for month in months:
-                if month in monthly_data:
-                    # 添加月份标题
-                    month_heading = doc.add_heading(f'=== {month} ===', level=1)
-                    month_heading.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-                    
-                    # 按时间倒序排列该月的内容
-                    month_contents = sorted(monthly_data[month], 
-                                          key=lambda x: x.get("发布时间_解析", ""), 
-                                          reverse=True)
-                    
-                    # 添加该月的每条内容
-                    for content in month_contents:
-                        # 发布时间
-                        publish_time = content.get("发布时间_原始", "")
-                        if publish_time:
-                            time_para = doc.add_paragraph()
-                            time_run = time_para.add_run(f"【发布时间】{publish_time}")
-                            time_run.font.size = Pt(11)
-                            time_run.bold = True
-                        
-                        # 文案内容
-                        text_content = content.get("文案内容", "")
-                        if text_content:
-                            text_para = doc.add_paragraph()
-                            text_run = text_para.add_run(f"【文案内容】{text_content}")
-                            text_run.font.size = Pt(11)
-                        
-                        # 添加统计数据
-                        like_count = self._extract_number(content.get("点赞数", "0"))
-                        comment_count = self._extract_number(content.get("评论数", "0"))
-                        repost_count = self._extract_number(content.get("转发数", "0"))
-                        
-                        # 统计信息
-                        stats_para = doc.add_paragraph()
-                        stats_run = stats_para.add_run(f"【统计数据】点赞：{like_count} | 评论：{comment_count} | 转发：{repost_count}")
-                        stats_run.font.size = Pt(10)
-                        stats_run.font.color.rgb = RGBColor(128, 128, 128)  # 灰色字体
-                        
-                        # 如果是视频，添加视频描述
-                        if content.get("内容类型") == "视频":
-                            video_desc = content.get("视频描述", "")
-                            if video_desc:
-                                video_para = doc.add_paragraph()
-                                video_run = video_para.add_run(f"【视频描述】{video_desc}")
-                                video_run.font.size = Pt(11)
-                                video_run.italic = True
-                        
-                        # 添加空行分隔
-                        doc.add_paragraph()
-            
-            # 保存Word文档
-            output_path = os.path.join(self.bilibili_data_dir, filename)
-            doc.save(output_path)
-            
-            logger.info(f"✅ Word文档已导出: {output_path}")
-            logger.info(f"📄 共导出 {len(contents_data)} 条内容")
-            
-            return output_path
-            
-        except Exception as e:
-            logger.error(f"导出Word文档时发生错误: {str(e)}")
-            raise
+        return self._export_one("excel", contents_data, filename)
     
-    def _group_by_month(self, contents_data: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    def export_to_word(self, contents_data: List[Any], filename: str = "bilibili_content.docx") -> str:
         """
-        按月份分组数据
+        将数据导出为Word格式，按月份分组
         
         Args:
-            contents_data: 内容数据列表
+            contents_data: 提取的内容记录列表
+            filename: 输出文件名
             
         Returns:
-            Dict: 按月份分组的数据字典
+            str: 输出文件的完整路径
         """
-        monthly_data = {}
-        
-        for content in contents_data:
-            publish_date = content.get("发布时间_解析", "")
-            if publish_date:
-                try:
-                    # 解析日期
-                    date_obj = datetime.strptime(publish_date, "%Y-%m-%d")
-                    month_key = f"{date_obj.year}年{date_obj.month}月"
-                    
-                    if month_key not in monthly_data:
-                        monthly_data[month_key] = []
-                    
-                    monthly_data[month_key].append(content)
-                    
-                except ValueError:
-                    logger.warning(f"无法解析日期: {publish_date}")
-                    continue
-        
-        return monthly_data
+        return self._export_one("word", contents_data, filename)
     
-    def _extract_number(self, text: str) -> int:
-        """
-        从文本中提取数字
-        
-        Args:
-            text: 包含数字的文本
-            
-        Returns:
-            int: 提取的数字
-        """
-        try:
-            # 移除非数字字符，保留数字
-            import re
-            numbers = re.findall(r'\d+', str(text))
-            return int(numbers[0]) if numbers else 0
-        except Exception:
-            return 0
+    def _export_one(self, format_name: str, contents_data: List[Any], filename: str) -> str:
+        """只导出一种格式"""
+        sinks = build_sinks(BILIBILI_LAYOUT, self.bilibili_data_dir, [format_name], {format_name: filename})
+        return ExportEngine(sinks, sort_key=None).run(self.normalize_contents(contents_data))[format_name]
     
-    def export_all_formats(self, contents_data: List[Dict[str, Any]]) -> Dict[str, str]:
+    def export_all_formats(self, contents_data: List[Any], with_parquet: bool = False,
+                           formats: Optional[List[str]] = None) -> Dict[str, str]:
         """
-        导出所有格式的文件
+        导出所有格式的文件：记录只排序一次，一次遍历写入所有导出目标
         
         Args:
-            contents_data: 内容数据列表
+            contents_data: 内容记录列表
+            with_parquet: 是否同时导出按平台、月份分区的Parquet数据集
+            formats: 导出格式（excel / word / csv / jsonl），默认全部
             
         Returns:
             Dict: 包含各文件路径的字典
         """
-        results = {}
-        
         try:
-            # 导出Excel
-            excel_path = self.export_to_excel(contents_data)
-            results["excel"] = excel_path
+            sinks = build_sinks(BILIBILI_LAYOUT, self.bilibili_data_dir, formats)
+            if with_parquet:
+                sinks.append(ParquetSink(os.path.join(self.output_dir, "parquet"), bilibili_records))
             
-            # 导出Word
-            word_path = self.export_to_word(contents_data)
-            results["word"] = word_path
+            # normalize_contents 已排序，引擎保持顺序
+            results = ExportEngine(sinks, sort_key=None).run(self.normalize_contents(contents_data))
             
             logger.info("✅ 所有格式文件导出完成")
             
@@ -265,4 +138,4 @@ class DataExporter:
             logger.error(f"导出文件时发生错误: {str(e)}")
             raise
         
-        return results
\ No newline at end of file
+        return results
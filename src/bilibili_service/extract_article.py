@@ -11,41 +11,130 @@ import sys
 import os
 from typing import Dict, List, Optional, Any
 from selenium import webdriver
-from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+from config.settings import BROWSER_CONFIG
 from src.bilibili_service.login import get_chrome_options
+from src.common.command_trace import trace_card, trace_driver
+from src.common.selector_registry import get_selector_registry
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# 日志由入口（命令行、常驻服务）通过 src.common.log_setup.setup_logging 统一初始化
 logger = logging.getLogger(__name__)
 
 
+# 卡片类型（由发布时间文本判断），选择器命中统计按类型区分
+CARD_TYPES = ["视频", "动态"]
+
+# 一次脚本调用提取当前页面所有卡片的数据，逻辑与 _extract_single_dynamic 一致；
+# 每个字段按注册表学到的顺序尝试选择器，并返回尝试次数和命中的选择器供注册表统计
+BATCH_EXTRACT_SCRIPT = """
+const selectors = arguments[0];
+const cardSelector = arguments[1];
+const text = el => (el.innerText || '').trim();
+return Array.from(document.querySelectorAll(cardSelector)).map(card => {
+    const lookups = {};
+    // valueOf 返回 null 表示该元素不可用，继续尝试下一个选择器
+    const find = (type, field, valueOf) => {
+        const candidates = selectors[type][field] || [];
+        for (let i = 0; i < candidates.length; i++) {
+            const el = card.querySelector(candidates[i]);
+            const value = el ? valueOf(el, candidates[i]) : null;
+            if (value !== null && value !== undefined) {
+                lookups[field] = [type, i + 1, candidates[i]];
+                return value;
+            }
+        }
+        lookups[field] = [type, candidates.length, null];
+        return null;
+    };
+    const timeText = find('*', 'publish_time', text);
+    const type = timeText && timeText.includes('投稿了视频') ? '视频' : '动态';
+    const countOf = (field, label) => {
+        const value = find(type, field, text);
+        return value && value !== label ? value : '0';
+    };
+    let imgSrc = find(type, 'images', (el, selector) => (selector.startsWith('source')
+        ? ((el.getAttribute('srcset') || '').split(/\\s+/)[0] || '')
+        : (el.src || el.getAttribute('src') || '')) || null) || '';
+    if (imgSrc.startsWith('//')) imgSrc = 'https:' + imgSrc;
+    return {
+        height: Math.round(card.getBoundingClientRect().height),
+        lookups,
+        data: {
+            '内容ID': find(type, 'content_id', el => el.getAttribute('dyn-id')),
+            '作者': find(type, 'author', text) ?? '未知',
+            '内容类型': type,
+            '发布时间': timeText ?? '',
+            '文案内容': find(type, 'content_text', text) ?? '',
+            '视频描述': type === '视频' ? (find(type, 'video_desc', text) ?? '') : '',
+            '点赞数': countOf('like_count', '点赞'),
+            '评论数': countOf('comment_count', '评论'),
+            '转发数': countOf('repost_count', '转发'),
+            '图片链接': imgSrc,
+            '视频链接': '',
+            '平台标识': 'bilibili'
+        }
+    };
+});
+"""
+
+
 class BilibiliArticleExtractor:
     """B站动态文章提取器"""
     
-    def __init__(self, headless: bool = False):
+    def __init__(self, headless: bool = False, backend: str = "selenium", record_dir: Optional[str] = None,
+                 replay_dir: Optional[str] = None):
         """
         初始化提取器
         
         Args:
             headless: 是否使用无头模式
+            backend: 浏览器后端，selenium（经chromedriver）、cdp（直连DevTools协议）或 replay（回放录制的会话）
+            record_dir: 录制目录，设置后把本次会话录制到该目录
+            replay_dir: replay 后端使用的录制目录，默认 BROWSER_CONFIG["replay_dir"]
         """
+        if backend not in ("selenium", "cdp", "replay"):
+            raise ValueError(f"未知的浏览器后端: {backend}")
+        self.backend = backend
+        self.record_dir = record_dir
+        self.replay_dir = replay_dir or BROWSER_CONFIG.get("replay_dir")
         self.chrome_options = get_chrome_options()
         if headless:
             self.chrome_options.add_argument('--headless')
         self.driver = None
+        self.session_injected = False
+        self.selectors = get_selector_registry("bilibili")
+        
+    @property
+    def card_selector(self) -> str:
+        """动态卡片选择器（注册表中命中率最高的）"""
+        return self.selectors.candidates("dynamic_card")[0]
         
     def __enter__(self):
         """上下文管理器入口"""
+        if self.backend == "replay":
+            from src.common.replay import ReplayDriver
+            
+            self.driver = trace_driver(ReplayDriver(self.replay_dir, latency=BROWSER_CONFIG.get("replay_latency", 0.0)))
+            # 回放的页面已处于录制时的登录状态，不读写会话库
+            self.session_injected = True
+            logger.info(f"✅ 回放录制的会话: {self.replay_dir}")
+            return self
+        
+        if self.backend == "cdp":
+            from src.common.cdp_driver import CdpDriver
+            
+            self.driver = CdpDriver(options=self.chrome_options)
+            logger.info("✅ 使用DevTools协议后端成功启动Chrome")
+            self._start_recording()
+            self._inject_session()
+            return self
+        
         try:
             # 尝试使用webdriver-manager自动管理ChromeDriver
             from webdriver_manager.chrome import ChromeDriverManager
@@ -68,16 +157,51 @@ class BilibiliArticleExtractor:
                 except Exception as e3:
                     logger.error(f"❌ 所有Chrome启动方式都失败: {e3}")
                     raise e3
+        self._start_recording()
+        self._inject_session()
         return self
         
     def __exit__(self, exc_type, exc_val, exc_tb):
         """上下文管理器出口"""
+        try:
+            self.selectors.report()
+            self.selectors.save()
+        except Exception as e:
+            logger.warning(f"保存选择器统计失败: {str(e)}")
         if self.driver:
             self.driver.quit()
             
+    def _start_recording(self):
+        """设置了录制目录时用录制包装器替换浏览器；启用命令追踪时再包一层追踪"""
+        if self.record_dir:
+            from src.common.replay import RecordingDriver
+            
+            self.driver = RecordingDriver(self.driver, self.record_dir)
+            logger.info(f"🎥 录制会话到: {self.record_dir}")
+        self.driver = trace_driver(self.driver)
+            
+    def _inject_session(self):
+        """把会话库中有效的B站登录态注入新浏览器"""
+        try:
+            from src.common.session_vault import get_session_vault
+            
+            self.session_injected = get_session_vault().inject_into_driver(self.driver, "bilibili")
+        except Exception as e:
+            logger.warning(f"注入会话库登录态失败: {str(e)}")
+            self.session_injected = False
+            
+    def _save_session(self):
+        """登录成功后把浏览器中的登录态保存到会话库"""
+        try:
+            from src.common.session_vault import get_session_vault
+            
+            get_session_vault().export_from_driver(self.driver, "bilibili")
+        except Exception as e:
+            logger.warning(f"保存登录态到会话库失败: {str(e)}")
+            
     def _wait_for_login(self, timeout: int = 60) -> bool:
         """
-        等待用户登录完成
+        等待用户登录完成（已注入会话库登录态时不再轮询）
         
         Args:
             timeout: 超时时间（秒）
@@ -86,75 +210,69 @@ class BilibiliArticleExtractor:
             bool: 是否登录成功
         """
         logger.info("检查登录状态...")
+        if self.session_injected and "passport.bilibili.com" not in self.driver.current_url:
+            logger.info("✅ 会话库登录态有效，跳过登录检测")
+            return True
+        
         start_time = time.time()
         
         while time.time() - start_time < timeout:
             current_url = self.driver.current_url
             if "passport.bilibili.com" not in current_url and "login" not in current_url:
                 logger.info("✅ 检测到登录成功！")
+                self._save_session()
+                self.session_injected = True
                 return True
             time.sleep(2)
             
         logger.warning("⏰ 登录超时")
         return False
         
-    def _extract_interaction_data(self, card_element) -> Dict[str, str]:
+    def _find_text(self, card_element, field: str, card_type: str) -> Optional[str]:
         """
-        提取互动数据（点赞、评论、转发）
+        按注册表顺序查找字段元素并返回其文本
         
         Args:
             card_element: 动态卡片元素
+            field: 字段名（BILIBILI_SELECTORS 的键）
+            card_type: 卡片类型
             
         Returns:
-            Dict: 包含点赞数、评论数、转发数的字典
+            Optional[str]: 去除首尾空白的文本，未找到元素时为None
         """
-        interaction_data = {
-            "点赞数": "0",
-            "评论数": "0", 
-            "转发数": "0"
-        }
+        element, _ = self.selectors.find(card_element, field, card_type)
+        return element.text.strip() if element is not None else None
         
-        # 提取点赞数
-        try:
-            like_element = card_element.find_element(By.CSS_SELECTOR, ".bili-dyn-action.like")
-            like_text = like_element.text.strip()
-            if like_text and like_text != "点赞":
-                interaction_data["点赞数"] = like_text
-            else:
-                interaction_data["点赞数"] = "0"
-        except NoSuchElementException:
-            logger.debug("未找到点赞元素")
-            
-        # 提取评论数
-        try:
-            comment_element = card_element.find_element(By.CSS_SELECTOR, ".bili-dyn-action.comment")
-            comment_text = comment_element.text.strip()
-            if comment_text and comment_text != "评论":
-                interaction_data["评论数"] = comment_text
-            else:
-                interaction_data["评论数"] = "0"
-        except NoSuchElementException:
-            logger.debug("未找到评论元素")
+    def _extract_interaction_data(self, card_element, card_type: str = "动态") -> Dict[str, str]:
+        """
+        提取互动数据（点赞、评论、转发）
+        
+        Args:
+            card_element: 动态卡片元素
+            card_type: 卡片类型
             
-        # 提取转发数
-        try:
-            repost_element = card_element.find_element(By.CSS_SELECTOR, ".bili-dyn-action.forward")
-            repost_text = repost_element.text.strip()
-            if repost_text and repost_text != "转发":
-                interaction_data["转发数"] = repost_text
-            else:
-                interaction_data["转发数"] = "0"
-        except NoSuchElementException:
-            logger.debug("未找到转发元素")
+        Returns:
+            Dict: 包含点赞数、评论数、转发数的字典
+        """
+        interaction_data = {}
+        for key, field, label in (("点赞数", "like_count", "点赞"),
+                                  ("评论数", "comment_count", "评论"),
+                                  ("转发数", "repost_count", "转发")):
+            text = self._find_text(card_element, field, card_type)
+            if text is None:
+                logger.debug(f"未找到{label}元素")
+            # 没有数字时按钮上显示的是文字标签
+            interaction_data[key] = text if text and text != label else "0"
             
         return interaction_data
         
-    def _extract_media_content(self, card_element) -> Dict[str, str]:
+    def _extract_media_content(self, card_element, card_type: str = "动态") -> Dict[str, str]:
         """
         提取媒体内容（图片、视频）
         
         Args:
             card_element: 动态卡片元素
+            card_type: 卡片类型
             
         Returns:
             Dict: 包含图片链接和视频链接的字典
@@ -164,68 +282,40 @@ class BilibiliArticleExtractor:
             "视频链接": ""
         }
         
-        # 提取图片链接
-        try:
-            # 尝试多种图片选择器（B站图片结构复杂，需要多种选择器）
-            image_selectors = [
-                "picture.b-img__inner img",                    # B站新版图片结构 - 用户发现的
-                ".b-img__inner img",                           # B站新版图片结构（不限定picture标签）
-                "picture img[src*='hdslb.com']",              # picture标签中的B站CDN图片
-                ".bili-album__preview__picture__img img",      # 相册预览图
-                ".bili-dyn-card-img img",                      # 动态卡片图片
-                ".bili-rich-text__content img",                # 富文本内容中的图片
-                ".img-box img",                               # 图片盒子
-                ".album__image img",                          # 相册图片
-                ".bili-dyn-card__image img",                  # 动态卡片图片
-                ".dyn-card-opus img",                         # opus类型动态的图片
-                ".bili-dyn-content img",                      # 动态内容中的图片
-                "img[src*='hdslb.com']",                       # B站CDN图片
-                "img[src*='i0.hdslb.com']",                   # B站图片服务器
-                "img[src*='i1.hdslb.com']",                   # B站图片服务器
-                "img[src*='i2.hdslb.com']",                   # B站图片服务器
-                "img[src*='bfs/new_dyn']",                    # B站新版动态图片路径
-                "img[srcset*='hdslb.com']",                   # 带srcset属性的B站图片
-                "source[srcset*='hdslb.com']"                 # source标签中的B站图片
-            ]
-            
-            img_element = None
-            img_src = ""
-            
-            # 尝试每个选择器
-            for selector in image_selectors:
-                try:
-                    img_element = card_element.find_element(By.CSS_SELECTOR, selector)
-                    # 如果是source标签，尝试获取srcset属性
-                    if selector.startswith("source"):
-                        img_src = img_element.get_attribute("srcset")
-                        if img_src:
-                            # srcset可能包含多个URL，取第一个
-                            img_src = img_src.split()[0]
-                    else:
-                        img_src = img_element.get_attribute("src")
-                    
-                    if img_src:
-                        break
-                except NoSuchElementException:
-                    continue
-            
-            # 处理相对路径
-            if img_src and img_src.startswith("//"):
-                img_src = "https:" + img_src
-            
-            media_data["图片链接"] = img_src or ""
-        except NoSuchElementException:
+        def image_src(img_element, selector: str) -> str:
+            # source标签使用srcset属性，可能包含多个URL，取第一个
+            if selector.startswith("source"):
+                srcset = img_element.get_attribute("srcset")
+                return srcset.split()[0] if srcset else ""
+            return img_element.get_attribute("src") or ""
+        
+        # 按注册表学到的顺序尝试图片选择器，多数卡片第一次就能命中
+        img_src, _ = self.selectors.find(card_element, "images", card_type, accept=image_src)
+        if img_src is None:
             logger.debug("未找到图片元素")
-                
-            # 提取视频链接
-            try:
-                video_element = card_element.find_element(By.CSS_SELECTOR, "video source, .video-box video, .media video")
-                media_data["视频链接"] = video_element.get_attribute("src") or ""
-            except NoSuchElementException:
-                logger.debug("未找到视频元素")
-                
+        
+        # 处理相对路径
+        if img_src and img_src.startswith("//"):
+            img_src = "https:" + img_src
+        
+        media_data["图片链接"] = img_src or ""
         return media_data
         
+    def find_content_id(self, card_element, card_type: str = "动态") -> Optional[str]:
+        """
+        查找动态卡片的内容ID
+        
+        Args:
+            card_element: 动态卡片元素
+            card_type: 卡片类型
+            
+        Returns:
+            Optional[str]: 内容ID，未找到时为None
+        """
+        content_id, _ = self.selectors.find(card_element, "content_id", card_type,
+                                            accept=lambda element, _: element.get_attribute("dyn-id"))
+        return content_id
+        
     def _extract_single_dynamic(self, card_element) -> Dict[str, Any]:
         """
         提取单个动态的完整数据
@@ -238,80 +328,68 @@ class BilibiliArticleExtractor:
         """
         dynamic_data = {}
         
-        try:
-            # 内容ID
+        # 本卡片的全部浏览器命令计为一张卡片（--trace-commands）
+        with trace_card():
             try:
-                content_id_element = card_element.find_element(By.CSS_SELECTOR, ".dyn-card-opus[dyn-id]")
-                dynamic_data["内容ID"] = content_id_element.get_attribute("dyn-id")
-            except NoSuchElementException:
-                try:
-                    content_id_element = card_element.find_element(By.CSS_SELECTOR, "[dyn-id]")
-                    dynamic_data["内容ID"] = content_id_element.get_attribute("dyn-id")
-                except NoSuchElementException:
-                    dynamic_data["内容ID"] = "未知"
+                # 发布时间和内容类型 - 通过时间元素判断是否为视频，后续字段按卡片类型选择选择器顺序
+                time_text = self.getTime(card_element)
+                card_type = "视频" if "投稿了视频" in time_text else "动态"
             
-            # 作者
-            try:
-                author_element = card_element.find_element(By.CSS_SELECTOR, ".bili-dyn-title__text")
-                dynamic_data["作者"] = author_element.text.strip()
-            except NoSuchElementException:
-                dynamic_data["作者"] = "未知"
+                # 内容ID
+                dynamic_data["内容ID"] = self.find_content_id(card_element, card_type) or "未知"
             
-            # 内容类型 - 通过时间元素判断是否为视频
-            try:
-                time_element = card_element.find_element(By.CSS_SELECTOR, ".bili-dyn-time")
-                time_text = time_element.text.strip()
-                if "投稿了视频" in time_text:
-                    dynamic_data["内容类型"] = "视频"
-                else:
-                    dynamic_data["内容类型"] = "动态"
-            except NoSuchElementException:
-                dynamic_data["内容类型"] = "动态"
+                # 作者
+                author = self._find_text(card_element, "author", card_type)
+                dynamic_data["作者"] = author if author is not None else "未知"
             
-            # 发布时间
-            try:
-                time_element = card_element.find_element(By.CSS_SELECTOR, ".bili-dyn-time")
-                dynamic_data["发布时间"] = time_element.text.strip()
-            except NoSuchElementException:
-                dynamic_data["发布时间"] = ""
+                dynamic_data["内容类型"] = card_type
+                dynamic_data["发布时间"] = time_text
             
-            # 文案内容 - 确保在bili-dyn-content元素内查找
-            try:
-                # 首先找到bili-dyn-content元素
-                dyn_content_element = card_element.find_element(By.CSS_SELECTOR, ".bili-dyn-content")
-                # 在bili-dyn-content元素内查找文案内容
-                content_element = dyn_content_element.find_element(By.CSS_SELECTOR, ".bili-rich-text__content")
-                dynamic_data["文案内容"] = content_element.text.strip()
-            except NoSuchElementException:
-                dynamic_data["文案内容"] = ""
+                # 文案内容 - 在bili-dyn-content元素内查找
+                dynamic_data["文案内容"] = self._find_text(card_element, "content_text", card_type) or ""
             
-            # 视频描述 - 如果是视频类型，提取bili-dyn-card-video__desc
-            if dynamic_data.get("内容类型") == "视频":
-                try:
-                    video_desc_element = card_element.find_element(By.CSS_SELECTOR, ".bili-dyn-card-video__desc")
-                    dynamic_data["视频描述"] = video_desc_element.text.strip()
-                except NoSuchElementException:
+                # 视频描述 - 如果是视频类型，提取bili-dyn-card-video__desc
+                if card_type == "视频":
+                    dynamic_data["视频描述"] = self._find_text(card_element, "video_desc", card_type) or ""
+                else:
                     dynamic_data["视频描述"] = ""
-            else:
-                dynamic_data["视频描述"] = ""
             
-            # 互动数据
-            interaction_data = self._extract_interaction_data(card_element)
-            dynamic_data.update(interaction_data)
+                # 互动数据
+                interaction_data = self._extract_interaction_data(card_element, card_type)
+                dynamic_data.update(interaction_data)
             
-            # 媒体内容
-            media_data = self._extract_media_content(card_element)
-            dynamic_data.update(media_data)
+                # 媒体内容
+                media_data = self._extract_media_content(card_element, card_type)
+                dynamic_data.update(media_data)
             
-            # 平台标识
-            dynamic_data["平台标识"] = "bilibili"
+                # 平台标识
+                dynamic_data["平台标识"] = "bilibili"
             
-        except Exception as e:
-            logger.error(f"提取动态数据时发生错误: {str(e)}")
-            dynamic_data = {"错误": str(e)}
+            except Exception as e:
+                logger.error(f"提取动态数据时发生错误: {str(e)}")
+                dynamic_data = {"错误": str(e)}
             
         return dynamic_data
         
+    def extract_visible_cards(self, card_selector: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        一次脚本调用提取当前页面所有动态卡片，代替逐个元素的 find_element/text 往返
+        
+        Args:
+            card_selector: 动态卡片选择器，默认使用注册表中的卡片选择器
+            
+        Returns:
+            List[Dict]: 按页面顺序排列的卡片，每项包含 height（卡片高度）和 data（动态数据，
+                        字段与 _extract_single_dynamic 一致，未找到ID时内容ID为None）
+        """
+        ordered = self.selectors.candidates_by_type(CARD_TYPES)
+        cards = self.driver.execute_script(BATCH_EXTRACT_SCRIPT, ordered, card_selector or self.card_selector) or []
+        for card in cards:
+            # 页面内的查找结果计入注册表统计
+            for field, (card_type, tried, matched) in card.pop("lookups", {}).items():
+                self.selectors.record(field, card_type, ordered[card_type][field][:tried], matched)
+        return cards
+        
     def getTime(self, card_element) -> str:
         """
         获取动态的发布时间
@@ -322,9 +400,5 @@ class BilibiliArticleExtractor:
         Returns:
             str: 发布时间文本
         """
-        try:
-            time_element = card_element.find_element(By.CSS_SELECTOR, ".bili-dyn-time")
-            return time_element.text.strip()
-        except NoSuchElementException:
-            return ""
+        return self._find_text(card_element, "publish_time", "*") or ""
     
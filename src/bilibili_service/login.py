@@ -60,9 +60,18 @@ def get_chrome_options(headless=False, profile_name="Default"):
     
     return options
 
+def _save_session(driver):
+    """把浏览器中的B站登录态保存到会话库"""
+    try:
+        from src.common.session_vault import get_session_vault
+        
+        get_session_vault().export_from_driver(driver, "bilibili")
+    except Exception as e:
+        print(f"⚠️ 保存登录态到会话库失败: {e}")
+
 def bilibili_login(username, password):
     """
-    B站登录功能
+    B站登录功能，会话库中已有有效登录态时直接返回，不再走登录表单
     
     Args:
         username: 用户名/手机号
@@ -71,6 +80,12 @@ def bilibili_login(username, password):
     Returns:
         bool: 登录是否成功
     """
+    from src.common.session_vault import get_session_vault
+    
+    if get_session_vault().validate("bilibili"):
+        print("✅ 会话库中的登录态有效，跳过登录流程")
+        return True
+    
     driver = None
     try:
         # 获取Chrome配置
@@ -139,6 +154,7 @@ def bilibili_login(username, password):
             # 如果跳转到首页或者包含用户信息，说明登录成功
             if "bilibili.com" in current_url and "passport.bilibili.com" not in current_url:
                 print("✅ 登录成功！")
+                _save_session(driver)
                 return True
             elif "passport.bilibili.com" in current_url:
                 # 检查是否有验证码或其他验证
@@ -154,6 +170,7 @@ def bilibili_login(username, password):
                         current_url = driver.current_url
                         if "bilibili.com" in current_url and "passport.bilibili.com" not in current_url:
                             print("✅ 登录成功！")
+                            _save_session(driver)
                             return True
                 except:
                     pass
@@ -162,6 +179,7 @@ def bilibili_login(username, password):
                 return False
             else:
                 print("✅ 登录成功！")
+                _save_session(driver)
                 return True
                 
         except Exception as e:
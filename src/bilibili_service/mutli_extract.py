@@ -9,52 +9,77 @@ import logging
 import time
 import sys
 import os
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+from config.settings import BILIBILI_RESULT_FILE
 from src.bilibili_service.extract_article import BilibiliArticleExtractor
 from datetime import datetime, timedelta
 import re
+from src.analysis_service.caption_search import index_stored_posts
 from src.bilibili_service.data_exporter import DataExporter
+from src.common.change_log import publish_changes
+from src.common.command_trace import trace_card
+from src.common.infinite_scroll import feed_scroller
+from src.common.log_setup import card_logger
+from src.common.profiling import profile_stage
+from src.common.records import BilibiliDynamic
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# 日志由入口（命令行、常驻服务）通过 src.common.log_setup.setup_logging 统一初始化
 logger = logging.getLogger(__name__)
+# 逐卡片的高频日志，按 LOG_CONFIG["sampling"] 采样
+card_log = card_logger(__name__)
 
 
 class BilibiliMultiExtractor:
     """B站批量内容提取器"""
     
-    def __init__(self, headless: bool = False):
+    def __init__(self, headless: bool = False, backend: str = "selenium", record_dir: Optional[str] = None,
+                 replay_dir: Optional[str] = None, screenshots: bool = False, screenshot_dir: Optional[str] = None):
         """
         初始化批量提取器
         
         Args:
             headless: 是否使用无头模式
+            backend: 浏览器后端，selenium、cdp 或 replay
+            record_dir: 录制目录，设置后把本次会话录制到该目录
+            replay_dir: replay 后端使用的录制目录
+            screenshots: 是否为按时间范围提取到的每张卡片存档截图
+            screenshot_dir: 截图目录，默认 SCREENSHOT_CONFIG["output_dir"] 下按启动时间新建的子目录
         """
         self.headless = headless
+        self.backend = backend
+        self.record_dir = record_dir
+        self.replay_dir = replay_dir
+        self.screenshots = screenshots
+        self.screenshot_dir = screenshot_dir
         self.extractor = None
+        self.archiver = None
         
     def __enter__(self):
         """上下文管理器入口"""
-        self.extractor = BilibiliArticleExtractor(headless=self.headless)
+        self.extractor = BilibiliArticleExtractor(headless=self.headless, backend=self.backend,
+                                                  record_dir=self.record_dir, replay_dir=self.replay_dir)
         self.extractor.__enter__()
+        if self.screenshots:
+            from src.common.card_screenshots import archiver_from_config
+            
+            self.archiver = archiver_from_config(self.screenshot_dir)
         return self
         
     def __exit__(self, exc_type, exc_val, exc_tb):
         """上下文管理器出口"""
         if self.extractor:
             self.extractor.__exit__(exc_type, exc_val, exc_tb)
+        if self.archiver:
+            self.archiver.close()
             
     def _parse_time_text(self, time_text: str) -> Optional[datetime]:
         """
@@ -125,7 +150,7 @@ class BilibiliMultiExtractor:
             try:
                 wait = WebDriverWait(self.extractor.driver, 10)
                 first_card = wait.until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, ".bili-dyn-item__main"))
+                    EC.presence_of_element_located((By.CSS_SELECTOR, self.extractor.card_selector))
                 )
                 logger.info("找到第一个动态卡片")
             except TimeoutException:
@@ -149,7 +174,8 @@ class BilibiliMultiExtractor:
             logger.error(f"提取第一个内容时发生错误: {str(e)}")
             return None
             
-    def extract_contents_by_date_range(self, user_url: str, start_time_str: str, end_time_str: str) -> List[Dict[str, Any]]:
+    def extract_contents_by_date_range(self, user_url: str, start_time_str: str, end_time_str: str,
+                                       should_stop: Optional[Callable[[], bool]] = None) -> List[BilibiliDynamic]:
         """
         按指定时间范围提取用户动态内容（倒序：从结束日期到开始日期）
         
@@ -157,9 +183,10 @@ class BilibiliMultiExtractor:
             user_url: B站用户动态页面URL
             start_time_str: 开始时间字符串（如："08月19日"）
             end_time_str: 结束时间字符串（如："09月25日"）
+            should_stop: 可选的取消检查函数，每轮提取前调用，返回True时提前结束
             
         Returns:
-            List[Dict]: 提取的内容数据列表（时间范围内的所有内容）
+            List[BilibiliDynamic]: 提取的内容记录列表（时间范围内的所有内容）
         """
         logger.info(f"开始按时间范围提取用户动态内容")
         logger.info(f"时间范围: {start_time_str} 到 {end_time_str}")
@@ -185,8 +212,8 @@ class BilibiliMultiExtractor:
             extracted_ids = set()  # 记录已提取的内容ID，避免重复
             scroll_count = 0
             max_scrolls = 50  # 增加最大滚动次数，确保能提取时间范围内的所有内容
+            range_complete = False  # 是否完整覆盖了时间范围（用于判断缺失内容）
             total_cards_seen = 0  # 记录总共看到的卡片数量（不管是否提取）
-            total_scrolled_height = 0  # 累计滚动高度
             
             # 解析时间范围
             start_date = self._parse_time_text(start_time_str)
@@ -198,128 +225,115 @@ class BilibiliMultiExtractor:
             
             logger.info(f"解析后的时间范围: {start_date} 到 {end_date}")
             
-            while scroll_count < max_scrolls:
-                logger.info(f"第 {scroll_count + 1} 轮提取，当前已提取 {len(contents_data)} 个内容")
-                
-                # 查找当前页面的所有动态卡片
-                try:
-                    wait = WebDriverWait(self.extractor.driver, 10)
-                    cards = wait.until(
-                        EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".bili-dyn-item__main"))
-                    )
-                    logger.info(f"当前页面找到 {len(cards)} 个动态卡片")
-                    
-                    # 计算本轮所有卡片的总高度
-                    current_round_height = 0
-                    for card in cards:
-                        card_height = card.size["height"]
-                        current_round_height += card_height
-                        total_cards_seen += 1
-                    
-                    logger.info(f"本轮 {len(cards)} 个卡片总高度: {current_round_height} 像素")
-                    logger.info(f"累计已看到 {total_cards_seen} 个卡片")
-                    
-                except TimeoutException:
-                    logger.warning("未找到动态卡片，尝试滚动加载更多内容")
+            def extract_cards():
+                # 一次脚本调用取回页面上所有卡片的数据
+                with profile_stage("bilibili_extract_cards"):
+                    return self.extractor.extract_visible_cards()
+            
+            # 每轮跳到列表底部，等页面加载出新卡片即返回，不再估算滚动距离和固定等待
+            scroller = feed_scroller(self.extractor.driver, "bilibili", self.extractor.card_selector)
+            try:
+                WebDriverWait(self.extractor.driver, 10).until(
+                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, self.extractor.card_selector))
+                )
+                batches = scroller.batches(extract_cards, max_rounds=max_scrolls)
+            except TimeoutException:
+                logger.warning("未找到动态卡片")
+                batches = []
+            
+            for batch in batches:
+                if should_stop and should_stop():
+                    logger.info("收到取消请求，停止提取")
                     break
                 
+                scroll_count = batch.round_index
+                cards = batch.cards
+                total_cards_seen += len(cards)
+                logger.info("第 %d 轮提取，当前已提取 %d 个内容", scroll_count, len(contents_data))
+                logger.info("本轮新加载 %d 个动态卡片（等待加载 %d 毫秒），累计已看到 %d 个卡片",
+                            len(cards), batch.waited_ms, total_cards_seen)
+                
                 # 遍历卡片，检查时间范围
                 new_contents_this_round = 0
                 reached_start_time = False
+                round_cards = []  # 本轮提取到的卡片 (内容ID, 页面中的序号)，用于截图存档
                 
-                for i, card in enumerate(cards):
-                    try:
-                        # 获取内容ID（使用与extract_article.py相同的逻辑）
+                with profile_stage("bilibili_parse_cards"):
+                    for i, card in enumerate(cards, batch.start):
                         try:
-                            content_id_elem = card.find_element(By.CSS_SELECTOR, ".dyn-card-opus[dyn-id]")
-                            content_id = content_id_elem.get_attribute("dyn-id")
-                        except NoSuchElementException:
-                            try:
-                                content_id_elem = card.find_element(By.CSS_SELECTOR, "[dyn-id]")
-                                content_id = content_id_elem.get_attribute("dyn-id")
-                            except NoSuchElementException:
-                                content_id = f"card_{i}"
+                            card_data = card["data"]
+                            content_id = card_data["内容ID"] or f"card_{i}"
                         
-                        # 跳过已提取的内容
-                        if content_id in extracted_ids:
-                            continue
+                            # 跳过已提取的内容
+                            if content_id in extracted_ids:
+                                continue
                             
-                        # 获取发布时间
-                        publish_time_text = self.extractor.getTime(card)
+                            # 获取发布时间
+                            publish_time_text = card_data["发布时间"]
                         
-                        if not publish_time_text:
-                            logger.debug(f"卡片 {content_id} 未获取到发布时间，跳过")
-                            continue
+                            if not publish_time_text:
+                                card_log.debug("卡片 %s 未获取到发布时间，跳过", content_id, extra={"content_id": content_id})
+                                continue
                             
-                        logger.info(f"卡片 {content_id} 发布时间: {publish_time_text}")
+                            card_log.info("卡片 %s 发布时间: %s", content_id, publish_time_text, extra={"content_id": content_id})
                         
-                        # 解析发布时间
-                        publish_date = self._parse_time_text(publish_time_text)
+                            # 解析发布时间
+                            publish_date = self._parse_time_text(publish_time_text)
                         
-                        if not publish_date:
-                            logger.debug(f"无法解析发布时间: {publish_time_text}")
-                            continue
+                            if not publish_date:
+                                card_log.debug("无法解析发布时间: %s", publish_time_text, extra={"content_id": content_id})
+                                continue
                         
-                        # 检查是否在时间范围内
-                        if start_date <= publish_date <= end_date:
-                            logger.info(f"✅ 卡片 {content_id} 在时间范围内，开始提取内容")
-                            
-                            # 获取卡片高度
-                            card_height = card.size["height"]
-                            logger.info(f"卡片高度: {card_height} 像素")
+                            # 检查是否在时间范围内
+                            if start_date <= publish_date <= end_date:
+                                card_log.info("✅ 卡片 %s 在时间范围内，开始提取内容", content_id, extra={"content_id": content_id})
                             
-                            # 提取卡片数据
-                            content_data = self.extractor._extract_single_dynamic(card)
+                                # 卡片高度
+                                card_height = card["height"]
+                                card_log.info("卡片高度: %d 像素", card_height, extra={"content_id": content_id})
                             
-                            if content_data and "错误" not in content_data:
-                                # 添加额外信息
-                                content_data["卡片高度"] = f"{card_height}px"
-                                content_data["提取轮次"] = scroll_count + 1
-                                content_data["发布时间_原始"] = publish_time_text
-                                content_data["发布时间_解析"] = publish_date.strftime("%Y-%m-%d")
+                                # 卡片数据（已在批量提取中取回）转换为记录，计数和时间只解析这一次
+                                content_data = BilibiliDynamic.from_card(card_data, publish_time=publish_date,
+                                                                         card_height=card_height,
+                                                                         extract_round=scroll_count)
                                 contents_data.append(content_data)
                                 extracted_ids.add(content_id)
+                                round_cards.append((content_id, i))
                                 new_contents_this_round += 1
-                                logger.info(f"✅ 成功提取内容，当前总数: {len(contents_data)}")
-                        elif publish_date < start_date:
-                            # 如果发布时间早于开始时间，说明已经到达开始时间了
-                            logger.info(f"✅ 到达开始时间 {start_time_str}，停止提取")
-                            reached_start_time = True
-                            break
-                        else:
-                            # 发布时间晚于结束时间，继续滚动
-                            logger.debug(f"卡片 {content_id} 发布时间 {publish_time_text} 晚于结束时间 {end_time_str}，继续滚动")
+                                card_log.info("✅ 成功提取内容，当前总数: %d", len(contents_data), extra={"content_id": content_id})
+                            elif publish_date < start_date:
+                                # 如果发布时间早于开始时间，说明已经到达开始时间了
+                                logger.info("✅ 到达开始时间 %s，停止提取", start_time_str)
+                                reached_start_time = True
+                                break
+                            else:
+                                # 发布时间晚于结束时间，继续滚动
+                                card_log.debug("卡片 %s 发布时间 %s 晚于结束时间 %s，继续滚动", content_id, publish_time_text, end_time_str,
+                                               extra={"content_id": content_id})
                             
-                    except Exception as e:
-                        logger.warning(f"处理单个卡片时出错: {str(e)}")
-                        continue
-                
-                logger.info(f"第 {scroll_count + 1} 轮提取完成，新增 {new_contents_this_round} 个内容")
-                
-                # 如果到达开始时间或本轮没有新内容，停止提取
-                if reached_start_time or new_contents_this_round == 0:
-                    if reached_start_time:
-                        logger.info("已到达开始时间，停止提取")
-                    else:
-                        logger.info("本轮未提取到新内容，可能已到达页面底部")
-                    break
-                
-                # 向下滑动加载更多内容
-                # 使用本轮所有卡片的总高度作为滚动距离，并增加额外距离确保加载新内容
-                scroll_distance = current_round_height + 500 if current_round_height > 0 else 1500
-                total_scrolled_height += scroll_distance
-                
-                logger.info(f"向下滑动 {scroll_distance} 像素加载更多内容")
-                logger.info(f"累计滚动高度: {total_scrolled_height} 像素")
+                        except Exception as e:
+                            logger.warning("处理单个卡片时出错: %s", e)
+                            continue
                 
-                # 使用JavaScript执行平滑滚动
-                scroll_script = f"window.scrollBy({{top: {scroll_distance}, behavior: 'smooth'}});"
-                self.extractor.driver.execute_script(scroll_script)
+                logger.info("第 %d 轮提取完成，新增 %d 个内容", scroll_count, new_contents_this_round)
                 
-                # 等待新内容加载
-                time.sleep(10)  # 增加等待时间，确保新内容完全加载
+                # 本轮卡片截图存档：一次视口截图，裁剪编码在进程池中进行，不阻塞爬取
+                if self.archiver and round_cards:
+                    try:
+                        self.archiver.capture(self.extractor.driver, self.extractor.card_selector, round_cards)
+                    except Exception as e:
+                        logger.warning("卡片截图失败: %s", e)
                 
-                scroll_count += 1
+                # 到达开始时间后停止；晚于结束时间的卡片之后还有内容，继续加载
+                if reached_start_time:
+                    range_complete = True
+                    logger.info("已到达开始时间，停止提取")
+                    break
+            else:
+                # 列表到底（而不是达到轮次上限）时同样完整覆盖了时间范围
+                range_complete = scroller.reached_end
+                if range_complete:
+                    logger.info("已到达列表底部")
             
             logger.info(f"按时间范围提取完成，共提取 {len(contents_data)} 个内容")
             logger.info(f"时间范围: {start_time_str} 到 {end_time_str}")
@@ -327,7 +341,7 @@ class BilibiliMultiExtractor:
             
             # 将提取结果汇总到1.txt文件
             try:
-                with open('/Users/Zhuanz/projects/PythonWS/Alipay/1.txt', 'w', encoding='utf-8') as f:
+                with open(BILIBILI_RESULT_FILE, 'w', encoding='utf-8') as f:
                     f.write("B站动态内容按时间范围提取结果汇总\n")
                     f.write("=" * 50 + "\n")
                     f.write(f"提取时间: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
@@ -336,7 +350,8 @@ class BilibiliMultiExtractor:
                     f.write(f"提取轮次: {scroll_count} 轮\n")
                     f.write("=" * 50 + "\n\n")
                     
-                    for i, content in enumerate(contents_data, 1):
+                    for i, record in enumerate(contents_data, 1):
+                        content = record.to_dict()
                         f.write(f"内容 {i}:\n")
                         f.write(f"  内容ID: {content.get('内容ID', '未知')}\n")
                         f.write(f"  作者: {content.get('作者', '未知')}\n")
@@ -362,6 +377,13 @@ class BilibiliMultiExtractor:
                 
             except Exception as e:
                 logger.error(f"保存结果到文件时出错: {str(e)}")
+            
+            # 保存的内容同步写入全文索引
+            index_stored_posts(contents_data)
+            
+            # 写入变更事件；只有完整覆盖时间范围时，范围内没有出现的已知内容才报告缺失
+            window = (start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")) if range_complete else None
+            publish_changes(contents_data, "bilibili", window=window)
                 
             return contents_data  # 返回时间范围内的所有内容
             
@@ -369,7 +391,7 @@ class BilibiliMultiExtractor:
             logger.error(f"按时间范围提取内容时发生错误: {str(e)}")
             return []
 
-    def extract_multiple_contents(self, user_url: str, target_count: int = 20) -> List[Dict[str, Any]]:
+    def extract_multiple_contents(self, user_url: str, target_count: int = 20) -> List[BilibiliDynamic]:
         """
         循环增量提取用户动态内容，直到达到目标数量
         
@@ -378,7 +400,7 @@ class BilibiliMultiExtractor:
             target_count: 目标提取数量（默认20个）
             
         Returns:
-            List[Dict]: 提取的内容数据列表
+            List[BilibiliDynamic]: 提取的内容记录列表
         """
         logger.info(f"开始循环增量提取用户动态内容，目标数量: {target_count}")
         
@@ -403,6 +425,7 @@ class BilibiliMultiExtractor:
             extracted_ids = set()  # 记录已提取的内容ID，避免重复
             scroll_count = 0
             max_scrolls = 10  # 最大滚动次数，防止无限循环
+            scroller = feed_scroller(self.extractor.driver, "bilibili", self.extractor.card_selector)
             
             while len(contents_data) < target_count and scroll_count < max_scrolls:
                 logger.info(f"第 {scroll_count + 1} 轮提取，当前已提取 {len(contents_data)}/{target_count} 个")
@@ -411,7 +434,7 @@ class BilibiliMultiExtractor:
                 try:
                     wait = WebDriverWait(self.extractor.driver, 10)
                     cards = wait.until(
-                        EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".bili-dyn-item__main"))
+                        EC.presence_of_all_elements_located((By.CSS_SELECTOR, self.extractor.card_selector))
                     )
                     logger.info(f"当前页面找到 {len(cards)} 个动态卡片")
                 except TimeoutException:
@@ -421,48 +444,41 @@ class BilibiliMultiExtractor:
                 # 提取当前页面的新内容
                 new_contents_this_round = 0
                 for i, card in enumerate(cards):
-                    try:
-                        # 获取内容ID（使用与extract_article.py相同的逻辑）
+                    with trace_card():
                         try:
-                            content_id_elem = card.find_element(By.CSS_SELECTOR, ".dyn-card-opus[dyn-id]")
-                            content_id = content_id_elem.get_attribute("dyn-id")
-                        except NoSuchElementException:
-                            try:
-                                content_id_elem = card.find_element(By.CSS_SELECTOR, "[dyn-id]")
-                                content_id = content_id_elem.get_attribute("dyn-id")
-                            except NoSuchElementException:
-                                content_id = f"card_{i}"
+                            # 获取内容ID（与extract_article.py共用选择器注册表）
+                            content_id = self.extractor.find_content_id(card) or f"card_{i}"
                         
-                        # 跳过已提取的内容
-                        if content_id in extracted_ids:
-                            continue
+                            # 跳过已提取的内容
+                            if content_id in extracted_ids:
+                                continue
                             
-                        logger.info(f"正在提取新内容 ID: {content_id}")
+                            logger.info(f"正在提取新内容 ID: {content_id}")
                         
-                        # 获取卡片高度
-                        card_height = card.size["height"]
-                        logger.info(f"卡片高度: {card_height} 像素")
+                            # 获取卡片高度
+                            card_height = card.size["height"]
+                            logger.info(f"卡片高度: {card_height} 像素")
                         
-                        # 提取卡片数据
-                        content_data = self.extractor._extract_single_dynamic(card)
+                            # 提取卡片数据
+                            content_data = self.extractor._extract_single_dynamic(card)
                         
-                        if content_data and "错误" not in content_data:
-                            # 添加卡片高度信息
-                            content_data["卡片高度"] = f"{card_height}px"
-                            content_data["提取轮次"] = scroll_count + 1
-                            contents_data.append(content_data)
-                            extracted_ids.add(content_id)
-                            new_contents_this_round += 1
-                            logger.info(f"✅ 成功提取内容，当前总数: {len(contents_data)}")
+                            if content_data and "错误" not in content_data:
+                                contents_data.append(BilibiliDynamic.from_card(
+                                    content_data, publish_time=self._parse_time_text(content_data["发布时间"]),
+                                    card_height=card_height, extract_round=scroll_count + 1
+                                ))
+                                extracted_ids.add(content_id)
+                                new_contents_this_round += 1
+                                logger.info(f"✅ 成功提取内容，当前总数: {len(contents_data)}")
                             
-                            # 如果达到目标数量，提前退出
-                            if len(contents_data) >= target_count:
-                                logger.info(f"已达到目标数量 {target_count}，停止提取")
-                                break
+                                # 如果达到目标数量，提前退出
+                                if len(contents_data) >= target_count:
+                                    logger.info(f"已达到目标数量 {target_count}，停止提取")
+                                    break
                                 
-                    except Exception as e:
-                        logger.warning(f"提取单个卡片时出错: {str(e)}")
-                        continue
+                        except Exception as e:
+                            logger.warning(f"提取单个卡片时出错: {str(e)}")
+                            continue
                 
                 logger.info(f"第 {scroll_count + 1} 轮提取完成，新增 {new_contents_this_round} 个内容")
                 
@@ -471,24 +487,11 @@ class BilibiliMultiExtractor:
                     logger.info("本轮未提取到新内容，可能已到达页面底部")
                     break
                 
-                # 如果还没达到目标数量，向下滑动加载更多内容
-                if len(contents_data) < target_count:
-                    # 计算本轮所有卡片的总高度
-                    current_round_height = 0
-                    for card in cards:
-                        current_round_height += card.size["height"]
-                    
-                    # 使用本轮所有卡片的总高度作为滚动距离
-                    scroll_distance = current_round_height if current_round_height > 0 else 1000
-                    
-                    logger.info(f"向下滑动 {scroll_distance} 像素加载更多内容")
-                    
-                    # 使用JavaScript执行平滑滚动
-                    scroll_script = f"window.scrollBy({{top: {scroll_distance}, behavior: 'smooth'}});"
-                    self.extractor.driver.execute_script(scroll_script)
-                    
-                    # 等待新内容加载
-                    time.sleep(5)
+                # 如果还没达到目标数量，跳到列表底部等待页面加载出新卡片
+                if len(contents_data) < target_count and scroller.advance(len(cards)) is None:
+                    logger.info("已到达列表底部")
+                    scroll_count += 1
+                    break
                 
                 scroll_count += 1
             
@@ -498,7 +501,7 @@ class BilibiliMultiExtractor:
             
             # 将提取结果汇总到1.txt文件
             try:
-                with open('/Users/Zhuanz/projects/PythonWS/Alipay/1.txt', 'w', encoding='utf-8') as f:
+                with open(BILIBILI_RESULT_FILE, 'w', encoding='utf-8') as f:
                     f.write("B站动态内容提取结果汇总\n")
                     f.write("=" * 50 + "\n")
                     f.write(f"提取时间: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
@@ -507,7 +510,8 @@ class BilibiliMultiExtractor:
                     f.write(f"提取轮次: {scroll_count} 轮\n")
                     f.write("=" * 50 + "\n\n")
                     
-                    for i, content in enumerate(contents_data, 1):
+                    for i, record in enumerate(contents_data, 1):
+                        content = record.to_dict()
                         f.write(f"内容 {i}:\n")
                         f.write(f"  内容ID: {content.get('内容ID', '未知')}\n")
                         f.write(f"  作者: {content.get('作者', '未知')}\n")
@@ -529,6 +533,9 @@ class BilibiliMultiExtractor:
                 
             except Exception as e:
                 logger.error(f"保存结果到文件时出错: {str(e)}")
+            
+            # 保存的内容同步写入全文索引
+            index_stored_posts(contents_data)
                 
             return contents_data[:target_count]  # 返回目标数量的内容
             
@@ -547,10 +554,22 @@ def test_first_content_extraction():
 
 
 if __name__ == "__main__":
+    import argparse
+
+    from src.common.log_setup import setup_logging
+    from src.common.command_trace import add_trace_arguments, command_trace_session
+    from src.common.profiling import add_profile_arguments, profiling_session
+    
+    parser = argparse.ArgumentParser(description="按时间范围提取B站动态")
+    add_profile_arguments(parser)
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    
+    setup_logging()
     start_time_str = "05月01日"  # 开始时间
     end_time_str =  "11月01日"   # 结束时间
     
-    with BilibiliMultiExtractor() as extractor:
+    with profiling_session(args), command_trace_session(args), BilibiliMultiExtractor() as extractor:
         contents = extractor.extract_contents_by_date_range(
             user_url="https://space.bilibili.com/420831218/dynamic",
             start_time_str=start_time_str,
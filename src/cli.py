@@ -0,0 +1,546 @@
+"""
+alipay-crawler 命令行入口
+
+子命令：
+    accounts  列出配置中的目标账号
+    crawl     按时间范围爬取B站动态
+    stats     批量提取抖音视频统计数据
+    export    将爬取结果导出为Excel、Word、CSV、JSONL（可选Parquet）
+    merge     合并抖音统计数据与文案内容为JSON
+    match     匹配B站、抖音的同一活动内容，输出跨平台活动簇
+    report    生成月度分析报告（图表 + 静态HTML）
+    tags      建立文案标签（话题、@提及、【活动名】）索引，按标签查询活动内容和互动量
+    search    文案全文检索（B站文案、视频描述、抖音文案）
+    comments  并发采集每月热门内容的评论（增量，只取新评论），导出供舆情复盘
+    changes   读取内容变更事件日志（新内容、计数变化、缺失内容），按消费者记录处理进度
+    daemon    启动常驻爬取服务，通过本地HTTP接口接收任务
+    enqueue   把抖音视频、B站日期窗口加入共享任务表
+    worker    从共享任务表领取并执行爬取单元（每台工作机运行一个）
+    queue     查看共享任务表进度，汇总结果导出
+
+各子命令所需的重量级依赖（selenium、pandas、python-docx等）只在执行该子命令时导入，
+`accounts`、`--help` 等轻量操作不会加载浏览器相关模块
+
+全局开关 --profile（放在子命令之前，如 `alipay-crawler --profile export bilibili`）按阶段做性能分析，
+输出各阶段的火焰图文件和热点汇总，见 src.common.profiling；
+--trace-commands 统计每条浏览器命令的次数、调用位置和耗时分布，见 src.common.command_trace
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import List, Optional
+
+from config.settings import (
+    BILIBILI_RESULT_FILE,
+    BILIBILI_URL,
+    BROWSER_CONFIG,
+    CAPTION_INDEX_CONFIG,
+    CHANGE_LOG_CONFIG,
+    COMMENT_CONFIG,
+    DAEMON_CONFIG,
+    DOUYIN_CONTENT_FILE,
+    DOUYIN_STATS_FILE,
+    DOUYIN_URL,
+    MATCH_CONFIG,
+    OUTPUT_DIR,
+    PROJECT_ROOT,
+    SEARCH_CONFIG,
+    STORAGE_CONFIG,
+    ensure_dirs,
+)
+
+
+def cmd_accounts(args: argparse.Namespace) -> int:
+    """列出配置中的目标账号"""
+    print(f"bilibili\t{BILIBILI_URL}")
+    print(f"douyin\t{DOUYIN_URL}")
+    return 0
+
+
+def cmd_crawl(args: argparse.Namespace) -> int:
+    """按时间范围爬取B站动态"""
+    from src.bilibili_service.mutli_extract import BilibiliMultiExtractor
+    from src.common.log_setup import log_context
+
+    ensure_dirs()
+    with log_context(account=args.url), \
+            BilibiliMultiExtractor(headless=args.headless, backend="replay" if args.replay else args.backend,
+                                   record_dir=args.record, replay_dir=args.replay,
+                                   screenshots=args.screenshots, screenshot_dir=args.screenshot_dir) as extractor:
+        contents = extractor.extract_contents_by_date_range(
+            user_url=args.url,
+            start_time_str=args.start,
+            end_time_str=args.end
+        )
+    print(f"按时间范围 {args.start} 到 {args.end} 提取了 {len(contents)} 个内容")
+
+    if args.export and contents:
+        from src.bilibili_service.data_exporter import DataExporter
+
+        results = DataExporter(output_dir=args.output_dir).export_all_formats(contents, with_parquet=args.parquet)
+        for format_type, path in results.items():
+            print(f"{format_type}\t{path}")
+    return 0
+
+
+def cmd_stats(args: argparse.Namespace) -> int:
+    """批量提取抖音视频统计数据"""
+    from src.douyin_service.batch_video_stats import main as batch_main
+
+    ensure_dirs()
+    batch_main(backend="replay" if args.replay else args.backend, browserless=not args.browser_only,
+               record_dir=args.record, replay_dir=args.replay)
+    return 0
+
+
+def cmd_export(args: argparse.Namespace) -> int:
+    """导出爬取结果"""
+    ensure_dirs()
+    if args.platform == "bilibili":
+        from export_bilibili_data import BilibiliDataExporter
+
+        results = BilibiliDataExporter(args.txt).export_all(formats=args.formats, output_dir=args.output_dir,
+                                                            with_parquet=args.parquet)
+        for format_type, path in results.items():
+            print(f"{format_type}\t{path}")
+        return 0
+
+    from src.douyin_service.douyin_data_exporter import DouyinDataExporter
+
+    exporter = DouyinDataExporter(output_dir=args.output_dir)
+    data = exporter.parse_douyin_data(stats_file=args.stats, content_file=args.content)
+    if not data:
+        print("未找到有效数据", file=sys.stderr)
+        return 1
+    results = exporter.export_all_formats(data, with_parquet=args.parquet, formats=args.formats)
+    for format_type, path in results.items():
+        print(f"{format_type}\t{path}")
+    return 0
+
+
+def cmd_merge(args: argparse.Namespace) -> int:
+    """合并抖音统计数据与文案内容为JSON"""
+    from src.douyin_service.douyin_data_exporter import DouyinDataExporter
+
+    ensure_dirs()
+    exporter = DouyinDataExporter(output_dir=args.output_dir)
+    data = exporter.parse_douyin_data(stats_file=args.stats, content_file=args.content)
+    with open(args.output, "w", encoding=STORAGE_CONFIG["encoding"]) as f:
+        json.dump([item.to_dict() for item in data], f, ensure_ascii=False, indent=STORAGE_CONFIG["indent"])
+    print(f"已合并 {len(data)} 条记录: {args.output}")
+    return 0
+
+
+def cmd_match(args: argparse.Namespace) -> int:
+    """匹配跨平台活动内容"""
+    from export_bilibili_data import BilibiliDataExporter
+    from src.analysis_service.cross_platform_matcher import export_clusters, match_cross_platform
+    from src.douyin_service.douyin_data_exporter import DouyinDataExporter
+
+    ensure_dirs()
+    bilibili_contents = BilibiliDataExporter(args.txt).parse_txt_data()
+    douyin_data = DouyinDataExporter(output_dir=args.output_dir).parse_douyin_data(
+        stats_file=args.stats, content_file=args.content
+    )
+    clusters = match_cross_platform(bilibili_contents, douyin_data, threshold=args.threshold,
+                                    num_perm=MATCH_CONFIG["num_perm"])
+    export_clusters(clusters, args.output, encoding=STORAGE_CONFIG["encoding"], indent=STORAGE_CONFIG["indent"])
+    print(f"共找到 {len(clusters)} 个跨平台活动簇: {args.output}")
+    return 0
+
+
+def cmd_report(args: argparse.Namespace) -> int:
+    """生成月度分析报告"""
+    from src.analysis_service.monthly_report import build_report, load_from_excel, load_from_parquet
+
+    ensure_dirs()
+    if args.excel:
+        df = load_from_excel(args.excel)
+    else:
+        df = load_from_parquet(args.parquet_dir)
+    report_path = build_report(df, args.output_dir, top_n=args.top_n)
+    print(f"报告已生成: {report_path}")
+    return 0
+
+
+def cmd_tags(args: argparse.Namespace) -> int:
+    """文案标签索引：建立、按标签查询、热门标签"""
+    from src.analysis_service.caption_tags import CaptionTagIndex
+
+    ensure_dirs()
+    with CaptionTagIndex(args.db) as index:
+        if args.action == "index":
+            from export_bilibili_data import BilibiliDataExporter
+            from src.douyin_service.douyin_data_exporter import DouyinDataExporter
+
+            count = index.add_records(BilibiliDataExporter(args.txt).parse_txt_data() or [])
+            count += index.add_records(DouyinDataExporter(output_dir=args.output_dir).parse_douyin_data(
+                stats_file=args.stats, content_file=args.content))
+            print(f"已索引 {count} 条内容: {args.db}")
+            return 0
+
+        if args.action == "top":
+            for row in index.top_tags(kind=args.kind, month=args.month, limit=args.limit):
+                print(f"{row['posts']}\t{row['engagement']}\t{row['kind']}\t{row['tag']}")
+            return 0
+
+        if not args.tag:
+            print("query 需要指定标签", file=sys.stderr)
+            return 2
+        result = index.query(args.tag, kind=args.kind, contains=args.contains, platform=args.platform)
+        print(json.dumps(result, ensure_ascii=False, indent=STORAGE_CONFIG["indent"]))
+        return 0
+
+
+def cmd_search(args: argparse.Namespace) -> int:
+    """文案全文检索：建立/更新索引、检索"""
+    from src.analysis_service.caption_search import CaptionSearchIndex
+
+    ensure_dirs()
+    with CaptionSearchIndex(args.db, tokenizer=args.tokenizer) as index:
+        if args.action == "index":
+            from export_bilibili_data import BilibiliDataExporter
+            from src.douyin_service.douyin_data_exporter import DouyinDataExporter
+
+            changed = index.add_records(BilibiliDataExporter(args.txt).parse_txt_data() or [])
+            changed += index.add_records(DouyinDataExporter(output_dir=args.output_dir).parse_douyin_data(
+                stats_file=args.stats, content_file=args.content))
+            print(f"已更新 {changed} 条内容，索引共 {index.count()} 条: {args.db}")
+            return 0
+
+        query = " ".join(args.query)
+        if not query:
+            print("query 需要指定检索词", file=sys.stderr)
+            return 2
+        for hit in index.search(query, platform=args.platform, start=args.start, end=args.end, limit=args.limit):
+            print(f"{hit['publish_date'] or '-'}\t{hit['platform']}\t{hit['url']}\t{' '.join(hit['snippet'].split())}")
+        return 0
+
+
+def cmd_comments(args: argparse.Namespace) -> int:
+    """热门内容评论：采集、导出"""
+    from src.analysis_service.comment_crawler import CommentStore, comment_crawler_from_config, top_posts
+
+    ensure_dirs()
+    with CommentStore(args.db) as store:
+        if args.action == "export":
+            count = store.export_jsonl(args.output)
+            print(f"已导出 {count} 条内容的评论: {args.output}")
+            return 0
+
+        from export_bilibili_data import BilibiliDataExporter
+        from src.douyin_service.douyin_data_exporter import DouyinDataExporter
+
+        records = list(BilibiliDataExporter(args.txt).parse_txt_data() or [])
+        records += DouyinDataExporter(output_dir=args.output_dir).parse_douyin_data(
+            stats_file=args.stats, content_file=args.content)
+        posts = [post for post in top_posts(records, top_n=args.top_n, month=args.month)
+                 if not args.platform or post[0] == args.platform]
+        summary = comment_crawler_from_config(store).crawl(posts)
+        print(f"{summary['posts']} 条内容，新增 {summary['new_comments']} 条评论，"
+              f"失败 {len(summary['failed'])} 条: {args.db}")
+        return 1 if summary["failed"] else 0
+
+
+def cmd_changes(args: argparse.Namespace) -> int:
+    """内容变更事件：查看、跟随、按消费者消费"""
+    from src.common.change_log import ChangeLog, ChangeLogConsumer
+
+    change_log = ChangeLog(args.log_dir, segment_bytes=CHANGE_LOG_CONFIG["segment_bytes"])
+    if args.action == "status":
+        print(f"下一个offset: {change_log.next_offset}，段文件 {len(change_log.segments())} 个: {args.log_dir}")
+        return 0
+
+    if args.action == "consume":
+        if not args.consumer:
+            print("consume 需要指定 --consumer", file=sys.stderr)
+            return 2
+        consumer = ChangeLogConsumer(change_log, args.consumer)
+        if args.follow:
+            for event in consumer.tail(poll_interval=CHANGE_LOG_CONFIG["poll_interval"]):
+                print(json.dumps(event, ensure_ascii=False), flush=True)
+            return 0
+        for event in consumer.poll(args.limit):
+            print(json.dumps(event, ensure_ascii=False))
+        consumer.commit()
+        return 0
+
+    offset = args.offset
+    while True:
+        for event in change_log.read(offset, limit=args.limit):
+            print(json.dumps(event, ensure_ascii=False), flush=True)
+            offset = event["offset"] + 1
+        if not args.follow:
+            return 0
+        time.sleep(CHANGE_LOG_CONFIG["poll_interval"])
+
+
+def cmd_daemon(args: argparse.Namespace) -> int:
+    """启动常驻爬取服务"""
+    from src.daemon_service.crawl_daemon import serve
+
+    ensure_dirs()
+    serve(host=args.host, port=args.port, headless=args.headless, backend=args.backend)
+    return 0
+
+
+def cmd_enqueue(args: argparse.Namespace) -> int:
+    """把爬取单元加入共享任务表"""
+    from src.common.work_queue import work_queue_from_config
+    from src.daemon_service.crawl_worker import bilibili_window_units, douyin_video_units
+
+    if args.platform == "douyin":
+        from src.douyin_service.batch_video_stats import read_video_urls
+
+        units = list(douyin_video_units(read_video_urls(args.content)))
+    else:
+        units = list(bilibili_window_units(args.url, args.start, args.end))
+
+    queue = work_queue_from_config(args.dsn)
+    added = queue.enqueue_many(units)
+    print(f"新加入 {added} 个单元（共 {len(units)} 个，其余已在任务表中）")
+    return 0
+
+
+def cmd_worker(args: argparse.Namespace) -> int:
+    """运行任务表工作机"""
+    from config.settings import WORK_QUEUE_CONFIG
+    from src.common.work_queue import work_queue_from_config
+    from src.daemon_service.crawl_daemon import BrowserSessions
+    from src.daemon_service.crawl_worker import DEFAULT_UNIT_HANDLERS, CrawlWorker
+
+    ensure_dirs()
+    handlers = {kind: DEFAULT_UNIT_HANDLERS[kind] for kind in args.kinds or DEFAULT_UNIT_HANDLERS}
+    worker = CrawlWorker(
+        work_queue_from_config(args.dsn),
+        sessions=BrowserSessions(headless=args.headless, backend=args.backend),
+        handlers=handlers,
+        worker_id=args.worker_id,
+        heartbeat_interval=WORK_QUEUE_CONFIG["heartbeat_interval"],
+        poll_interval=WORK_QUEUE_CONFIG["poll_interval"],
+    )
+    try:
+        summary = worker.run(exit_when_idle=args.exit_when_idle)
+    except KeyboardInterrupt:
+        # 手中单元的租约会过期，由其他工作机接手
+        return 130
+    print(json.dumps(summary, ensure_ascii=False))
+    return 0
+
+
+def cmd_queue(args: argparse.Namespace) -> int:
+    """查看共享任务表进度，可选汇总已完成结果导出"""
+    from src.common.work_queue import work_queue_from_config
+
+    queue = work_queue_from_config(args.dsn)
+    for status, count in queue.counts().items():
+        print(f"{status}\t{count}")
+    for failure in queue.failures():
+        print(f"failed\t{failure['unit_id']}\t{failure['attempts']}\t{failure['error']}", file=sys.stderr)
+
+    if args.export:
+        from src.bilibili_service.data_exporter import DataExporter
+        from src.daemon_service.crawl_worker import collect_bilibili_results, collect_douyin_results
+        from src.douyin_service.douyin_data_exporter import DouyinDataExporter
+
+        ensure_dirs()
+        bilibili_contents = collect_bilibili_results(queue)
+        if bilibili_contents:
+            for format_type, path in DataExporter(output_dir=args.output_dir).export_all_formats(
+                    bilibili_contents).items():
+                print(f"bilibili {format_type}\t{path}")
+        douyin_data = collect_douyin_results(queue)
+        if douyin_data:
+            for format_type, path in DouyinDataExporter(output_dir=args.output_dir).export_all_formats(
+                    douyin_data).items():
+                print(f"douyin {format_type}\t{path}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器"""
+    from src.common.command_trace import add_trace_arguments
+    from src.common.profiling import add_profile_arguments
+
+    parser = argparse.ArgumentParser(prog="alipay-crawler", description="支付宝社交媒体内容爬取工具")
+    add_profile_arguments(parser)
+    add_trace_arguments(parser)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    data_dir = str(PROJECT_ROOT / "data")
+    backend_option = {"choices": ["selenium", "cdp"], "default": BROWSER_CONFIG["backend"],
+                      "help": "浏览器后端：selenium（经chromedriver）或 cdp（直连DevTools协议）"}
+    record_option = {"metavar": "DIR", "help": "把浏览器会话（页面、每轮滚动的DOM快照、XHR）录制到目录"}
+    replay_option = {"metavar": "DIR", "help": "不启动浏览器，回放 --record 录制的会话"}
+
+    accounts = subparsers.add_parser("accounts", help="列出目标账号")
+    accounts.set_defaults(func=cmd_accounts)
+
+    crawl = subparsers.add_parser("crawl", help="按时间范围爬取B站动态")
+    crawl.add_argument("--url", default=BILIBILI_URL, help="B站用户动态页面URL")
+    crawl.add_argument("--start", default="05月01日", help="开始时间，如 05月01日")
+    crawl.add_argument("--end", default="11月01日", help="结束时间，如 11月01日")
+    crawl.add_argument("--headless", action="store_true", help="使用无头模式")
+    crawl.add_argument("--backend", **backend_option)
+    crawl.add_argument("--record", **record_option)
+    crawl.add_argument("--replay", **replay_option)
+    crawl.add_argument("--screenshots", action="store_true", help="为提取到的每张卡片存档截图")
+    crawl.add_argument("--screenshot-dir", help="截图目录，默认 output/card_screenshots/<启动时间>")
+    crawl.add_argument("--export", action="store_true", help="爬取完成后直接导出")
+    crawl.add_argument("--parquet", action="store_true", help="导出时同时导出Parquet数据集")
+    crawl.add_argument("--output-dir", default=data_dir, help="导出目录")
+    crawl.set_defaults(func=cmd_crawl)
+
+    stats = subparsers.add_parser("stats", help="批量提取抖音视频统计数据")
+    stats.add_argument("--backend", **backend_option)
+    stats.add_argument("--record", **record_option)
+    stats.add_argument("--replay", **replay_option)
+    stats.add_argument("--browser-only", action="store_true", help="不尝试解析视频页嵌入数据，全部用浏览器提取")
+    stats.set_defaults(func=cmd_stats)
+
+    export = subparsers.add_parser("export", help="导出Excel、Word、CSV、JSONL")
+    export.add_argument("platform", choices=["bilibili", "douyin"])
+    export.add_argument("--txt", default=str(BILIBILI_RESULT_FILE), help="B站提取结果文件")
+    export.add_argument("--stats", default=str(DOUYIN_STATS_FILE), help="抖音统计数据文件")
+    export.add_argument("--content", default=str(DOUYIN_CONTENT_FILE), help="抖音文案内容文件")
+    export.add_argument("--formats", nargs="+", help="导出格式（excel word csv jsonl），默认全部")
+    export.add_argument("--parquet", action="store_true", help="同时导出Parquet数据集")
+    export.add_argument("--output-dir", default=data_dir, help="导出目录")
+    export.set_defaults(func=cmd_export)
+
+    merge = subparsers.add_parser("merge", help="合并抖音统计数据与文案内容")
+    merge.add_argument("--stats", default=str(DOUYIN_STATS_FILE), help="抖音统计数据文件")
+    merge.add_argument("--content", default=str(DOUYIN_CONTENT_FILE), help="抖音文案内容文件")
+    merge.add_argument("--output", default=str(PROJECT_ROOT / "data" / "douyin_data" / "douyin_merged.json"),
+                       help="合并结果输出路径")
+    merge.add_argument("--output-dir", default=data_dir, help="数据目录")
+    merge.set_defaults(func=cmd_merge)
+
+    match = subparsers.add_parser("match", help="匹配跨平台活动内容")
+    match.add_argument("--txt", default=str(BILIBILI_RESULT_FILE), help="B站提取结果文件")
+    match.add_argument("--stats", default=str(DOUYIN_STATS_FILE), help="抖音统计数据文件")
+    match.add_argument("--content", default=str(DOUYIN_CONTENT_FILE), help="抖音文案内容文件")
+    match.add_argument("--threshold", type=float, default=MATCH_CONFIG["threshold"], help="文案相似度阈值")
+    match.add_argument("--output", default=str(PROJECT_ROOT / "data" / "cross_platform_clusters.json"),
+                       help="活动簇输出路径")
+    match.add_argument("--output-dir", default=data_dir, help="数据目录")
+    match.set_defaults(func=cmd_match)
+
+    report = subparsers.add_parser("report", help="生成月度分析报告")
+    report.add_argument("--parquet-dir", default=str(PROJECT_ROOT / "data" / "parquet"), help="Parquet数据集目录")
+    report.add_argument("--excel", nargs="+", help="改为从导出的xlsx文件加载")
+    report.add_argument("--top-n", type=int, default=10, help="每月Top内容数")
+    report.add_argument("--output-dir", default=str(OUTPUT_DIR / "report"), help="报告输出目录")
+    report.set_defaults(func=cmd_report)
+
+    tags = subparsers.add_parser("tags", help="文案标签索引（话题、@提及、【活动名】）")
+    tags.add_argument("action", choices=["index", "query", "top"],
+                      help="index：从爬取结果建立索引；query：查询一个标签；top：热门标签")
+    tags.add_argument("tag", nargs="?", help="要查询的标签，如 惠出境")
+    tags.add_argument("--kind", choices=["hashtag", "mention", "topic"], help="只查某种标签")
+    tags.add_argument("--contains", action="store_true", help="匹配包含该文字的所有标签")
+    tags.add_argument("--platform", choices=["bilibili", "douyin"], help="只查某个平台")
+    tags.add_argument("--month", help="top 只统计某个月，如 2024-10")
+    tags.add_argument("--limit", type=int, default=20, help="top 返回的标签数")
+    tags.add_argument("--txt", default=str(BILIBILI_RESULT_FILE), help="B站提取结果文件")
+    tags.add_argument("--stats", default=str(DOUYIN_STATS_FILE), help="抖音统计数据文件")
+    tags.add_argument("--content", default=str(DOUYIN_CONTENT_FILE), help="抖音文案内容文件")
+    tags.add_argument("--db", default=CAPTION_INDEX_CONFIG["db_path"], help="索引文件")
+    tags.add_argument("--output-dir", default=data_dir, help="数据目录")
+    tags.set_defaults(func=cmd_tags)
+
+    search = subparsers.add_parser("search", help="文案全文检索")
+    search.add_argument("action", choices=["index", "query"], help="index：从爬取结果建立/更新索引；query：检索")
+    search.add_argument("query", nargs="*", help="检索词，多个词需同时出现")
+    search.add_argument("--platform", choices=["bilibili", "douyin"], help="只查某个平台")
+    search.add_argument("--start", help="发布日期下限，如 2024-09-01")
+    search.add_argument("--end", help="发布日期上限，如 2024-10-31")
+    search.add_argument("--limit", type=int, default=20, help="返回数量")
+    search.add_argument("--tokenizer", choices=["trigram", "jieba"], default=SEARCH_CONFIG["tokenizer"],
+                        help="新建索引使用的分词器")
+    search.add_argument("--txt", default=str(BILIBILI_RESULT_FILE), help="B站提取结果文件")
+    search.add_argument("--stats", default=str(DOUYIN_STATS_FILE), help="抖音统计数据文件")
+    search.add_argument("--content", default=str(DOUYIN_CONTENT_FILE), help="抖音文案内容文件")
+    search.add_argument("--db", default=SEARCH_CONFIG["db_path"], help="索引文件")
+    search.add_argument("--output-dir", default=data_dir, help="数据目录")
+    search.set_defaults(func=cmd_search)
+
+    comments = subparsers.add_parser("comments", help="热门内容评论采集")
+    comments.add_argument("action", choices=["crawl", "export"],
+                          help="crawl：采集每月热门内容的新评论；export：按内容导出评论为JSONL")
+    comments.add_argument("--top-n", type=int, default=COMMENT_CONFIG["top_n"], help="每月每个平台的内容数")
+    comments.add_argument("--month", help="只采集某个月，如 2024-10")
+    comments.add_argument("--platform", choices=["bilibili", "douyin"], help="只采集某个平台")
+    comments.add_argument("--txt", default=str(BILIBILI_RESULT_FILE), help="B站提取结果文件")
+    comments.add_argument("--stats", default=str(DOUYIN_STATS_FILE), help="抖音统计数据文件")
+    comments.add_argument("--content", default=str(DOUYIN_CONTENT_FILE), help="抖音文案内容文件")
+    comments.add_argument("--db", default=COMMENT_CONFIG["db_path"], help="评论库文件")
+    comments.add_argument("--output", default=str(OUTPUT_DIR / "comments.jsonl"), help="export 输出路径")
+    comments.add_argument("--output-dir", default=data_dir, help="数据目录")
+    comments.set_defaults(func=cmd_comments)
+
+    changes = subparsers.add_parser("changes", help="内容变更事件日志")
+    changes.add_argument("action", choices=["tail", "consume", "status"],
+                         help="tail：从 --offset 起输出事件；consume：输出消费者未处理的事件并确认；status：日志概况")
+    changes.add_argument("--offset", type=int, default=0, help="tail 的起始offset")
+    changes.add_argument("--consumer", help="consume 的消费者名字")
+    changes.add_argument("--limit", type=int, help="最多输出的事件数")
+    changes.add_argument("--follow", action="store_true", help="持续跟随新事件（Ctrl+C 结束）")
+    changes.add_argument("--log-dir", default=CHANGE_LOG_CONFIG["log_dir"], help="事件日志目录")
+    changes.set_defaults(func=cmd_changes)
+
+    daemon = subparsers.add_parser("daemon", help="启动常驻爬取服务")
+    daemon.add_argument("--host", default=DAEMON_CONFIG["host"], help="监听地址")
+    daemon.add_argument("--port", type=int, default=DAEMON_CONFIG["port"], help="监听端口")
+    daemon.add_argument("--headless", action="store_true", help="使用无头模式")
+    daemon.add_argument("--backend", **backend_option)
+    daemon.set_defaults(func=cmd_daemon)
+
+    dsn_option = {"help": "任务表地址（sqlite:///路径 或 postgresql://...），默认取环境变量或配置"}
+
+    enqueue = subparsers.add_parser("enqueue", help="把爬取单元加入共享任务表")
+    enqueue.add_argument("platform", choices=["bilibili", "douyin"])
+    enqueue.add_argument("--content", default=str(DOUYIN_CONTENT_FILE), help="抖音视频URL文件")
+    enqueue.add_argument("--url", default=BILIBILI_URL, help="B站用户动态页面URL")
+    enqueue.add_argument("--start", default="05月01日", help="开始时间，如 05月01日")
+    enqueue.add_argument("--end", default="11月01日", help="结束时间，如 11月01日（按自然月切分为窗口）")
+    enqueue.add_argument("--dsn", **dsn_option)
+    enqueue.set_defaults(func=cmd_enqueue)
+
+    worker = subparsers.add_parser("worker", help="从共享任务表领取并执行爬取单元")
+    worker.add_argument("--kinds", nargs="+", choices=["douyin_video", "bilibili_window"], help="只领取这些类型")
+    worker.add_argument("--worker-id", help="工作机标识，默认 主机名:进程号")
+    worker.add_argument("--exit-when-idle", action="store_true", help="没有可领取的单元时退出")
+    worker.add_argument("--headless", action="store_true", help="使用无头模式")
+    worker.add_argument("--backend", **backend_option)
+    worker.add_argument("--dsn", **dsn_option)
+    worker.set_defaults(func=cmd_worker)
+
+    queue = subparsers.add_parser("queue", help="查看共享任务表进度")
+    queue.add_argument("--export", action="store_true", help="汇总已完成单元的结果并导出")
+    queue.add_argument("--output-dir", default=data_dir, help="导出目录")
+    queue.add_argument("--dsn", **dsn_option)
+    queue.set_defaults(func=cmd_queue)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行主函数"""
+    args = build_parser().parse_args(argv)
+    if args.command != "accounts":
+        from src.common.log_setup import setup_logging
+
+        setup_logging()
+
+    from src.common.command_trace import command_trace_session
+    from src.common.profiling import profiling_session
+
+    with profiling_session(args), command_trace_session(args):
+        return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
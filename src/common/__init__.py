@@ -0,0 +1,4 @@
+"""
+公共模块
+提供两个平台共用的基础设施（HTTP客户端等）
+"""
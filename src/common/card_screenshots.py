@@ -0,0 +1,272 @@
+"""
+卡片截图存档
+
+爬取时为每张内容卡片保存一张截图，作为客户报告中“发布时的样子”的凭证：
+- 每轮滚动只截一次视口（get_screenshot_as_png），卡片位置由一次脚本调用取回
+- 裁剪和编码（WebP，或 Pillow 支持时的 AVIF）在独立进程池中进行，爬取线程提交后立即返回，不等待编码
+- 去重：已经完整截到的卡片不再提交；只露出一部分的卡片在之后完整出现时替换；
+  像素完全相同的截图只保存一份，其余在清单中指向同一文件；
+  文件按引用计数，仍被其他卡片引用的文件不会被覆盖，不再被引用的文件删除
+- 结束时写出 manifest.json：内容ID → 文件、像素哈希、是否完整、截图时间
+
+需要 Pillow（pip install Pillow）
+"""
+
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 一次脚本调用取回视口大小、设备像素比和所有卡片相对视口的位置（与 BATCH_EXTRACT_SCRIPT 的卡片顺序一致）
+CARD_RECTS_SCRIPT = """
+const cards = Array.from(document.querySelectorAll(arguments[0]));
+return {
+    dpr: window.devicePixelRatio || 1,
+    viewport: [window.innerWidth, window.innerHeight],
+    rects: cards.map(card => {
+        const r = card.getBoundingClientRect();
+        return [r.left, r.top, r.width, r.height];
+    })
+};
+"""
+
+_FORMATS = {"webp": "WEBP", "avif": "AVIF", "png": "PNG"}
+
+# 一张卡片的裁剪任务：(内容ID, 裁剪框(左, 上, 右, 下，设备像素), 是否完整)
+Crop = Tuple[str, Tuple[int, int, int, int], bool]
+
+
+def _load_pillow():
+    try:
+        from PIL import Image, features
+    except ImportError as e:
+        raise ImportError("卡片截图需要安装 Pillow：pip install Pillow") from e
+    return Image, features
+
+
+def crop_and_encode(png: bytes, crops: Sequence[Crop], image_format: str,
+                    quality: int) -> List[Tuple[str, str, bytes, bool, Tuple[int, int]]]:
+    """
+    从一张视口截图中裁剪出各卡片并编码（在工作进程中执行）
+
+    Args:
+        png: 视口截图
+        crops: 裁剪任务
+        image_format: webp / avif / png
+        quality: 有损编码质量
+
+    Returns:
+        List: (内容ID, 像素哈希, 编码后的图片, 是否完整, (宽, 高))
+    """
+    Image, _ = _load_pillow()
+    screenshot = Image.open(io.BytesIO(png)).convert("RGB")
+    results = []
+    for content_id, box, full in crops:
+        card = screenshot.crop(box)
+        digest = hashlib.sha1(card.tobytes()).hexdigest()
+        buffer = io.BytesIO()
+        card.save(buffer, format=_FORMATS[image_format], quality=quality)
+        results.append((content_id, digest, buffer.getvalue(), full, card.size))
+    return results
+
+
+class CardScreenshotArchiver:
+    """卡片截图存档（爬取线程调用 capture，编码在进程池中完成）"""
+
+    def __init__(self, output_dir: str, image_format: str = "webp", quality: int = 80,
+                 workers: Optional[int] = None, executor: Optional[Executor] = None):
+        """
+        初始化存档
+
+        Args:
+            output_dir: 截图目录
+            image_format: webp、avif（需要 Pillow 支持 AVIF）或 png
+            quality: 有损编码质量
+            workers: 编码进程数，默认CPU核数
+            executor: 自定义执行器（默认首次截图时创建进程池）
+        """
+        if image_format not in _FORMATS:
+            raise ValueError(f"不支持的截图格式: {image_format}（可用: {', '.join(_FORMATS)}）")
+        _, features = _load_pillow()
+        if image_format != "png" and not features.check(image_format):
+            raise ValueError(f"当前 Pillow 不支持 {image_format} 编码，请升级 Pillow 或改用其他格式")
+        self.output_dir = output_dir
+        self.image_format = image_format
+        self.quality = quality
+        self.workers = workers
+        self._executor = executor
+        self._own_executor = executor is None
+        # 每个编码任务的回调完成事件
+        self._pending: List[threading.Event] = []
+        # 内容ID → 已提交的可见面积，完整截到时为None（不再提交）
+        self._submitted: Dict[str, Optional[int]] = {}
+        self.manifest: Dict[str, Dict[str, Any]] = {}
+        self._files_by_digest: Dict[str, str] = {}
+        # 文件 → 引用它的内容ID、写入该文件的内容ID、像素哈希
+        self._file_refs: Dict[str, set] = {}
+        self._file_owner: Dict[str, str] = {}
+        self._file_digest: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.rounds = 0
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _plan(self, layout: Dict[str, Any], cards: Sequence[Tuple[str, int]]) -> List[Crop]:
+        """按卡片位置计算裁剪框，跳过已经截到的卡片"""
+        dpr = layout.get("dpr") or 1
+        view_width, view_height = layout["viewport"]
+        rects = layout["rects"]
+        crops = []
+        for content_id, index in cards:
+            if index >= len(rects) or not content_id:
+                continue
+            left, top, width, height = rects[index]
+            full = left >= 0 and top >= 0 and left + width <= view_width and top + height <= view_height
+            right, bottom = min(left + width, view_width), min(top + height, view_height)
+            left, top = max(left, 0), max(top, 0)
+            if right - left < 1 or bottom - top < 1:
+                continue
+            area = int((right - left) * (bottom - top))
+            previous = self._submitted.get(content_id, 0)
+            if previous is None or (not full and area <= previous):
+                continue
+            self._submitted[content_id] = None if full else area
+            box = (round(left * dpr), round(top * dpr), round(right * dpr), round(bottom * dpr))
+            crops.append((content_id, box, full))
+        return crops
+
+    def capture(self, driver: Any, card_selector: str, cards: Sequence[Tuple[str, int]]) -> int:
+        """
+        截取当前视口并提交裁剪编码任务（不等待编码完成）
+
+        Args:
+            driver: 浏览器
+            card_selector: 动态卡片选择器
+            cards: 要存档的卡片 (内容ID, 卡片在页面中的序号)
+
+        Returns:
+            int: 提交的卡片数
+        """
+        if not cards:
+            return 0
+        layout = driver.execute_script(CARD_RECTS_SCRIPT, card_selector)
+        crops = self._plan(layout, cards)
+        if not crops:
+            return 0
+        png = driver.get_screenshot_as_png()
+        self.rounds += 1
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        future = self._executor.submit(crop_and_encode, png, crops, self.image_format, self.quality)
+        captured_at = time.strftime("%Y-%m-%d %H:%M:%S")
+        round_index = self.rounds
+        stored = threading.Event()
+        self._pending.append(stored)
+        future.add_done_callback(lambda done: self._store(done, captured_at, round_index, stored))
+        return len(crops)
+
+    def _file_name(self, content_id: str) -> str:
+        """按内容ID取文件名；同名文件仍在使用（被其他卡片引用）时加序号"""
+        stem = re.sub(r"[^\w.-]+", "_", content_id)
+        file_name, index = f"{stem}.{self.image_format}", 1
+        while file_name in self._file_refs:
+            index += 1
+            file_name = f"{stem}-{index}.{self.image_format}"
+        return file_name
+
+    def _release(self, content_id: str, file_name: str):
+        """内容不再引用文件；没有任何引用时删除文件"""
+        refs = self._file_refs.get(file_name)
+        if refs is None:
+            return
+        refs.discard(content_id)
+        if refs:
+            return
+        del self._file_refs[file_name]
+        del self._file_owner[file_name]
+        self._files_by_digest.pop(self._file_digest.pop(file_name), None)
+        try:
+            os.remove(os.path.join(self.output_dir, file_name))
+        except FileNotFoundError:
+            pass
+
+    def _store(self, future: Future, captured_at: str, round_index: int, stored: threading.Event):
+        """编码完成回调：写文件、去重、更新清单"""
+        try:
+            self._store_results(future.result(), captured_at, round_index)
+        except Exception as e:
+            logger.warning(f"卡片截图存档失败: {str(e)}")
+        finally:
+            stored.set()
+
+    def _store_results(self, results: List[Tuple[str, str, bytes, bool, Tuple[int, int]]], captured_at: str,
+                       round_index: int):
+        with self._lock:
+            for content_id, digest, data, full, size in results:
+                existing = self.manifest.get(content_id)
+                if existing and existing["full"] and not full:
+                    continue
+                file_name = self._files_by_digest.get(digest)
+                if file_name is None:
+                    file_name = self._file_name(content_id)
+                    with open(os.path.join(self.output_dir, file_name), "wb") as f:
+                        f.write(data)
+                    self._files_by_digest[digest] = file_name
+                    self._file_refs[file_name] = set()
+                    self._file_owner[file_name] = content_id
+                    self._file_digest[file_name] = digest
+                self._file_refs[file_name].add(content_id)
+                if existing and existing["file"] != file_name:
+                    # 完整截图替换之前的部分截图，之前的文件没有其他引用时删除
+                    self._release(content_id, existing["file"])
+                duplicate = self._file_owner[file_name] != content_id
+                self.manifest[content_id] = {
+                    "file": file_name,
+                    "sha1": digest,
+                    "full": full,
+                    "width": size[0],
+                    "height": size[1],
+                    "round": round_index,
+                    "captured_at": captured_at,
+                    "duplicate": duplicate,
+                }
+
+    def close(self) -> str:
+        """
+        等待剩余的编码任务并写出清单
+
+        Returns:
+            str: 清单文件路径
+        """
+        for stored in self._pending:
+            stored.wait()
+        self._pending.clear()
+        if self._own_executor and self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+        path = os.path.join(self.output_dir, "manifest.json")
+        with self._lock:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+            files = len(self._file_refs)
+        logger.info(f"📸 卡片截图已存档 {len(self.manifest)} 张（{files} 个文件，{self.rounds} 次截图）: {self.output_dir}")
+        return path
+
+
+def archiver_from_config(output_dir: Optional[str] = None) -> CardScreenshotArchiver:
+    """按 SCREENSHOT_CONFIG 创建截图存档"""
+    from config.settings import SCREENSHOT_CONFIG
+
+    return CardScreenshotArchiver(output_dir or os.path.join(SCREENSHOT_CONFIG["output_dir"],
+                                                             time.strftime("%Y%m%d-%H%M%S")),
+                                  image_format=SCREENSHOT_CONFIG["format"], quality=SCREENSHOT_CONFIG["quality"],
+                                  workers=SCREENSHOT_CONFIG["workers"])
@@ -0,0 +1,610 @@
+"""
+Chrome DevTools Protocol 浏览器后端
+
+绕过chromedriver，直接通过DevTools websocket与Chrome通信：
+- 每个命令只有一次websocket往返，没有 WebDriver HTTP → chromedriver → CDP 的转发
+- 多个命令可以流水线发送（call_many），不必逐个等待
+- Runtime.evaluate 一次提取整页数据（evaluate）
+- 订阅网络事件（on / wait_for_event / response_body），不必轮询页面
+- 元素等远程对象放入按导航划分的对象组，打开新页面（或调用 release_objects）时整组释放；
+  document 句柄在同一页面内只取一次
+
+CdpDriver 实现了提取器用到的 WebDriver 接口子集（get、find_element(s)、execute_script、
+current_url、page_source、quit，元素的 text、get_attribute、size 等），
+因此可以直接替换 BilibiliArticleExtractor 和抖音统计函数中的 selenium driver
+"""
+
+import itertools
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.webdriver.common.by import By
+
+logger = logging.getLogger(__name__)
+
+
+# 常见的Chrome可执行文件位置
+CHROME_CANDIDATES = [
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+    "C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe",
+    "C:\\Program Files (x86)\\Google\\Chrome\\Application\\chrome.exe",
+    "google-chrome",
+    "google-chrome-stable",
+    "chromium",
+    "chromium-browser",
+]
+
+# get_attribute 的语义与selenium一致：优先返回同名属性（property），否则返回HTML属性（attribute）
+_GET_ATTRIBUTE_JS = """function(name) {
+    const prop = this[name];
+    if (prop !== undefined && prop !== null && typeof prop !== 'object' && typeof prop !== 'function') {
+        return String(prop);
+    }
+    return this.getAttribute(name);
+}"""
+
+_QUERY_ONE_JS = """function(kind, expr) {
+    if (kind === 'xpath') {
+        return document.evaluate(expr, this, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    }
+    return this.querySelector(expr);
+}"""
+
+_QUERY_ALL_JS = """function(kind, expr) {
+    if (kind === 'xpath') {
+        const result = document.evaluate(expr, this, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        const nodes = [];
+        for (let i = 0; i < result.snapshotLength; i++) nodes.push(result.snapshotItem(i));
+        return nodes;
+    }
+    return Array.from(this.querySelectorAll(expr));
+}"""
+
+
+class CdpError(Exception):
+    """DevTools协议调用返回错误"""
+
+
+def _to_query(by: str, value: str) -> Tuple[str, str]:
+    """将selenium定位方式转换为 (css|xpath, 表达式)"""
+    if by == By.CSS_SELECTOR:
+        return "css", value
+    if by == By.XPATH:
+        return "xpath", value
+    if by == By.TAG_NAME:
+        return "css", value
+    if by == By.ID:
+        return "css", f'[id="{value}"]'
+    if by == By.CLASS_NAME:
+        return "css", f".{value}"
+    if by == By.NAME:
+        return "css", f'[name="{value}"]'
+    raise ValueError(f"CDP后端不支持的定位方式: {by}")
+
+
+class CdpConnection:
+    """DevTools websocket连接：后台线程收消息，按id匹配命令结果，其余分发为事件"""
+
+    def __init__(self, ws_url: str, timeout: float = 30):
+        """
+        建立连接
+
+        Args:
+            ws_url: DevTools websocket地址
+            timeout: 默认命令超时（秒）
+        """
+        import websocket
+
+        self.timeout = timeout
+        self._ws = websocket.create_connection(ws_url, timeout=timeout, suppress_origin=True,
+                                               enable_multithread=True)
+        self._ws.settimeout(None)
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Future] = {}
+        self._listeners: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._reader = threading.Thread(target=self._read_loop, name="cdp-reader", daemon=True)
+        self._reader.start()
+
+    def _read_loop(self):
+        while not self._closed:
+            try:
+                raw = self._ws.recv()
+            except Exception as e:
+                if not self._closed:
+                    logger.warning(f"DevTools连接已断开: {str(e)}")
+                break
+            if not raw:
+                continue
+            message = json.loads(raw)
+
+            if "id" in message:
+                with self._lock:
+                    future = self._pending.pop(message["id"], None)
+                if future is None:
+                    continue
+                if "error" in message:
+                    future.set_exception(CdpError(message["error"].get("message", str(message["error"]))))
+                else:
+                    future.set_result(message.get("result", {}))
+                continue
+
+            with self._lock:
+                listeners = list(self._listeners.get(message.get("method", ""), []))
+            for listener in listeners:
+                try:
+                    listener(message.get("params", {}))
+                except Exception as e:
+                    logger.warning(f"处理DevTools事件 {message.get('method')} 时出错: {str(e)}")
+
+        # 连接断开后让所有等待中的命令失败
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(CdpError("DevTools连接已关闭"))
+
+    def send(self, method: str, params: Optional[Dict[str, Any]] = None) -> Future:
+        """
+        发送命令，不等待结果
+
+        Returns:
+            Future: 命令结果
+        """
+        command_id = next(self._ids)
+        future: Future = Future()
+        with self._lock:
+            self._pending[command_id] = future
+        self._ws.send(json.dumps({"id": command_id, "method": method, "params": params or {}}))
+        return future
+
+    def call(self, method: str, params: Optional[Dict[str, Any]] = None,
+             timeout: Optional[float] = None) -> Dict[str, Any]:
+        """发送命令并等待结果"""
+        return self._wait(self.send(method, params), method, timeout)
+
+    def call_many(self, commands: Sequence[Tuple[str, Optional[Dict[str, Any]]]],
+                  timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        流水线发送多个命令：全部发出后再统一等待结果
+
+        Args:
+            commands: [(方法名, 参数)]
+            timeout: 每个命令的超时
+
+        Returns:
+            List[Dict]: 与命令顺序一致的结果
+        """
+        futures = [(method, self.send(method, params)) for method, params in commands]
+        return [self._wait(future, method, timeout) for method, future in futures]
+
+    def _wait(self, future: Future, method: str, timeout: Optional[float]) -> Dict[str, Any]:
+        try:
+            return future.result(timeout if timeout is not None else self.timeout)
+        except FutureTimeoutError:
+            raise TimeoutException(f"DevTools命令超时: {method}")
+
+    def on(self, event: str, callback: Callable[[Dict[str, Any]], None]):
+        """订阅事件"""
+        with self._lock:
+            self._listeners.setdefault(event, []).append(callback)
+
+    def off(self, event: str, callback: Callable[[Dict[str, Any]], None]):
+        """取消订阅事件"""
+        with self._lock:
+            if callback in self._listeners.get(event, []):
+                self._listeners[event].remove(callback)
+
+    def close(self):
+        """关闭连接"""
+        self._closed = True
+        try:
+            self._ws.close()
+        except Exception:
+            pass
+
+
+class CdpElement:
+    """页面元素（对应一个远程对象），接口与selenium WebElement一致的部分"""
+
+    def __init__(self, driver: "CdpDriver", object_id: str):
+        self._driver = driver
+        self.object_id = object_id
+
+    def _call(self, function: str, *args: Any) -> Any:
+        return self._driver.call_function(self.object_id, function, *args)
+
+    def find_element(self, by: str = By.CSS_SELECTOR, value: str = "") -> "CdpElement":
+        """在当前元素内查找第一个匹配元素，找不到时抛出 NoSuchElementException"""
+        return self._driver._find_one(self.object_id, by, value)
+
+    def find_elements(self, by: str = By.CSS_SELECTOR, value: str = "") -> List["CdpElement"]:
+        """在当前元素内查找所有匹配元素"""
+        return self._driver._find_all(self.object_id, by, value)
+
+    @property
+    def text(self) -> str:
+        return self._call("function() { return this.innerText || ''; }")
+
+    @property
+    def tag_name(self) -> str:
+        return self._call("function() { return this.tagName.toLowerCase(); }")
+
+    @property
+    def size(self) -> Dict[str, int]:
+        return self._call("""function() {
+            const rect = this.getBoundingClientRect();
+            return {height: Math.round(rect.height), width: Math.round(rect.width)};
+        }""")
+
+    @property
+    def rect(self) -> Dict[str, float]:
+        return self._call("""function() {
+            const rect = this.getBoundingClientRect();
+            return {x: rect.x, y: rect.y, width: rect.width, height: rect.height};
+        }""")
+
+    def get_attribute(self, name: str) -> Optional[str]:
+        return self._call(_GET_ATTRIBUTE_JS, name)
+
+    def click(self):
+        self._call("function() { this.click(); }")
+
+
+class CdpDriver:
+    """直接通过DevTools协议控制Chrome的浏览器后端"""
+
+    def __init__(self, options=None, chrome_path: Optional[str] = None, port: Optional[int] = None,
+                 headless: bool = False, page_load_timeout: float = 30, startup_timeout: float = 20):
+        """
+        启动Chrome（或连接已在运行的Chrome）
+
+        Args:
+            options: selenium ChromeOptions，复用其中的启动参数（如 --user-data-dir 登录态目录）
+            chrome_path: Chrome可执行文件路径，默认自动查找
+            port: 已开启远程调试的Chrome端口，指定时不启动新浏览器
+            headless: 是否使用无头模式
+            page_load_timeout: 页面加载超时（秒）
+            startup_timeout: 浏览器启动超时（秒）
+        """
+        self.page_load_timeout = page_load_timeout
+        self._process: Optional[subprocess.Popen] = None
+        self._temp_profile: Optional[str] = None
+        # 当前对象组（每次导航换一组）和本组内缓存的 document 句柄
+        self._groups = itertools.count(1)
+        self._object_group = f"cdp-{next(self._groups)}"
+        self._document: Optional[str] = None
+
+        if port is None:
+            port = self._launch(options, chrome_path, headless, startup_timeout)
+        self.port = port
+
+        self.conn = CdpConnection(self._page_ws_url(port, startup_timeout), timeout=page_load_timeout)
+        # 页面自行跳转、刷新时执行上下文被清空，缓存的 document 句柄随之失效
+        self.conn.on("Runtime.executionContextsCleared", self._forget_document)
+        self.conn.call_many([("Page.enable", None), ("Runtime.enable", None), ("DOM.enable", None)])
+
+    # ---------- 启动与连接 ----------
+
+    def _launch(self, options, chrome_path: Optional[str], headless: bool, startup_timeout: float) -> int:
+        """启动Chrome并返回远程调试端口"""
+        binary = chrome_path or self._find_chrome()
+        arguments = [arg for arg in (getattr(options, "arguments", None) or [])
+                     if not arg.startswith("--remote-debugging-port")]
+
+        user_data_dir = next((arg.split("=", 1)[1] for arg in arguments if arg.startswith("--user-data-dir=")), None)
+        if user_data_dir is None:
+            self._temp_profile = tempfile.mkdtemp(prefix="cdp_profile_")
+            user_data_dir = self._temp_profile
+            arguments.append(f"--user-data-dir={user_data_dir}")
+        if headless and not any(arg.startswith("--headless") for arg in arguments):
+            arguments.append("--headless=new")
+
+        # 端口设为0由Chrome自行选择，实际端口写入 DevToolsActivePort 文件
+        active_port_file = os.path.join(user_data_dir, "DevToolsActivePort")
+        if os.path.exists(active_port_file):
+            os.remove(active_port_file)
+
+        command = [binary, "--remote-debugging-port=0", "--no-first-run", "--no-default-browser-check"]
+        command += arguments + ["about:blank"]
+        self._process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        deadline = time.time() + startup_timeout
+        while time.time() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"Chrome启动失败，退出码 {self._process.returncode}")
+            try:
+                with open(active_port_file, "r", encoding="utf-8") as f:
+                    first_line = f.readline().strip()
+                if first_line:
+                    logger.info(f"✅ Chrome已启动，DevTools端口 {first_line}")
+                    return int(first_line)
+            except OSError:
+                pass
+            time.sleep(0.1)
+        raise TimeoutException("等待Chrome DevTools端口超时")
+
+    @staticmethod
+    def _find_chrome() -> str:
+        from config.settings import BROWSER_CONFIG
+
+        configured = BROWSER_CONFIG.get("chrome_path")
+        for candidate in ([configured] if configured else []) + CHROME_CANDIDATES:
+            path = candidate if os.path.isabs(candidate) else shutil.which(candidate)
+            if path and os.path.exists(path):
+                return path
+        raise FileNotFoundError("未找到Chrome可执行文件，请在 BROWSER_CONFIG['chrome_path'] 中配置")
+
+    @staticmethod
+    def _page_ws_url(port: int, timeout: float) -> str:
+        """获取第一个页面标签的websocket地址"""
+        deadline = time.time() + timeout
+        while True:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/json/list", timeout=5) as response:
+                    targets = json.loads(response.read())
+                for target in targets:
+                    if target.get("type") == "page" and target.get("webSocketDebuggerUrl"):
+                        return target["webSocketDebuggerUrl"]
+            except OSError:
+                pass
+            if time.time() >= deadline:
+                raise TimeoutException("未找到可连接的Chrome页面")
+            time.sleep(0.2)
+
+    # ---------- 脚本执行 ----------
+
+    @staticmethod
+    def _unwrap(result: Dict[str, Any]) -> Dict[str, Any]:
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            description = details.get("exception", {}).get("description") or details.get("text", "")
+            raise CdpError(f"页面脚本执行出错: {description}")
+        return result["result"]
+
+    def evaluate(self, expression: str, await_promise: bool = False) -> Any:
+        """
+        在页面中执行表达式并按值返回结果（一次往返完成批量提取）
+
+        Args:
+            expression: JavaScript表达式
+            await_promise: 是否等待Promise完成
+
+        Returns:
+            Any: 表达式结果（JSON可序列化的值）
+        """
+        result = self.conn.call("Runtime.evaluate", {
+            "expression": expression,
+            "returnByValue": True,
+            "awaitPromise": await_promise,
+        })
+        return self._unwrap(result).get("value")
+
+    def evaluate_many(self, expressions: Sequence[str]) -> List[Any]:
+        """流水线执行多个表达式"""
+        results = self.conn.call_many([
+            ("Runtime.evaluate", {"expression": expression, "returnByValue": True})
+            for expression in expressions
+        ])
+        return [self._unwrap(result).get("value") for result in results]
+
+    def _call_function_raw(self, object_id: str, function: str, args: Sequence[Any],
+                           return_by_value: bool) -> Dict[str, Any]:
+        arguments = [
+            {"objectId": arg.object_id} if isinstance(arg, CdpElement) else {"value": arg}
+            for arg in args
+        ]
+        result = self.conn.call("Runtime.callFunctionOn", {
+            "objectId": object_id,
+            "functionDeclaration": function,
+            "arguments": arguments,
+            "returnByValue": return_by_value,
+            "objectGroup": self._object_group,
+        })
+        return self._unwrap(result)
+
+    def call_function(self, object_id: str, function: str, *args: Any) -> Any:
+        """以远程对象为this调用函数，按值返回结果"""
+        return self._call_function_raw(object_id, function, args, True).get("value")
+
+    def _document_id(self) -> str:
+        """当前页面 document 的远程对象（同一页面内只取一次）"""
+        document = self._document
+        if document is None:
+            document = self._unwrap(self.conn.call("Runtime.evaluate", {
+                "expression": "document",
+                "objectGroup": self._object_group,
+            }))["objectId"]
+            self._document = document
+        return document
+
+    def _forget_document(self, params: Optional[Dict[str, Any]] = None):
+        self._document = None
+
+    def release_objects(self):
+        """
+        释放当前对象组中的全部远程对象（之前取得的元素随之失效），之后的查找使用新的对象组
+
+        打开新页面时自动调用；在同一页面上长时间反复查找元素（如无限滚动列表）时可以按轮调用
+        """
+        group = self._object_group
+        self._object_group = f"cdp-{next(self._groups)}"
+        self._document = None
+        try:
+            self.conn.call("Runtime.releaseObjectGroup", {"objectGroup": group})
+        except CdpError as e:
+            logger.debug(f"释放对象组 {group} 失败: {str(e)}")
+
+    def _find_one(self, object_id: str, by: str, value: str) -> CdpElement:
+        kind, expr = _to_query(by, value)
+        remote = self._call_function_raw(object_id, _QUERY_ONE_JS, (kind, expr), False)
+        if remote.get("subtype") == "null" or "objectId" not in remote:
+            raise NoSuchElementException(f"未找到元素: {value}")
+        return CdpElement(self, remote["objectId"])
+
+    def _find_all(self, object_id: str, by: str, value: str) -> List[CdpElement]:
+        kind, expr = _to_query(by, value)
+        remote = self._call_function_raw(object_id, _QUERY_ALL_JS, (kind, expr), False)
+        properties = self.conn.call("Runtime.getProperties", {"objectId": remote["objectId"], "ownProperties": True})
+        # 中间数组只用于取元素，元素句柄留在对象组中，数组本身立即释放
+        self.conn.send("Runtime.releaseObject", {"objectId": remote["objectId"]})
+        elements = [
+            (int(prop["name"]), CdpElement(self, prop["value"]["objectId"]))
+            for prop in properties.get("result", [])
+            if prop["name"].isdigit() and "objectId" in prop.get("value", {})
+        ]
+        return [element for _, element in sorted(elements, key=lambda item: item[0])]
+
+    # ---------- WebDriver 兼容接口 ----------
+
+    def get(self, url: str):
+        """打开页面并等待 load 事件（上一个页面的远程对象整组释放）"""
+        self.release_objects()
+        loaded = threading.Event()
+
+        def on_load(params):
+            loaded.set()
+
+        self.conn.on("Page.loadEventFired", on_load)
+        try:
+            result = self.conn.call("Page.navigate", {"url": url})
+            if result.get("errorText"):
+                raise CdpError(f"页面打开失败: {result['errorText']}")
+            if not loaded.wait(self.page_load_timeout):
+                raise TimeoutException(f"页面加载超时: {url}")
+        finally:
+            self.conn.off("Page.loadEventFired", on_load)
+
+    def find_element(self, by: str = By.CSS_SELECTOR, value: str = "") -> CdpElement:
+        return self._find_one(self._document_id(), by, value)
+
+    def find_elements(self, by: str = By.CSS_SELECTOR, value: str = "") -> List[CdpElement]:
+        return self._find_all(self._document_id(), by, value)
+
+    def execute_script(self, script: str, *args: Any) -> Any:
+        """执行脚本，与selenium一致：脚本为函数体，通过 arguments 访问参数"""
+        function = f"function() {{ {script} }}"
+        if any(isinstance(arg, CdpElement) for arg in args):
+            return self.call_function(self._document_id(), function, *args)
+        return self.evaluate(f"({function}).apply(null, {json.dumps(list(args))})")
+
+    def execute_async_script(self, script: str, *args: Any) -> Any:
+        """执行异步脚本，与selenium一致：最后一个参数为完成回调，返回回调收到的值"""
+        function = f"function() {{ {script} }}"
+        arguments = json.dumps(list(args))
+        return self.evaluate(f"new Promise(resolve => ({function}).apply(null, {arguments}.concat([resolve])))",
+                             await_promise=True)
+
+    @property
+    def current_url(self) -> str:
+        return self.evaluate("location.href")
+
+    @property
+    def title(self) -> str:
+        return self.evaluate("document.title")
+
+    @property
+    def page_source(self) -> str:
+        return self.evaluate("document.documentElement.outerHTML")
+
+    def execute_cdp_cmd(self, cmd: str, cmd_args: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """与selenium Chrome一致的DevTools命令接口"""
+        return self.conn.call(cmd, cmd_args or {})
+
+    def get_cookies(self) -> List[Dict[str, Any]]:
+        """当前页面可见的Cookie（selenium格式）"""
+        from src.common.session_vault import _from_cdp_cookie
+
+        return [_from_cdp_cookie(cookie) for cookie in self.conn.call("Network.getCookies").get("cookies", [])]
+
+    def add_init_script(self, script: str):
+        """注册在每个新文档加载前执行的脚本（如隐藏 navigator.webdriver）"""
+        self.conn.call("Page.addScriptToEvaluateOnNewDocument", {"source": script})
+
+    def implicitly_wait(self, seconds: float):
+        """兼容接口：CDP后端不使用隐式等待"""
+
+    def set_page_load_timeout(self, seconds: float):
+        self.page_load_timeout = seconds
+
+    # ---------- 网络事件 ----------
+
+    def enable_network(self):
+        """开启网络事件（Network.requestWillBeSent、Network.responseReceived 等）"""
+        self.conn.call("Network.enable")
+
+    def on(self, event: str, callback: Callable[[Dict[str, Any]], None]):
+        """订阅DevTools事件"""
+        self.conn.on(event, callback)
+
+    def off(self, event: str, callback: Callable[[Dict[str, Any]], None]):
+        """取消订阅DevTools事件"""
+        self.conn.off(event, callback)
+
+    def wait_for_event(self, event: str, predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                       timeout: float = 10) -> Dict[str, Any]:
+        """
+        等待满足条件的事件（例如某个接口的响应），代替轮询页面
+
+        Args:
+            event: 事件名，如 Network.responseReceived
+            predicate: 事件参数的过滤函数
+            timeout: 超时（秒）
+
+        Returns:
+            Dict: 事件参数
+        """
+        matched: Dict[str, Any] = {}
+        done = threading.Event()
+
+        def listener(params):
+            if not done.is_set() and (predicate is None or predicate(params)):
+                matched.update(params)
+                done.set()
+
+        self.conn.on(event, listener)
+        try:
+            if not done.wait(timeout):
+                raise TimeoutException(f"等待事件超时: {event}")
+        finally:
+            self.conn.off(event, listener)
+        return matched
+
+    def response_body(self, request_id: str) -> str:
+        """获取某个网络请求的响应体"""
+        result = self.conn.call("Network.getResponseBody", {"requestId": request_id})
+        if result.get("base64Encoded"):
+            import base64
+
+            return base64.b64decode(result["body"]).decode("utf-8", errors="replace")
+        return result.get("body", "")
+
+    def quit(self):
+        """关闭浏览器"""
+        try:
+            if self._process is not None:
+                self.conn.send("Browser.close")
+        except Exception:
+            pass
+        self.conn.close()
+        if self._process is not None:
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+            self._process = None
+        if self._temp_profile:
+            shutil.rmtree(self._temp_profile, ignore_errors=True)
+            self._temp_profile = None
+
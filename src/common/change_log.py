@@ -0,0 +1,429 @@
+"""
+内容变更事件日志
+
+下游工具不再在每次运行后重读整个 xlsx 比对，而是读取只追加的 JSONL 事件日志，只处理有变化的内容：
+- post_created：第一次见到的内容（附完整记录）
+- metrics_changed：点赞、评论、转发（收藏）数有变化（附各计数的当前值和增量）
+- post_missing：本次运行范围内应该出现却没有出现的内容（已删除、隐藏或获取失败），同一内容只报告一次，
+  之后重新出现时再写入一次 post_created（restored 为 true）
+- 每个事件有单调递增的 offset；日志按大小切分为段文件（文件名为段内第一个 offset）
+- 消费者（ChangeLogConsumer）按名字保存已处理到的 offset，poll 取新事件、commit 确认，tail 持续跟随
+- 多个进程（如守护进程的多个爬取任务）可以同时写同一日志：追加和快照比较在日志目录的文件锁内进行，
+  每次追加前从磁盘重新读取下一个 offset
+
+按时间范围爬取B站动态（extract_contents_by_date_range）和批量提取抖音视频统计数据结束时写入事件：
+
+    change_log = ChangeLog("data/change_log")
+    change_log.capture(records, "bilibili", window=("2024-09-01", "2024-09-30"))
+    consumer = ChangeLogConsumer(change_log, "weekly-report")
+    for event in consumer.poll():
+        ...
+    consumer.commit()
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.common.records import BilibiliDynamic, DouyinVideo
+
+logger = logging.getLogger(__name__)
+
+POST_CREATED = "post_created"
+METRICS_CHANGED = "metrics_changed"
+POST_MISSING = "post_missing"
+
+# 参与变更比较的计数字段
+_METRICS = {
+    "bilibili": ("like_count", "comment_count", "repost_count"),
+    "douyin": ("like_count", "comment_count", "collect_count", "share_count"),
+}
+
+_SEGMENT_SUFFIX = ".jsonl"
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _atomic_write_json(path: str, value: Any):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(value, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _lock_file(f):
+    """对已打开的锁文件加排他锁（阻塞直到获得）"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            # LK_LOCK 重试约10秒后仍未获得时报错，继续等待
+            continue
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        return
+    f.seek(0)
+    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class ChangeLog:
+    """只追加的事件日志（按大小切分段文件）"""
+
+    def __init__(self, log_dir: str, segment_bytes: int = 8 * 1024 * 1024):
+        """
+        打开（或新建）事件日志
+
+        Args:
+            log_dir: 日志目录（段文件、内容快照、消费者offset）
+            segment_bytes: 段文件大小上限，超过后新事件写入新的段文件
+        """
+        self.log_dir = log_dir
+        self.segment_bytes = segment_bytes
+        self._lock = threading.RLock()
+        self._lock_path = os.path.join(log_dir, ".lock")
+        self._lock_file = None
+        self._lock_depth = 0
+        self._snapshot_path = os.path.join(log_dir, "snapshot.json")
+        os.makedirs(log_dir, exist_ok=True)
+        self._next_offset = self._recover_next_offset()
+
+    # ---------- 段文件 ----------
+
+    def segments(self) -> List[int]:
+        """全部段文件的起始 offset（升序）"""
+        return sorted(int(name[:-len(_SEGMENT_SUFFIX)]) for name in os.listdir(self.log_dir)
+                      if name.endswith(_SEGMENT_SUFFIX) and name[:-len(_SEGMENT_SUFFIX)].isdigit())
+
+    def _segment_path(self, base_offset: int) -> str:
+        return os.path.join(self.log_dir, f"{base_offset:020d}{_SEGMENT_SUFFIX}")
+
+    def _recover_next_offset(self, repair: bool = False) -> int:
+        """
+        由最后一个段文件的最后一条完整事件恢复下一个 offset
+
+        追加中途崩溃会留下不以换行结尾的半行，与 read 一样跳过；
+        repair 为True时（持有文件锁，没有进程正在写入）截掉半行，之后的事件从新的一行开始
+
+        Args:
+            repair: 是否截掉最后的半行
+
+        Returns:
+            int: 下一个 offset
+        """
+        segments = self.segments()
+        if not segments:
+            return 0
+        next_offset = segments[-1]
+        path = self._segment_path(segments[-1])
+        complete_bytes = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                complete_bytes += len(line)
+                if line.strip():
+                    next_offset = json.loads(line)["offset"] + 1
+        if repair and complete_bytes < os.path.getsize(path):
+            logger.warning(f"事件日志 {path} 末尾有不完整的事件（写入中断），已截掉")
+            with open(path, "r+b") as f:
+                f.truncate(complete_bytes)
+        return next_offset
+
+    @property
+    def next_offset(self) -> int:
+        return self._next_offset
+
+    @contextmanager
+    def _locked(self):
+        """
+        进程内线程锁 + 日志目录的文件锁（跨进程），可重入
+
+        同一进程再次打开锁文件加锁会等待自己，因此只在最外层获取文件锁
+        """
+        with self._lock:
+            if self._lock_depth == 0:
+                self._lock_file = open(self._lock_path, "a+b")
+                try:
+                    _lock_file(self._lock_file)
+                except BaseException:
+                    self._lock_file.close()
+                    raise
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    try:
+                        _unlock_file(self._lock_file)
+                    finally:
+                        self._lock_file.close()
+                        self._lock_file = None
+
+    def append(self, events: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        追加事件（分配 offset 和写入时间）
+
+        Args:
+            events: 事件，至少包含 type、platform、content_id
+
+        Returns:
+            List[Dict]: 写入的事件
+        """
+        written = []
+        with self._locked():
+            # 其他进程可能已经追加过事件，offset 以磁盘上的日志为准
+            self._next_offset = self._recover_next_offset(repair=True)
+            segments = self.segments()
+            path = self._segment_path(segments[-1]) if segments else self._segment_path(self._next_offset)
+            f = open(path, "a", encoding="utf-8")
+            try:
+                for event in events:
+                    if f.tell() >= self.segment_bytes:
+                        f.close()
+                        f = open(self._segment_path(self._next_offset), "a", encoding="utf-8")
+                    event = {"offset": self._next_offset, "ts": round(time.time(), 3), **event}
+                    f.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+                    self._next_offset += 1
+                    written.append(event)
+                f.flush()
+                os.fsync(f.fileno())
+            finally:
+                f.close()
+        return written
+
+    def read(self, offset: int = 0, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        从 offset 开始按顺序读取事件
+
+        Args:
+            offset: 起始 offset（含）
+            limit: 最多读取的事件数
+
+        Yields:
+            Dict: 事件
+        """
+        segments = self.segments()
+        start = max(bisect.bisect_right(segments, offset) - 1, 0)
+        count = 0
+        for base_offset in segments[start:]:
+            with open(self._segment_path(base_offset), encoding="utf-8") as f:
+                for line in f:
+                    # 写入中的最后一行可能不完整，留到下次读取
+                    if not line.endswith("\n"):
+                        return
+                    event = json.loads(line)
+                    if event["offset"] < offset:
+                        continue
+                    if limit is not None and count >= limit:
+                        return
+                    count += 1
+                    yield event
+
+    # ---------- 变更检测 ----------
+
+    def _load_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self._snapshot_path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def capture(self, records: Iterable[Any], platform: str, window: Optional[Tuple[str, str]] = None,
+                expected_ids: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        与上次保存的内容快照比较，写入新内容、计数变化和缺失内容事件
+
+        Args:
+            records: 本次运行得到的内容记录（BilibiliDynamic / DouyinVideo）
+            platform: 平台（bilibili / douyin）
+            window: 本次完整覆盖的发布日期范围 (YYYY-MM-DD, YYYY-MM-DD)，范围内已知但本次没有出现的内容报告缺失
+            expected_ids: 本次应该出现的内容ID，已知但本次没有出现的内容报告缺失
+
+        Returns:
+            List[Dict]: 写入的事件
+        """
+        with self._locked():
+            snapshot = self._load_snapshot()
+            events = self._diff(snapshot, records, platform, window, expected_ids)
+            written = self.append(events) if events else []
+            _atomic_write_json(self._snapshot_path, snapshot)
+        return written
+
+    @staticmethod
+    def _diff(snapshot: Dict[str, Dict[str, Any]], records: Iterable[Any], platform: str,
+              window: Optional[Tuple[str, str]], expected_ids: Optional[Iterable[str]]) -> List[Dict[str, Any]]:
+        """比较记录与快照，生成事件并更新快照"""
+        metrics = _METRICS[platform]
+        events, seen = [], set()
+        for record in records:
+            if not isinstance(record, (BilibiliDynamic, DouyinVideo)) or record.platform != platform:
+                continue
+            if not record.content_id or record.content_id == "未知":
+                continue
+            key = f"{platform}:{record.content_id}"
+            seen.add(key)
+            current = {name: getattr(record, name) for name in metrics}
+            previous = snapshot.get(key)
+            event = {"platform": platform, "content_id": record.content_id, "publish_date": record.publish_date}
+            if previous is None or previous["missing"]:
+                # 报告过缺失的内容重新出现时再次作为新内容
+                events.append({"type": POST_CREATED, **event, "metrics": current, "record": record.as_row(),
+                               "restored": previous is not None})
+            else:
+                deltas = {name: value - previous["metrics"].get(name, 0) for name, value in current.items()
+                          if value != previous["metrics"].get(name, 0)}
+                if deltas:
+                    events.append({"type": METRICS_CHANGED, **event, "metrics": current, "deltas": deltas})
+            snapshot[key] = {"publish_date": record.publish_date or (previous or {}).get("publish_date", ""),
+                             "metrics": current, "missing": False}
+
+        expected = {f"{platform}:{content_id}" for content_id in expected_ids or ()}
+        for key, state in snapshot.items():
+            if key in seen or state["missing"] or not key.startswith(f"{platform}:"):
+                continue
+            publish_date = state["publish_date"]
+            if key in expected or (window is not None and publish_date and window[0] <= publish_date <= window[1]):
+                events.append({"type": POST_MISSING, "platform": platform, "content_id": key.split(":", 1)[1],
+                               "publish_date": state["publish_date"], "metrics": state["metrics"]})
+                state["missing"] = True
+        return events
+
+
+class ChangeLogConsumer:
+    """按名字记录已处理 offset 的消费者"""
+
+    def __init__(self, change_log: ChangeLog, name: str):
+        """
+        Args:
+            change_log: 事件日志
+            name: 消费者名字，各消费者的 offset 互不影响
+        """
+        self.change_log = change_log
+        self.name = name
+        self._offset_path = os.path.join(change_log.log_dir, "consumers", f"{name}.json")
+        os.makedirs(os.path.dirname(self._offset_path), exist_ok=True)
+        self.offset = self._load_offset()
+        # poll 取到但尚未 commit 的位置
+        self._position = self.offset
+
+    def _load_offset(self) -> int:
+        try:
+            with open(self._offset_path, encoding="utf-8") as f:
+                return json.load(f)["offset"]
+        except FileNotFoundError:
+            return 0
+
+    def poll(self, max_events: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        取出尚未处理的事件（不自动确认，处理完后调用 commit）
+
+        Args:
+            max_events: 最多取出的事件数
+
+        Returns:
+            List[Dict]: 事件
+        """
+        events = list(self.change_log.read(self._position, limit=max_events))
+        if events:
+            self._position = events[-1]["offset"] + 1
+        return events
+
+    def commit(self, offset: Optional[int] = None):
+        """
+        确认处理到 offset（不含），默认确认到最近一次 poll 的位置
+
+        Args:
+            offset: 下次从该 offset 开始读取
+        """
+        self.offset = self._position if offset is None else offset
+        self._position = self.offset
+        _atomic_write_json(self._offset_path, {"offset": self.offset, "committed_at": time.time()})
+
+    def seek(self, offset: int):
+        """从 offset 重新读取（未提交）"""
+        self._position = offset
+
+    def tail(self, poll_interval: float = 1, should_stop: Optional[Callable[[], bool]] = None,
+             auto_commit: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        持续跟随新事件
+
+        Args:
+            poll_interval: 没有新事件时的等待间隔（秒）
+            should_stop: 每次等待前调用，返回True时结束
+            auto_commit: 每个事件交给调用方处理完成后自动确认
+
+        Yields:
+            Dict: 事件
+        """
+        while True:
+            events = self.poll()
+            for event in events:
+                yield event
+                if auto_commit:
+                    self.commit(event["offset"] + 1)
+            if not events:
+                if should_stop and should_stop():
+                    return
+                time.sleep(poll_interval)
+
+
+_shared_log: Optional[ChangeLog] = None
+_shared_lock = threading.Lock()
+
+
+def get_change_log() -> ChangeLog:
+    """获取按 CHANGE_LOG_CONFIG 配置的共享事件日志（进程内单例）"""
+    global _shared_log
+    with _shared_lock:
+        if _shared_log is None:
+            from config.settings import CHANGE_LOG_CONFIG
+
+            _shared_log = ChangeLog(CHANGE_LOG_CONFIG["log_dir"], segment_bytes=CHANGE_LOG_CONFIG["segment_bytes"])
+        return _shared_log
+
+
+def publish_changes(records: Iterable[Any], platform: str, **scope: Any) -> int:
+    """
+    爬取结束后写入变更事件（CHANGE_LOG_CONFIG["enabled"] 关闭时不写入），失败只记录警告
+
+    Args:
+        records: 本次运行得到的内容记录
+        platform: 平台
+        scope: 缺失检测范围，见 ChangeLog.capture 的 window / expected_ids
+
+    Returns:
+        int: 写入的事件数
+    """
+    from config.settings import CHANGE_LOG_CONFIG
+
+    if not CHANGE_LOG_CONFIG["enabled"]:
+        return 0
+    try:
+        events = get_change_log().capture(records, platform, **scope)
+    except Exception as e:
+        logger.warning(f"写入变更事件失败: {str(e)}")
+        return 0
+    counts = {}
+    for event in events:
+        counts[event["type"]] = counts.get(event["type"], 0) + 1
+    logger.info(f"📝 变更事件已写入 {len(events)} 条: {counts}")
+    return len(events)
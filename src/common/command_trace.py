@@ -0,0 +1,383 @@
+"""
+浏览器命令追踪
+
+打开 --trace-commands 后，提取器使用的浏览器（BilibiliArticleExtractor、抖音批量统计的 create_driver）
+被 TracingDriver 包装，每一次远程命令（find_element + 选择器、.text、.size、get_attribute、execute_script 等）
+都按命令和调用位置计数并记录耗时，运行结束时输出：
+- 每种命令的次数、总耗时和耗时分布（按毫秒分桶的直方图）
+- 每个 命令 × 调用位置 的次数和总耗时（调用位置取最近的两层项目代码，如 _extract_interaction_data > _find_text）
+- 每个页面（每次 get()）和每张卡片（trace_card 范围内）的命令数
+
+用于判断哪些选择器回退、逐元素读取值得删除或合并为一次脚本调用。未打开时不包装浏览器，没有任何开销
+"""
+
+import argparse
+import bisect
+import io
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 调用位置回溯时跳过的模块（追踪器自身、selenium内部、选择器注册表的通用查找）
+_SKIPPED_PATHS = (os.sep + "command_trace.py", os.sep + "selenium" + os.sep, os.sep + "selector_registry.py")
+
+
+def _is_element(value: Any) -> bool:
+    """是否为页面元素（selenium WebElement、CdpElement 或录制、回放包装）"""
+    return hasattr(value, "get_attribute") and hasattr(value, "find_element") and not hasattr(value, "get")
+
+
+def _call_site(depth: int = 2) -> str:
+    """最近的 depth 层项目代码帧，外层在前，最后附上最内层的文件和行号"""
+    frame = sys._getframe(1)
+    names: List[str] = []
+    location = ""
+    while frame is not None and len(names) < depth:
+        filename = frame.f_code.co_filename
+        if not any(path in filename for path in _SKIPPED_PATHS):
+            if not names:
+                location = f"{os.path.basename(filename)}:{frame.f_lineno}"
+            names.append(frame.f_code.co_name)
+        frame = frame.f_back
+    return f"{' > '.join(reversed(names))} ({location})" if names else "?"
+
+
+def _command_label(name: str, kind: str, args: tuple) -> str:
+    """命令的显示名：查找类命令带上选择器，get_attribute 带上属性名，属性读取以 . 开头"""
+    if kind == "get":
+        return f".{name}"
+    if name in ("find_element", "find_elements") and len(args) >= 2:
+        return f"{name}({args[0]}={args[1]!r})"
+    if name in ("get_attribute", "get_property", "get_dom_attribute", "value_of_css_property") and args:
+        return f"{name}({args[0]!r})"
+    return name
+
+
+class LatencyHistogram:
+    """按毫秒分桶的耗时直方图"""
+
+    def __init__(self, bounds_ms: List[float]):
+        self.bounds_ms = list(bounds_ms)
+        self.counts = [0] * (len(self.bounds_ms) + 1)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms: float):
+        self.counts[bisect.bisect_left(self.bounds_ms, ms)] += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def percentile(self, fraction: float) -> float:
+        """按桶估算的分位数（返回所在桶的上界，最后一个桶返回最大值）"""
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return self.bounds_ms[index] if index < len(self.bounds_ms) else self.max_ms
+        return 0.0
+
+    def buckets(self) -> Dict[str, int]:
+        labels = [f"<={bound:g}ms" for bound in self.bounds_ms] + [f">{self.bounds_ms[-1]:g}ms"]
+        return {label: count for label, count in zip(labels, self.counts) if count}
+
+
+class CommandTracer:
+    """浏览器命令统计（多个浏览器、多个线程共用）"""
+
+    def __init__(self, output_dir: Optional[str] = None, bounds_ms: Optional[List[float]] = None,
+                 top_n: int = 20, clock: Callable[[], float] = time.perf_counter):
+        """
+        初始化追踪器
+
+        Args:
+            output_dir: 报告目录，为None时只写日志
+            bounds_ms: 直方图分桶上界（毫秒）
+            top_n: 报告中列出的 命令 × 调用位置 数
+            clock: 计时函数
+        """
+        self.output_dir = output_dir
+        self.bounds_ms = bounds_ms or [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+        self.top_n = top_n
+        self.clock = clock
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.sites: Dict[Tuple[str, str], List[float]] = defaultdict(lambda: [0, 0.0])
+        self.page_commands: List[Tuple[str, int]] = []
+        self.card_commands: List[int] = []
+        self._current = threading.local()
+        self._lock = threading.Lock()
+
+    def record(self, name: str, kind: str, args: tuple, seconds: float, site: str):
+        """记录一次命令"""
+        ms = seconds * 1000
+        label = _command_label(name, kind, args)
+        with self._lock:
+            histogram = self.histograms.get(label if kind == "get" else name)
+            if histogram is None:
+                histogram = self.histograms[label if kind == "get" else name] = LatencyHistogram(self.bounds_ms)
+            histogram.add(ms)
+            site_stats = self.sites[(label, site)]
+            site_stats[0] += 1
+            site_stats[1] += ms
+            if self.page_commands:
+                url, count = self.page_commands[-1]
+                self.page_commands[-1] = (url, count + 1)
+        if getattr(self._current, "card", None) is not None:
+            self._current.card += 1
+
+    def page(self, url: str):
+        """开始一个新页面（get() 时调用），之后的命令计入该页面"""
+        with self._lock:
+            self.page_commands.append((url, 0))
+
+    @contextmanager
+    def card(self) -> Iterator[None]:
+        """统计范围内的命令数作为一张卡片的命令数（嵌套时计入外层）"""
+        if getattr(self._current, "card", None) is not None:
+            yield
+            return
+        self._current.card = 0
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.card_commands.append(self._current.card)
+            self._current.card = None
+
+    # ---------- 报告 ----------
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        汇总统计
+
+        Returns:
+            Dict: commands（总命令数）、by_command（每种命令的次数、耗时和直方图）、
+                  by_site（命令 × 调用位置，按总耗时降序）、pages / cards（每页、每卡片命令数）
+        """
+        with self._lock:
+            by_command = [{
+                "command": name,
+                "count": histogram.count,
+                "total_ms": round(histogram.total_ms, 3),
+                "mean_ms": round(histogram.total_ms / histogram.count, 3),
+                "p50_ms": histogram.percentile(0.5),
+                "p95_ms": histogram.percentile(0.95),
+                "max_ms": round(histogram.max_ms, 3),
+                "histogram": histogram.buckets(),
+            } for name, histogram in self.histograms.items()]
+            by_site = [{"command": label, "site": site, "count": count, "total_ms": round(total_ms, 3)}
+                       for (label, site), (count, total_ms) in self.sites.items()]
+            pages = [count for _, count in self.page_commands]
+            cards = list(self.card_commands)
+
+        by_command.sort(key=lambda row: -row["total_ms"])
+        by_site.sort(key=lambda row: -row["total_ms"])
+        return {
+            "commands": sum(row["count"] for row in by_command),
+            "total_ms": round(sum(row["total_ms"] for row in by_command), 3),
+            "pages": {"count": len(pages), "commands_per_page": round(sum(pages) / len(pages), 1) if pages else 0,
+                      "max": max(pages, default=0)},
+            "cards": {"count": len(cards), "commands_per_card": round(sum(cards) / len(cards), 1) if cards else 0,
+                      "max": max(cards, default=0)},
+            "by_command": by_command,
+            "by_site": by_site,
+        }
+
+    def report(self) -> Dict[str, Any]:
+        """
+        把汇总写入日志（设置了 output_dir 时同时写出 commands.json 和 commands.txt）
+
+        Returns:
+            Dict: summary() 的结果
+        """
+        summary = self.summary()
+        text = io.StringIO()
+        text.write(f"共 {summary['commands']} 条命令，耗时 {summary['total_ms'] / 1000:.2f} 秒；"
+                   f"{summary['pages']['count']} 个页面，平均每页 {summary['pages']['commands_per_page']} 条；"
+                   f"{summary['cards']['count']} 张卡片，平均每张 {summary['cards']['commands_per_card']} 条"
+                   f"（最多 {summary['cards']['max']} 条）\n")
+        text.write("\n命令（次数 / 总耗时ms / 平均 / P95 / 最大）\n")
+        for row in summary["by_command"]:
+            text.write(f"  {row['count']:8d}  {row['total_ms']:10.1f}  {row['mean_ms']:8.2f}  {row['p95_ms']:8g}  "
+                       f"{row['max_ms']:8.1f}  {row['command']}\n")
+        text.write(f"\nTop {self.top_n} 命令 × 调用位置（次数 / 总耗时ms）\n")
+        for row in summary["by_site"][:self.top_n]:
+            text.write(f"  {row['count']:8d}  {row['total_ms']:10.1f}  {row['command']}  @ {row['site']}\n")
+
+        if self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(os.path.join(self.output_dir, "commands.json"), "w", encoding="utf-8") as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+            with open(os.path.join(self.output_dir, "commands.txt"), "w", encoding="utf-8") as f:
+                f.write(text.getvalue())
+        logger.info(f"🔎 浏览器命令统计" + (f"已写入 {self.output_dir}" if self.output_dir else "") +
+                    f"\n{text.getvalue()}")
+        return summary
+
+
+class TracingElement:
+    """追踪中的页面元素：转发到真实元素并记录命令"""
+
+    def __init__(self, driver: "TracingDriver", element: Any):
+        self._driver = driver
+        self._element = element
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            return getattr(self._element, name)
+        return self._driver._proxy(self._element, name)
+
+
+class TracingDriver:
+    """追踪浏览器命令的包装器，接口与被包装的浏览器一致"""
+
+    def __init__(self, driver: Any, tracer: CommandTracer):
+        """
+        Args:
+            driver: 浏览器（selenium WebDriver、CdpDriver，或录制、回放包装）
+            tracer: 命令统计
+        """
+        self._driver = driver
+        self._tracer = tracer
+
+    def _wrap(self, value: Any) -> Any:
+        """把返回值中的元素包装为 TracingElement"""
+        if isinstance(value, TracingElement):
+            return value
+        if _is_element(value):
+            return TracingElement(self, value)
+        if isinstance(value, list):
+            return [self._wrap(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self._wrap(item) for key, item in value.items()}
+        return value
+
+    @staticmethod
+    def _unwrap(value: Any) -> Any:
+        """把参数中的 TracingElement 还原为被包装的元素"""
+        if isinstance(value, TracingElement):
+            return value._element
+        if isinstance(value, (list, tuple)):
+            return type(value)(TracingDriver._unwrap(item) for item in value)
+        if isinstance(value, dict):
+            return {key: TracingDriver._unwrap(item) for key, item in value.items()}
+        return value
+
+    def _traced(self, name: str, kind: str, args: tuple, func: Callable[[], Any]) -> Any:
+        started = self._tracer.clock()
+        try:
+            return self._wrap(func())
+        finally:
+            self._tracer.record(name, kind, args, self._tracer.clock() - started, _call_site())
+
+    def _proxy(self, obj: Any, name: str) -> Any:
+        started = self._tracer.clock()
+        attr = getattr(obj, name)
+        if not callable(attr):
+            # 属性读取（.text、.size、.current_url 等）本身就是一次远程命令
+            self._tracer.record(name, "get", (), self._tracer.clock() - started, _call_site())
+            return self._wrap(attr)
+
+        def call(*args, **kwargs):
+            return self._traced(name, "call", args, lambda: attr(*self._unwrap(args), **self._unwrap(kwargs)))
+        return call
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            return getattr(self._driver, name)
+        return self._proxy(self._driver, name)
+
+    def get(self, url: str):
+        """打开页面，之后的命令计入新页面"""
+        self._tracer.page(url)
+        return self._traced("get", "call", (url,), lambda: self._driver.get(url))
+
+
+_tracer: Optional[CommandTracer] = None
+
+
+def get_command_tracer() -> Optional[CommandTracer]:
+    """当前的命令统计（未启用时为None）"""
+    return _tracer
+
+
+def enable_command_trace(output_dir: Optional[str] = None) -> CommandTracer:
+    """
+    按 COMMAND_TRACE_CONFIG 启用命令追踪，之后创建的浏览器都会被包装
+
+    Args:
+        output_dir: 报告目录，默认 COMMAND_TRACE_CONFIG["output_dir"] 下按启动时间新建的子目录
+
+    Returns:
+        CommandTracer: 命令统计
+    """
+    global _tracer
+    from config.settings import COMMAND_TRACE_CONFIG
+
+    output_dir = output_dir or os.path.join(COMMAND_TRACE_CONFIG["output_dir"], time.strftime("%Y%m%d-%H%M%S"))
+    _tracer = CommandTracer(output_dir, bounds_ms=COMMAND_TRACE_CONFIG["latency_buckets_ms"],
+                            top_n=COMMAND_TRACE_CONFIG["top_n"])
+    return _tracer
+
+
+def disable_command_trace():
+    """停止追踪（已包装的浏览器继续计数到原来的统计）"""
+    global _tracer
+    _tracer = None
+
+
+def trace_driver(driver: Any) -> Any:
+    """启用追踪时返回包装后的浏览器，否则原样返回"""
+    if _tracer is None or driver is None or isinstance(driver, TracingDriver):
+        return driver
+    return TracingDriver(driver, _tracer)
+
+
+def trace_card():
+    """把范围内的命令计为一张卡片（未启用追踪时不做任何事）"""
+    if _tracer is None:
+        return _no_trace()
+    return _tracer.card()
+
+
+@contextmanager
+def _no_trace() -> Iterator[None]:
+    yield
+
+
+def add_trace_arguments(parser: argparse.ArgumentParser):
+    """给入口的参数解析器添加 --trace-commands / --trace-dir 开关"""
+    parser.add_argument("--trace-commands", action="store_true",
+                        help="统计每条浏览器命令的次数、调用位置和耗时分布")
+    parser.add_argument("--trace-dir", help="命令统计报告目录，默认 output/command_trace/<启动时间>")
+
+
+@contextmanager
+def command_trace_session(args: argparse.Namespace) -> Iterator[Optional[CommandTracer]]:
+    """
+    按命令行开关启用追踪，流程结束（包括出错）时输出报告
+
+    Args:
+        args: 含 add_trace_arguments 添加的开关的参数
+    """
+    if not getattr(args, "trace_commands", False):
+        yield None
+        return
+    tracer = enable_command_trace(args.trace_dir)
+    try:
+        yield tracer
+    finally:
+        disable_command_trace()
+        tracer.report()
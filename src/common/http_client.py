@@ -0,0 +1,268 @@
+"""
+HTTP客户端模块
+
+所有不经过浏览器的请求（接口、图片、服务端渲染页面）共用同一个客户端：
+- 按域名复用连接池（keep-alive）
+- 磁盘缓存，遵循 ETag / Last-Modified / Cache-Control: max-age
+- 按URL类别配置缓存有效期，覆盖服务端声明
+- 统计缓存命中、重新验证、未命中次数
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    """解析 Cache-Control 头为指令字典"""
+    directives: Dict[str, Optional[str]] = {}
+    for part in value.split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        name, _, arg = part.partition("=")
+        directives[name.strip()] = arg.strip().strip('"') or None
+    return directives
+
+
+class HttpCache:
+    """磁盘HTTP缓存：每个URL对应一个元数据文件和一个响应体文件"""
+
+    def __init__(self, cache_dir: str):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url: str) -> Tuple[str, str]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        subdir = os.path.join(self.cache_dir, key[:2])
+        return os.path.join(subdir, f"{key}.json"), os.path.join(subdir, f"{key}.body")
+
+    def load(self, url: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        """
+        读取缓存条目
+
+        Returns:
+            Tuple: (元数据, 响应体)，不存在时返回None
+        """
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        return meta, body
+
+    def store(self, url: str, meta: Dict[str, Any], body: Optional[bytes] = None):
+        """
+        写入缓存条目（先写临时文件再替换，避免并发读到半个文件）
+
+        Args:
+            url: 请求URL
+            meta: 元数据
+            body: 响应体，为None时只更新元数据
+        """
+        meta_path, body_path = self._paths(url)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        if body is not None:
+            self._atomic_write(body_path, body)
+        self._atomic_write(meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+
+    @staticmethod
+    def _atomic_write(path: str, data: bytes):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+class CachedHttpClient:
+    """带条件请求缓存和连接池的HTTP客户端"""
+
+    def __init__(self, cache_dir: str, default_ttl: int = 0,
+                 ttl_overrides: Optional[List[Tuple[str, int]]] = None,
+                 pool_connections: int = 10, pool_maxsize: int = 10,
+                 timeout: float = 15, headers: Optional[Dict[str, str]] = None):
+        """
+        初始化HTTP客户端
+
+        Args:
+            cache_dir: 缓存目录
+            default_ttl: 响应未声明 max-age 时的新鲜期（秒），0表示每次都发条件请求重新验证
+            ttl_overrides: [(URL正则, 有效期秒数)]，按顺序匹配，命中时覆盖服务端声明
+            pool_connections: 连接池数量（按域名）
+            pool_maxsize: 每个连接池的最大连接数
+            timeout: 请求超时（秒）
+            headers: 默认请求头
+        """
+        self.cache = HttpCache(cache_dir)
+        self.default_ttl = default_ttl
+        self.ttl_overrides: List[Tuple[Pattern[str], int]] = [
+            (re.compile(pattern), ttl) for pattern, ttl in (ttl_overrides or [])
+        ]
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+        self._stats = {"hit": 0, "revalidated": 0, "miss": 0, "uncacheable": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """获取缓存统计（hit: 未发请求直接命中；revalidated: 304；miss: 下载新内容；uncacheable: 不可缓存）"""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def log_stats(self):
+        """输出缓存统计"""
+        stats = self.stats()
+        total = sum(stats.values())
+        served = stats["hit"] + stats["revalidated"]
+        ratio = served / total if total else 0.0
+        logger.info(f"📦 HTTP缓存统计: {stats}，缓存命中率 {ratio:.1%}")
+
+    def _ttl_for(self, url: str, cache_control: Dict[str, Optional[str]]) -> int:
+        """计算缓存有效期：URL类别覆盖 > max-age > 默认值"""
+        for pattern, ttl in self.ttl_overrides:
+            if pattern.search(url):
+                return ttl
+        max_age = cache_control.get("max-age")
+        if max_age is not None and max_age.isdigit():
+            return int(max_age)
+        return self.default_ttl
+
+    @staticmethod
+    def _build_response(url: str, meta: Dict[str, Any], body: bytes) -> requests.Response:
+        """用缓存内容构造响应对象"""
+        response = requests.Response()
+        response.status_code = meta["status"]
+        response.headers.update(meta["headers"])
+        response.url = url
+        response._content = body
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.from_cache = True
+        return response
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, use_cache: bool = True,
+            **kwargs) -> requests.Response:
+        """
+        发送GET请求，优先使用缓存
+
+        Args:
+            url: 请求URL
+            headers: 额外请求头
+            use_cache: 是否使用缓存
+            **kwargs: 透传给 requests.Session.get 的参数
+
+        Returns:
+            requests.Response: 响应对象，from_cache 属性表示是否来自缓存
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        request_headers = dict(headers or {})
+
+        cached = self.cache.load(url) if use_cache else None
+        if cached is not None:
+            meta, body = cached
+            if time.time() < meta["stored_at"] + meta["ttl"]:
+                self._count("hit")
+                logger.debug(f"缓存命中: {url}")
+                return self._build_response(url, meta, body)
+            if meta.get("etag"):
+                request_headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                request_headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = self.session.get(url, headers=request_headers, **kwargs)
+
+        if cached is not None and response.status_code == 304:
+            meta, body = cached
+            cache_control = _parse_cache_control(response.headers.get("Cache-Control", ""))
+            meta["stored_at"] = time.time()
+            meta["ttl"] = self._ttl_for(url, cache_control)
+            meta["etag"] = response.headers.get("ETag", meta.get("etag"))
+            meta["last_modified"] = response.headers.get("Last-Modified", meta.get("last_modified"))
+            self.cache.store(url, meta)
+            self._count("revalidated")
+            logger.debug(f"缓存重新验证: {url}")
+            return self._build_response(url, meta, body)
+
+        response.from_cache = False
+        cache_control = _parse_cache_control(response.headers.get("Cache-Control", ""))
+        if not use_cache or response.status_code != 200 or "no-store" in cache_control:
+            self._count("uncacheable")
+            return response
+
+        ttl = 0 if "no-cache" in cache_control else self._ttl_for(url, cache_control)
+        meta = {
+            "url": url,
+            "status": response.status_code,
+            "headers": {
+                name: value for name, value in response.headers.items()
+                if name.lower() not in ("content-encoding", "transfer-encoding", "content-length")
+            },
+            "stored_at": time.time(),
+            "ttl": ttl,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        self.cache.store(url, meta, response.content)
+        self._count("miss")
+        logger.debug(f"缓存未命中: {url}")
+        return response
+
+    def close(self):
+        """关闭连接池"""
+        self.session.close()
+
+
+_shared_client: Optional[CachedHttpClient] = None
+_shared_lock = threading.Lock()
+
+
+def get_http_client() -> CachedHttpClient:
+    """
+    获取按 HTTP_CACHE_CONFIG 配置的共享客户端（进程内单例，复用连接池和缓存）
+
+    Returns:
+        CachedHttpClient: 共享客户端
+    """
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            from config.settings import BROWSER_CONFIG, HTTP_CACHE_CONFIG
+
+            _shared_client = CachedHttpClient(
+                cache_dir=HTTP_CACHE_CONFIG["cache_dir"],
+                default_ttl=HTTP_CACHE_CONFIG["default_ttl"],
+                ttl_overrides=HTTP_CACHE_CONFIG["ttl_overrides"],
+                pool_connections=HTTP_CACHE_CONFIG["pool_connections"],
+                pool_maxsize=HTTP_CACHE_CONFIG["pool_maxsize"],
+                timeout=HTTP_CACHE_CONFIG["timeout"],
+                headers={"User-Agent": BROWSER_CONFIG["user_agent"]},
+            )
+        return _shared_client
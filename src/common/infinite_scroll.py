@@ -0,0 +1,225 @@
+"""
+无限滚动加载
+
+代替“按卡片高度估算滚动距离 + 固定等待”的滚动方式，B站动态和抖音作品列表共用：
+- 每轮直接跳到列表底部（滚动容器或整个页面，不用平滑滚动），让页面自己的加载哨兵进入视口
+- 在页面内等待加载信号：MutationObserver 发现卡片数增加（或最后一张卡片被替换）后的下一帧即返回，
+  每轮等待时间等于页面实际加载所需的时间，不额外留余量；IntersectionObserver 记录跳转后最后一张卡片是否进入视口
+- 列表结束：出现“没有更多”标记（且没有加载中标记），或连续 max_idle_rounds 轮超时没有新卡片
+- batches 按轮次返回新加载的卡片，调用方不再关心滚动距离和等待
+
+    scroller = feed_scroller(driver, "bilibili", card_selector)
+    for batch in scroller.batches(extract_cards):
+        handle(batch.cards)
+"""
+
+import logging
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from src.common.profiling import profile_stage
+
+logger = logging.getLogger(__name__)
+
+# 记录当前最后一张卡片（加载哨兵）并跳到列表底部，返回卡片数
+JUMP_SCRIPT = """
+const cards = document.querySelectorAll(arguments[0]);
+const container = arguments[1] ? document.querySelector(arguments[1]) : null;
+const last = cards.length ? cards[cards.length - 1] : null;
+const sentinel = window.__feedSentinel = {last: last, visible: false};
+if (last && window.IntersectionObserver) {
+    const observer = new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) {
+            sentinel.visible = true;
+            observer.disconnect();
+        }
+    });
+    observer.observe(last);
+}
+const target = container && container.scrollHeight > container.clientHeight
+    ? container : (document.scrollingElement || document.documentElement);
+target.scrollTo({top: target.scrollHeight, behavior: 'instant'});
+return cards.length;
+"""
+
+# 等待页面加载出新卡片、列表结束或超时（异步脚本，最后一个参数为完成回调）
+WAIT_SCRIPT = """
+const [cardSelector, containerSelector, before, timeoutMs, endSelector, loadingSelector, done] = arguments;
+const started = performance.now();
+const sentinel = window.__feedSentinel || {};
+const root = (containerSelector && document.querySelector(containerSelector)) || document.body;
+const shown = selector => {
+    const el = selector ? document.querySelector(selector) : null;
+    return !!el && el.getClientRects().length > 0;
+};
+const replaced = () => !!sentinel.last && !sentinel.last.isConnected;
+let finished = false, observer = null, timer = null;
+const finish = status => {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    clearTimeout(timer);
+    done({status: status, count: document.querySelectorAll(cardSelector).length, replaced: replaced(),
+          sentinel_visible: !!sentinel.visible, waited_ms: Math.round(performance.now() - started)});
+};
+const check = () => {
+    if (document.querySelectorAll(cardSelector).length > before || replaced()) {
+        // 同一批卡片通常在一次渲染中插入，下一帧再返回以取到整批
+        requestAnimationFrame(() => finish('loaded'));
+        return true;
+    }
+    if (shown(endSelector) && !shown(loadingSelector)) {
+        finish('end');
+        return true;
+    }
+    return false;
+};
+if (!check()) {
+    observer = new MutationObserver(check);
+    observer.observe(root, {childList: true, subtree: true});
+    timer = setTimeout(() => finish('timeout'), timeoutMs);
+}
+"""
+
+
+class ScrollBatch:
+    """一轮新加载的卡片"""
+
+    __slots__ = ("round_index", "cards", "start", "waited_ms")
+
+    def __init__(self, round_index: int, cards: List[Any], start: int, waited_ms: int = 0):
+        """
+        Args:
+            round_index: 轮次（从1开始，第1轮为打开页面时已有的卡片）
+            cards: 新卡片
+            start: 第一张新卡片在页面中的序号
+            waited_ms: 本轮等待页面加载的时间（毫秒）
+        """
+        self.round_index = round_index
+        self.cards = cards
+        self.start = start
+        self.waited_ms = waited_ms
+
+
+class InfiniteScroller:
+    """无限滚动列表的加载驱动"""
+
+    def __init__(self, driver: Any, card_selector: str, container_selector: Optional[str] = None,
+                 end_selector: Optional[str] = None, loading_selector: Optional[str] = None,
+                 timeout: float = 10, max_idle_rounds: int = 2, stage: str = "scroll"):
+        """
+        初始化滚动驱动
+
+        Args:
+            driver: 浏览器（selenium、cdp，或录制、回放包装）
+            card_selector: 卡片选择器
+            container_selector: 列表容器选择器，默认整个页面（容器本身可滚动时滚动容器）
+            end_selector: 列表结束标记（如“没有更多了”），出现即结束
+            loading_selector: 加载中标记，显示时不按结束标记判断
+            timeout: 每轮等待新卡片的超时（秒），需小于浏览器脚本超时
+            max_idle_rounds: 连续多少轮超时没有新卡片视为列表结束
+            stage: 性能分析阶段名，每轮跳转和等待计入该阶段
+        """
+        self.driver = driver
+        self.card_selector = card_selector
+        self.container_selector = container_selector
+        self.end_selector = end_selector
+        self.loading_selector = loading_selector
+        self.timeout = timeout
+        self.max_idle_rounds = max_idle_rounds
+        self.stage = stage
+        self.reached_end = False
+        self.rounds = 0
+
+    def _round(self, known: int) -> Dict[str, Any]:
+        """跳到底部并等待一轮"""
+        with profile_stage(self.stage):
+            before = self.driver.execute_script(JUMP_SCRIPT, self.card_selector, self.container_selector)
+            outcome = self.driver.execute_async_script(
+                WAIT_SCRIPT, self.card_selector, self.container_selector, max(before or 0, known),
+                int(self.timeout * 1000), self.end_selector, self.loading_selector,
+            )
+        self.rounds += 1
+        return outcome or {"status": "timeout", "count": before or 0, "replaced": False, "waited_ms": 0}
+
+    def advance(self, known: int) -> Optional[Dict[str, Any]]:
+        """
+        加载下一批卡片
+
+        Args:
+            known: 已经处理过的卡片数
+
+        Returns:
+            Dict: status、count（卡片数）、replaced（已有卡片被替换）、waited_ms；列表已结束时返回None
+        """
+        if self.reached_end:
+            return None
+        idle = 0
+        while True:
+            outcome = self._round(known)
+            if outcome["count"] > known or outcome["replaced"]:
+                if outcome["status"] == "end":
+                    # 最后一批和结束标记一起出现，交给调用方处理后结束
+                    self.reached_end = True
+                logger.info("⏬ 加载 %d 张新卡片，等待 %d 毫秒", outcome["count"] - known, outcome["waited_ms"])
+                return outcome
+            idle += 1
+            if outcome["status"] == "end" or idle >= self.max_idle_rounds:
+                reason = "结束标记" if outcome["status"] == "end" else "无新卡片"
+                logger.info("⏹️ 列表已到底（%s），共 %d 张卡片", reason, outcome["count"])
+                self.reached_end = True
+                return None
+
+    def batches(self, extract: Callable[[], List[Any]], max_rounds: Optional[int] = None) -> Iterator[ScrollBatch]:
+        """
+        按轮次返回新加载的卡片，直到列表结束、达到轮次上限或调用方停止迭代
+
+        Args:
+            extract: 取回页面上全部卡片（页面顺序，与 card_selector 一致），如 extract_visible_cards
+            max_rounds: 最多返回的轮次
+
+        Yields:
+            ScrollBatch: 新卡片（已有卡片被替换时返回全部卡片，由调用方去重）
+        """
+        known, waited_ms, replaced = 0, 0, False
+        round_index = 0
+        while True:
+            cards = extract()
+            start = 0 if replaced or len(cards) < known else known
+            round_index += 1
+            yield ScrollBatch(round_index, cards[start:], start, waited_ms)
+            known = len(cards)
+            if max_rounds is not None and round_index >= max_rounds:
+                return
+            outcome = self.advance(known)
+            if outcome is None:
+                return
+            waited_ms, replaced = outcome["waited_ms"], outcome["replaced"]
+
+
+def feed_scroller(driver: Any, platform: str, card_selector: Optional[str] = None,
+                  **overrides: Any) -> InfiniteScroller:
+    """
+    按 SCROLL_CONFIG 创建某个平台列表的滚动驱动
+
+    Args:
+        driver: 浏览器
+        platform: bilibili / douyin
+        card_selector: 卡片选择器，默认使用配置中的选择器
+        overrides: 覆盖 InfiniteScroller 的其他参数
+
+    Returns:
+        InfiniteScroller: 滚动驱动
+    """
+    from config.settings import SCROLL_CONFIG
+
+    feed = SCROLL_CONFIG["feeds"][platform]
+    options = {
+        "container_selector": feed.get("container"),
+        "end_selector": feed.get("end"),
+        "loading_selector": feed.get("loading"),
+        "timeout": SCROLL_CONFIG["timeout"],
+        "max_idle_rounds": SCROLL_CONFIG["max_idle_rounds"],
+        "stage": f"{platform}_scroll",
+        **overrides,
+    }
+    return InfiniteScroller(driver, card_selector or feed["cards"], **options)
@@ -0,0 +1,320 @@
+"""
+日志初始化
+
+- 爬取线程只把日志记录放入队列（QueueHandler），由后台线程（QueueListener）格式化并写入，
+  不在爬取线程上做字符串格式化和磁盘写入
+- 消息使用 %s 占位符延迟格式化：被级别或采样过滤掉的记录不会格式化
+- 文件日志为每行一个JSON对象，带 run_id / account / content_id 字段，便于查询
+- 逐卡片的高频日志走单独的 logger（card_logger），按级别采样
+- 文件按 LOG_CONFIG 的 rotation 大小轮转，超过 retention 的旧文件在初始化时清理
+- loguru（导出模块使用）的日志也转入同一队列
+- 子进程（如导出进程）的日志经多进程队列回到主进程，由主进程的监听线程写入
+"""
+
+import atexit
+import contextlib
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+# 当前任务上下文，由 log_context 设置，QueueHandler 在放入队列前写入记录
+_CONTEXT_FIELDS = ("run_id", "account", "content_id")
+_context: contextvars.ContextVar = contextvars.ContextVar("log_context", default={})
+# 进程级默认字段（setup_logging 的 run_id），新线程没有继承上下文时使用
+_process_fields: Dict[str, Any] = {}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+_setup_lock = threading.Lock()
+
+
+def card_logger(name: str) -> logging.Logger:
+    """
+    获取逐卡片高频日志使用的 logger（会按 LOG_CONFIG["sampling"] 采样）
+
+    Args:
+        name: 模块名（__name__）
+
+    Returns:
+        logging.Logger: name + ".cards"
+    """
+    return logging.getLogger(f"{name}.cards")
+
+
+@contextlib.contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    """
+    在代码块内为日志记录附加上下文字段
+
+    Args:
+        **fields: run_id / account / content_id
+    """
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def new_run_id() -> str:
+    """生成运行ID"""
+    return f"{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+def parse_size(text: str) -> int:
+    """解析 "10 MB" 形式的大小为字节数"""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]?B)\s*", text.upper())
+    if not match:
+        raise ValueError(f"无法解析大小: {text}")
+    units = {"B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+    return int(float(match.group(1)) * units[match.group(2)])
+
+
+def parse_duration(text: str) -> float:
+    """解析 "7 days" 形式的时长为秒数"""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*(second|minute|hour|day|week)s?\s*", text.lower())
+    if not match:
+        raise ValueError(f"无法解析时长: {text}")
+    units = {"second": 1, "minute": 60, "hour": 3600, "day": 86400, "week": 7 * 86400}
+    return float(match.group(1)) * units[match.group(2)]
+
+
+class ContextFilter(logging.Filter):
+    """在产生日志的线程上把上下文字段写入记录（上下文变量在监听线程上不可见）"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in {**_process_fields, **_context.get()}.items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    按级别采样名称以指定后缀结尾的 logger（确定性采样：比例为0.1时每10条保留1条）
+
+    不在 rates 中的级别全部保留
+    """
+
+    def __init__(self, suffixes, rates: Dict[str, float]):
+        super().__init__()
+        self.suffixes = tuple(suffixes)
+        self.rates = {logging.getLevelName(level): rate for level, rate in rates.items()}
+        self._counts: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not record.name.endswith(self.suffixes):
+            return True
+        rate = self.rates.get(record.levelno)
+        if rate is None or rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+        with self._lock:
+            count = self._counts.get(record.levelno, 0)
+            self._counts[record.levelno] = count + 1
+        return count % round(1 / rate) == 0
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    不在产生日志的线程上格式化消息的 QueueHandler
+
+    标准 QueueHandler.prepare 会先合并 msg 和 args，这里原样入队，由监听线程格式化
+    （同一进程内传递，不需要记录可被序列化）
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """每条记录输出为一行JSON"""
+
+    _RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "func": record.funcName,
+            "line": record.lineno,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in self._RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ContextTextFormatter(logging.Formatter):
+    """控制台文本格式，存在上下文字段时附在消息后"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        context = " ".join(f"{key}={getattr(record, key)}" for key in _CONTEXT_FIELDS if hasattr(record, key))
+        return f"{text} [{context}]" if context else text
+
+
+def _prune_old_logs(log_file: str, retention_seconds: float):
+    """删除超过保留期的轮转日志文件"""
+    directory = os.path.dirname(log_file) or "."
+    prefix = os.path.basename(log_file) + "."
+    cutoff = time.time() - retention_seconds
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.startswith(prefix) and os.path.getmtime(path) < cutoff:
+            os.remove(path)
+
+
+def _route_loguru(handler: Optional[logging.Handler], level: str = "INFO"):
+    """把 loguru 的日志转入同一个队列，handler 为None时恢复默认的stderr输出"""
+    try:
+        from loguru import logger as loguru_logger
+    except ImportError:
+        return
+    import sys
+
+    loguru_logger.remove()
+    if handler is None:
+        loguru_logger.add(sys.stderr)
+    else:
+        loguru_logger.add(handler, level=level, format="{message}")
+
+
+def setup_logging(run_id: Optional[str] = None, level: Optional[str] = None, console: bool = True,
+                  log_file: Optional[str] = None) -> str:
+    """
+    初始化日志（重复调用时只更新 run_id）
+
+    Args:
+        run_id: 本次运行的ID，默认自动生成
+        level: 日志级别，默认 LOG_CONFIG["level"]
+        console: 是否输出到控制台
+        log_file: JSON日志文件路径，默认 LOG_CONFIG["file"]
+
+    Returns:
+        str: 本次运行的ID
+    """
+    global _listener, _queue_handler
+    from config.settings import LOG_CONFIG
+
+    run_id = run_id or new_run_id()
+    _process_fields["run_id"] = run_id
+
+    with _setup_lock:
+        if _listener is not None:
+            return run_id
+
+        level = level or LOG_CONFIG["level"]
+        log_file = log_file or LOG_CONFIG["file"]
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        _prune_old_logs(log_file, parse_duration(LOG_CONFIG["retention"]))
+
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=parse_size(LOG_CONFIG["rotation"]), backupCount=LOG_CONFIG["backup_count"],
+            encoding="utf-8"
+        )
+        file_handler.setFormatter(JsonFormatter())
+        handlers = [file_handler]
+        if console:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(ContextTextFormatter(LOG_CONFIG["format"]))
+            handlers.append(console_handler)
+
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        _queue_handler = DeferredQueueHandler(log_queue)
+        _queue_handler.addFilter(ContextFilter())
+        _queue_handler.addFilter(SamplingFilter(LOG_CONFIG["sampled_loggers"], LOG_CONFIG["sampling"]))
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_queue_handler)
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        _route_loguru(_queue_handler, level)
+
+    return run_id
+
+
+@contextlib.contextmanager
+def child_process_logs(context: Any) -> Iterator[Optional[Any]]:
+    """
+    接收子进程日志的多进程队列
+
+    fork 出的子进程继承了本进程的 QueueHandler，但子进程中没有监听线程，记录会丢失；
+    子进程调用 forward_logging(队列) 后，记录经该队列转入本进程的日志队列
+
+    Args:
+        context: multiprocessing 上下文
+
+    Yields:
+        Queue: 传给子进程的队列，日志未初始化时为None（子进程直接输出到继承的stderr）
+    """
+    handler = _queue_handler
+    if handler is None:
+        yield None
+        return
+    log_queue = context.Queue()
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    listener.start()
+    try:
+        yield log_queue
+    finally:
+        listener.stop()
+        log_queue.close()
+
+
+def forward_logging(log_queue: Any):
+    """
+    在子进程中调用：日志（含loguru）改为放入 child_process_logs 提供的队列
+
+    消息和上下文字段在子进程中合并、写入记录，记录需要可以pickle
+
+    Args:
+        log_queue: child_process_logs 提供的队列
+    """
+    global _listener, _queue_handler
+    handler = logging.handlers.QueueHandler(log_queue)
+    handler.addFilter(ContextFilter())
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    # 继承来的监听线程在子进程中不存在
+    _listener = None
+    _queue_handler = None
+    _route_loguru(handler, logging.getLevelName(root.level))
+
+
+def shutdown_logging():
+    """停止后台写日志线程，写完队列中剩余的记录"""
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        logging.getLogger().removeHandler(_queue_handler)
+        _route_loguru(None)
+        _listener = None
+        _queue_handler = None
@@ -0,0 +1,314 @@
+"""
+分阶段性能分析
+
+各入口（命令行、mutli_extract、batch_video_stats、export_bilibili_data、抖音导出）的 --profile 开关打开后，
+流水线的每个阶段（页面提取、解析、导出等）单独记录：
+- sample 模式（默认，开销低，可在生产环境使用）：后台线程每隔 interval 秒采一次执行阶段的线程的调用栈
+  （按墙上时间采样，等待浏览器往返、sleep 的时间也计入），
+  每个阶段输出 speedscope 文件（<阶段>.speedscope.json，可拖入 https://www.speedscope.app 查看火焰图）
+  和折叠栈文件（<阶段>.folded，可用 flamegraph.pl 生成SVG）
+- cprofile 模式（精确到每次函数调用，开销较高）：每个阶段输出 <阶段>.pstats
+运行结束时输出每个阶段的耗时和全部阶段合计的 Top-N 热点（hotspots.txt，同时写入日志）
+
+用法：
+    with profile_stage("parse_txt"):
+        ...
+未打开 --profile 时 profile_stage 不做任何事。入口用 add_profile_arguments 添加开关，用 profiling_session 包住主流程
+"""
+
+import argparse
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 调用栈中的一帧：(函数名, 文件, 函数定义行号)
+Frame = Tuple[str, str, int]
+
+SAMPLE = "sample"
+CPROFILE = "cprofile"
+
+
+def _stack_of(frame: Any) -> List[Frame]:
+    """从最内层帧向外回溯，返回从外到内的调用栈"""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+class _Sampler:
+    """采样线程：定期记录目标线程的调用栈（从进入阶段的函数开始）"""
+
+    def __init__(self, thread_id: int, base_depth: int, interval: float, samples: Counter):
+        self.thread_id = thread_id
+        self.base_depth = base_depth
+        self.interval = interval
+        self.samples = samples
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = _stack_of(frame)[self.base_depth:]
+            if stack:
+                self.samples[tuple(stack)] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class StageProfiler:
+    """分阶段性能分析器"""
+
+    def __init__(self, output_dir: Optional[str] = None, mode: str = SAMPLE, interval: float = 0.005,
+                 top_n: int = 20):
+        """
+        初始化分析器
+
+        Args:
+            output_dir: 输出目录，为None时不分析（profile_stage 直接放行）
+            mode: sample（采样）或 cprofile（确定性分析）
+            interval: 采样间隔（秒）
+            top_n: 汇总中列出的热点数
+        """
+        if mode not in (SAMPLE, CPROFILE):
+            raise ValueError(f"未知的分析模式: {mode}（可用: {SAMPLE}, {CPROFILE}）")
+        self.output_dir = output_dir
+        self.mode = mode
+        self.interval = interval
+        self.top_n = top_n
+        self.wall_times: Dict[str, float] = {}
+        self._samples: Dict[str, Counter] = {}
+        self._profiles: Dict[str, cProfile.Profile] = {}
+        self._active = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.output_dir is not None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        分析一个阶段；同名阶段多次进入时累计（如每轮滚动提取），嵌套阶段计入外层阶段
+
+        Args:
+            name: 阶段名（用作文件名）
+        """
+        if not self.enabled or getattr(self._active, "name", None):
+            yield
+            return
+
+        self._active.name = name
+        start = time.perf_counter()
+        sampler = profile = None
+        if self.mode == SAMPLE:
+            with self._lock:
+                samples = self._samples.setdefault(name, Counter())
+            # 去掉调用 with 的函数的上层帧（sys._getframe(2) 跳过本生成器和 contextmanager 的 __enter__）
+            base_depth = len(_stack_of(sys._getframe(2))) - 1
+            sampler = _Sampler(threading.get_ident(), base_depth, self.interval, samples)
+            sampler.start()
+        else:
+            with self._lock:
+                profile = self._profiles.setdefault(name, cProfile.Profile())
+            try:
+                profile.enable()
+            except ValueError:
+                # 其他线程的阶段正在使用cProfile（Python 3.12起同一时间只能有一个），本次不记录
+                profile = None
+        try:
+            yield
+        finally:
+            if sampler:
+                sampler.stop()
+            if profile:
+                profile.disable()
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.wall_times[name] = self.wall_times.get(name, 0.0) + elapsed
+            self._active.name = None
+
+    # ---------- 输出 ----------
+
+    @staticmethod
+    def _file_stem(name: str) -> str:
+        return re.sub(r"[^\w.-]+", "_", name)
+
+    def _write_speedscope(self, name: str, samples: Counter, path: str):
+        frames: List[Frame] = []
+        index: Dict[Frame, int] = {}
+        profile_samples, weights = [], []
+        for stack, count in samples.items():
+            indices = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frames.append(frame)
+                indices.append(index[frame])
+            profile_samples.append(indices)
+            weights.append(count * self.interval)
+        document = {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "alipay-crawler",
+            "shared": {"frames": [{"name": func, "file": file, "line": line} for func, file, line in frames]},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": profile_samples,
+                "weights": weights,
+            }],
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(document, f, ensure_ascii=False)
+
+    @staticmethod
+    def _write_folded(samples: Counter, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in samples.items():
+                names = ";".join(f"{func} ({os.path.basename(file)}:{line})" for func, file, line in stack)
+                f.write(f"{names} {count}\n")
+
+    def hotspots(self) -> List[Dict[str, Any]]:
+        """
+        全部阶段合计的 Top-N 热点
+
+        Returns:
+            List[Dict]: function / self_seconds / total_seconds（sample模式按采样数估算）
+        """
+        if self.mode == SAMPLE:
+            self_counts: Counter = Counter()
+            total_counts: Counter = Counter()
+            for samples in self._samples.values():
+                for stack, count in samples.items():
+                    self_counts[stack[-1]] += count
+                    for frame in set(stack):
+                        total_counts[frame] += count
+            return [{"function": f"{func} ({file}:{line})", "self_seconds": count * self.interval,
+                     "total_seconds": total_counts[(func, file, line)] * self.interval}
+                    for (func, file, line), count in self_counts.most_common(self.top_n)]
+
+        if not self._profiles:
+            return []
+        stats = pstats.Stats(*self._profiles.values())
+        rows = []
+        for (file, line, func), (_, _, tottime, cumtime, _) in stats.stats.items():
+            rows.append({"function": f"{func} ({file}:{line})", "self_seconds": tottime, "total_seconds": cumtime})
+        rows.sort(key=lambda row: -row["self_seconds"])
+        return rows[:self.top_n]
+
+    def report(self) -> Optional[str]:
+        """
+        写出各阶段的分析文件和热点汇总
+
+        Returns:
+            Optional[str]: 汇总文件路径，未启用时为None
+        """
+        if not self.enabled:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        for name, samples in self._samples.items():
+            stem = os.path.join(self.output_dir, self._file_stem(name))
+            self._write_speedscope(name, samples, f"{stem}.speedscope.json")
+            self._write_folded(samples, f"{stem}.folded")
+        for name, profile in self._profiles.items():
+            profile.dump_stats(os.path.join(self.output_dir, f"{self._file_stem(name)}.pstats"))
+
+        summary = io.StringIO()
+        summary.write("阶段耗时（秒）\n")
+        for name, seconds in sorted(self.wall_times.items(), key=lambda item: -item[1]):
+            summary.write(f"  {seconds:10.3f}  {name}\n")
+        summary.write(f"\nTop {self.top_n} 热点（自身耗时 / 累计耗时，秒）\n")
+        for row in self.hotspots():
+            summary.write(f"  {row['self_seconds']:10.3f}  {row['total_seconds']:10.3f}  {row['function']}\n")
+
+        path = os.path.join(self.output_dir, "hotspots.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(summary.getvalue())
+        logger.info(f"⏱️ 性能分析结果已写入 {self.output_dir}\n{summary.getvalue()}")
+        return path
+
+
+_profiler = StageProfiler()
+
+
+def get_profiler() -> StageProfiler:
+    """获取当前的分析器（进程内单例，未启用时 profile_stage 直接放行）"""
+    return _profiler
+
+
+def enable_profiling(output_dir: Optional[str] = None, mode: Optional[str] = None) -> StageProfiler:
+    """
+    按 PROFILE_CONFIG 启用分阶段分析（各入口的 --profile 开关调用）
+
+    Args:
+        output_dir: 输出目录，默认 PROFILE_CONFIG["output_dir"] 下按启动时间新建的子目录
+        mode: sample 或 cprofile，默认 PROFILE_CONFIG["mode"]
+
+    Returns:
+        StageProfiler: 分析器
+    """
+    global _profiler
+    from config.settings import PROFILE_CONFIG
+
+    output_dir = output_dir or os.path.join(PROFILE_CONFIG["output_dir"], time.strftime("%Y%m%d-%H%M%S"))
+    _profiler = StageProfiler(output_dir, mode=mode or PROFILE_CONFIG["mode"],
+                              interval=PROFILE_CONFIG["interval"], top_n=PROFILE_CONFIG["top_n"])
+    return _profiler
+
+
+def profile_stage(name: str):
+    """当前分析器的阶段上下文"""
+    return _profiler.stage(name)
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser):
+    """给入口的参数解析器添加 --profile / --profile-mode / --profile-dir 开关"""
+    parser.add_argument("--profile", action="store_true", help="分阶段性能分析，输出火焰图文件和热点汇总")
+    parser.add_argument("--profile-mode", choices=[SAMPLE, CPROFILE], help="分析方式，默认取配置（sample）")
+    parser.add_argument("--profile-dir", help="分析结果目录，默认 output/profiles/<启动时间>")
+
+
+@contextmanager
+def profiling_session(args: argparse.Namespace) -> Iterator[StageProfiler]:
+    """
+    按命令行开关启用分析，流程结束（包括出错）时写出结果
+
+    Args:
+        args: 含 add_profile_arguments 添加的开关的参数
+    """
+    if not getattr(args, "profile", False):
+        yield _profiler
+        return
+    profiler = enable_profiling(args.profile_dir, args.profile_mode)
+    try:
+        yield profiler
+    finally:
+        profiler.report()
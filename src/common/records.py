@@ -0,0 +1,296 @@
+"""
+内容记录类型
+
+B站动态（BilibiliDynamic）和抖音视频（DouyinVideo）使用 __slots__ 的记录类，爬取和导出共用：
+- 计数在创建记录时解析为 int，发布时间解析为 datetime，之后各导出格式不再重复解析
+- 属性名即导出列名，导出时不再逐条转换为新的字典
+- to_dict / from_dict 与原先的中文键字典互相转换，用于1.txt、JSON等既有格式
+"""
+
+import re
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+_COUNT_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*([万千亿wWkK]?)")
+_COUNT_UNITS = {"": 1, "千": 1000, "k": 1000, "万": 10000, "w": 10000, "亿": 100000000}
+
+# 互动量包含的计数字段（标签索引、评论采集、月度报告共用同一定义）
+ENGAGEMENT_FIELDS = {
+    "bilibili": ("like_count", "comment_count", "repost_count"),
+    "douyin": ("like_count", "comment_count", "collect_count", "share_count"),
+}
+
+
+def parse_count(text: Any) -> int:
+    """
+    解析计数文本为整数，支持 "1.2万"、"3千"、"1,024" 等形式
+
+    Args:
+        text: 计数文本或数字
+
+    Returns:
+        int: 计数，无法解析时为0
+    """
+    if isinstance(text, int):
+        return text
+    if not text:
+        return 0
+    match = _COUNT_PATTERN.search(str(text).replace(",", ""))
+    if not match:
+        return 0
+    return int(float(match.group(1)) * _COUNT_UNITS[match.group(2).lower()])
+
+
+def engagement_of(record: Any) -> int:
+    """互动量：B站 点赞+评论+转发，抖音 点赞+评论+收藏+转发"""
+    return sum(getattr(record, name) for name in ENGAGEMENT_FIELDS[record.platform])
+
+
+class _Record:
+    """记录类的公共方法"""
+
+    __slots__ = ()
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """按属性名取值（兼容按字典访问的旧代码）"""
+        return getattr(self, name, default)
+
+    def as_row(self) -> Dict[str, Any]:
+        """全部属性组成的字典"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other: Any) -> bool:
+        return type(self) is type(other) and self.as_row() == other.as_row()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__[:3])
+        return f"{type(self).__name__}({fields}, ...)"
+
+
+class BilibiliDynamic(_Record):
+    """B站动态"""
+
+    __slots__ = ("content_id", "author", "content_type", "publish_time", "publish_time_raw", "text_content",
+                 "video_description", "like_count", "comment_count", "repost_count", "image_urls", "video_url",
+                 "card_height", "extract_round")
+
+    def __init__(self, content_id: str = "", author: str = "", content_type: str = "动态",
+                 publish_time: Optional[datetime] = None, publish_time_raw: str = "", text_content: str = "",
+                 video_description: str = "", like_count: int = 0, comment_count: int = 0, repost_count: int = 0,
+                 image_urls: str = "", video_url: str = "", card_height: Optional[int] = None,
+                 extract_round: Optional[int] = None):
+        self.content_id = content_id
+        self.author = author
+        self.content_type = content_type
+        self.publish_time = publish_time
+        self.publish_time_raw = publish_time_raw
+        self.text_content = text_content
+        self.video_description = video_description
+        self.like_count = like_count
+        self.comment_count = comment_count
+        self.repost_count = repost_count
+        self.image_urls = image_urls
+        self.video_url = video_url
+        self.card_height = card_height
+        self.extract_round = extract_round
+
+    @property
+    def platform(self) -> str:
+        return "bilibili"
+
+    @property
+    def export_content_type(self) -> str:
+        """导出使用的内容类型：视频 / 图文"""
+        return "视频" if self.content_type == "视频" else "图文"
+
+    @property
+    def publish_date(self) -> str:
+        """发布日期（YYYY-MM-DD），未解析时为空字符串"""
+        return self.publish_time.strftime("%Y-%m-%d") if self.publish_time else ""
+
+    @property
+    def month_key(self) -> Optional[str]:
+        """月份分组名（如 2024年10月）"""
+        return f"{self.publish_time.year}年{self.publish_time.month}月" if self.publish_time else None
+
+    @classmethod
+    def from_card(cls, data: Dict[str, Any], publish_time: Optional[datetime] = None,
+                  card_height: Optional[int] = None, extract_round: Optional[int] = None) -> "BilibiliDynamic":
+        """
+        由页面提取结果（extract_visible_cards / _extract_single_dynamic 的中文键字典）创建记录
+
+        Args:
+            data: 卡片数据
+            publish_time: 解析后的发布时间
+            card_height: 卡片高度（像素）
+            extract_round: 提取轮次
+
+        Returns:
+            BilibiliDynamic: 记录
+        """
+        return cls(
+            content_id=data.get("内容ID") or "未知",
+            author=data.get("作者", ""),
+            content_type=data.get("内容类型", "动态"),
+            publish_time=publish_time,
+            publish_time_raw=data.get("发布时间", ""),
+            text_content=data.get("文案内容", ""),
+            video_description=data.get("视频描述", ""),
+            like_count=parse_count(data.get("点赞数")),
+            comment_count=parse_count(data.get("评论数")),
+            repost_count=parse_count(data.get("转发数")),
+            image_urls=data.get("图片链接", ""),
+            video_url=data.get("视频链接", ""),
+            card_height=card_height,
+            extract_round=extract_round,
+        )
+
+    @classmethod
+    def from_dict(cls, content: Dict[str, Any]) -> "BilibiliDynamic":
+        """
+        由旧的中文键字典（含 发布时间_原始 / 发布时间_解析 / 卡片高度 等附加字段）创建记录
+
+        Args:
+            content: 中文键字典
+
+        Returns:
+            BilibiliDynamic: 记录
+        """
+        publish_time = None
+        if content.get("发布时间_解析"):
+            try:
+                publish_time = datetime.strptime(content["发布时间_解析"], "%Y-%m-%d")
+            except ValueError:
+                publish_time = None
+        record = cls.from_card(content, publish_time=publish_time,
+                               card_height=parse_count(content["卡片高度"]) if content.get("卡片高度") else None,
+                               extract_round=content.get("提取轮次"))
+        record.publish_time_raw = content.get("发布时间_原始") or record.publish_time_raw
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为中文键字典（1.txt、JSON等既有格式）"""
+        return {
+            "内容ID": self.content_id,
+            "作者": self.author,
+            "内容类型": self.content_type,
+            "发布时间": self.publish_time_raw,
+            "文案内容": self.text_content,
+            "视频描述": self.video_description,
+            "点赞数": self.like_count,
+            "评论数": self.comment_count,
+            "转发数": self.repost_count,
+            "图片链接": self.image_urls,
+            "视频链接": self.video_url,
+            "平台标识": self.platform,
+            "卡片高度": f"{self.card_height}px" if self.card_height is not None else "",
+            "提取轮次": self.extract_round,
+            "发布时间_原始": self.publish_time_raw,
+            "发布时间_解析": self.publish_date,
+        }
+
+
+class DouyinVideo(_Record):
+    """抖音视频"""
+
+    __slots__ = ("video_url", "content_text", "publish_time", "publish_time_raw", "like_count", "comment_count",
+                 "collect_count", "share_count", "author")
+
+    def __init__(self, video_url: str = "", content_text: str = "", publish_time: Optional[datetime] = None,
+                 publish_time_raw: str = "", like_count: int = 0, comment_count: int = 0, collect_count: int = 0,
+                 share_count: int = 0, author: str = ""):
+        self.video_url = video_url
+        self.content_text = content_text
+        self.publish_time = publish_time
+        self.publish_time_raw = publish_time_raw
+        self.like_count = like_count
+        self.comment_count = comment_count
+        self.collect_count = collect_count
+        self.share_count = share_count
+        self.author = author
+
+    @property
+    def platform(self) -> str:
+        return "douyin"
+
+    @property
+    def content_id(self) -> str:
+        """视频ID（URL最后一段）"""
+        return self.video_url.rstrip("/").rsplit("/", 1)[-1] if self.video_url else ""
+
+    @property
+    def publish_date(self) -> str:
+        """发布日期（YYYY-MM-DD），未解析时为空字符串"""
+        return self.publish_time.strftime("%Y-%m-%d") if self.publish_time else ""
+
+    @staticmethod
+    def parse_publish_time(text: str) -> Optional[datetime]:
+        """
+        解析 "发布时间：YYYY-MM-DD HH:MM" 形式的发布时间
+
+        Args:
+            text: 发布时间文本
+
+        Returns:
+            Optional[datetime]: 发布时间，无法解析时为None
+        """
+        value = (text or "").replace("发布时间：", "").strip()
+        for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+            try:
+                return datetime.strptime(value, fmt)
+            except ValueError:
+                continue
+        return None
+
+    @classmethod
+    def from_stats(cls, video_url: str, stats: Dict[str, Any], content_text: str = "") -> "DouyinVideo":
+        """
+        由统计数据（extract_video_stats / ssr_fetch 的 likes/comments/... 字典）创建记录
+
+        Args:
+            video_url: 视频URL
+            stats: 统计数据
+            content_text: 文案内容
+
+        Returns:
+            DouyinVideo: 记录
+        """
+        publish_time_raw = stats.get("publish_time", "")
+        return cls(
+            video_url=video_url,
+            content_text=content_text or stats.get("description", ""),
+            publish_time=cls.parse_publish_time(publish_time_raw),
+            publish_time_raw=publish_time_raw,
+            like_count=parse_count(stats.get("likes")),
+            comment_count=parse_count(stats.get("comments")),
+            collect_count=parse_count(stats.get("collects")),
+            share_count=parse_count(stats.get("shares")),
+        )
+
+    def to_stats_text(self) -> str:
+        """
+        转换为统计数据文件（3.txt）中的一条记录，格式与 DouyinDataExporter._parse_stats_file 一致
+
+        Returns:
+            str: 以“=== 视频URL: ... ===”开头、分隔线结尾的文本
+        """
+        return (f"\n=== 视频URL: {self.video_url} ===\n"
+                f"点赞数: {self.like_count}\n"
+                f"评论数: {self.comment_count}\n"
+                f"收藏数: {self.collect_count}\n"
+                f"转发数: {self.share_count}\n"
+                f"发布时间: {self.publish_time_raw}\n"
+                + "-" * 50 + "\n")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为合并结果的字典格式（merge 子命令输出的JSON）"""
+        return {
+            "video_url": self.video_url,
+            "content_text": self.content_text,
+            "publish_time": self.publish_time_raw,
+            "like_count": self.like_count,
+            "comment_count": self.comment_count,
+            "collect_count": self.collect_count,
+            "share_count": self.share_count,
+            "publish_time_parsed": self.publish_date,
+        }
@@ -0,0 +1,553 @@
+"""
+会话录制与回放
+
+录制（RecordingDriver）：包装真实浏览器（selenium 或 cdp 后端），把一次会话保存为目录：
+- session.har.json：类HAR归档
+    log.pages      每次 get() 打开的页面（HTML 保存在 pages/）
+    log.entries    页面发出的 XHR / fetch 请求与响应（通过页面内注入的钩子收集）
+    _snapshots     每轮滚动前的DOM快照（保存在 snapshots/）
+    _commands      浏览器命令及其返回值（元素以编号表示），供回放使用
+- pages/、snapshots/：HTML文件
+
+回放：
+- ReplayDriver：按录制的命令返回结果，不需要浏览器和网络，可直接交给同一套提取器类，
+  并可设置模拟延迟（固定延迟或按录制耗时缩放），用于离线测试和可复现的性能测试
+- ReplayServer：本地HTTP服务，按原始路径返回录制的页面和XHR响应，供真实浏览器离线访问
+"""
+
+import collections
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FILE = "session.har.json"
+
+# 录制时注入页面的钩子：收集 fetch 和 XMLHttpRequest 的响应
+XHR_HOOK_SCRIPT = r"""
+(() => {
+    if (window.__replayXhr) return;
+    window.__replayXhr = [];
+    const push = (method, url, status, headers, body, started) => window.__replayXhr.push({
+        method: (method || 'GET').toUpperCase(), url: new URL(url, location.href).href,
+        status, headers, body, started, time: Date.now() - started
+    });
+    const originalFetch = window.fetch;
+    window.fetch = async function(input, init) {
+        const started = Date.now();
+        const response = await originalFetch.apply(this, arguments);
+        try {
+            const method = (init && init.method) || (input && input.method) || 'GET';
+            const headers = {};
+            response.headers.forEach((value, name) => { headers[name] = value; });
+            response.clone().text().then(body => push(method, response.url || String(input.url || input),
+                                                       response.status, headers, body, started));
+        } catch (e) {}
+        return response;
+    };
+    const open = XMLHttpRequest.prototype.open;
+    XMLHttpRequest.prototype.open = function(method, url) {
+        this.__replayMeta = {method, url};
+        return open.apply(this, arguments);
+    };
+    const send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        const started = Date.now();
+        this.addEventListener('loadend', () => {
+            try {
+                const headers = {};
+                this.getAllResponseHeaders().trim().split(/[\r\n]+/).forEach(line => {
+                    const index = line.indexOf(':');
+                    if (index > 0) headers[line.slice(0, index).trim().toLowerCase()] = line.slice(index + 1).trim();
+                });
+                const body = (this.responseType === '' || this.responseType === 'text') ? this.responseText
+                    : (this.responseType === 'json' ? JSON.stringify(this.response) : '');
+                push(this.__replayMeta.method, this.__replayMeta.url, this.status, headers, body, started);
+            } catch (e) {}
+        });
+        return send.apply(this, arguments);
+    };
+})();
+"""
+
+_HARVEST_XHR_SCRIPT = "const r = window.__replayXhr || []; window.__replayXhr = []; return r;"
+
+
+class ReplayMissError(Exception):
+    """回放时遇到录制中没有的命令"""
+
+
+def _is_element(value: Any) -> bool:
+    """是否为页面元素（selenium WebElement、CdpElement 或录制包装）"""
+    return hasattr(value, "get_attribute") and hasattr(value, "find_element") and not hasattr(value, "get")
+
+
+def _command_key(target: Any, name: str, kind: str, args: Any, kwargs: Any) -> str:
+    return json.dumps([target, name, kind, args, kwargs], ensure_ascii=False, sort_keys=True, default=str)
+
+
+def _iso_now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+class RecordingElement:
+    """录制中的页面元素：转发到真实元素并记录调用"""
+
+    def __init__(self, recorder: "RecordingDriver", element: Any, element_id: int):
+        self._recorder = recorder
+        self._element = element
+        self._element_id = element_id
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            return getattr(self._element, name)
+        return self._recorder._proxy(self._element, self._element_id, name)
+
+
+class RecordingDriver:
+    """录制浏览器会话的包装器，接口与被包装的浏览器一致"""
+
+    def __init__(self, driver: Any, archive_dir: str, snapshot_on_scroll: bool = True, capture_xhr: bool = True):
+        """
+        开始录制
+
+        Args:
+            driver: 真实浏览器（selenium WebDriver 或 CdpDriver）
+            archive_dir: 归档目录
+            snapshot_on_scroll: 每次执行滚动脚本前保存DOM快照
+            capture_xhr: 是否注入钩子收集XHR响应
+        """
+        self._driver = driver
+        self._archive_dir = archive_dir
+        self._snapshot_on_scroll = snapshot_on_scroll
+        self._commands: List[Dict[str, Any]] = []
+        self._pages: List[Dict[str, Any]] = []
+        self._entries: List[Dict[str, Any]] = []
+        self._snapshots: List[Dict[str, Any]] = []
+        self._next_element_id = 0
+        self._element_ids: Dict[int, int] = {}
+        self._lock = threading.RLock()
+
+        os.makedirs(os.path.join(archive_dir, "pages"), exist_ok=True)
+        os.makedirs(os.path.join(archive_dir, "snapshots"), exist_ok=True)
+
+        self._capture_xhr = capture_xhr
+        if capture_xhr:
+            try:
+                driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": XHR_HOOK_SCRIPT})
+            except Exception as e:
+                logger.warning(f"无法注入XHR录制钩子，将不录制XHR: {str(e)}")
+                self._capture_xhr = False
+
+    # ---------- 编码 ----------
+
+    def _wrap(self, value: Any) -> Any:
+        """把返回值中的元素包装为 RecordingElement"""
+        if isinstance(value, RecordingElement):
+            return value
+        if _is_element(value):
+            with self._lock:
+                element_id = self._element_ids.get(id(value))
+                if element_id is None:
+                    element_id = self._next_element_id
+                    self._next_element_id += 1
+                    self._element_ids[id(value)] = element_id
+            return RecordingElement(self, value, element_id)
+        if isinstance(value, list):
+            return [self._wrap(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self._wrap(item) for key, item in value.items()}
+        return value
+
+    @staticmethod
+    def _unwrap(value: Any) -> Any:
+        """把参数中的 RecordingElement 还原为真实元素"""
+        if isinstance(value, RecordingElement):
+            return value._element
+        if isinstance(value, (list, tuple)):
+            return type(value)(RecordingDriver._unwrap(item) for item in value)
+        if isinstance(value, dict):
+            return {key: RecordingDriver._unwrap(item) for key, item in value.items()}
+        return value
+
+    @staticmethod
+    def _encode(value: Any) -> Any:
+        """把值编码为可JSON序列化的形式，元素编码为 {"__element__": 编号}"""
+        if isinstance(value, RecordingElement):
+            return {"__element__": value._element_id}
+        if isinstance(value, (list, tuple)):
+            return [RecordingDriver._encode(item) for item in value]
+        if isinstance(value, dict):
+            return {str(key): RecordingDriver._encode(item) for key, item in value.items()}
+        if value is None or isinstance(value, (str, int, float, bool)):
+            return value
+        return {"__unserializable__": repr(value)}
+
+    # ---------- 命令录制 ----------
+
+    def _record(self, target: Any, name: str, kind: str, args: tuple, kwargs: dict, func):
+        started = time.perf_counter()
+        entry = {
+            "target": target,
+            "name": name,
+            "kind": kind,
+            "args": self._encode(list(args)),
+            "kwargs": self._encode(kwargs),
+        }
+        try:
+            result = self._wrap(func())
+        except Exception as e:
+            entry.update(error={"type": type(e).__name__, "message": str(e)},
+                         duration=time.perf_counter() - started)
+            with self._lock:
+                self._commands.append(entry)
+            raise
+        entry.update(result=self._encode(result), duration=time.perf_counter() - started)
+        with self._lock:
+            self._commands.append(entry)
+        return result
+
+    def _proxy(self, obj: Any, target: Any, name: str) -> Any:
+        attr = getattr(obj, name)
+        if not callable(attr):
+            return self._record(target, name, "get", (), {}, lambda: attr)
+
+        def call(*args, **kwargs):
+            return self._record(target, name, "call", args, kwargs,
+                                lambda: attr(*self._unwrap(args), **self._unwrap(kwargs)))
+        return call
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            return getattr(self._driver, name)
+        return self._proxy(self._driver, "driver", name)
+
+    # ---------- 页面、快照、XHR ----------
+
+    def get(self, url: str):
+        """打开页面并保存页面HTML"""
+        result = self._record("driver", "get", "call", (url,), {}, lambda: self._driver.get(url))
+        page_id = f"page_{len(self._pages):03d}"
+        file_name = os.path.join("pages", f"{page_id}.html")
+        with open(os.path.join(self._archive_dir, file_name), "w", encoding="utf-8") as f:
+            f.write(self._driver.page_source)
+        self._pages.append({"id": page_id, "url": url, "startedDateTime": _iso_now(), "file": file_name})
+        return result
+
+    def execute_script(self, script: str, *args: Any) -> Any:
+        """执行脚本；滚动脚本执行前保存本轮的DOM快照"""
+        if self._snapshot_on_scroll and "scroll" in script:
+            self.snapshot()
+        return self._record("driver", "execute_script", "call", (script,) + args, {},
+                            lambda: self._driver.execute_script(script, *self._unwrap(args)))
+
+    def snapshot(self, label: str = "") -> str:
+        """
+        保存当前DOM快照并收集已完成的XHR
+
+        Args:
+            label: 快照说明
+
+        Returns:
+            str: 快照文件相对路径
+        """
+        self.harvest_xhr()
+        index = len(self._snapshots)
+        file_name = os.path.join("snapshots", f"round_{index:03d}.html")
+        with open(os.path.join(self._archive_dir, file_name), "w", encoding="utf-8") as f:
+            f.write(self._driver.page_source)
+        self._snapshots.append({
+            "round": index, "label": label, "url": self._driver.current_url,
+            "captured_at": _iso_now(), "file": file_name,
+        })
+        return file_name
+
+    def harvest_xhr(self):
+        """从页面取回钩子收集的XHR响应"""
+        if not self._capture_xhr:
+            return
+        try:
+            responses = self._driver.execute_script(_HARVEST_XHR_SCRIPT) or []
+        except Exception as e:
+            logger.debug(f"收集XHR失败: {str(e)}")
+            return
+        for response in responses:
+            self._entries.append({
+                "startedDateTime": datetime.fromtimestamp(response["started"] / 1000, timezone.utc).isoformat(),
+                "time": response.get("time", 0),
+                "request": {"method": response["method"], "url": response["url"]},
+                "response": {
+                    "status": response["status"],
+                    "headers": [{"name": name, "value": value} for name, value in response["headers"].items()],
+                    "content": {
+                        "mimeType": response["headers"].get("content-type", ""),
+                        "text": response["body"],
+                    },
+                },
+            })
+
+    def save(self) -> str:
+        """
+        写入归档
+
+        Returns:
+            str: 归档文件路径
+        """
+        self.harvest_xhr()
+        archive = {
+            "log": {
+                "version": "1.2",
+                "creator": {"name": "alipay-crawler-recorder", "version": "1.0"},
+                "pages": self._pages,
+                "entries": self._entries,
+            },
+            "_snapshots": self._snapshots,
+            "_commands": self._commands,
+        }
+        path = os.path.join(self._archive_dir, ARCHIVE_FILE)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(archive, f, ensure_ascii=False, indent=1)
+        logger.info(f"✅ 会话已录制: {path}（{len(self._commands)} 条命令，{len(self._snapshots)} 个快照，"
+                    f"{len(self._entries)} 个XHR）")
+        return path
+
+    def quit(self):
+        """保存归档并关闭浏览器"""
+        try:
+            self.save()
+        finally:
+            self._driver.quit()
+
+
+def load_archive(archive_dir: str) -> Dict[str, Any]:
+    """读取录制归档"""
+    with open(os.path.join(archive_dir, ARCHIVE_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class ReplayElement:
+    """回放中的页面元素"""
+
+    def __init__(self, driver: "ReplayDriver", element_id: int):
+        self._driver = driver
+        self._element_id = element_id
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self._driver._resolve(self._element_id, name)
+
+
+class ReplayDriver:
+    """
+    按录制结果回放的浏览器
+
+    每条命令按 (对象, 名称, 参数) 匹配录制中的下一次结果；同一命令被调用的次数超过录制次数时
+    重复最后一次结果（例如反复读取 current_url），从未录制过的命令抛出 ReplayMissError
+    """
+
+    def __init__(self, archive_dir: str, latency: float = 0.0, latency_scale: Optional[float] = None,
+                 sleep=time.sleep):
+        """
+        加载录制归档
+
+        Args:
+            archive_dir: 归档目录
+            latency: 每条命令的固定模拟延迟（秒）
+            latency_scale: 按录制耗时乘以该系数模拟延迟，设置后忽略 latency
+            sleep: 等待函数
+        """
+        self.archive = load_archive(archive_dir)
+        self.latency = latency
+        self.latency_scale = latency_scale
+        self._sleep = sleep
+        self._queues: Dict[str, Deque[Dict[str, Any]]] = collections.defaultdict(collections.deque)
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self._kinds: Dict[Tuple[Any, str], str] = {}
+        self._lock = threading.Lock()
+        self.replayed = 0
+
+        for entry in self.archive["_commands"]:
+            key = _command_key(entry["target"], entry["name"], entry["kind"], entry["args"], entry["kwargs"])
+            self._queues[key].append(entry)
+            self._kinds[(entry["target"], entry["name"])] = entry["kind"]
+
+    @staticmethod
+    def _encode_args(value: Any) -> Any:
+        if isinstance(value, ReplayElement):
+            return {"__element__": value._element_id}
+        if isinstance(value, (list, tuple)):
+            return [ReplayDriver._encode_args(item) for item in value]
+        if isinstance(value, dict):
+            return {str(key): ReplayDriver._encode_args(item) for key, item in value.items()}
+        return value
+
+    def _decode(self, value: Any) -> Any:
+        if isinstance(value, list):
+            return [self._decode(item) for item in value]
+        if isinstance(value, dict):
+            if "__element__" in value:
+                return ReplayElement(self, value["__element__"])
+            if "__unserializable__" in value:
+                return None
+            return {key: self._decode(item) for key, item in value.items()}
+        return value
+
+    def _replay(self, target: Any, name: str, kind: str, args: tuple, kwargs: dict) -> Any:
+        key = _command_key(target, name, kind, self._encode_args(list(args)), self._encode_args(kwargs))
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue:
+                entry = queue.popleft()
+                self._last[key] = entry
+            elif key in self._last:
+                entry = self._last[key]
+            else:
+                raise ReplayMissError(f"录制中没有该命令: {key[:200]}")
+            self.replayed += 1
+
+        delay = entry.get("duration", 0) * self.latency_scale if self.latency_scale is not None else self.latency
+        if delay > 0:
+            self._sleep(delay)
+
+        error = entry.get("error")
+        if error:
+            raise self._exception(error["type"], error["message"])
+        return self._decode(entry.get("result"))
+
+    @staticmethod
+    def _exception(type_name: str, message: str) -> Exception:
+        """按名称还原录制时的异常（selenium异常或内置异常）"""
+        from selenium.common import exceptions as selenium_exceptions
+
+        import builtins
+
+        exception_type = getattr(selenium_exceptions, type_name, None) or getattr(builtins, type_name, None)
+        if isinstance(exception_type, type) and issubclass(exception_type, Exception):
+            try:
+                return exception_type(message)
+            except TypeError:
+                pass
+        return ReplayMissError(f"{type_name}: {message}")
+
+    def _resolve(self, target: Any, name: str) -> Any:
+        kind = self._kinds.get((target, name))
+        if kind is None:
+            raise AttributeError(f"录制中没有 {target}.{name}")
+        if kind == "get":
+            return self._replay(target, name, "get", (), {})
+        return lambda *args, **kwargs: self._replay(target, name, "call", args, kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self._resolve("driver", name)
+
+    def get(self, url: str):
+        return self._replay("driver", "get", "call", (url,), {})
+
+    def execute_script(self, script: str, *args: Any) -> Any:
+        return self._replay("driver", "execute_script", "call", (script,) + args, {})
+
+    def implicitly_wait(self, seconds: float):
+        """兼容接口"""
+
+    def quit(self):
+        """兼容接口：回放没有需要关闭的浏览器"""
+
+
+class ReplayServer:
+    """按原始路径返回录制页面和XHR响应的本地HTTP服务"""
+
+    def __init__(self, archive_dir: str, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        """
+        Args:
+            archive_dir: 归档目录
+            host: 监听地址
+            port: 监听端口，0表示自动选择
+            latency: 每个响应的模拟延迟（秒）
+        """
+        self.archive_dir = archive_dir
+        self.latency = latency
+        archive = load_archive(archive_dir)
+
+        # 路径（含查询串）→ (状态码, 响应头, 响应体)
+        self.routes: Dict[str, Tuple[int, Dict[str, str], bytes]] = {}
+        for entry in archive["log"]["entries"]:
+            response = entry["response"]
+            headers = {header["name"]: header["value"] for header in response["headers"]
+                       if header["name"].lower() not in ("content-length", "content-encoding", "transfer-encoding")}
+            self.routes.setdefault(self._route(entry["request"]["url"]),
+                                   (response["status"], headers, response["content"]["text"].encode("utf-8")))
+        for page in archive["log"]["pages"]:
+            self.routes.setdefault(self._route(page["url"]), (200, {"Content-Type": "text/html; charset=utf-8"},
+                                                              self._read(page["file"])))
+        for snapshot in archive["_snapshots"]:
+            self.routes[f"/_snapshots/{snapshot['round']}"] = (
+                200, {"Content-Type": "text/html; charset=utf-8"}, self._read(snapshot["file"])
+            )
+
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _route(url: str) -> str:
+        parts = urlsplit(url)
+        return parts.path + (f"?{parts.query}" if parts.query else "")
+
+    def _read(self, file_name: str) -> bytes:
+        with open(os.path.join(self.archive_dir, file_name), "rb") as f:
+            return f.read()
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self, with_body: bool):
+                if server.latency > 0:
+                    time.sleep(server.latency)
+                status, headers, body = server.routes.get(self.path, (404, {}, b""))
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if with_body:
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                self._serve(True)
+
+            def do_POST(self):
+                self._serve(True)
+
+            def do_HEAD(self):
+                self._serve(False)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "ReplayServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="replay-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,304 @@
+"""
+重试子系统
+
+- 失败的条目进入单独的重试队列，主流程继续处理后面的条目，不在失败处原地等待
+- 重试按带抖动的指数退避安排时间（full jitter：在 [0, min(上限, 基础延迟×2^n)] 内随机）
+- 按域名熔断：同一域名连续失败达到阈值后暂停请求该域名，冷却后只放行一个试探请求
+- 超过最大重试次数仍失败的条目写入死信记录（JSONL），不会以默认值混入导出数据
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class FetchError(Exception):
+    """条目获取失败（可重试），代替返回默认值"""
+
+
+class CircuitOpenError(FetchError):
+    """目标域名已熔断"""
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float, rng: Optional[random.Random] = None) -> float:
+    """
+    计算第 attempt 次重试前的等待时间（带抖动的指数退避）
+
+    Args:
+        attempt: 重试次数（从1开始）
+        base_delay: 基础延迟（秒）
+        max_delay: 延迟上限（秒）
+        rng: 随机数生成器
+
+    Returns:
+        float: 等待秒数
+    """
+    ceiling = min(max_delay, base_delay * (2 ** (attempt - 1)))
+    return (rng or random).uniform(0, ceiling)
+
+
+def domain_of(item: Any) -> str:
+    """默认的域名提取函数：条目本身是URL"""
+    return urlparse(str(item)).netloc
+
+
+class CircuitBreaker:
+    """
+    按域名的熔断器：连续失败 failure_threshold 次后打开，reset_timeout 秒后半开，只放行一个试探请求
+
+    试探结果（record_success / record_failure）返回前其他调用方仍被拒绝；试探超过 reset_timeout 仍未返回结果
+    （如调用方异常退出）时视为丢失，再放行下一个试探
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._probe_started: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, domain: str) -> bool:
+        """是否允许请求该域名（熔断冷却结束后只允许一个调用方试探）"""
+        with self._lock:
+            opened_at = self._opened_at.get(domain)
+            if opened_at is None:
+                return True
+            now = self.clock()
+            if now - opened_at < self.reset_timeout:
+                return False
+            probe_started = self._probe_started.get(domain)
+            if probe_started is not None and now - probe_started < self.reset_timeout:
+                return False
+            self._probe_started[domain] = now
+            return True
+
+    def retry_at(self, domain: str) -> float:
+        """熔断的域名何时可以再次试探（已有试探在途时为该试探视为丢失的时间）"""
+        with self._lock:
+            started = self._probe_started.get(domain, self._opened_at.get(domain, self.clock()))
+            return started + self.reset_timeout
+
+    def record_success(self, domain: str):
+        with self._lock:
+            self._failures.pop(domain, None)
+            self._probe_started.pop(domain, None)
+            if self._opened_at.pop(domain, None) is not None:
+                logger.info(f"✅ {domain} 恢复，熔断关闭")
+
+    def record_failure(self, domain: str):
+        with self._lock:
+            self._probe_started.pop(domain, None)
+            failures = self._failures.get(domain, 0) + 1
+            self._failures[domain] = failures
+            if failures >= self.failure_threshold:
+                if domain not in self._opened_at:
+                    logger.warning(f"⚠️ {domain} 连续失败 {failures} 次，熔断 {self.reset_timeout} 秒")
+                # 半开试探失败时重新计时
+                self._opened_at[domain] = self.clock()
+
+    def state(self, domain: str) -> str:
+        """closed / open / half-open"""
+        with self._lock:
+            opened_at = self._opened_at.get(domain)
+        if opened_at is None:
+            return "closed"
+        return "half-open" if self.clock() - opened_at >= self.reset_timeout else "open"
+
+
+class DeadLetterLog:
+    """死信记录：每行一个JSON，记录最终失败的条目、错误和尝试次数"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, item: Any, error: str, attempts: int, **extra: Any):
+        entry = {"item": item, "error": error, "attempts": attempts, "failed_at": time.time(), **extra}
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+
+    def read(self) -> List[Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+
+class RetryOutcome:
+    """一次运行的结果"""
+
+    def __init__(self):
+        self.results: Dict[Hashable, Any] = {}
+        self.dead: List[Dict[str, Any]] = []
+        self.retries = 0
+
+    def __repr__(self) -> str:
+        return f"RetryOutcome(ok={len(self.results)}, dead={len(self.dead)}, retries={self.retries})"
+
+
+class RetryQueue:
+    """
+    带重试队列的批量执行器
+
+    主流程依次处理条目，失败的条目按退避时间放入重试队列；每处理完一个主条目就执行已到期的重试，
+    主流程结束后等待并处理剩余的重试
+    """
+
+    def __init__(self, process: Callable[[Any], Any], max_retries: int = 3, base_delay: float = 2,
+                 max_delay: float = 60, breaker: Optional[CircuitBreaker] = None,
+                 dead_letter: Optional[DeadLetterLog] = None, domain_func: Callable[[Any], str] = domain_of,
+                 retry_on: tuple = (Exception,), clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep, rng: Optional[random.Random] = None):
+        """
+        初始化执行器
+
+        Args:
+            process: 处理单个条目的函数，失败时抛出异常
+            max_retries: 最大重试次数（不含首次）
+            base_delay: 退避基础延迟（秒）
+            max_delay: 退避上限（秒）
+            breaker: 熔断器，默认新建
+            dead_letter: 死信记录，为None时只在结果中返回
+            domain_func: 条目 → 域名
+            retry_on: 视为可重试的异常类型，其他异常直接进入死信
+            clock: 单调时钟
+            sleep: 等待函数
+            rng: 随机数生成器
+        """
+        self.process = process
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.dead_letter = dead_letter
+        self.domain_func = domain_func
+        self.retry_on = retry_on
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self._heap: List[tuple] = []
+        self._sequence = itertools.count()
+
+    def _schedule(self, item: Any, attempts: int, due: float, error: str):
+        heapq.heappush(self._heap, (due, next(self._sequence), item, attempts, error))
+
+    def _attempt(self, item: Any, attempts: int, outcome: RetryOutcome,
+                 on_result: Optional[Callable[[Any, Any], None]]):
+        """执行一次尝试；attempts 为此前已失败的次数"""
+        domain = self.domain_func(item)
+        if not self.breaker.allow(domain):
+            # 熔断中：不消耗重试次数，推迟到可试探时
+            self._schedule(item, attempts, self.breaker.retry_at(domain), "熔断中")
+            return
+
+        try:
+            value = self.process(item)
+        except self.retry_on as e:
+            self.breaker.record_failure(domain)
+            attempts += 1
+            error = f"{type(e).__name__}: {e}"
+            if attempts > self.max_retries:
+                self._bury(item, error, attempts, domain, outcome)
+            else:
+                delay = backoff_delay(attempts, self.base_delay, self.max_delay, self.rng)
+                logger.warning(f"{item} 第 {attempts} 次失败，{delay:.1f} 秒后重试: {error}")
+                self._schedule(item, attempts, self.clock() + delay, error)
+            return
+        except Exception as e:
+            self._bury(item, f"{type(e).__name__}: {e}", attempts + 1, domain, outcome)
+            return
+
+        self.breaker.record_success(domain)
+        outcome.results[item] = value
+        if on_result:
+            on_result(item, value)
+
+    def _bury(self, item: Any, error: str, attempts: int, domain: str, outcome: RetryOutcome):
+        logger.error(f"❌ {item} 失败 {attempts} 次，写入死信记录: {error}")
+        entry = {"item": item, "error": error, "attempts": attempts, "domain": domain}
+        outcome.dead.append(entry)
+        if self.dead_letter:
+            self.dead_letter.append(item, error, attempts, domain=domain)
+
+    def _run_due(self, outcome: RetryOutcome, on_result, block: bool):
+        """执行到期的重试；block为True时等待直到重试队列清空"""
+        while self._heap:
+            due = self._heap[0][0]
+            now = self.clock()
+            if due > now:
+                if not block:
+                    return
+                self.sleep(due - now)
+            _, _, item, attempts, _ = heapq.heappop(self._heap)
+            outcome.retries += 1
+            self._attempt(item, attempts, outcome, on_result)
+
+    def run(self, items, on_result: Optional[Callable[[Any, Any], None]] = None,
+            should_stop: Optional[Callable[[], bool]] = None) -> RetryOutcome:
+        """
+        处理所有条目
+
+        Args:
+            items: 条目（需可哈希，作为结果字典的键）
+            on_result: 每个条目成功时的回调 (条目, 结果)
+            should_stop: 取消检查函数，返回True时停止（未完成的重试不写入死信）
+
+        Returns:
+            RetryOutcome: 成功结果、死信条目和重试次数
+        """
+        outcome = RetryOutcome()
+        for item in items:
+            if should_stop and should_stop():
+                return outcome
+            self._attempt(item, 0, outcome, on_result)
+            self._run_due(outcome, on_result, block=False)
+
+        while self._heap:
+            if should_stop and should_stop():
+                break
+            self._run_due(outcome, on_result, block=False)
+            if self._heap:
+                wait = max(0.0, self._heap[0][0] - self.clock())
+                self.sleep(wait)
+        self._heap.clear()
+        return outcome
+
+
+def retry_queue_from_config(process: Callable[[Any], Any], dead_letter_name: str, **kwargs: Any) -> RetryQueue:
+    """
+    按 CRAWLER_CONFIG 创建执行器
+
+    Args:
+        process: 处理单个条目的函数
+        dead_letter_name: 死信文件名（位于 CRAWLER_CONFIG["dead_letter_dir"]）
+        **kwargs: 覆盖 RetryQueue 的其他参数
+
+    Returns:
+        RetryQueue: 执行器
+    """
+    from config.settings import CRAWLER_CONFIG
+
+    options = {
+        "max_retries": CRAWLER_CONFIG["max_retries"],
+        "base_delay": CRAWLER_CONFIG["retry_delay"],
+        "max_delay": CRAWLER_CONFIG["retry_max_delay"],
+        "breaker": CircuitBreaker(CRAWLER_CONFIG["breaker_threshold"], CRAWLER_CONFIG["breaker_reset"]),
+        "dead_letter": DeadLetterLog(os.path.join(CRAWLER_CONFIG["dead_letter_dir"], dead_letter_name)),
+    }
+    options.update(kwargs)
+    return RetryQueue(process, **options)
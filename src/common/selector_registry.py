@@ -0,0 +1,254 @@
+"""
+选择器注册表
+
+- 每个字段配置一组按优先级排列的备选选择器（config/settings.py 的 BILIBILI_SELECTORS / DOUYIN_SELECTORS）
+- 按字段和卡片类型统计每个选择器的命中情况，查找时先试最近最常命中的选择器，
+  多数卡片每个字段只需一次查找
+- 统计保存到 SELECTOR_CONFIG["stats_file"]，下次运行沿用学到的顺序
+- 连续未命中达到 SELECTOR_CONFIG["dead_after"] 次的选择器视为失效，在报告中列出
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+logger = logging.getLogger(__name__)
+
+# 不区分卡片类型的汇总统计
+ANY_TYPE = "*"
+
+
+class SelectorRegistry:
+    """单个平台的选择器注册表"""
+
+    def __init__(self, platform: str, selectors: Dict[str, List[str]], stats_path: Optional[str] = None,
+                 dead_after: int = 20, smoothing: float = 0.1):
+        """
+        初始化注册表
+
+        Args:
+            platform: 平台名（统计文件中的分组）
+            selectors: 字段 → 按优先级排列的备选选择器
+            stats_path: 统计文件路径，为None时不持久化
+            dead_after: 连续未命中多少次视为失效
+            smoothing: 命中率滑动平均的系数，越大越快适应页面改版
+        """
+        self.platform = platform
+        self.selectors = {field: list(candidates) for field, candidates in selectors.items()}
+        self.stats_path = stats_path
+        self.dead_after = dead_after
+        self.smoothing = smoothing
+        # 字段 → 卡片类型 → 选择器 → {score, hits, trials, misses_since_hit, last_hit}
+        self._stats: Dict[str, Dict[str, Dict[str, Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    # ---------- 排序与统计 ----------
+
+    def candidates(self, field: str, card_type: str = ANY_TYPE) -> List[str]:
+        """
+        按学到的顺序返回字段的备选选择器（没有该卡片类型的统计时使用汇总统计）
+
+        Args:
+            field: 字段名
+            card_type: 卡片类型
+
+        Returns:
+            List[str]: 选择器列表，命中率高的在前，同分时保持配置顺序
+        """
+        configured = self.selectors[field]
+        with self._lock:
+            by_type = self._stats.get(field, {})
+            stats = by_type.get(card_type) or by_type.get(ANY_TYPE) or {}
+            scores = {selector: stats.get(selector, {}).get("score", 0.0) for selector in configured}
+        return sorted(configured, key=lambda selector: -scores[selector])
+
+    def candidates_by_type(self, card_types: List[str]) -> Dict[str, Dict[str, List[str]]]:
+        """
+        所有字段在各卡片类型下的选择器顺序，供页面内批量提取脚本使用
+
+        Args:
+            card_types: 卡片类型列表（另外总是包含汇总类型 "*"）
+
+        Returns:
+            Dict: 卡片类型 → 字段 → 选择器列表
+        """
+        return {card_type: {field: self.candidates(field, card_type) for field in self.selectors}
+                for card_type in [ANY_TYPE, *card_types]}
+
+    def _update(self, field: str, card_type: str, selector: str, hit: bool):
+        for key in {card_type, ANY_TYPE}:
+            entry = self._stats.setdefault(field, {}).setdefault(key, {}).setdefault(
+                selector, {"score": 0.0, "hits": 0, "trials": 0, "misses_since_hit": 0, "last_hit": None}
+            )
+            entry["trials"] += 1
+            entry["score"] += self.smoothing * ((1.0 if hit else 0.0) - entry["score"])
+            if hit:
+                entry["hits"] += 1
+                entry["misses_since_hit"] = 0
+                entry["last_hit"] = time.time()
+            else:
+                entry["misses_since_hit"] += 1
+
+    def record(self, field: str, card_type: str, tried: List[str], matched: Optional[str]):
+        """
+        记录一次查找：tried 中 matched 之前的选择器未命中，matched 命中
+
+        Args:
+            field: 字段名
+            card_type: 卡片类型
+            tried: 依次尝试过的选择器
+            matched: 命中的选择器，全部未命中时为None
+        """
+        with self._lock:
+            for selector in tried:
+                self._update(field, card_type, selector, selector == matched)
+
+    # ---------- 查找 ----------
+
+    def find(self, root: Any, field: str, card_type: str = ANY_TYPE,
+             accept: Optional[Callable[[Any, str], Any]] = None) -> Tuple[Any, Optional[str]]:
+        """
+        在 root（浏览器或元素）内按学到的顺序查找字段元素
+
+        Args:
+            root: 查找范围
+            field: 字段名
+            card_type: 卡片类型
+            accept: 对找到的元素取值的函数 (元素, 选择器) → 值，值为空时视为未命中继续尝试；
+                    为None时返回元素本身
+
+        Returns:
+            Tuple: (元素或accept的返回值, 命中的选择器)，全部未命中时为 (None, None)
+        """
+        tried = []
+        for selector in self.candidates(field, card_type):
+            tried.append(selector)
+            try:
+                element = root.find_element(By.CSS_SELECTOR, selector)
+            except NoSuchElementException:
+                continue
+            value = accept(element, selector) if accept else element
+            if value:
+                self.record(field, card_type, tried, selector)
+                return value, selector
+        self.record(field, card_type, tried, None)
+        return None, None
+
+    def find_all(self, root: Any, field: str, card_type: str = ANY_TYPE) -> List[Any]:
+        """
+        查找字段的所有元素：返回第一个有匹配结果的选择器的全部元素
+
+        Args:
+            root: 查找范围
+            field: 字段名
+            card_type: 卡片类型
+
+        Returns:
+            List: 元素列表，全部未命中时为空列表
+        """
+        tried = []
+        for selector in self.candidates(field, card_type):
+            tried.append(selector)
+            elements = root.find_elements(By.CSS_SELECTOR, selector)
+            if elements:
+                self.record(field, card_type, tried, selector)
+                return elements
+        self.record(field, card_type, tried, None)
+        return []
+
+    # ---------- 报告与持久化 ----------
+
+    def dead_selectors(self) -> List[Dict[str, Any]]:
+        """
+        连续未命中达到 dead_after 次的选择器（按汇总统计）
+
+        Returns:
+            List[Dict]: field / selector / trials / hits / last_hit
+        """
+        dead = []
+        with self._lock:
+            for field, configured in self.selectors.items():
+                stats = self._stats.get(field, {}).get(ANY_TYPE, {})
+                for selector in configured:
+                    entry = stats.get(selector)
+                    if entry and entry["misses_since_hit"] >= self.dead_after:
+                        dead.append({"field": field, "selector": selector, "trials": entry["trials"],
+                                     "hits": entry["hits"], "last_hit": entry["last_hit"]})
+        return dead
+
+    def report(self) -> List[Dict[str, Any]]:
+        """记录失效选择器的警告日志并返回它们"""
+        dead = self.dead_selectors()
+        for item in dead:
+            last_hit = (time.strftime("%Y-%m-%d %H:%M", time.localtime(item["last_hit"]))
+                        if item["last_hit"] else "从未命中")
+            logger.warning(f"⚠️ {self.platform} 选择器可能已失效: {item['field']} → {item['selector']}"
+                           f"（尝试 {item['trials']} 次，命中 {item['hits']} 次，最后命中: {last_hit}）")
+        return dead
+
+    def load(self):
+        """读取统计文件中本平台的统计"""
+        if not self.stats_path or not os.path.exists(self.stats_path):
+            return
+        try:
+            with open(self.stats_path, "r", encoding="utf-8") as f:
+                stats = json.load(f).get(self.platform, {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取选择器统计失败，使用配置顺序: {str(e)}")
+            return
+        with self._lock:
+            self._stats = stats
+
+    def save(self):
+        """把本平台的统计写入统计文件（保留其他平台的统计）"""
+        if not self.stats_path:
+            return
+        os.makedirs(os.path.dirname(self.stats_path) or ".", exist_ok=True)
+        all_stats: Dict[str, Any] = {}
+        if os.path.exists(self.stats_path):
+            try:
+                with open(self.stats_path, "r", encoding="utf-8") as f:
+                    all_stats = json.load(f)
+            except (OSError, ValueError):
+                all_stats = {}
+        with self._lock:
+            all_stats[self.platform] = json.loads(json.dumps(self._stats))
+        temp_path = f"{self.stats_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(all_stats, f, ensure_ascii=False, indent=1)
+        os.replace(temp_path, self.stats_path)
+
+
+_registries: Dict[str, SelectorRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_selector_registry(platform: str) -> SelectorRegistry:
+    """
+    获取按配置创建的平台选择器注册表（进程内单例）
+
+    Args:
+        platform: bilibili 或 douyin
+
+    Returns:
+        SelectorRegistry: 注册表
+    """
+    with _registries_lock:
+        if platform not in _registries:
+            from config.settings import BILIBILI_SELECTORS, DOUYIN_SELECTORS, SELECTOR_CONFIG
+
+            selectors = {"bilibili": BILIBILI_SELECTORS, "douyin": DOUYIN_SELECTORS}[platform]
+            _registries[platform] = SelectorRegistry(
+                platform, selectors,
+                stats_path=SELECTOR_CONFIG["stats_file"],
+                dead_after=SELECTOR_CONFIG["dead_after"],
+                smoothing=SELECTOR_CONFIG["smoothing"],
+            )
+        return _registries[platform]
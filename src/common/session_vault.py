@@ -0,0 +1,327 @@
+"""
+登录态会话库
+
+把浏览器里的登录Cookie导出后加密保存在磁盘上，之后的任务直接复用：
+- 校验分两步：先检查登录Cookie是否存在、是否过期（本地，无网络请求），
+  再用一个轻量的已登录接口探测（探测成功后 probe_interval 秒内不再重复）
+- 可以直接注入新启动的浏览器（selenium 或 cdp 后端）和 requests 会话
+- 加密密钥来自环境变量，未设置时在会话库目录生成仅当前用户可读的密钥文件
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _fernet_class():
+    try:
+        from cryptography.fernet import Fernet
+    except ImportError:
+        raise ImportError("会话库需要 cryptography，请先执行: pip install cryptography")
+    return Fernet
+
+
+def _probe_ok(platform: str, payload: Dict[str, Any]) -> bool:
+    """判断探测接口的返回是否表示已登录"""
+    if platform == "bilibili":
+        # /x/web-interface/nav：未登录时 code 为 -101
+        return payload.get("code") == 0 and bool((payload.get("data") or {}).get("isLogin"))
+    if platform == "douyin":
+        return payload.get("message") == "success" and bool(payload.get("data"))
+    raise ValueError(f"未知平台: {platform}")
+
+
+def _from_cdp_cookie(cookie: Dict[str, Any]) -> Dict[str, Any]:
+    """DevTools Cookie格式 → selenium get_cookies 格式"""
+    converted = {
+        "name": cookie["name"],
+        "value": cookie["value"],
+        "domain": cookie.get("domain", ""),
+        "path": cookie.get("path", "/"),
+        "secure": cookie.get("secure", False),
+        "httpOnly": cookie.get("httpOnly", False),
+    }
+    if cookie.get("sameSite"):
+        converted["sameSite"] = cookie["sameSite"]
+    if not cookie.get("session") and cookie.get("expires", -1) > 0:
+        converted["expiry"] = int(cookie["expires"])
+    return converted
+
+
+def _to_cdp_cookie(cookie: Dict[str, Any]) -> Dict[str, Any]:
+    """selenium Cookie格式 → Network.setCookies 参数"""
+    converted = {
+        "name": cookie["name"],
+        "value": cookie["value"],
+        "domain": cookie.get("domain", ""),
+        "path": cookie.get("path", "/"),
+        "secure": cookie.get("secure", False),
+        "httpOnly": cookie.get("httpOnly", False),
+    }
+    if cookie.get("sameSite"):
+        converted["sameSite"] = cookie["sameSite"]
+    if cookie.get("expiry"):
+        converted["expires"] = cookie["expiry"]
+    return converted
+
+
+class SessionVault:
+    """加密的登录态会话库，每个 平台/账号 一个文件"""
+
+    def __init__(self, vault_dir: str, platforms: Dict[str, Dict[str, Any]], key: Optional[bytes] = None,
+                 probe_interval: float = 600, probe_timeout: float = 5, user_agent: Optional[str] = None):
+        """
+        初始化会话库
+
+        Args:
+            vault_dir: 会话库目录
+            platforms: 各平台配置（domain、auth_cookies、probe_url）
+            key: Fernet密钥，为None时读取或生成 vault_dir/.key
+            probe_interval: 探测成功后多久内不再重复探测（秒）
+            probe_timeout: 探测请求超时（秒）
+            user_agent: 探测请求使用的User-Agent
+        """
+        self.vault_dir = vault_dir
+        self.platforms = platforms
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.user_agent = user_agent
+        os.makedirs(vault_dir, exist_ok=True)
+        self._fernet = _fernet_class()(key or self._load_or_create_key())
+        self._lock = threading.Lock()
+
+    def _load_or_create_key(self) -> bytes:
+        key_path = os.path.join(self.vault_dir, ".key")
+        if os.path.exists(key_path):
+            with open(key_path, "rb") as f:
+                return f.read().strip()
+        key = _fernet_class().generate_key()
+        fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+        logger.info(f"🔑 已生成会话库密钥: {key_path}")
+        return key
+
+    def _platform(self, platform: str) -> Dict[str, Any]:
+        if platform not in self.platforms:
+            raise ValueError(f"未知平台: {platform}")
+        return self.platforms[platform]
+
+    def _path(self, platform: str, account: str) -> str:
+        return os.path.join(self.vault_dir, f"{platform}__{account}.vault")
+
+    # ---------- 读写 ----------
+
+    def save(self, platform: str, cookies: List[Dict[str, Any]], account: str = "default",
+             validated_at: Optional[float] = None):
+        """
+        加密保存Cookie
+
+        Args:
+            platform: 平台（bilibili / douyin）
+            cookies: selenium get_cookies 格式的Cookie列表
+            account: 账号标识
+            validated_at: 最近一次探测成功的时间戳
+        """
+        self._platform(platform)
+        payload = {"cookies": cookies, "saved_at": time.time(), "validated_at": validated_at}
+        token = self._fernet.encrypt(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+        path = self._path(platform, account)
+        temp_path = f"{path}.tmp"
+        with self._lock:
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(token)
+            os.replace(temp_path, path)
+
+    def load(self, platform: str, account: str = "default") -> Optional[Dict[str, Any]]:
+        """
+        读取并解密会话
+
+        Returns:
+            Dict: {"cookies", "saved_at", "validated_at"}，不存在或无法解密时返回None
+        """
+        from cryptography.fernet import InvalidToken
+
+        try:
+            with open(self._path(platform, account), "rb") as f:
+                token = f.read()
+        except OSError:
+            return None
+        try:
+            return json.loads(self._fernet.decrypt(token))
+        except (InvalidToken, ValueError):
+            logger.warning(f"会话文件无法解密，已忽略: {platform}/{account}")
+            return None
+
+    def delete(self, platform: str, account: str = "default"):
+        """删除会话"""
+        try:
+            os.remove(self._path(platform, account))
+        except FileNotFoundError:
+            pass
+
+    # ---------- 校验 ----------
+
+    def has_valid_cookies(self, platform: str, cookies: List[Dict[str, Any]], now: Optional[float] = None) -> bool:
+        """
+        本地校验：登录Cookie齐全且未过期（会话Cookie视为未过期）
+
+        Args:
+            platform: 平台
+            cookies: Cookie列表
+            now: 当前时间戳，默认 time.time()
+
+        Returns:
+            bool: 是否有效
+        """
+        now = time.time() if now is None else now
+        by_name = {cookie["name"]: cookie for cookie in cookies}
+        for name in self._platform(platform)["auth_cookies"]:
+            cookie = by_name.get(name)
+            if cookie is None or not cookie.get("value"):
+                return False
+            if cookie.get("expiry") and cookie["expiry"] <= now:
+                return False
+        return True
+
+    def probe(self, platform: str, cookies: List[Dict[str, Any]], session=None) -> bool:
+        """
+        用Cookie请求已登录接口，确认服务端仍认可该登录态
+
+        Args:
+            platform: 平台
+            cookies: Cookie列表
+            session: 发请求用的 requests 会话，默认新建
+
+        Returns:
+            bool: 是否已登录
+        """
+        import requests
+
+        config = self._platform(platform)
+        cookie_header = "; ".join(f"{cookie['name']}={cookie['value']}" for cookie in cookies)
+        headers = {"Cookie": cookie_header, "Referer": config.get("home_url", "")}
+        if self.user_agent:
+            headers["User-Agent"] = self.user_agent
+
+        requester = session or requests
+        try:
+            response = requester.get(config["probe_url"], headers=headers, timeout=self.probe_timeout)
+            return response.status_code == 200 and _probe_ok(platform, response.json())
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"{platform} 登录态探测失败: {str(e)}")
+            return False
+
+    def validate(self, platform: str, account: str = "default", session=None, force_probe: bool = False) -> bool:
+        """
+        校验会话库中的登录态：先本地检查过期，再按需探测
+
+        Args:
+            platform: 平台
+            account: 账号标识
+            session: 探测用的 requests 会话
+            force_probe: 忽略 probe_interval，强制探测
+
+        Returns:
+            bool: 登录态是否可用
+        """
+        stored = self.load(platform, account)
+        if not stored or not self.has_valid_cookies(platform, stored["cookies"]):
+            return False
+
+        validated_at = stored.get("validated_at")
+        if not force_probe and validated_at and time.time() - validated_at < self.probe_interval:
+            return True
+
+        if not self.probe(platform, stored["cookies"], session):
+            logger.info(f"{platform}/{account} 的登录态已失效")
+            return False
+        self.save(platform, stored["cookies"], account, validated_at=time.time())
+        return True
+
+    # ---------- 导入导出 ----------
+
+    def export_from_driver(self, driver, platform: str, account: str = "default") -> int:
+        """
+        从浏览器导出该平台域名下的全部Cookie（包括其他子域名）并保存
+
+        Args:
+            driver: selenium Chrome 或 CdpDriver
+            platform: 平台
+            account: 账号标识
+
+        Returns:
+            int: 保存的Cookie数量
+        """
+        domain = self._platform(platform)["domain"].lstrip(".")
+        result = driver.execute_cdp_cmd("Network.getAllCookies", {})
+        cookies = [
+            _from_cdp_cookie(cookie) for cookie in result.get("cookies", [])
+            if cookie.get("domain", "").lstrip(".").endswith(domain)
+        ]
+        self.save(platform, cookies, account)
+        logger.info(f"✅ 已保存 {platform}/{account} 的 {len(cookies)} 个Cookie")
+        return len(cookies)
+
+    def inject_into_driver(self, driver, platform: str, account: str = "default") -> bool:
+        """
+        把会话注入浏览器（无需先打开对应域名的页面）
+
+        Returns:
+            bool: 是否注入了有效会话
+        """
+        if not self.validate(platform, account):
+            return False
+        cookies = self.load(platform, account)["cookies"]
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": [_to_cdp_cookie(cookie) for cookie in cookies]})
+        logger.info(f"✅ 已向浏览器注入 {platform}/{account} 的登录态")
+        return True
+
+    def inject_into_session(self, session, platform: str, account: str = "default") -> bool:
+        """
+        把会话注入 requests 会话
+
+        Returns:
+            bool: 是否注入了有效会话
+        """
+        if not self.validate(platform, account):
+            return False
+        for cookie in self.load(platform, account)["cookies"]:
+            session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain", ""),
+                                path=cookie.get("path", "/"))
+        return True
+
+
+_shared_vault: Optional[SessionVault] = None
+_shared_lock = threading.Lock()
+
+
+def get_session_vault() -> SessionVault:
+    """
+    获取按 SESSION_CONFIG 配置的共享会话库（进程内单例）
+
+    Returns:
+        SessionVault: 会话库
+    """
+    global _shared_vault
+    with _shared_lock:
+        if _shared_vault is None:
+            from config.settings import BROWSER_CONFIG, SESSION_CONFIG
+
+            key = os.environ.get(SESSION_CONFIG["key_env"])
+            _shared_vault = SessionVault(
+                vault_dir=SESSION_CONFIG["vault_dir"],
+                platforms=SESSION_CONFIG["platforms"],
+                key=key.encode("ascii") if key else None,
+                probe_interval=SESSION_CONFIG["probe_interval"],
+                probe_timeout=SESSION_CONFIG["probe_timeout"],
+                user_agent=BROWSER_CONFIG["user_agent"],
+            )
+        return _shared_vault
@@ -0,0 +1,4 @@
+"""
+常驻爬取服务模块
+在一个长期运行的进程中保持浏览器会话，通过本地HTTP接口接收爬取、刷新、导出任务
+"""
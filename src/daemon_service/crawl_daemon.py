@@ -0,0 +1,400 @@
+"""
+常驻爬取服务
+
+启动一次解释器、浏览器和登录状态，之后通过本地HTTP接口持续接收任务，
+避免每次cron调用都重新启动Chrome、重新登录。
+
+接口（JSON）：
+    POST   /jobs          提交任务 {"type": "crawl" | "refresh" | "export", "params": {...}}
+    GET    /jobs          查询所有任务
+    GET    /jobs/<id>     查询单个任务状态
+    DELETE /jobs/<id>     取消任务（排队中的任务直接取消，运行中的任务在下一个检查点停止）
+
+示例：
+    curl -X POST localhost:8765/jobs -d '{"type": "refresh", "params": {"video_urls": ["https://www.douyin.com/video/..."]}}'
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+from src.common.log_setup import log_context
+
+logger = logging.getLogger(__name__)
+
+
+# 任务状态
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class Job:
+    """单个任务"""
+
+    def __init__(self, job_type: str, params: Optional[Dict[str, Any]] = None):
+        """
+        初始化任务
+
+        Args:
+            job_type: 任务类型
+            params: 任务参数
+        """
+        self.job_id = uuid.uuid4().hex[:12]
+        self.job_type = job_type
+        self.params = params or {}
+        self.status = PENDING
+        self.result: Any = None
+        self.error = ""
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_event = threading.Event()
+
+    def should_stop(self) -> bool:
+        """供任务处理函数在检查点调用，判断是否已被取消"""
+        return self.cancel_event.is_set()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可序列化的字典"""
+        return {
+            "job_id": self.job_id,
+            "type": self.job_type,
+            "params": self.params,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class BrowserSessions:
+    """
+    常驻浏览器会话
+
+    B站提取器和抖音浏览器在第一次使用时启动，之后一直复用，直到服务关闭
+    """
+
+    def __init__(self, headless: bool = False, backend: str = "selenium"):
+        self.headless = headless
+        self.backend = backend
+        self._bilibili = None
+        self._douyin_driver = None
+
+    @property
+    def bilibili(self):
+        """B站批量提取器（已进入上下文）"""
+        if self._bilibili is None:
+            from src.bilibili_service.mutli_extract import BilibiliMultiExtractor
+
+            self._bilibili = BilibiliMultiExtractor(headless=self.headless, backend=self.backend).__enter__()
+            logger.info("✅ B站浏览器会话已启动")
+        return self._bilibili
+
+    @property
+    def douyin_driver(self):
+        """抖音视频页浏览器"""
+        if self._douyin_driver is None:
+            from src.douyin_service.batch_video_stats import create_driver
+
+            self._douyin_driver = create_driver(self.backend)
+            logger.info("✅ 抖音浏览器会话已启动")
+        return self._douyin_driver
+
+    def close(self):
+        """关闭所有浏览器会话"""
+        if self._bilibili is not None:
+            self._bilibili.__exit__(None, None, None)
+            self._bilibili = None
+        if self._douyin_driver is not None:
+            self._douyin_driver.quit()
+            self._douyin_driver = None
+
+
+def run_crawl_job(job: Job, sessions: BrowserSessions) -> Dict[str, Any]:
+    """B站按时间范围爬取任务"""
+    from config.settings import BILIBILI_URL, DATA_DIR
+
+    params = job.params
+    contents = sessions.bilibili.extract_contents_by_date_range(
+        user_url=params.get("url", BILIBILI_URL),
+        start_time_str=params.get("start", "05月01日"),
+        end_time_str=params.get("end", "11月01日"),
+        should_stop=job.should_stop
+    )
+    result: Dict[str, Any] = {"count": len(contents)}
+
+    if params.get("export") and contents and not job.should_stop():
+        from src.bilibili_service.data_exporter import DataExporter
+
+        exporter = DataExporter(output_dir=params.get("output_dir", str(DATA_DIR)))
+        result["files"] = exporter.export_all_formats(contents)
+    return result
+
+
+def run_refresh_job(job: Job, sessions: BrowserSessions) -> Dict[str, Any]:
+    """抖音视频统计数据刷新任务"""
+    from src.common.retry import retry_queue_from_config
+    from src.douyin_service.batch_video_stats import get_video_stats
+
+    video_urls: List[str] = job.params.get("video_urls", [])
+    browserless = job.params.get("browserless", True)
+    retry_queue = retry_queue_from_config(
+        lambda url: get_video_stats(url, lambda: sessions.douyin_driver, browserless), "douyin_refresh.jsonl"
+    )
+    outcome = retry_queue.run(video_urls, should_stop=job.should_stop)
+    if job.should_stop():
+        logger.info("收到取消请求，停止刷新")
+    return {"count": len(outcome.results), "stats": outcome.results, "failed": outcome.dead}
+
+
+def run_export_job(job: Job, sessions: BrowserSessions) -> Dict[str, Any]:
+    """导出任务，参数与命令行 export 子命令一致"""
+    from src.cli import build_parser, cmd_export
+
+    params = job.params
+    argv = ["export", str(params.get("platform", "douyin"))]
+    for key in ("txt", "stats", "content", "output_dir"):
+        if key in params:
+            argv += [f"--{key.replace('_', '-')}", str(params[key])]
+    formats = params.get("formats")
+    if formats:
+        argv += ["--formats", *([formats] if isinstance(formats, str) else [str(name) for name in formats])]
+    if params.get("parquet"):
+        argv.append("--parquet")
+    try:
+        args = build_parser().parse_args(argv)
+    except SystemExit:
+        # argparse 出错时会退出进程，转换为任务失败
+        raise ValueError(f"导出参数无效: {' '.join(argv[1:])}")
+    return {"exit_code": cmd_export(args)}
+
+
+# 默认任务处理函数
+DEFAULT_HANDLERS: Dict[str, Callable[[Job, BrowserSessions], Any]] = {
+    "crawl": run_crawl_job,
+    "refresh": run_refresh_job,
+    "export": run_export_job,
+}
+
+
+class CrawlDaemon:
+    """常驻爬取服务：任务队列 + 单个工作线程（浏览器会话不是线程安全的）"""
+
+    def __init__(self, handlers: Optional[Dict[str, Callable[[Job, BrowserSessions], Any]]] = None,
+                 sessions: Optional[BrowserSessions] = None):
+        """
+        初始化常驻服务
+
+        Args:
+            handlers: 任务类型到处理函数的映射，默认使用 DEFAULT_HANDLERS
+            sessions: 浏览器会话，默认按需启动
+        """
+        self.handlers = handlers if handlers is not None else dict(DEFAULT_HANDLERS)
+        self.sessions = sessions if sessions is not None else BrowserSessions()
+        self.jobs: Dict[str, Job] = {}
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动工作线程"""
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._work_loop, name="crawl-daemon-worker", daemon=True)
+            self._worker.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """停止工作线程并关闭浏览器会话"""
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join(timeout)
+            self._worker = None
+        self.sessions.close()
+
+    def submit(self, job_type: str, params: Optional[Dict[str, Any]] = None) -> Job:
+        """
+        提交任务
+
+        Args:
+            job_type: 任务类型
+            params: 任务参数
+
+        Returns:
+            Job: 新建的任务
+        """
+        if not isinstance(job_type, str) or job_type not in self.handlers:
+            raise ValueError(f"未知的任务类型: {job_type}")
+        if params is not None and not isinstance(params, dict):
+            raise ValueError("任务参数必须是JSON对象")
+        job = Job(job_type, params)
+        with self._lock:
+            self.jobs[job.job_id] = job
+        self._queue.put(job)
+        logger.info(f"📥 收到任务 {job.job_id} ({job_type})")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """查询任务"""
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self) -> List[Job]:
+        """查询所有任务（按提交时间排序）"""
+        with self._lock:
+            return sorted(self.jobs.values(), key=lambda job: job.created_at)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        取消任务
+
+        Args:
+            job_id: 任务ID
+
+        Returns:
+            Job: 被取消的任务，不存在时返回None
+        """
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel_event.set()
+        with self._lock:
+            if job.status == PENDING:
+                job.status = CANCELLED
+                job.finished_at = time.time()
+        logger.info(f"🛑 任务 {job_id} 已请求取消")
+        return job
+
+    def _work_loop(self):
+        """工作线程：依次执行队列中的任务"""
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            with self._lock:
+                if job.status == CANCELLED:
+                    continue
+                job.status = RUNNING
+                job.started_at = time.time()
+
+            # 任务内的日志都带上任务ID作为 run_id
+            with log_context(run_id=job.job_id, account=job.params.get("url", "")):
+                logger.info(f"▶️ 开始执行任务 {job.job_id} ({job.job_type})")
+                try:
+                    result = self.handlers[job.job_type](job, self.sessions)
+                    status = CANCELLED if job.should_stop() else DONE
+                    error = ""
+                except Exception as e:
+                    logger.error(f"任务 {job.job_id} 执行失败: {str(e)}")
+                    result, status, error = None, FAILED, str(e)
+
+            with self._lock:
+                job.result = result
+                job.status = status
+                job.error = error
+                job.finished_at = time.time()
+            logger.info(f"⏹️ 任务 {job.job_id} 结束，状态: {status}")
+
+
+def _make_handler(daemon: CrawlDaemon):
+    """创建绑定到指定服务实例的HTTP请求处理类"""
+
+    class DaemonRequestHandler(BaseHTTPRequestHandler):
+        """本地HTTP接口"""
+
+        def _send_json(self, status: int, payload: Any):
+            body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _job_id(self) -> Optional[str]:
+            parts = self.path.strip("/").split("/")
+            if len(parts) == 2 and parts[0] == "jobs":
+                return parts[1]
+            return None
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/jobs":
+                self._send_json(200, [job.to_dict() for job in daemon.list_jobs()])
+                return
+            job = daemon.get(self._job_id() or "")
+            if job is None:
+                self._send_json(404, {"error": "任务不存在"})
+                return
+            self._send_json(200, job.to_dict())
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/jobs":
+                self._send_json(404, {"error": "接口不存在"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(payload, dict):
+                    raise ValueError("请求体必须是JSON对象")
+                job = daemon.submit(payload.get("type", ""), payload.get("params"))
+            except ValueError as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            self._send_json(202, job.to_dict())
+
+        def do_DELETE(self):
+            job = daemon.cancel(self._job_id() or "")
+            if job is None:
+                self._send_json(404, {"error": "任务不存在"})
+                return
+            self._send_json(200, job.to_dict())
+
+        def log_message(self, format, *args):
+            logger.debug("%s - %s", self.address_string(), format % args)
+
+    return DaemonRequestHandler
+
+
+def create_server(daemon: CrawlDaemon, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    """
+    创建本地HTTP服务（只监听本机地址）
+
+    Args:
+        daemon: 常驻服务实例
+        host: 监听地址
+        port: 监听端口，0表示随机端口
+
+    Returns:
+        ThreadingHTTPServer: HTTP服务
+    """
+    return ThreadingHTTPServer((host, port), _make_handler(daemon))
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, headless: bool = False, backend: str = "selenium"):
+    """
+    启动常驻爬取服务并阻塞运行，Ctrl+C 退出
+
+    Args:
+        host: 监听地址
+        port: 监听端口
+        headless: 浏览器是否使用无头模式
+        backend: 浏览器后端，selenium 或 cdp
+    """
+    daemon = CrawlDaemon(sessions=BrowserSessions(headless=headless, backend=backend))
+    daemon.start()
+    server = create_server(daemon, host, port)
+    logger.info(f"🚀 常驻爬取服务已启动: http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("正在关闭常驻爬取服务...")
+    finally:
+        server.server_close()
+        daemon.stop()
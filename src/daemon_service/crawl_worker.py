@@ -0,0 +1,203 @@
+"""
+任务表工作机
+
+从共享任务表（src.common.work_queue）领取爬取单元，用现有的提取器执行并提交结果。
+多台机器各自运行一个工作机即可分担每晚的刷新：
+
+    alipay-crawler enqueue douyin                         # 把2.txt中的视频加入任务表
+    alipay-crawler enqueue bilibili --start 05月01日 --end 11月01日   # 按月切分日期窗口
+    alipay-crawler worker --exit-when-idle                # 每台工作机上运行
+    alipay-crawler queue --export                         # 查看进度，汇总结果导出
+
+单元类型：
+    douyin_video      {"url": 视频URL}                       → 统计数据（get_video_stats 的返回值）
+    bilibili_window   {"url": 动态页URL, "start", "end"}     → 动态列表（BilibiliDynamic.to_dict）
+"""
+
+import logging
+import re
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.common.log_setup import log_context
+from src.common.records import BilibiliDynamic, DouyinVideo
+from src.common.work_queue import LeaseKeeper, WorkQueue, default_worker_id
+from src.daemon_service.crawl_daemon import BrowserSessions
+
+logger = logging.getLogger(__name__)
+
+
+DOUYIN_VIDEO = "douyin_video"
+BILIBILI_WINDOW = "bilibili_window"
+
+
+# ---------- 爬取单元 ----------
+
+def douyin_video_units(video_urls: List[str]) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """抖音视频单元，业务键为视频ID"""
+    for url in video_urls:
+        yield DOUYIN_VIDEO, DouyinVideo(video_url=url).content_id, {"url": url}
+
+
+def month_windows(start: str, end: str) -> List[Tuple[str, str]]:
+    """
+    把 "MM月DD日" 形式的时间范围按自然月切分为日期窗口
+
+    Args:
+        start: 开始时间（如 05月01日）
+        end: 结束时间（如 11月01日）
+
+    Returns:
+        List: (开始, 结束) 窗口列表，相邻窗口共用边界日期（结果汇总时按内容ID去重）
+    """
+    pattern = re.compile(r"(\d{1,2})月(\d{1,2})日")
+    start_match, end_match = pattern.match(start), pattern.match(end)
+    if not start_match or not end_match:
+        raise ValueError(f"无法解析时间范围: {start} 到 {end}")
+    month, day = int(start_match.group(1)), int(start_match.group(2))
+    end_month, end_day = int(end_match.group(1)), int(end_match.group(2))
+
+    windows = []
+    while (month, day) < (end_month, end_day):
+        next_month = month + 1
+        boundary = (next_month, 1) if next_month <= end_month else (end_month, end_day)
+        windows.append((f"{month:02d}月{day:02d}日", f"{boundary[0]:02d}月{boundary[1]:02d}日"))
+        month, day = boundary
+    return windows
+
+
+def bilibili_window_units(user_url: str, start: str, end: str) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """B站日期窗口单元，业务键为 账号URL|开始|结束"""
+    for window_start, window_end in month_windows(start, end):
+        payload = {"url": user_url, "start": window_start, "end": window_end}
+        yield BILIBILI_WINDOW, f"{user_url}|{window_start}|{window_end}", payload
+
+
+# ---------- 单元执行 ----------
+
+def run_douyin_video(payload: Dict[str, Any], sessions: BrowserSessions,
+                     should_stop: Callable[[], bool]) -> Dict[str, Any]:
+    """执行抖音视频单元"""
+    from config.settings import WORK_QUEUE_CONFIG
+    from src.douyin_service.batch_video_stats import get_video_stats
+
+    return get_video_stats(payload["url"], lambda: sessions.douyin_driver, WORK_QUEUE_CONFIG["browserless"])
+
+
+def run_bilibili_window(payload: Dict[str, Any], sessions: BrowserSessions,
+                        should_stop: Callable[[], bool]) -> List[Dict[str, Any]]:
+    """执行B站日期窗口单元"""
+    contents = sessions.bilibili.extract_contents_by_date_range(
+        user_url=payload["url"],
+        start_time_str=payload["start"],
+        end_time_str=payload["end"],
+        should_stop=should_stop
+    )
+    if should_stop():
+        # 中途停止的窗口结果不完整，不提交，重新排队由其他工作机重做
+        raise InterruptedError("执行中途停止")
+    return [content.to_dict() for content in contents]
+
+
+# 默认单元处理函数
+DEFAULT_UNIT_HANDLERS: Dict[str, Callable[[Dict[str, Any], BrowserSessions, Callable[[], bool]], Any]] = {
+    DOUYIN_VIDEO: run_douyin_video,
+    BILIBILI_WINDOW: run_bilibili_window,
+}
+
+
+class CrawlWorker:
+    """工作机：循环领取单元、续约、执行、提交"""
+
+    def __init__(self, queue: WorkQueue, sessions: Optional[BrowserSessions] = None,
+                 handlers: Optional[Dict[str, Callable[..., Any]]] = None, worker_id: Optional[str] = None,
+                 heartbeat_interval: float = 60, poll_interval: float = 10,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        初始化工作机
+
+        Args:
+            queue: 任务表
+            sessions: 浏览器会话，默认按需启动
+            handlers: 单元类型到处理函数 (参数, 浏览器会话, 停止检查) → 结果 的映射
+            worker_id: 工作机标识，默认 主机名:进程号
+            heartbeat_interval: 续约间隔（秒）
+            poll_interval: 没有可领取单元时的等待间隔（秒）
+            sleep: 等待函数
+        """
+        self.queue = queue
+        self.sessions = sessions if sessions is not None else BrowserSessions()
+        self.handlers = handlers if handlers is not None else dict(DEFAULT_UNIT_HANDLERS)
+        self.worker_id = worker_id or default_worker_id()
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+        self.sleep = sleep
+
+    def run_once(self, should_stop: Callable[[], bool] = lambda: False) -> Optional[str]:
+        """
+        领取并执行一个单元
+
+        Returns:
+            Optional[str]: 单元的最终状态（done / pending / failed / lost），没有可领取单元时为None
+        """
+        leases = self.queue.lease(self.worker_id, kinds=list(self.handlers))
+        if not leases:
+            return None
+        lease = leases[0]
+
+        with log_context(unit=lease.unit_id, worker=self.worker_id), \
+                LeaseKeeper(self.queue, lease, self.heartbeat_interval) as keeper:
+            logger.info(f"领取 {lease.unit_id}（第 {lease.attempts} 次尝试）")
+            stop = lambda: should_stop() or keeper.lost.is_set()
+            try:
+                result = self.handlers[lease.kind](lease.payload, self.sessions, stop)
+            except Exception as e:
+                if keeper.lost.is_set():
+                    return "lost"
+                status = self.queue.fail(lease, f"{type(e).__name__}: {e}")
+                logger.warning(f"⚠️ {lease.unit_id} 执行失败（{status or '租约已失效'}）: {str(e)}")
+                return status or "lost"
+
+            # 幂等提交：即使租约在执行末尾过期，只要单元还没有结果，这次的结果依然生效
+            stored = self.queue.complete(lease, result)
+            logger.info(f"✅ {lease.unit_id} 完成" + ("" if stored else "（已有结果，本次结果丢弃）"))
+            return "done"
+
+    def run(self, should_stop: Callable[[], bool] = lambda: False, exit_when_idle: bool = False) -> Dict[str, int]:
+        """
+        持续领取执行，直到 should_stop 返回True（或 exit_when_idle 时任务表没有可领取的单元）
+
+        Returns:
+            Dict: 各最终状态的单元数
+        """
+        summary: Dict[str, int] = {}
+        try:
+            while not should_stop():
+                status = self.run_once(should_stop)
+                if status is None:
+                    if exit_when_idle:
+                        break
+                    self.sleep(self.poll_interval)
+                    continue
+                summary[status] = summary.get(status, 0) + 1
+        finally:
+            self.sessions.close()
+        logger.info(f"工作机 {self.worker_id} 退出: {summary}")
+        return summary
+
+
+# ---------- 结果汇总 ----------
+
+def collect_douyin_results(queue: WorkQueue) -> List[DouyinVideo]:
+    """已完成的抖音视频单元 → 视频记录"""
+    return [DouyinVideo.from_stats(payload["url"], stats) for _, payload, stats in queue.results(DOUYIN_VIDEO)]
+
+
+def collect_bilibili_results(queue: WorkQueue) -> List[BilibiliDynamic]:
+    """已完成的B站窗口单元 → 动态记录（相邻窗口边界日期的重复内容按内容ID去重）"""
+    records: Dict[str, BilibiliDynamic] = {}
+    for _, _, contents in queue.results(BILIBILI_WINDOW):
+        for content in contents:
+            record = BilibiliDynamic.from_dict(content)
+            records.setdefault(record.content_id, record)
+    return list(records.values())
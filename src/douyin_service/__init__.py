@@ -3,7 +3,13 @@
 提供抖音相关的登录、数据提取等功能
 """
 
-from .login import douyin_login, get_chrome_options
-
 __version__ = "1.0.0"
-__all__ = ["douyin_login", "get_chrome_options"]
\ No newline at end of file
+__all__ = ["douyin_login", "get_chrome_options"]
+
+
+def __getattr__(name):
+    """延迟导入登录模块，避免导入本包时加载selenium"""
+    if name in __all__:
+        from . import login
+        return getattr(login, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -16,36 +16,16 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import logging
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+from config.settings import CHROME_PROFILE_DIR, DOUYIN_CONTENT_FILE, DOUYIN_STATS_DEBUG_FILE, DOUYIN_STATS_FILE
+from src.common.change_log import publish_changes
+from src.common.command_trace import trace_driver
+from src.common.profiling import profile_stage
+from src.common.records import DouyinVideo, parse_count
+from src.common.retry import FetchError, retry_queue_from_config
+from src.common.selector_registry import get_selector_registry
 
-def parse_number(text):
-    """解析数字，处理万、千等单位"""
-    if not text:
-        return 0
-    
-    # 移除所有非数字字符，保留数字和单位
-    text = text.strip()
-    
-    # 使用正则表达式提取数字和单位
-    match = re.search(r'(\d+\.?\d*)([万千wW]?)', text)
-    if not match:
-        return 0
-    
-    number = float(match.group(1))
-    unit = match.group(2).lower()
-    
-    # 根据单位转换数字
-    if unit in ['w', '万']:
-        return int(number * 10000)
-    elif unit == '千':
-        return int(number * 1000)
-    else:
-        return int(number)
+# 日志由入口（命令行、常驻服务）通过 src.common.log_setup.setup_logging 统一初始化
+logger = logging.getLogger(__name__)
 
 def extract_video_stats(driver, video_url):
     """提取单个视频的统计数据"""
@@ -67,11 +47,11 @@ def extract_video_stats(driver, video_url):
         # 获取页面源码用于调试
         page_source = driver.page_source
         
-        # 查找所有包含 fcEX2ARL class 的 div
-        stats_divs = driver.find_elements(By.CSS_SELECTOR, "div.fcEX2ARL")
+        # 查找统计区域的 div（选择器由注册表按命中情况排序）
+        stats_divs = get_selector_registry("douyin").find_all(driver, "stats_block")
         
-        # 写入调试信息到文件
-        with open('/Users/Zhuanz/projects/PythonWS/Alipay/3.txt', 'a', encoding='utf-8') as debug_file:
+        # 写入调试信息到单独的调试文件（3.txt 只保存成功取到的统计数据）
+        with open(DOUYIN_STATS_DEBUG_FILE, 'a', encoding='utf-8') as debug_file:
             debug_file.write(f"\n=== 视频URL: {video_url} ===\n")
             debug_file.write(f"找到 {len(stats_divs)} 个 fcEX2ARL div:\n")
             for i, div in enumerate(stats_divs):
@@ -81,6 +61,10 @@ def extract_video_stats(driver, video_url):
                 except Exception as e:
                     debug_file.write(f"Div {i}: 获取HTML失败 - {str(e)}\n")
         
+        # 页面未渲染出统计区域（验证码、加载失败等），不能当作全0数据
+        if not stats_divs:
+            raise FetchError("页面中未找到统计数据")
+        
         # 初始化统计数据
         stats = {
             'likes': 0,
@@ -96,7 +80,7 @@ def extract_video_stats(driver, video_url):
             try:
                 span = div.find_element(By.TAG_NAME, "span")
                 text = span.text
-                number = parse_number(text)
+                number = parse_count(text)
                 
                 if i == 0:  # 点赞
                     stats['likes'] = number
@@ -112,11 +96,11 @@ def extract_video_stats(driver, video_url):
                 continue
         
         # 提取发布时间
-        try:
-            publish_time_element = driver.find_element(By.CSS_SELECTOR, "span.MsN3XzkF[data-e2e='detail-video-publish-time']")
+        publish_time_element, _ = get_selector_registry("douyin").find(driver, "publish_time")
+        if publish_time_element is not None:
             stats['publish_time'] = publish_time_element.text
-        except Exception as e:
-            logger.warning(f"提取发布时间失败: {str(e)}")
+        else:
+            logger.warning("提取发布时间失败: 未找到发布时间元素")
             stats['publish_time'] = '未找到发布时间'
         
         logger.info(f"视频数据提取完成: 点赞={stats['likes']}, 评论={stats['comments']}, 收藏={stats['collects']}, 转发={stats['shares']}, 发布时间={stats['publish_time']}")
@@ -124,14 +108,27 @@ def extract_video_stats(driver, video_url):
         return stats
         
     except Exception as e:
-        logger.error(f"提取视频统计数据失败: {str(e)}")
-        return {
-            'likes': 0,
-            'comments': 0,
-            'collects': 0,
-            'shares': 0,
-            'publish_time': '提取失败'
-        }
+        # 不再返回全0的默认数据，交给调用方重试或记入死信
+        raise FetchError(f"提取视频统计数据失败: {str(e)}") from e
+
+def get_video_stats(video_url, get_driver, browserless=True):
+    """
+    获取单个视频的统计数据：优先解析视频页嵌入的数据（不启动浏览器），失败时回退到浏览器提取
+    
+    Args:
+        video_url: 视频URL
+        get_driver: 返回浏览器的函数，只在需要回退时调用（浏览器按需启动）
+        browserless: 是否先尝试免浏览器获取
+    """
+    if browserless:
+        from src.douyin_service.ssr_fetch import fetch_video_stats
+        
+        stats = fetch_video_stats(video_url)
+        if stats is not None:
+            logger.info(f"视频数据获取完成（免浏览器）: 点赞={stats['likes']}, 评论={stats['comments']}, 收藏={stats['collects']}, 转发={stats['shares']}, 发布时间={stats['publish_time']}")
+            return stats
+        logger.info("免浏览器获取失败，回退到浏览器提取")
+    return extract_video_stats(get_driver(), video_url)
 
 def read_video_urls(file_path):
     """从文件中读取视频URL列表"""
@@ -151,18 +148,21 @@ def read_video_urls(file_path):
         logger.error(f"读取文件失败: {str(e)}")
         return []
 
-def main():
-    """主函数"""
-    # 清空3.txt文件
-    with open('/Users/Zhuanz/projects/PythonWS/Alipay/3.txt', 'w', encoding='utf-8') as f:
-        f.write("")
-    
-    # 读取视频URL列表
-    video_urls = read_video_urls('/Users/Zhuanz/projects/PythonWS/Alipay/2.txt')
+def create_driver(backend="selenium", record_dir=None, replay_dir=None):
+    """
+    创建用于抖音视频页的Chrome浏览器
     
-    if not video_urls:
-        logger.error("没有找到有效的视频URL")
-        return
+    Args:
+        backend: 浏览器后端，selenium（经chromedriver）、cdp（直连DevTools协议）或 replay（回放录制的会话）
+        record_dir: 录制目录，设置后把本次会话录制到该目录
+        replay_dir: replay 后端使用的录制目录，默认 BROWSER_CONFIG["replay_dir"]
+    """
+    if backend == "replay":
+        from config.settings import BROWSER_CONFIG
+        from src.common.replay import ReplayDriver
+        
+        return trace_driver(ReplayDriver(replay_dir or BROWSER_CONFIG["replay_dir"],
+                                         latency=BROWSER_CONFIG["replay_latency"]))
     
     # 配置Chrome选项
     chrome_options = Options()
@@ -170,58 +170,141 @@ def main():
     chrome_options.add_argument('--disable-dev-shm-usage')
     chrome_options.add_argument('--disable-gpu')
     chrome_options.add_argument('--window-size=1920,1080')
-    chrome_options.add_argument('--user-data-dir=/Users/Zhuanz/projects/PythonWS/Alipay/chrome_user_data')
+    chrome_options.add_argument(f'--user-data-dir={CHROME_PROFILE_DIR}')
     chrome_options.add_argument('--disable-blink-features=AutomationControlled')
     chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
     chrome_options.add_experimental_option('useAutomationExtension', False)
     
-    # 设置ChromeDriver服务
-    service = Service('/usr/local/bin/chromedriver')
+    if backend == "cdp":
+        from src.common.cdp_driver import CdpDriver
+        
+        driver = CdpDriver(options=chrome_options)
+        driver.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    else:
+        # 设置ChromeDriver服务
+        service = Service('/usr/local/bin/chromedriver')
+        
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    
+    if record_dir:
+        from src.common.replay import RecordingDriver
+        
+        driver = RecordingDriver(driver, record_dir)
+    
+    # 注入会话库中的抖音登录态
+    try:
+        from src.common.session_vault import get_session_vault
+        
+        get_session_vault().inject_into_driver(driver, "douyin")
+    except Exception as e:
+        logger.warning(f"注入会话库登录态失败: {str(e)}")
+    return trace_driver(driver)
+
+def main(backend="selenium", browserless=True, record_dir=None, replay_dir=None):
+    """
+    主函数
+    
+    Args:
+        backend: 浏览器后端，selenium、cdp 或 replay
+        browserless: 是否优先免浏览器获取（解析视频页嵌入数据），浏览器只在回退时启动
+        record_dir: 录制目录，设置后把浏览器会话录制到该目录
+        replay_dir: replay 后端使用的录制目录
+    """
+    if backend == "replay" or record_dir:
+        # 免浏览器获取走真实网络，录制和回放都只经过浏览器
+        browserless = False
+    
+    # 清空3.txt文件和调试文件
+    for path in (DOUYIN_STATS_FILE, DOUYIN_STATS_DEBUG_FILE):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("")
     
-    # 启动浏览器
+    # 读取视频URL列表
+    video_urls = read_video_urls(DOUYIN_CONTENT_FILE)
+    
+    if not video_urls:
+        logger.error("没有找到有效的视频URL")
+        return
+    
+    # 浏览器在第一次需要回退时才启动
     driver = None
+    
+    def get_driver():
+        nonlocal driver
+        if driver is None:
+            driver = create_driver(backend, record_dir, replay_dir)
+        return driver
+    
+    def fetch(url):
+        used_browser = False
+        
+        def browser():
+            nonlocal used_browser
+            used_browser = True
+            return get_driver()
+        
+        try:
+            with profile_stage("douyin_fetch"):
+                return get_video_stats(url, browser, browserless)
+        finally:
+            # 浏览器打开页面后添加延迟避免被限制；免浏览器获取只有一次请求，不需要等待
+            if used_browser:
+                time.sleep(2)
+    
+    all_results = []
+    videos = []
+    
+    def save_result(url, stats):
+        # 保存结果（与导出共用视频记录，计数已解析为整数）
+        video = DouyinVideo.from_stats(url, stats)
+        videos.append(video)
+        result = video.to_stats_text()
+        all_results.append(result)
+        logger.info(f"已完成 {len(all_results)}/{len(video_urls)} 个视频")
+        
+        # 将结果追加到3.txt文件（带“=== 视频URL ===”标题，导出时按标题切分）
+        with profile_stage("douyin_save"), open(DOUYIN_STATS_FILE, 'a', encoding='utf-8') as f:
+            f.write(result)
+    
     try:
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        # 失败的视频进入重试队列，主流程继续处理后面的视频；最终失败的写入死信记录，不写入3.txt
+        retry_queue = retry_queue_from_config(fetch, "douyin_stats.jsonl")
+        outcome = retry_queue.run(video_urls, on_result=save_result)
         
-        # 处理每个视频
-        all_results = []
-        for i, url in enumerate(video_urls, 1):
-            logger.info(f"处理第 {i}/{len(video_urls)} 个视频")
-            
-            # 提取视频统计数据
-            stats = extract_video_stats(driver, url)
-            
-            # 保存结果
-            result = f"""视频URL: {url}
-点赞数: {stats['likes']}
-评论数: {stats['comments']}
-收藏数: {stats['collects']}
-转发数: {stats['shares']}
-发布时间: {stats['publish_time']}
-"""
-            all_results.append(result)
-            
-            # 将结果追加到3.txt文件
-            with open('/Users/Zhuanz/projects/PythonWS/Alipay/3.txt', 'a', encoding='utf-8') as f:
-                f.write(result)
-                f.write("-" * 50 + "\n")
-            
-            # 添加延迟避免被限制
-            time.sleep(2)
+        logger.info(f"批量处理完成，共处理 {len(video_urls)} 个视频，重试 {outcome.retries} 次")
         
-        logger.info(f"批量处理完成，共处理 {len(video_urls)} 个视频")
+        # 写入变更事件：列表中的视频最终没有取到数据的报告缺失
+        publish_changes(videos, "douyin", expected_ids=[DouyinVideo(video_url=url).content_id for url in video_urls])
         
         # 在控制台输出汇总信息
         print(f"\n=== 批量处理完成 ===")
-        print(f"共处理 {len(video_urls)} 个视频")
-        print(f"结果已保存到: /Users/Zhuanz/projects/PythonWS/Alipay/3.txt")
+        print(f"共处理 {len(video_urls)} 个视频，成功 {len(outcome.results)} 个，失败 {len(outcome.dead)} 个")
+        print(f"结果已保存到: {DOUYIN_STATS_FILE}")
+        if outcome.dead:
+            print(f"失败的视频已写入死信记录: {retry_queue.dead_letter.path}")
         
     except Exception as e:
         logger.error(f"程序执行失败: {str(e)}")
     finally:
+        registry = get_selector_registry("douyin")
+        registry.report()
+        registry.save()
         if driver:
             driver.quit()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+
+    from src.common.log_setup import setup_logging
+    from src.common.command_trace import add_trace_arguments, command_trace_session
+    from src.common.profiling import add_profile_arguments, profiling_session
+    
+    parser = argparse.ArgumentParser(description="批量提取抖音视频统计数据")
+    add_profile_arguments(parser)
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    
+    setup_logging()
+    with profiling_session(args), command_trace_session(args):
+        main()
\ No newline at end of file
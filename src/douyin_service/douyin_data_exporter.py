@@ -1,23 +1,53 @@
 """
 抖音数据导出模块
-用于将提取的抖音数据导出为Excel和Word格式
+用于将提取的抖音数据导出为Excel、Word、CSV、JSONL格式
 """
 
-import pandas as pd
-from docx import Document
-from docx.shared import Pt, RGBColor
-from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
-from datetime import datetime
 import os
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from loguru import logger
 
+from config.settings import DATA_DIR, DOUYIN_CONTENT_FILE, DOUYIN_STATS_FILE
+from src.common.profiling import profile_stage
+from src.common.records import DouyinVideo
+from src.export_service.export_engine import ExportEngine
+from src.export_service.parquet_sink import ParquetSink, douyin_records
+from src.export_service.sinks import DocxSink, ExportLayout, build_sinks
+
+
+def _render_word(sink: DocxSink, item: DouyinVideo):
+    """Word中单条抖音视频的排版：只保留时间、内容和统计数据"""
+    if item.publish_time_raw:
+        sink.add_field("发布时间", item.publish_time_raw, bold=True)
+    if item.content_text:
+        sink.add_field("文案内容", item.content_text)
+    sink.add_field("统计数据", f"点赞：{item.like_count} | 评论：{item.comment_count} | 转发：{item.share_count}",
+                   size=10, muted=True)
+
+
+# 抖音导出排版：Word按发布时间倒序摆放，不分组
+DOUYIN_LAYOUT = ExportLayout(
+    basename="douyin",
+    columns=[
+        ("视频URL", lambda item: item.video_url),
+        ("文案内容", lambda item: item.content_text),
+        ("发布时间", lambda item: item.publish_date),
+        ("点赞数", lambda item: item.like_count),
+        ("评论数", lambda item: item.comment_count),
+        ("收藏数", lambda item: item.collect_count),
+        ("转发数", lambda item: item.share_count),
+        ("平台", lambda item: "抖音"),
+    ],
+    word_title="支付宝抖音视频内容汇总",
+    render_word=_render_word,
+)
+
 
 class DouyinDataExporter:
     """抖音数据导出器"""
     
-    def __init__(self, output_dir: str = "/Users/Zhuanz/projects/PythonWS/Alipay/data"):
+    def __init__(self, output_dir: str = str(DATA_DIR)):
         """
         初始化数据导出器
         
@@ -30,8 +60,8 @@ class DouyinDataExporter:
         # 确保输出目录存在
         os.makedirs(self.douyin_data_dir, exist_ok=True)
         
-    def parse_douyin_data(self, stats_file: str = "/Users/Zhuanz/projects/PythonWS/Alipay/3.txt", 
-                         content_file: str = "/Users/Zhuanz/projects/PythonWS/Alipay/2.txt") -> List[Dict[str, Any]]:
+    def parse_douyin_data(self, stats_file: str = str(DOUYIN_STATS_FILE),
+                         content_file: str = str(DOUYIN_CONTENT_FILE)) -> List[DouyinVideo]:
         """
         解析抖音数据文件，整合统计数据和文案内容
         
@@ -40,41 +70,41 @@ class DouyinDataExporter:
             content_file: 文案内容文件路径（2.txt）
             
         Returns:
-            List[Dict]: 整合后的数据列表
+            List[DouyinVideo]: 整合后的视频记录
         """
-        try:
-            # 读取统计数据文件
-            stats_data = self._parse_stats_file(stats_file)
-            
-            # 读取文案内容文件
-            content_data = self._parse_content_file(content_file)
-            
-            # 整合数据
-            merged_data = []
-            for stats in stats_data:
-                video_url = stats.get("video_url", "")
-                # 从文案文件中找到对应的内容
-                content = self._find_content_by_url(video_url, content_data)
+        with profile_stage("douyin_parse"):
+            try:
+                # 读取统计数据文件
+                stats_data = self._parse_stats_file(stats_file)
+            
+                # 读取文案内容文件
+                content_data = self._parse_content_file(content_file)
+            
+                # 整合数据
+                merged_data = []
+                for stats in stats_data:
+                    video_url = stats.get("video_url", "")
+                    # 从文案文件中找到对应的内容
+                    content = self._find_content_by_url(video_url, content_data)
                 
-                merged_item = {
-                    "video_url": video_url,
-                    "content_text": content.get("content_text", ""),
-                    "publish_time": stats.get("publish_time", ""),
-                    "like_count": stats.get("like_count", 0),
-                    "comment_count": stats.get("comment_count", 0),
-                    "collect_count": stats.get("collect_count", 0),
-                    "share_count": stats.get("share_count", 0),
-                    "publish_time_parsed": self._parse_publish_time(stats.get("publish_time", ""))
-                }
-                
-                merged_data.append(merged_item)
-            
-            logger.info(f"✅ 成功解析抖音数据，共 {len(merged_data)} 条记录")
-            return merged_data
-            
-        except Exception as e:
-            logger.error(f"解析抖音数据时发生错误: {str(e)}")
-            raise
+                    publish_time_raw = stats.get("publish_time", "")
+                    merged_data.append(DouyinVideo(
+                        video_url=video_url,
+                        content_text=content.get("content_text", ""),
+                        publish_time=DouyinVideo.parse_publish_time(publish_time_raw),
+                        publish_time_raw=publish_time_raw,
+                        like_count=stats.get("like_count", 0),
+                        comment_count=stats.get("comment_count", 0),
+                        collect_count=stats.get("collect_count", 0),
+                        share_count=stats.get("share_count", 0),
+                    ))
+            
+                logger.info(f"✅ 成功解析抖音数据，共 {len(merged_data)} 条记录")
+                return merged_data
+            
+            except Exception as e:
+                logger.error(f"解析抖音数据时发生错误: {str(e)}")
+                raise
     
     def _parse_stats_file(self, file_path: str) -> List[Dict[str, Any]]:
         """解析统计数据文件（3.txt）"""
@@ -181,20 +211,7 @@ class DouyinDataExporter:
             pass
         return ""
     
-    def _parse_publish_time(self, publish_time: str) -> str:
-        """解析发布时间为标准格式"""
-        try:
-            # 处理格式如 "发布时间：2025-10-18 09:01"
-            if "发布时间：" in publish_time:
-                time_str = publish_time.replace("发布时间：", "").strip()
-                # 尝试解析为datetime对象
-                dt = datetime.strptime(time_str, "%Y-%m-%d %H:%M")
-                return dt.strftime("%Y-%m-%d")
-        except Exception:
-            pass
-        return ""
-    
-    def export_to_excel(self, data: List[Dict[str, Any]], filename: str = "douyin_data.xlsx") -> str:
+    def export_to_excel(self, data: List[DouyinVideo], filename: str = "douyin_data.xlsx") -> str:
         """
         将数据导出为Excel格式
         
@@ -205,45 +222,9 @@ class DouyinDataExporter:
         Returns:
             str: 输出文件的完整路径
         """
-        try:
-            # 准备Excel数据
-            excel_data = []
-            
-            for item in data:
-                excel_row = {
-                    "视频URL": item.get("video_url", ""),
-                    "文案内容": item.get("content_text", ""),
-                    "发布时间": item.get("publish_time_parsed", ""),
-                    "点赞数": item.get("like_count", 0),
-                    "评论数": item.get("comment_count", 0),
-                    "收藏数": item.get("collect_count", 0),
-                    "转发数": item.get("share_count", 0),
-                    "平台": "抖音"
-                }
-                
-                excel_data.append(excel_row)
-            
-            # 创建DataFrame
-            df = pd.DataFrame(excel_data)
-            
-            # 按发布时间倒序排列
-            if not df.empty and '发布时间' in df.columns:
-                df = df.sort_values('发布时间', ascending=False)
-            
-            # 保存到Excel文件
-            output_path = os.path.join(self.douyin_data_dir, filename)
-            df.to_excel(output_path, index=False, engine='openpyxl')
-            
-            logger.info(f"✅ Excel文件已导出: {output_path}")
-            logger.info(f"📊 共导出 {len(excel_data)} 条数据")
-            
-            return output_path
-            
-        except Exception as e:
-            logger.error(f"导出Excel文件时发生错误: {str(e)}")
-            raise
+        return self._export_one("excel", data, filename)
     
-    def export_to_word(self, data: List[Dict[str, Any]], filename: str = "douyin_content.docx") -> str:
+    def export_to_word(self, data: List[DouyinVideo], filename: str = "douyin_content.docx") -> str:
         """
         将数据导出为Word格式，按顺序摆放，只保留时间和内容
         
@@ -254,119 +235,32 @@ class DouyinDataExporter:
         Returns:
             str: 输出文件的完整路径
         """
-        try:
-            # 创建Word文档
-            doc = Document()
-            
-            # 设置标题
-            title = doc.add_heading('支付宝抖音视频内容汇总', 0)
-            title.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-            
-            # 按发布时间倒序排列数据
-            sorted_data = sorted(data, 
-                              key=lambda x: x.get("publish_time_parsed", ""), 
-                              reverse=True)
-            
-            # 添加每条内容（只保留时间和内容）
-            for item in sorted_data:
-                # 发布时间
-                publish_time = item.get("publish_time", "")
-                if publish_time:
-                    time_para = doc.add_paragraph()
-                    time_run = time_para.add_run(f"【发布时间】{publish_time}")
-                    time_run.font.size = Pt(11)
-                    time_run.bold = True
-                
-                # 文案内容
-                content_text = item.get("content_text", "")
-                if content_text:
-                    text_para = doc.add_paragraph()
-                    text_run = text_para.add_run(f"【文案内容】{content_text}")
-                    text_run.font.size = Pt(11)
-                
-                # 添加统计数据
-                like_count = item.get("like_count", 0)
-                comment_count = item.get("comment_count", 0)
-                share_count = item.get("share_count", 0)
-                
-                # 统计信息
-                stats_para = doc.add_paragraph()
-                stats_run = stats_para.add_run(f"【统计数据】点赞：{like_count} | 评论：{comment_count} | 转发：{share_count}")
-                stats_run.font.size = Pt(10)
-                stats_run.font.color.rgb = RGBColor(128, 128, 128)  # 灰色字体
-                
-                # 添加空行分隔
-                doc.add_paragraph()
-            
-            # 保存Word文档
-            output_path = os.path.join(self.douyin_data_dir, filename)
-            doc.save(output_path)
-            
-            logger.info(f"✅ Word文档已导出: {output_path}")
-            logger.info(f"📄 共导出 {len(data)} 条内容")
-            
-            return output_path
-            
-        except Exception as e:
-            logger.error(f"导出Word文档时发生错误: {str(e)}")
-            raise
+        return self._export_one("word", data, filename)
     
-    def _group_by_month(self, data: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
-        """
-        按月份分组数据
-        
-        Args:
-            data: 数据列表
-            
-        Returns:
-            Dict: 按月份分组的数据字典
-        """
-        monthly_data = {}
-        
-        for item in data:
-            publish_date = item.get("publish_time_parsed", "")
-            if publish_date:
-                try:
-                    # 解析日期
-                    date_obj = datetime.strptime(publish_date, "%Y-%m-%d")
-                    month_key = f"{date_obj.year}年{date_obj.month}月"
-                    
-                    if month_key not in monthly_data:
-                        monthly_data[month_key] = []
-                    
-                    monthly_data[month_key].append(item)
-                    
-                except ValueError:
-                    logger.warning(f"无法解析日期: {publish_date}")
-                    continue
-            else:
-                # 没有日期的数据放入"未知时间"分组
-                if "未知时间" not in monthly_data:
-                    monthly_data["未知时间"] = []
-                monthly_data["未知时间"].append(item)
-        
-        return monthly_data
+    def _export_one(self, format_name: str, data: List[DouyinVideo], filename: str) -> str:
+        """只导出一种格式"""
+        sinks = build_sinks(DOUYIN_LAYOUT, self.douyin_data_dir, [format_name], {format_name: filename})
+        return ExportEngine(sinks).run(data)[format_name]
     
-    def export_all_formats(self, data: List[Dict[str, Any]]) -> Dict[str, str]:
+    def export_all_formats(self, data: List[DouyinVideo], with_parquet: bool = False,
+                           formats: Optional[List[str]] = None) -> Dict[str, str]:
         """
-        导出所有格式的文件
+        导出所有格式的文件：记录只排序一次，一次遍历写入所有导出目标
         
         Args:
-            data: 要导出的数据列表
+            data: 要导出的视频记录
+            with_parquet: 是否同时导出按平台、月份分区的Parquet数据集
+            formats: 导出格式（excel / word / csv / jsonl），默认全部
             
         Returns:
             Dict: 包含各文件路径的字典
         """
-        results = {}
-        
         try:
-            # 导出Excel
-            excel_path = self.export_to_excel(data)
-            results["excel"] = excel_path
+            sinks = build_sinks(DOUYIN_LAYOUT, self.douyin_data_dir, formats)
+            if with_parquet:
+                sinks.append(ParquetSink(os.path.join(self.output_dir, "parquet"), douyin_records))
             
-            # 导出Word
-            word_path = self.export_to_word(data)
-            results["word"] = word_path
+            results = ExportEngine(sinks).run(data)
             
             logger.info("✅ 所有格式文件导出完成")
             
@@ -377,5 +271,16 @@ class DouyinDataExporter:
         return results
 
 
-# 需要导入RGBColor用于设置字体颜色
-from docx.shared import RGBColor
\ No newline at end of file
+if __name__ == "__main__":
+    import argparse
+
+    from src.common.profiling import add_profile_arguments, profiling_session
+
+    parser = argparse.ArgumentParser(description="导出抖音统计数据（3.txt）和文案（2.txt）")
+    parser.add_argument("--parquet", action="store_true", help="同时导出Parquet数据集")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with profiling_session(args):
+        exporter = DouyinDataExporter()
+        exporter.export_all_formats(exporter.parse_douyin_data(), with_parquet=args.parquet)
@@ -13,6 +13,8 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 
+from config.settings import CHROME_PROFILE_DIR, DOUYIN_STATS_FILE, PROJECT_ROOT
+
 
 def setup_driver():
     """设置Chrome浏览器驱动"""
@@ -24,7 +26,7 @@ def setup_driver():
     chrome_options.add_argument('--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
     
     # 使用用户数据目录以保持登录状态
-    chrome_options.add_argument('--user-data-dir=/Users/Zhuanz/projects/PythonWS/Alipay/chrome_user_data')
+    chrome_options.add_argument(f'--user-data-dir={CHROME_PROFILE_DIR}')
     
     driver = webdriver.Chrome(options=chrome_options)
     return driver
@@ -74,7 +76,7 @@ def extract_video_stats(driver, video_url):
             shares = "0"
             
             # 调试：将所有找到的div内容写入3.txt
-            with open('/Users/Zhuanz/projects/PythonWS/Alipay/3.txt', 'w', encoding='utf-8') as debug_file:
+            with open(DOUYIN_STATS_FILE, 'w', encoding='utf-8') as debug_file:
                 for i, div in enumerate(all_fc_divs):
                     div_html = div.get_attribute('outerHTML')
                     debug_file.write(f"第{i+1}个fcEX2ARL div内容: {div_html}\n\n")
@@ -108,7 +110,7 @@ def extract_video_stats(driver, video_url):
             debug_info.append(f"查找fcEX2ARL div失败: {e}")
         
         # 写入所有调试信息
-        with open('/Users/Zhuanz/projects/PythonWS/Alipay/3.txt', 'a', encoding='utf-8') as debug_file:
+        with open(DOUYIN_STATS_FILE, 'a', encoding='utf-8') as debug_file:
             debug_file.write('\n'.join(debug_info))
             
         stats = {
@@ -173,7 +175,7 @@ def main():
             print(f"转发数: {stats['shares']:,}")
             
             # 保存结果到文件
-            with open('/Users/Zhuanz/projects/PythonWS/Alipay/video_stats.txt', 'w', encoding='utf-8') as f:
+            with open(PROJECT_ROOT / 'video_stats.txt', 'w', encoding='utf-8') as f:
                 f.write(f"视频URL: {stats['video_url']}\n")
                 f.write(f"点赞数: {stats['likes']}\n")
                 f.write(f"评论数: {stats['comments']}\n")
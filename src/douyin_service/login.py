@@ -12,6 +12,8 @@ import time
 import platform
 import os
 
+from config.settings import CHROME_PROFILE_DIR
+
 def get_chrome_options(headless=False, profile_name="Default"):
     """
     配置Chrome浏览器选项，提供跨平台兼容的浏览器配置
@@ -37,8 +39,7 @@ def get_chrome_options(headless=False, profile_name="Default"):
     user_home = os.path.expanduser("~")
     
     # 使用专门的项目目录来保持登录状态
-    project_dir = "/Users/Zhuanz/projects/PythonWS/Alipay"
-    chrome_profile_path = os.path.join(project_dir, "chrome_user_data")
+    chrome_profile_path = str(CHROME_PROFILE_DIR)
     print(f"[浏览器配置] 使用项目Chrome配置路径: {chrome_profile_path}")
     
     # 确保配置文件目录存在
@@ -54,7 +55,9 @@ def get_chrome_options(headless=False, profile_name="Default"):
 
 def douyin_login(username=None, password=None):
     """
-    抖音登录功能 - 打开网页让用户手动登录
+    抖音登录功能 - 打开网页让用户手动登录，登录成功后保存到会话库
+    
+    会话库中已有有效登录态时直接返回，不再打开浏览器
     
     Args:
         username: 用户名/手机号（可选，用于扫码登录时为None）
@@ -63,6 +66,13 @@ def douyin_login(username=None, password=None):
     Returns:
         bool: 登录是否成功
     """
+    from src.common.session_vault import get_session_vault
+    
+    vault = get_session_vault()
+    if vault.validate("douyin"):
+        print("✅ 会话库中的登录态有效，跳过登录流程")
+        return True
+    
     driver = None
     try:
         # 获取Chrome配置
@@ -90,15 +100,20 @@ def douyin_login(username=None, password=None):
         # 等待用户手动登录，最多等待5分钟
         for i in range(300):  # 最多等待300秒
             try:
-                # 检查是否已经登录（通过查找用户头像或其他登录后元素）
-                
+                # 检查是否已经登录：登录Cookie出现且服务端认可
+                cookies = driver.get_cookies()
+                if vault.has_valid_cookies("douyin", cookies) and vault.probe("douyin", cookies):
+                    vault.export_from_driver(driver, "douyin")
+                    print("✅ 检测到登录成功，登录态已保存到会话库")
+                    return True
                 
                 time.sleep(1)
                 if i % 30 == 0 and i > 0:
                     print(f"等待登录中... ({i//60}分{i%60}秒)")
                     
-            except:
-                pass
+            except Exception as e:
+                print(f"⚠️ 检查登录状态出错: {e}")
+                time.sleep(1)
         
         print("⏰ 等待登录超时")
         return False
@@ -109,16 +124,8 @@ def douyin_login(username=None, password=None):
         
     finally:
         if driver:
-            # 保持浏览器打开，让用户可以继续使用
-            print("浏览器将保持打开状态，您可以继续使用...")
-            print("如需关闭浏览器，请按 Ctrl+C")
-            try:
-                # 等待用户主动关闭
-                while True:
-                    time.sleep(10)
-            except KeyboardInterrupt:
-                print("\n正在关闭浏览器...")
-                driver.quit()
+            # 登录态已在会话库中，后续任务直接注入，不必保持浏览器打开
+            driver.quit()
 
 def main():
     """主函数"""
@@ -0,0 +1,205 @@
+"""
+抖音视频详情免浏览器获取
+
+视频页 /video/<id> 的HTML里嵌有服务端渲染的数据，直接请求HTML并解析即可拿到
+精确的点赞、评论、收藏、转发数和发布时间，不需要浏览器渲染：
+- <script id="RENDER_DATA" type="application/json">：URL编码的JSON（www.douyin.com）
+- window._ROUTER_DATA = {...}：分享页（iesdouyin.com）
+- window._SSR_HYDRATED_DATA = {...}：旧版页面
+
+请求走共享HTTP客户端（连接池、缓存），并带上会话库中的抖音登录态
+解析不到数据时返回None，由调用方回退到浏览器提取
+"""
+
+import json
+import logging
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import unquote
+
+logger = logging.getLogger(__name__)
+
+# 抖音页面显示的发布时间为北京时间
+BEIJING_TZ = timezone(timedelta(hours=8))
+
+_VIDEO_ID_PATTERN = re.compile(r"/video/(\d+)")
+_RENDER_DATA_PATTERN = re.compile(
+    r'<script[^>]*\bid="RENDER_DATA"[^>]*>(.*?)</script>', re.S
+)
+_WINDOW_DATA_PATTERN = re.compile(
+    r"window\.(_ROUTER_DATA|_SSR_HYDRATED_DATA)\s*=\s*(\{.*?\})\s*;?\s*</script>", re.S
+)
+
+# 统计字段的两种命名（RENDER_DATA为驼峰，分享页为下划线）
+_STAT_FIELDS = {
+    "likes": ("diggCount", "digg_count"),
+    "comments": ("commentCount", "comment_count"),
+    "collects": ("collectCount", "collect_count"),
+    "shares": ("shareCount", "share_count"),
+}
+
+_session_lock = threading.Lock()
+_session_injected = False
+
+
+def video_id_from_url(video_url: str) -> Optional[str]:
+    """从视频URL中取出视频ID"""
+    match = _VIDEO_ID_PATTERN.search(video_url)
+    return match.group(1) if match else None
+
+
+def extract_embedded_json(html: str) -> List[Any]:
+    """
+    提取页面中嵌入的服务端渲染JSON
+
+    Args:
+        html: 视频页HTML
+
+    Returns:
+        List: 解析出的JSON对象（可能有多个来源）
+    """
+    payloads = []
+
+    for raw in _RENDER_DATA_PATTERN.findall(html):
+        try:
+            payloads.append(json.loads(unquote(raw.strip())))
+        except ValueError as e:
+            logger.debug(f"RENDER_DATA 解析失败: {str(e)}")
+
+    for name, raw in _WINDOW_DATA_PATTERN.findall(html):
+        try:
+            # 页面脚本中的 undefined 不是合法JSON
+            payloads.append(json.loads(re.sub(r"(?<=[:\[,])\s*undefined\b", "null", raw)))
+        except ValueError as e:
+            logger.debug(f"{name} 解析失败: {str(e)}")
+
+    return payloads
+
+
+def _walk(node: Any) -> Iterator[Dict[str, Any]]:
+    """深度优先遍历JSON中的所有对象"""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            yield current
+            stack.extend(current.values())
+        elif isinstance(current, list):
+            stack.extend(current)
+
+
+def find_aweme(payloads: List[Any], video_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    在嵌入数据中查找视频详情对象（带统计数据的aweme）
+
+    Args:
+        payloads: extract_embedded_json 的结果
+        video_id: 视频ID，指定时只匹配该视频（页面中还可能有相关推荐视频）
+
+    Returns:
+        Dict: 视频详情对象，未找到时返回None
+    """
+    for payload in payloads:
+        for node in _walk(payload):
+            statistics = node.get("statistics") or node.get("stats")
+            if not isinstance(statistics, dict):
+                continue
+            aweme_id = str(node.get("awemeId") or node.get("aweme_id") or "")
+            if video_id is None or aweme_id == video_id:
+                return node
+    return None
+
+
+def parse_aweme_stats(aweme: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    将视频详情对象转换为统计数据，字段与 batch_video_stats.extract_video_stats 一致
+
+    Args:
+        aweme: find_aweme 返回的视频详情
+
+    Returns:
+        Dict: likes/comments/collects/shares（int）、publish_time（"发布时间：YYYY-MM-DD HH:MM"）、
+              publish_timestamp（秒）、description
+    """
+    statistics = aweme.get("statistics") or aweme.get("stats") or {}
+    stats: Dict[str, Any] = {}
+    for field, names in _STAT_FIELDS.items():
+        value = next((statistics[name] for name in names if name in statistics), 0)
+        stats[field] = int(value or 0)
+
+    timestamp = int(aweme.get("createTime") or aweme.get("create_time") or 0)
+    stats["publish_timestamp"] = timestamp
+    stats["publish_time"] = (
+        "发布时间：" + datetime.fromtimestamp(timestamp, BEIJING_TZ).strftime("%Y-%m-%d %H:%M")
+        if timestamp else ""
+    )
+    stats["description"] = aweme.get("desc", "")
+    return stats
+
+
+def parse_video_page(html: str, video_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    从视频页HTML解析统计数据
+
+    Args:
+        html: 视频页HTML
+        video_id: 视频ID
+
+    Returns:
+        Dict: 统计数据，页面中没有嵌入数据时返回None
+    """
+    aweme = find_aweme(extract_embedded_json(html), video_id)
+    return parse_aweme_stats(aweme) if aweme else None
+
+
+def _prepare_client(client):
+    """首次使用共享客户端时注入会话库中的抖音登录态"""
+    global _session_injected
+    with _session_lock:
+        if _session_injected:
+            return
+        try:
+            from src.common.session_vault import get_session_vault
+
+            if not get_session_vault().inject_into_session(client.session, "douyin"):
+                logger.info("会话库中没有有效的抖音登录态，以未登录状态请求")
+        except Exception as e:
+            logger.warning(f"注入会话库登录态失败: {str(e)}")
+        _session_injected = True
+
+
+def fetch_video_stats(video_url: str, client=None) -> Optional[Dict[str, Any]]:
+    """
+    不启动浏览器获取视频统计数据：一次HTTP请求加一次JSON解析
+
+    Args:
+        video_url: 抖音视频URL
+        client: CachedHttpClient，默认使用共享客户端
+
+    Returns:
+        Dict: 统计数据，请求失败或页面中没有嵌入数据时返回None（由调用方回退到浏览器）
+    """
+    import requests
+
+    if client is None:
+        from src.common.http_client import get_http_client
+
+        client = get_http_client()
+        _prepare_client(client)
+
+    try:
+        # 统计数据要最新的，且页面内容随登录态变化（缓存键只有URL），视频页不走缓存
+        response = client.get(video_url, headers={"Referer": "https://www.douyin.com/"}, use_cache=False)
+    except requests.RequestException as e:
+        logger.warning(f"请求视频页失败: {video_url} - {str(e)}")
+        return None
+    if response.status_code != 200:
+        logger.warning(f"请求视频页失败: {video_url} - HTTP {response.status_code}")
+        return None
+
+    stats = parse_video_page(response.text, video_id_from_url(video_url))
+    if stats is None:
+        logger.info(f"视频页中未找到嵌入数据: {video_url}")
+    return stats
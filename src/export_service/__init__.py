@@ -0,0 +1,4 @@
+"""
+导出服务模块
+提供跨平台共享的导出调度、数据汇（sink）等功能
+"""
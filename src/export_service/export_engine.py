@@ -0,0 +1,268 @@
+"""
+导出引擎
+记录只排序一次，然后在一次遍历中把记录按批分发给所有导出目标（见 sinks.py），
+Excel、Word、CSV、JSONL等格式不再各自遍历、分组和排序
+
+每个导出目标在自己的工作者中消费记录流并各自计时：
+- CPU密集的导出目标（Sink.worker = "process"，如Excel、Word）在独立进程中运行
+- 以I/O为主的导出目标（Sink.worker = "thread"，如CSV、JSONL、Parquet）在线程中运行
+- 分发队列有长度上限，慢的导出目标会让遍历等待，记录不会在内存中无限堆积
+"""
+
+import contextlib
+import multiprocessing
+import pickle
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+from src.common.log_setup import child_process_logs, forward_logging
+from src.common.profiling import profile_stage
+from src.export_service.sinks import Sink
+
+# 分发队列的结束标记
+_DONE = None
+
+
+def by_publish_time(record: Any) -> datetime:
+    """排序键：发布时间，没有发布时间的记录排在最后（倒序时）"""
+    return record.publish_time or datetime.min
+
+
+def _get_mp_context():
+    """
+    获取多进程上下文
+
+    优先使用fork：子进程直接继承父进程中的导出目标（列定义、排版函数等），无需序列化；
+    不支持fork的平台（如Windows）退回默认方式，此时导出目标需要可以pickle
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+def _consume(sink: Sink, batches: Any) -> Dict[str, Any]:
+    """
+    在工作者中执行单个导出目标：打开、逐批写入、保存，并计时
+
+    出错后继续取完分发队列（丢弃记录），避免遍历在已满的队列上等待
+
+    Returns:
+        Dict: path、seconds、count，失败时为 error
+    """
+    start = time.perf_counter()
+    error = None
+    try:
+        sink.open()
+    except Exception as e:
+        error = e
+    while True:
+        batch = batches.get()
+        if batch is _DONE:
+            break
+        if error is not None:
+            continue
+        try:
+            for record in batch:
+                sink.write(record)
+        except Exception as e:
+            error = e
+    path = None
+    if error is None:
+        try:
+            path = sink.close()
+        except Exception as e:
+            error = e
+    outcome = {"name": sink.name, "path": path, "seconds": time.perf_counter() - start, "count": sink.count}
+    if error is not None:
+        outcome["error"] = error
+    return outcome
+
+
+def _process_worker(sink: Sink, batches: Any, results: Any, log_queue: Any = None):
+    """
+    子进程入口：日志经日志队列回到主进程，结果（含异常）通过结果队列返回；无法pickle的异常转换为 RuntimeError
+    """
+    if log_queue is not None:
+        forward_logging(log_queue)
+    outcome = _consume(sink, batches)
+    error = outcome.get("error")
+    if error is not None:
+        try:
+            pickle.dumps(error)
+        except Exception:
+            outcome["error"] = RuntimeError(f"{type(error).__name__}: {error}")
+    results.put(outcome)
+
+
+class ExportEngine:
+    """单遍导出引擎"""
+
+    def __init__(self, sinks: List[Sink], sort_key: Optional[Callable[[Any], Any]] = by_publish_time,
+                 reverse: bool = True, workers: Optional[str] = "auto", batch_size: int = 256,
+                 max_pending: int = 8):
+        """
+        初始化导出引擎
+
+        Args:
+            sinks: 导出目标列表
+            sort_key: 排序键，为None时保持输入顺序
+            reverse: 是否倒序（默认最新的在前）
+            workers: auto（按各导出目标的 worker 属性选择进程或线程）、thread（全部用线程）、
+                     None（在调用线程中依次写入）；只有一个导出目标时总是在调用线程中写入
+            batch_size: 每次分发给导出目标的记录数
+            max_pending: 每个导出目标最多积压的批数
+        """
+        if workers not in ("auto", "thread", None):
+            raise ValueError(f"未知的工作者类型: {workers}（可用: auto、thread、None）")
+        self.sinks = sinks
+        self.sort_key = sort_key
+        self.reverse = reverse
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.timings: Dict[str, float] = {}
+
+    def run(self, records: Iterable[Any]) -> Dict[str, str]:
+        """
+        排序后一次遍历，把记录分发给所有导出目标
+
+        Args:
+            records: 记录
+
+        Returns:
+            Dict: 导出目标名称到输出路径的映射
+        """
+        with profile_stage("export"):
+            if self.sort_key is not None:
+                records = sorted(records, key=self.sort_key, reverse=self.reverse)
+
+            self.timings = {sink.name: 0.0 for sink in self.sinks}
+            wall_start = time.perf_counter()
+
+            if self.workers is None or len(self.sinks) <= 1:
+                count, outcomes = self._run_inline(records)
+            else:
+                count, outcomes = self._run_workers(records)
+
+            results: Dict[str, str] = {}
+            failed = None
+            for sink in self.sinks:
+                outcome = outcomes[sink.name]
+                self.timings[sink.name] = outcome["seconds"]
+                sink.count = outcome["count"]
+                if "error" in outcome:
+                    logger.error(f"导出目标 {sink.name} 执行失败: {str(outcome['error'])}")
+                    failed = failed or outcome["error"]
+                    continue
+                results[sink.name] = outcome["path"]
+                logger.info(f"⏱️ {sink.name} 导出完成，用时 {outcome['seconds']:.2f} 秒: {outcome['path']}")
+            if failed is not None:
+                raise failed
+
+            wall_seconds = time.perf_counter() - wall_start
+            logger.info(f"⏱️ {count} 条记录写入 {len(self.sinks)} 个导出目标，总用时 {wall_seconds:.2f} 秒")
+            return results
+
+    def _run_inline(self, records: Iterable[Any]):
+        """在调用线程中依次写入各导出目标"""
+        batches = {sink.name: queue.SimpleQueue() for sink in self.sinks}
+        count = 0
+        for batch in self._batches(records):
+            count += len(batch)
+            for sink in self.sinks:
+                batches[sink.name].put(batch)
+        for sink in self.sinks:
+            batches[sink.name].put(_DONE)
+        return count, {sink.name: _consume(sink, batches[sink.name]) for sink in self.sinks}
+
+    def _run_workers(self, records: Iterable[Any]):
+        """每个导出目标一个工作者（进程或线程），遍历记录时按批分发"""
+        context = _get_mp_context()
+        results = context.Queue()
+        outcomes: Dict[str, Dict[str, Any]] = {}
+        channels: Dict[str, Any] = {}
+        processes: Dict[str, Any] = {}
+        threads: List[threading.Thread] = []
+
+        def consume_in_thread(sink: Sink):
+            outcomes[sink.name] = _consume(sink, channels[sink.name])
+
+        # 先启动子进程，fork 时父进程中还没有导出线程；守护进程中不能再创建子进程，全部用线程
+        use_processes = self.workers == "auto" and not multiprocessing.current_process().daemon
+        process_sinks = [sink for sink in self.sinks if use_processes and sink.worker == "process"]
+        # 子进程的日志经队列转回本进程的日志监听线程
+        with child_process_logs(context) if process_sinks else contextlib.nullcontext() as log_queue:
+            for sink in process_sinks:
+                channels[sink.name] = context.Queue(self.max_pending)
+                process = context.Process(target=_process_worker,
+                                          args=(sink, channels[sink.name], results, log_queue),
+                                          name=f"export-{sink.name}", daemon=True)
+                process.start()
+                processes[sink.name] = process
+            for sink in self.sinks:
+                if sink.name not in processes:
+                    channels[sink.name] = queue.Queue(self.max_pending)
+                    thread = threading.Thread(target=consume_in_thread, args=(sink,), name=f"export-{sink.name}",
+                                              daemon=True)
+                    thread.start()
+                    threads.append(thread)
+
+            count = 0
+            try:
+                for batch in self._batches(records):
+                    count += len(batch)
+                    for sink in self.sinks:
+                        self._send(channels[sink.name], batch, processes.get(sink.name))
+            finally:
+                for sink in self.sinks:
+                    self._send(channels[sink.name], _DONE, processes.get(sink.name))
+
+            for thread in threads:
+                thread.join()
+            outcomes.update(self._collect(processes, results))
+        return count, outcomes
+
+    @staticmethod
+    def _send(channel: Any, batch: Optional[List[Any]], process: Any = None):
+        """把一批记录放入分发队列；子进程已异常退出时丢弃，不在已满的队列上一直等待"""
+        while True:
+            try:
+                channel.put(batch, timeout=1)
+                return
+            except queue.Full:
+                if process is not None and not process.is_alive():
+                    return
+
+    @staticmethod
+    def _collect(processes: Dict[str, Any], results: Any) -> Dict[str, Dict[str, Any]]:
+        """取回子进程的结果；子进程异常退出（没有返回结果）时记为失败"""
+        outcomes: Dict[str, Dict[str, Any]] = {}
+        while len(outcomes) < len(processes):
+            try:
+                outcome = results.get(timeout=1)
+            except queue.Empty:
+                for name, process in processes.items():
+                    if name not in outcomes and not process.is_alive() and results.empty():
+                        outcomes[name] = {"name": name, "path": None, "seconds": 0.0, "count": 0,
+                                          "error": RuntimeError(f"导出进程异常退出，退出码 {process.exitcode}")}
+                continue
+            outcomes[outcome["name"]] = outcome
+        for process in processes.values():
+            process.join()
+        return outcomes
+
+    def _batches(self, records: Iterable[Any]):
+        """按 batch_size 切分记录流（只遍历一次）"""
+        batch: List[Any] = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
@@ -0,0 +1,247 @@
+"""
+Parquet数据集导出模块
+将B站、抖音数据写入按平台、月份分区的Parquet数据集，
+列类型固定（计数为int64、发布时间为timestamp、作者和内容类型为字典编码），
+供分析侧直接用pandas/pyarrow读取，支持谓词下推和内存映射读取
+"""
+
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from src.common.records import BilibiliDynamic, DouyinVideo
+from src.export_service.sinks import Sink
+
+
+# 分区字段
+PARTITION_COLUMNS = ["platform", "month"]
+
+# 无法解析发布时间的数据归入该月份分区
+UNKNOWN_MONTH = "unknown"
+
+
+def _arrow_modules():
+    """延迟导入pyarrow，未安装时给出明确提示"""
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as pads
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet导出需要安装pyarrow: pip install pyarrow") from e
+    return pa, pads, pq
+
+
+def dataset_schema():
+    """
+    获取Parquet数据集的统一表结构
+
+    Returns:
+        pyarrow.Schema: 两个平台共用的表结构
+    """
+    pa, _, _ = _arrow_modules()
+    dict_string = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("content_id", pa.string()),
+        ("platform", pa.string()),
+        ("month", pa.string()),
+        ("author", dict_string),
+        ("content_type", dict_string),
+        ("text_content", pa.string()),
+        ("publish_time", pa.timestamp("s")),
+        ("like_count", pa.int64()),
+        ("comment_count", pa.int64()),
+        ("repost_count", pa.int64()),
+        ("collect_count", pa.int64()),
+        ("image_urls", pa.string()),
+        ("video_url", pa.string()),
+    ])
+
+
+def _month_of(publish_time: Optional[datetime]) -> str:
+    """获取发布时间所在月份分区值（如 2024-10）"""
+    if publish_time is None:
+        return UNKNOWN_MONTH
+    return publish_time.strftime("%Y-%m")
+
+
+def bilibili_records(rows: List[BilibiliDynamic]) -> List[Dict[str, Any]]:
+    """
+    将B站记录（DataExporter.normalize_contents）转换为数据集记录
+
+    Args:
+        rows: B站记录
+
+    Returns:
+        List[Dict]: 数据集记录
+    """
+    return [
+        {
+            "content_id": row.content_id,
+            "platform": "bilibili",
+            "month": _month_of(row.publish_time),
+            "author": row.author or None,
+            "content_type": row.export_content_type,
+            "text_content": row.text_content,
+            "publish_time": row.publish_time,
+            "like_count": row.like_count,
+            "comment_count": row.comment_count,
+            "repost_count": row.repost_count,
+            "collect_count": None,
+            "image_urls": row.image_urls,
+            "video_url": None,
+        }
+        for row in rows
+    ]
+
+
+def douyin_records(rows: List[DouyinVideo]) -> List[Dict[str, Any]]:
+    """
+    将抖音记录（DouyinDataExporter.parse_douyin_data）转换为数据集记录
+
+    Args:
+        rows: 抖音记录
+
+    Returns:
+        List[Dict]: 数据集记录
+    """
+    return [
+        {
+            "content_id": row.content_id,
+            "platform": "douyin",
+            "month": _month_of(row.publish_time),
+            "author": row.author or None,
+            "content_type": "视频",
+            "text_content": row.content_text,
+            "publish_time": row.publish_time,
+            "like_count": row.like_count,
+            "comment_count": row.comment_count,
+            "repost_count": row.share_count,
+            "collect_count": row.collect_count,
+            "image_urls": None,
+            "video_url": row.video_url,
+        }
+        for row in rows
+    ]
+
+
+def write_parquet_dataset(records: List[Dict[str, Any]], dataset_dir: str,
+                          compression: str = "zstd") -> str:
+    """
+    将数据集记录写入按平台、月份分区的Parquet数据集
+
+    重复导出时只改写本次涉及的分区：分区中已有的记录与本次记录按 (平台, 内容ID) 合并，
+    同一内容以本次为准，本次没有导出的内容保留（如只爬取了半个月或另一个账号），
+    其他平台、月份的分区保持不变
+
+    Args:
+        records: bilibili_records / douyin_records 返回的记录
+        dataset_dir: 数据集根目录
+        compression: Parquet压缩算法
+
+    Returns:
+        str: 数据集根目录
+    """
+    pa, pads, _ = _arrow_modules()
+    schema = dataset_schema()
+
+    table = pa.Table.from_pylist(records, schema=schema)
+    partitioning = pads.partitioning(
+        pa.schema([(name, pa.string()) for name in PARTITION_COLUMNS]),
+        flavor="hive"
+    )
+    file_options = pads.ParquetFileFormat().make_write_options(compression=compression)
+    table = _merge_existing(table, dataset_dir, partitioning)
+
+    pads.write_dataset(
+        table,
+        dataset_dir,
+        format="parquet",
+        partitioning=partitioning,
+        file_options=file_options,
+        basename_template="part-{i}.parquet",
+        existing_data_behavior="delete_matching",
+    )
+
+    logger.info(f"✅ Parquet数据集已导出: {dataset_dir}")
+    logger.info(f"📊 共导出 {table.num_rows} 条数据")
+    return dataset_dir
+
+
+def _merge_existing(table, dataset_dir: str, partitioning):
+    """把本次涉及的分区中已有、但本次没有导出的记录并入本次写入的数据"""
+    pa, pads, _ = _arrow_modules()
+    import pyarrow.compute as pc
+
+    if table.num_rows == 0 or not os.path.isdir(dataset_dir):
+        return table
+
+    partitions = set(zip(table.column("platform").to_pylist(), table.column("month").to_pylist()))
+    condition = None
+    for platform, month in partitions:
+        match = (pc.field("platform") == platform) & (pc.field("month") == month)
+        condition = match if condition is None else condition | match
+    existing = pads.dataset(dataset_dir, schema=table.schema, format="parquet",
+                            partitioning=partitioning).to_table(filter=condition)
+    if existing.num_rows == 0:
+        return table
+
+    def keys(data):
+        return pc.binary_join_element_wise(data.column("platform"), data.column("content_id"), ":")
+
+    kept = existing.filter(pc.invert(pc.is_in(keys(existing), value_set=keys(table))))
+    return pa.concat_tables([kept.select(table.schema.names).cast(table.schema), table])
+
+
+class ParquetSink(Sink):
+    """导出目标：Parquet数据集（列式写入需要整批数据，记录先缓存，结束时一次写出）"""
+
+    def __init__(self, dataset_dir: str, to_records: Callable[[List[Any]], List[Dict[str, Any]]],
+                 name: str = "parquet"):
+        """
+        Args:
+            dataset_dir: 数据集根目录
+            to_records: 记录转换函数（bilibili_records / douyin_records）
+        """
+        super().__init__(name, dataset_dir)
+        self.to_records = to_records
+        self._rows: List[Any] = []
+
+    def open(self):
+        self._rows = []
+
+    def write(self, record: Any):
+        self._rows.append(record)
+        self.count += 1
+
+    def close(self) -> str:
+        return write_parquet_dataset(self.to_records(self._rows), self.path)
+
+
+def read_parquet_dataset(dataset_dir: str, columns: Optional[List[str]] = None,
+                         filters: Optional[List[Tuple[str, str, Any]]] = None,
+                         memory_map: bool = True):
+    """
+    读取Parquet数据集
+
+    filters中的平台、月份条件直接裁剪分区目录，其余条件按行组统计信息下推过滤，
+    例如 [("platform", "=", "douyin"), ("month", ">=", "2025-09")]
+
+    Args:
+        dataset_dir: 数据集根目录
+        columns: 需要读取的列，默认全部
+        filters: 过滤条件
+        memory_map: 是否使用内存映射读取
+
+    Returns:
+        pyarrow.Table: 读取结果，可通过 to_pandas() 转为DataFrame
+    """
+    _, _, pq = _arrow_modules()
+    return pq.read_table(
+        dataset_dir,
+        columns=columns,
+        filters=filters,
+        memory_map=memory_map,
+        partitioning="hive",
+    )
@@ -0,0 +1,305 @@
+"""
+导出目标（sink）模块
+
+每个导出目标实现 open / write / close 三个方法，由 ExportEngine 在一次遍历中按批分发记录，
+各导出目标在自己的线程或进程（worker 属性）中逐条写入：
+- XlsxSink：openpyxl 只写模式逐行写入Excel
+- DocxSink：Word文档，可按月份等分组键在分组变化时插入标题（记录流已排序，分组连续）
+- CsvSink：CSV文件
+- JsonlSink：每行一条JSON（orjson）
+
+各平台的列和Word排版由 ExportLayout 描述；导出格式通过 register_sink 注册，
+build_sinks 按格式名创建导出目标，新增格式无需修改导出引擎和各导出器
+"""
+
+import csv
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+
+# 表格列：(列名, 取值函数)
+Column = Tuple[str, Callable[[Any], Any]]
+
+
+class Sink:
+    """导出目标基类"""
+
+    # ExportEngine 为导出目标选择的工作者：thread（以I/O为主）或 process（CPU密集，在独立进程中运行）
+    worker = "thread"
+
+    def __init__(self, name: str, path: str):
+        """
+        初始化导出目标
+
+        Args:
+            name: 导出目标名称（导出结果字典的键）
+            path: 输出路径
+        """
+        self.name = name
+        self.path = path
+        self.count = 0
+
+    def open(self):
+        """开始导出（创建文件、写表头等）"""
+
+    def write(self, record: Any):
+        """写入一条记录"""
+        raise NotImplementedError
+
+    def close(self) -> str:
+        """
+        结束导出并保存
+
+        Returns:
+            str: 输出路径
+        """
+        return self.path
+
+
+class XlsxSink(Sink):
+    """Excel导出目标"""
+
+    worker = "process"
+
+    def __init__(self, path: str, columns: List[Column], name: str = "excel"):
+        super().__init__(name, path)
+        self.columns = columns
+        self._workbook = None
+        self._sheet = None
+
+    def open(self):
+        try:
+            from openpyxl import Workbook
+        except ImportError as e:
+            raise ImportError("Excel导出需要安装openpyxl: pip install openpyxl") from e
+
+        # 只写模式逐行写出，不在内存中保留单元格对象
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet()
+        self._sheet.append([header for header, _ in self.columns])
+
+    def write(self, record: Any):
+        self._sheet.append([value(record) for _, value in self.columns])
+        self.count += 1
+
+    def close(self) -> str:
+        self._workbook.save(self.path)
+        logger.info(f"✅ Excel文件已导出: {self.path}")
+        logger.info(f"📊 共导出 {self.count} 条数据")
+        return self.path
+
+
+class CsvSink(Sink):
+    """CSV导出目标"""
+
+    def __init__(self, path: str, columns: List[Column], name: str = "csv", encoding: str = "utf-8-sig"):
+        """
+        Args:
+            encoding: 文件编码，默认带BOM以便Excel直接打开中文
+        """
+        super().__init__(name, path)
+        self.columns = columns
+        self.encoding = encoding
+        self._file = None
+        self._writer = None
+
+    def open(self):
+        self._file = open(self.path, "w", encoding=self.encoding, newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([header for header, _ in self.columns])
+
+    def write(self, record: Any):
+        self._writer.writerow([value(record) for _, value in self.columns])
+        self.count += 1
+
+    def close(self) -> str:
+        self._file.close()
+        logger.info(f"✅ CSV文件已导出: {self.path}")
+        return self.path
+
+
+class JsonlSink(Sink):
+    """JSON Lines导出目标，每行一条记录的全部属性"""
+
+    def __init__(self, path: str, name: str = "jsonl"):
+        super().__init__(name, path)
+        self._file = None
+        self._dumps = None
+        self._option = 0
+
+    def open(self):
+        try:
+            import orjson
+        except ImportError as e:
+            raise ImportError("JSONL导出需要安装orjson: pip install orjson") from e
+
+        self._dumps = orjson.dumps
+        self._option = orjson.OPT_APPEND_NEWLINE
+        self._file = open(self.path, "wb")
+
+    def write(self, record: Any):
+        row = record.as_row() if hasattr(record, "as_row") else record
+        # datetime 由 orjson 直接序列化为 ISO 8601
+        self._file.write(self._dumps(row, option=self._option))
+        self.count += 1
+
+    def close(self) -> str:
+        self._file.close()
+        logger.info(f"✅ JSONL文件已导出: {self.path}")
+        return self.path
+
+
+class DocxSink(Sink):
+    """Word导出目标"""
+
+    worker = "process"
+
+    def __init__(self, path: str, title: str, render: Callable[["DocxSink", Any], None],
+                 group_by: Optional[Callable[[Any], Optional[str]]] = None, name: str = "word"):
+        """
+        Args:
+            title: 文档标题
+            render: 写入单条记录的函数 (sink, 记录)，通过 sink.add_field 添加段落
+            group_by: 分组键函数，分组变化时插入 "=== 分组 ===" 标题；分组键为空的记录不导出
+        """
+        super().__init__(name, path)
+        self.title = title
+        self.render = render
+        self.group_by = group_by
+        self.document = None
+        self._group = None
+
+    def open(self):
+        try:
+            from docx import Document
+            from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+        except ImportError as e:
+            raise ImportError("Word导出需要安装python-docx: pip install python-docx") from e
+
+        self.document = Document()
+        title = self.document.add_heading(self.title, 0)
+        title.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+        self._group = None
+
+    def add_field(self, label: str, value: Any, size: int = 11, bold: bool = False,
+                  italic: bool = False, muted: bool = False):
+        """
+        添加一个 "【标签】内容" 段落
+
+        Args:
+            label: 标签
+            value: 内容
+            size: 字号
+            bold: 是否加粗
+            italic: 是否斜体
+            muted: 是否使用灰色字体
+        """
+        from docx.shared import Pt, RGBColor
+
+        run = self.document.add_paragraph().add_run(f"【{label}】{value}")
+        run.font.size = Pt(size)
+        run.bold = bold
+        run.italic = italic
+        if muted:
+            run.font.color.rgb = RGBColor(128, 128, 128)  # 灰色字体
+
+    def write(self, record: Any):
+        if self.group_by:
+            group = self.group_by(record)
+            if not group:
+                return
+            if group != self._group:
+                from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+
+                heading = self.document.add_heading(f"=== {group} ===", level=1)
+                heading.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+                self._group = group
+
+        self.render(self, record)
+        # 添加空行分隔
+        self.document.add_paragraph()
+        self.count += 1
+
+    def close(self) -> str:
+        self.document.save(self.path)
+        logger.info(f"✅ Word文档已导出: {self.path}")
+        logger.info(f"📄 共导出 {self.count} 条内容")
+        return self.path
+
+
+class ExportLayout:
+    """单个平台的导出排版：表格列、Word标题与段落、文件名前缀"""
+
+    def __init__(self, basename: str, columns: List[Column], word_title: str,
+                 render_word: Callable[[DocxSink, Any], None],
+                 word_group_by: Optional[Callable[[Any], Optional[str]]] = None):
+        """
+        Args:
+            basename: 文件名前缀（如 bilibili → bilibili_data.xlsx / bilibili_content.docx）
+            columns: Excel、CSV的列
+            word_title: Word文档标题
+            render_word: Word中单条记录的排版函数
+            word_group_by: Word分组键函数
+        """
+        self.basename = basename
+        self.columns = columns
+        self.word_title = word_title
+        self.render_word = render_word
+        self.word_group_by = word_group_by
+
+
+# 格式名 → (工厂函数 (排版, 输出路径) → 导出目标, 默认文件名模板)
+_SINK_FACTORIES: Dict[str, Tuple[Callable[[ExportLayout, str], Sink], str]] = {}
+
+
+def register_sink(format_name: str, factory: Callable[[ExportLayout, str], Sink], filename: str):
+    """
+    注册导出格式
+
+    Args:
+        format_name: 格式名（导出结果字典的键）
+        factory: 工厂函数 (排版, 输出路径) → 导出目标
+        filename: 默认文件名模板，{basename} 替换为排版的文件名前缀
+    """
+    _SINK_FACTORIES[format_name] = (factory, filename)
+
+
+def available_formats() -> List[str]:
+    """已注册的导出格式"""
+    return list(_SINK_FACTORIES)
+
+
+def build_sinks(layout: ExportLayout, output_dir: str, formats: Optional[List[str]] = None,
+                filenames: Optional[Dict[str, str]] = None) -> List[Sink]:
+    """
+    按格式名创建导出目标
+
+    Args:
+        layout: 平台排版
+        output_dir: 输出目录
+        formats: 导出格式，默认全部已注册格式
+        filenames: 格式名 → 文件名，覆盖默认文件名
+
+    Returns:
+        List[Sink]: 导出目标列表
+    """
+    unknown = [name for name in formats or [] if name not in _SINK_FACTORIES]
+    if unknown:
+        raise ValueError(f"未知的导出格式: {', '.join(unknown)}（可用: {', '.join(_SINK_FACTORIES)}）")
+
+    filenames = filenames or {}
+    sinks = []
+    for name in formats or _SINK_FACTORIES:
+        factory, template = _SINK_FACTORIES[name]
+        filename = filenames.get(name) or template.format(basename=layout.basename)
+        sinks.append(factory(layout, os.path.join(output_dir, filename)))
+    return sinks
+
+
+register_sink("excel", lambda layout, path: XlsxSink(path, layout.columns), "{basename}_data.xlsx")
+register_sink("word", lambda layout, path: DocxSink(path, layout.word_title, layout.render_word,
+                                                     group_by=layout.word_group_by), "{basename}_content.docx")
+register_sink("csv", lambda layout, path: CsvSink(path, layout.columns), "{basename}_data.csv")
+register_sink("jsonl", lambda layout, path: JsonlSink(path), "{basename}_data.jsonl")
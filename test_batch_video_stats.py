@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+抖音批量统计测试
+跑一遍批量统计（免浏览器获取用假数据代替）写出 3.txt，再用导出器读回并导出，检查两端使用同一记录格式，
+以及最终失败的视频只进入死信记录、不产生导出行
+"""
+
+import csv
+import json
+import types
+
+import pytest
+
+from config.settings import CHANGE_LOG_CONFIG, CRAWLER_CONFIG, DOUYIN_SELECTORS
+from src.common import selector_registry
+from src.common.selector_registry import SelectorRegistry
+from src.douyin_service import batch_video_stats, ssr_fetch
+from src.douyin_service.douyin_data_exporter import DouyinDataExporter
+
+STATS = {
+    "https://www.douyin.com/video/7001": {"likes": "1.2万", "comments": 30, "collects": 4, "shares": 5,
+                                         "publish_time": "发布时间：2024-10-20 11:00"},
+    "https://www.douyin.com/video/7002": {"likes": 8, "comments": 0, "collects": 1, "shares": 2,
+                                         "publish_time": "发布时间：2024-09-02 08:30"},
+}
+
+
+class BlankPageDriver:
+    """回退到浏览器时打开的页面没有统计区域（验证码、加载失败等）"""
+
+    page_source = "<html><body>验证码</body></html>"
+
+    def get(self, url):
+        pass
+
+    def find_element(self, by, value):
+        return object()
+
+    def find_elements(self, by, value):
+        return []
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def stats_run(tmp_path, monkeypatch):
+    """把批量统计的输入输出、死信、变更日志和选择器统计都放到临时目录，返回运行函数"""
+    stats_file = tmp_path / "3.txt"
+    content_file = tmp_path / "2.txt"
+    monkeypatch.setattr(batch_video_stats, "DOUYIN_STATS_FILE", stats_file)
+    monkeypatch.setattr(batch_video_stats, "DOUYIN_CONTENT_FILE", content_file)
+    monkeypatch.setattr(batch_video_stats, "DOUYIN_STATS_DEBUG_FILE", tmp_path / "3_debug.txt")
+    monkeypatch.setattr(batch_video_stats, "create_driver", lambda *args: BlankPageDriver())
+    sleeps = []
+    monkeypatch.setattr(batch_video_stats, "time", types.SimpleNamespace(sleep=sleeps.append))
+    monkeypatch.setitem(CRAWLER_CONFIG, "dead_letter_dir", str(tmp_path / "dead_letter"))
+    monkeypatch.setitem(CRAWLER_CONFIG, "retry_delay", 0)
+    monkeypatch.setitem(CHANGE_LOG_CONFIG, "enabled", False)
+    monkeypatch.setattr(selector_registry, "_registries", {"douyin": SelectorRegistry("douyin", DOUYIN_SELECTORS)})
+    monkeypatch.setattr(ssr_fetch, "fetch_video_stats", lambda url: STATS.get(url))
+
+    def run(urls):
+        content_file.write_text("".join(f"{url}\n文案{url[-4:]}\n\n" for url in urls), encoding="utf-8")
+        batch_video_stats.main()
+        return stats_file, content_file
+
+    run.sleeps = sleeps
+
+    return run
+
+
+def test_stats_file_round_trips_through_export(stats_run, tmp_path):
+    stats_file, content_file = stats_run(list(STATS))
+    assert stats_file.read_text(encoding="utf-8").count("=== 视频URL: ") == 2
+    # 免浏览器获取成功时不等待
+    assert stats_run.sleeps == []
+
+    exporter = DouyinDataExporter(output_dir=str(tmp_path / "export"))
+    data = exporter.parse_douyin_data(stats_file=str(stats_file), content_file=str(content_file))
+    assert [(video.video_url, video.like_count, video.share_count, video.publish_date) for video in data] == [
+        ("https://www.douyin.com/video/7001", 12000, 5, "2024-10-20"),
+        ("https://www.douyin.com/video/7002", 8, 2, "2024-09-02"),
+    ]
+    assert data[0].content_text == "文案7001"
+
+    results = exporter.export_all_formats(data, formats=["csv"])
+    with open(results["csv"], encoding="utf-8-sig") as f:
+        rows = list(csv.DictReader(f))
+    assert [(row["视频URL"], row["点赞数"]) for row in rows] == [
+        ("https://www.douyin.com/video/7001", "12000"), ("https://www.douyin.com/video/7002", "8")]
+
+
+def test_dead_lettered_video_produces_no_export_row(stats_run, tmp_path):
+    dead_url = "https://www.douyin.com/video/7999"
+    stats_file, content_file = stats_run([*STATS, dead_url])
+
+    with open(tmp_path / "dead_letter" / "douyin_stats.jsonl", encoding="utf-8") as f:
+        dead = [json.loads(line) for line in f]
+    assert [entry["item"] for entry in dead] == [dead_url]
+    # 每次浏览器尝试的调试信息写入调试文件，不混入统计数据文件
+    assert (tmp_path / "3_debug.txt").read_text(encoding="utf-8").count(f"=== 视频URL: {dead_url} ===") == 4
+    assert dead_url not in stats_file.read_text(encoding="utf-8")
+    # 只有回退到浏览器的尝试等待（页面加载 3 秒 + 请求间隔 2 秒）
+    assert stats_run.sleeps == [3, 2] * 4
+
+    exporter = DouyinDataExporter(output_dir=str(tmp_path / "export"))
+    data = exporter.parse_douyin_data(stats_file=str(stats_file), content_file=str(content_file))
+    assert [video.video_url for video in data] == list(STATS)
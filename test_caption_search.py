@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+文案全文检索测试
+检查 trigram 索引的检索、短词匹配、平台和日期过滤、增量更新，以及大量内容下的检索耗时
+"""
+
+import time
+from datetime import datetime
+
+from src.analysis_service.caption_search import CaptionSearchIndex
+from src.common.records import BilibiliDynamic, DouyinVideo
+
+
+def _posts():
+    return [
+        DouyinVideo(video_url="https://www.douyin.com/video/1",
+                    content_text="上支付宝搜「惠出境」，参与【出境玩家大集结】活动，境外消费笔笔立减",
+                    publish_time=datetime(2024, 9, 25)),
+        DouyinVideo(video_url="https://www.douyin.com/video/2", content_text="苏超半决赛 #苏超# 徐州队加油",
+                    publish_time=datetime(2024, 10, 18)),
+        BilibiliDynamic(content_id="900", text_content="出境旅游攻略", video_description="出境玩家必看：境外消费返现",
+                        content_type="视频", publish_time=datetime(2024, 10, 2)),
+        BilibiliDynamic(content_id="901", text_content="", video_description=""),
+    ]
+
+
+def test_search_ranks_and_filters(tmp_path):
+    with CaptionSearchIndex(str(tmp_path / "search.db")) as index:
+        assert index.add_records(_posts()) == 3
+
+        hits = index.search("出境玩家")
+        assert {hit["content_id"] for hit in hits} == {"1", "900"}
+        assert "[出境玩家]" in hits[0]["snippet"]
+
+        # 多个词需同时出现，视频描述也参与检索
+        assert [hit["content_id"] for hit in index.search("境外消费 返现")] == ["900"]
+        assert [hit["content_id"] for hit in index.search("出境玩家", platform="douyin")] == ["1"]
+        assert [hit["content_id"] for hit in index.search("境外消费", start="2024-10-01", end="2024-10-31")] == ["900"]
+
+        # 少于三个字的词
+        assert [hit["content_id"] for hit in index.search("苏超")] == ["2"]
+        assert [hit["content_id"] for hit in index.search("苏超 徐州")] == ["2"]
+
+        # 查询语法字符按普通文字处理
+        assert index.search('"OR* NEAR(') == []
+
+
+def test_incremental_updates_only_rewrite_changed_posts(tmp_path):
+    db_path = str(tmp_path / "search.db")
+    with CaptionSearchIndex(db_path) as index:
+        index.add_records(_posts())
+
+    with CaptionSearchIndex(db_path) as index:
+        changed = DouyinVideo(video_url="https://www.douyin.com/video/2", content_text="苏超决赛 南京队夺冠",
+                              publish_time=datetime(2024, 10, 25))
+        assert index.add_records(_posts()[:1] + [changed]) == 1
+        assert index.count() == 3
+        assert index.search("徐州队") == []
+        assert [hit["publish_date"] for hit in index.search("南京队")] == ["2024-10-25"]
+
+
+def test_search_over_large_archive_is_fast(tmp_path):
+    accounts = ["支付宝", "支付宝生活号", "蚂蚁森林"]
+    records = [
+        DouyinVideo(video_url=f"https://www.douyin.com/video/{i}",
+                    content_text=f"{accounts[i % 3]}第{i}期活动：" + ("境外消费返现 " if i % 50 == 0 else "日常分享 ") * 5,
+                    publish_time=datetime(2021 + i % 4, i % 12 + 1, 1))
+        for i in range(20000)
+    ]
+    with CaptionSearchIndex(str(tmp_path / "search.db")) as index:
+        index.add_records(records)
+        start = time.perf_counter()
+        hits = index.search("境外消费返现", start="2023-01-01", limit=50)
+        assert len(hits) == 50
+        assert all(hit["publish_date"] >= "2023-01-01" for hit in hits)
+        assert time.perf_counter() - start < 0.5
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+文案标签索引测试
+检查话题、@提及、【活动名】的提取，索引的持久化、重复索引覆盖，以及活动查询的结果和耗时
+"""
+
+import time
+from datetime import datetime
+
+from src.analysis_service.caption_tags import HASHTAG, MENTION, TOPIC, CaptionTagIndex, extract_tags
+from src.common.records import BilibiliDynamic, DouyinVideo
+
+
+def test_extract_tags_in_one_pass():
+    text = "【惠出境】暑假出国用支付宝 #出境玩家大集结 #苏超# @支付宝 一起来！#Alipay碰一下，"
+    assert extract_tags(text) == [
+        (TOPIC, "惠出境"),
+        (HASHTAG, "出境玩家大集结"),
+        (HASHTAG, "苏超"),
+        (MENTION, "支付宝"),
+        (HASHTAG, "alipay碰一下"),
+    ]
+    assert extract_tags("#苏超# 和 #苏超 重复") == [(HASHTAG, "苏超")]
+    assert extract_tags("没有标签的文案") == []
+
+
+def test_extract_glued_hashtags():
+    # 2.txt 中话题之间没有空格的写法：结尾的 # 同时是下一个话题的开头
+    assert extract_tags("#支付宝 #碰一下#苏超 #徐州队") == [
+        (HASHTAG, "支付宝"), (HASHTAG, "碰一下"), (HASHTAG, "苏超"), (HASHTAG, "徐州队")]
+    assert extract_tags("#支付宝惠出境#出镜计划#环球奇遇季") == [
+        (HASHTAG, "支付宝惠出境"), (HASHTAG, "出镜计划"), (HASHTAG, "环球奇遇季")]
+    assert extract_tags("又唱又跳的？#技能五子棋##苏超##担架队##AQ##苏超半决赛#") == [
+        (HASHTAG, "技能五子棋"), (HASHTAG, "苏超"), (HASHTAG, "担架队"), (HASHTAG, "aq"), (HASHTAG, "苏超半决赛")]
+
+
+def _posts():
+    return [
+        DouyinVideo(video_url="https://www.douyin.com/video/1", content_text="#惠出境# 境外扫码 @支付宝",
+                    publish_time=datetime(2024, 9, 3), like_count=100, comment_count=10, collect_count=5,
+                    share_count=5),
+        DouyinVideo(video_url="https://www.douyin.com/video/2", content_text="#支付宝惠出境 返现 #苏超#",
+                    publish_time=datetime(2024, 10, 1), like_count=50),
+        BilibiliDynamic(content_id="900", text_content="【惠出境】 #惠出境# 攻略", like_count=7, comment_count=2,
+                        repost_count=1, publish_time=datetime(2024, 10, 20)),
+        BilibiliDynamic(content_id="901", text_content="日常分享"),
+    ]
+
+
+def test_campaign_query_uses_persistent_index(tmp_path):
+    db_path = str(tmp_path / "tags.db")
+    with CaptionTagIndex(db_path) as index:
+        assert index.add_records(_posts()) == 4
+
+    with CaptionTagIndex(db_path) as index:
+        result = index.query("#惠出境#")
+        assert result["post_count"] == 2
+        assert result["engagement"] == 120 + 10
+        assert result["by_month"] == {"2024-09": {"posts": 1, "engagement": 120},
+                                      "2024-10": {"posts": 1, "engagement": 10}}
+        assert [post["content_id"] for post in result["posts"]] == ["1", "900"]
+
+        # 包含匹配：#支付宝惠出境 和 【惠出境】 也算同一活动
+        broad = index.query("惠出境", contains=True)
+        assert broad["post_count"] == 3 and broad["engagement"] == 180
+        assert broad["tags"] == ["hashtag:惠出境", "hashtag:支付宝惠出境", "topic:惠出境"]
+        assert index.query("惠出境", contains=True, platform="bilibili")["post_count"] == 1
+
+        assert index.monthly_counts("惠出境") == {"2024-09": 1, "2024-10": 1}
+        top = index.top_tags(kind=HASHTAG, limit=1)
+        assert top == [{"kind": HASHTAG, "tag": "惠出境", "posts": 2, "engagement": 130}]
+
+
+def test_reindexing_a_post_replaces_its_tags(tmp_path):
+    with CaptionTagIndex(str(tmp_path / "tags.db")) as index:
+        index.add_records(_posts())
+        index.add_records([DouyinVideo(video_url="https://www.douyin.com/video/2", content_text="#苏超# 更新后",
+                                       publish_time=datetime(2024, 10, 1), like_count=80)])
+        assert index.query("支付宝惠出境")["post_count"] == 0
+        assert index.query("苏超")["engagement"] == 80
+
+
+def test_campaign_query_takes_milliseconds(tmp_path):
+    campaigns = [f"活动{i}" for i in range(200)]
+    records = [
+        DouyinVideo(video_url=f"https://www.douyin.com/video/{i}",
+                    content_text=f"#{campaigns[i % 200]}# #通用话题 第{i}条 @账号{i % 7}",
+                    publish_time=datetime(2024, i % 12 + 1, 1), like_count=i)
+        for i in range(20000)
+    ]
+    with CaptionTagIndex(str(tmp_path / "tags.db")) as index:
+        index.add_records(records)
+        start = time.perf_counter()
+        for campaign in campaigns[:20]:
+            assert index.query(campaign)["post_count"] == 100
+        assert (time.perf_counter() - start) / 20 < 0.05
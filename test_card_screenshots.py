@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+卡片截图存档测试
+用假浏览器返回生成的视口截图，检查每轮一次截图、进程池裁剪编码、部分截图被完整截图替换和像素去重，
+以及替换时不覆盖仍被其他卡片引用的文件、不留下不再引用的文件
+"""
+
+import io
+import json
+
+from PIL import Image
+
+from src.common.card_screenshots import CARD_RECTS_SCRIPT, CardScreenshotArchiver
+
+VIEWPORT = (200, 300)
+
+
+class FakeDriver:
+    """视口中按给定位置画出纯色卡片"""
+
+    def __init__(self):
+        self.cards = []
+        self.screenshots = 0
+
+    def execute_script(self, script, selector):
+        assert script == CARD_RECTS_SCRIPT and selector == ".card"
+        return {"dpr": 2, "viewport": list(VIEWPORT), "rects": [rect for rect, _ in self.cards]}
+
+    def get_screenshot_as_png(self):
+        self.screenshots += 1
+        image = Image.new("RGB", (VIEWPORT[0] * 2, VIEWPORT[1] * 2), "white")
+        for (left, top, width, height), color in self.cards:
+            image.paste(color, (int(left * 2), int(top * 2), int((left + width) * 2), int((top + height) * 2)))
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+
+def test_rounds_are_cropped_in_worker_processes(tmp_path):
+    driver = FakeDriver()
+    archiver = CardScreenshotArchiver(str(tmp_path), image_format="webp", workers=2)
+
+    # 第一轮：卡片a完整，卡片b只露出上半部分，卡片c与a像素相同
+    driver.cards = [([0, 0, 200, 100], "red"), ([0, 250, 200, 100], "blue"), ([0, 120, 200, 100], "red")]
+    assert archiver.capture(driver, ".card", [("a", 0), ("b", 1), ("c", 2)]) == 3
+
+    # 第二轮：滚动后b完整出现，a已完整截到不再提交
+    driver.cards = [([0, -150, 200, 100], "red"), ([0, 100, 200, 100], "blue")]
+    assert archiver.capture(driver, ".card", [("a", 0), ("b", 1)]) == 1
+
+    # 没有需要截图的卡片时不截图
+    assert archiver.capture(driver, ".card", [("a", 0), ("b", 1)]) == 0
+    assert driver.screenshots == 2
+
+    with open(archiver.close(), encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    assert manifest["a"]["full"] and (manifest["a"]["width"], manifest["a"]["height"]) == (400, 200)
+    assert manifest["b"]["full"] and manifest["b"]["round"] == 2 and manifest["b"]["height"] == 200
+    assert manifest["c"]["duplicate"] and manifest["c"]["file"] == manifest["a"]["file"]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["a.webp", "b.webp", "manifest.json"]
+
+    with Image.open(tmp_path / "b.webp") as image:
+        assert image.format == "WEBP" and image.size == (400, 200)
+        red, green, blue = image.getpixel((200, 100))
+        assert blue > 200 and red < 50
+
+
+def test_replacing_partial_capture_keeps_shared_files(tmp_path):
+    archiver = CardScreenshotArchiver(str(tmp_path), image_format="png", executor=object())
+
+    def store(content_id, digest, full):
+        archiver._store_results([(content_id, digest, digest.encode(), full, (1, 1))], "2024-10-01 10:00:00", 1)
+
+    # c 与 a 的部分截图像素相同，指向 a.png
+    store("a", "partial-a", False)
+    store("c", "partial-a", True)
+    assert archiver.manifest["c"]["file"] == "a.png" and archiver.manifest["c"]["duplicate"]
+
+    # a 完整出现：a.png 仍被 c 引用，不能覆盖，写入新文件
+    store("a", "full-a", True)
+    assert archiver.manifest["a"]["file"] == "a-2.png" and not archiver.manifest["a"]["duplicate"]
+    assert (tmp_path / "a.png").read_bytes() == b"partial-a"
+    assert (tmp_path / "a-2.png").read_bytes() == b"full-a"
+
+    # b 的完整截图与 e 相同：b 之前的部分截图没有其他引用，删除
+    store("e", "full-e", True)
+    store("b", "partial-b", False)
+    store("b", "full-e", True)
+    assert archiver.manifest["b"]["file"] == "e.png" and archiver.manifest["b"]["duplicate"]
+
+    with open(archiver.close(), encoding="utf-8") as f:
+        manifest = json.load(f)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["a-2.png", "a.png", "e.png", "manifest.json"]
+    assert {entry["file"] for entry in manifest.values()} == {"a-2.png", "a.png", "e.png"}
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+DevTools协议浏览器后端测试
+用本地的假DevTools服务（/json/list + websocket）模拟页面，检查元素查找、document 句柄缓存、
+对象组释放和页面自行跳转后的句柄失效
+"""
+
+import base64
+import hashlib
+import json
+import struct
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+from src.common.cdp_driver import CdpDriver
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# 每个页面的卡片文字
+PAGES = {
+    "https://example.com/a": ["卡片1", "卡片2", "卡片3"],
+    "https://example.com/b": ["卡片4"],
+}
+
+
+class FakePage:
+    """页面与远程对象表：按对象组记录存活的远程对象"""
+
+    def __init__(self):
+        self.url = "about:blank"
+        self.context = 1
+        self.objects = {}  # objectId → (对象组, 值)
+        self.ids = 0
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def _remote(self, group, value):
+        self.ids += 1
+        object_id = f"obj-{self.ids}"
+        self.objects[object_id] = (group, value)
+        return object_id
+
+    def live(self):
+        return sorted(group for group, _ in self.objects.values())
+
+    def handle(self, method, params):
+        """返回 (结果, 之后推送的事件)"""
+        self.calls.append((method, params))
+        if method == "Page.navigate":
+            self.url = params["url"]
+            return self.navigate()
+        if method == "Runtime.evaluate":
+            if params["expression"] == "document":
+                return {"result": {"type": "object", "objectId": self._remote(params["objectGroup"],
+                                                                           ("document", self.context))}}, []
+            if params["expression"] == "location.href":
+                return {"result": {"type": "string", "value": self.url}}, []
+        if method == "Runtime.callFunctionOn":
+            return self.call_function(params), []
+        if method == "Runtime.getProperties":
+            group, nodes = self.objects[params["objectId"]]
+            result = [{"name": str(i), "value": {"type": "object", "objectId": self._remote(group, node)}}
+                      for i, node in enumerate(nodes)]
+            return {"result": result + [{"name": "length", "value": {"type": "number", "value": len(nodes)}}]}, []
+        if method == "Runtime.releaseObject":
+            self.objects.pop(params["objectId"], None)
+        if method == "Runtime.releaseObjectGroup":
+            self.objects = {key: item for key, item in self.objects.items() if item[0] != params["objectGroup"]}
+        return {}, []
+
+    def navigate(self):
+        # 旧页面的执行上下文（及其中的对象）随导航销毁
+        self.context += 1
+        self.objects = {}
+        return {"frameId": "main"}, ["Runtime.executionContextsCleared", "Page.loadEventFired"]
+
+    def call_function(self, params):
+        group, target = self.objects.get(params["objectId"], (None, None))
+        if target is None or (target[0] == "document" and target[1] != self.context):
+            return {"exceptionDetails": {"text": "Cannot find context with specified id"}}
+        args = [arg.get("value") for arg in params.get("arguments", [])]
+        function = params["functionDeclaration"]
+        if "querySelectorAll" in function:
+            nodes = [("card", text) for text in PAGES.get(self.url, [])] if args[1] == ".card" else []
+            return {"result": {"type": "object", "subtype": "array",
+                               "objectId": self._remote(params["objectGroup"], nodes)}}
+        if "querySelector" in function:
+            texts = PAGES.get(self.url, []) if args[1] == ".card" else []
+            if not texts:
+                return {"result": {"type": "object", "subtype": "null", "value": None}}
+            return {"result": {"type": "object", "objectId": self._remote(params["objectGroup"], ("card", texts[0]))}}
+        if "innerText" in function:
+            return {"result": {"type": "string", "value": target[1]}}
+        return {"result": {"type": "undefined"}}
+
+
+class DevToolsHandler(BaseHTTPRequestHandler):
+    """/json/list 返回一个页面；页面地址上完成websocket握手后逐帧处理命令"""
+
+    page = None
+
+    def do_GET(self):
+        if self.path == "/json/list":
+            port = self.server.server_address[1]
+            body = json.dumps([{"type": "page", "webSocketDebuggerUrl": f"ws://127.0.0.1:{port}/devtools/page/1"}])
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body.encode("utf-8"))
+            return
+        accept = base64.b64encode(hashlib.sha1((self.headers["Sec-WebSocket-Key"] + WS_GUID).encode()).digest())
+        self.send_response(101)
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", accept.decode())
+        self.end_headers()
+        self.wfile.flush()
+        while True:
+            message = self._read_frame()
+            if message is None:
+                return
+            command = json.loads(message)
+            with self.page.lock:
+                result, events = self.page.handle(command["method"], command.get("params", {}))
+            self._send_frame(json.dumps({"id": command["id"], "result": result}))
+            for event in events:
+                self._send_frame(json.dumps({"method": event, "params": {}}))
+
+    def _read_frame(self):
+        header = self.rfile.read(2)
+        if len(header) < 2 or header[0] & 0x0F == 0x8:
+            return None
+        length = header[1] & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", self.rfile.read(2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", self.rfile.read(8))[0]
+        mask = self.rfile.read(4)
+        payload = self.rfile.read(length)
+        return bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload)).decode("utf-8")
+
+    def _send_frame(self, text):
+        payload = text.encode("utf-8")
+        if len(payload) < 126:
+            header = struct.pack(">BB", 0x81, len(payload))
+        else:
+            header = struct.pack(">BBH", 0x81, 126, len(payload))
+        self.wfile.write(header + payload)
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def driver():
+    DevToolsHandler.page = FakePage()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), DevToolsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    cdp = CdpDriver(port=server.server_address[1], page_load_timeout=5)
+    yield cdp
+    cdp.quit()
+    server.shutdown()
+    server.server_close()
+
+
+def _document_lookups(page):
+    return sum(1 for method, params in page.calls
+               if method == "Runtime.evaluate" and params.get("expression") == "document")
+
+
+def test_find_elements_reuses_document_and_releases_groups(driver):
+    page = DevToolsHandler.page
+    driver.get("https://example.com/a")
+    cards = driver.find_elements(By.CSS_SELECTOR, ".card")
+    assert [card.text for card in cards] == ["卡片1", "卡片2", "卡片3"]
+    assert driver.find_element(By.CSS_SELECTOR, ".card").text == "卡片1"
+    with pytest.raises(NoSuchElementException):
+        driver.find_element(By.CSS_SELECTOR, ".missing")
+    assert driver.current_url == "https://example.com/a"
+
+    # 同一页面只取一次 document；查找用的中间数组立即释放，其余对象都在当前对象组中
+    assert _document_lookups(page) == 1
+    with page.lock:
+        groups = page.live()
+    assert len(groups) == 1 + 3 + 1 and len(set(groups)) == 1
+
+    # 按轮释放：之前的元素全部释放，下一次查找重新取 document
+    driver.release_objects()
+    with page.lock:
+        assert page.live() == []
+    assert len(driver.find_elements(By.CSS_SELECTOR, ".card")) == 3
+    assert _document_lookups(page) == 2
+
+    # 打开新页面时释放上一个页面的对象组
+    driver.get("https://example.com/b")
+    released = [params["objectGroup"] for method, params in page.calls if method == "Runtime.releaseObjectGroup"]
+    assert len(released) == 3 and len(set(released)) == 3
+    assert [card.text for card in driver.find_elements(By.CSS_SELECTOR, ".card")] == ["卡片4"]
+    assert _document_lookups(page) == 3
+
+
+def test_page_initiated_navigation_invalidates_cached_document(driver):
+    page = DevToolsHandler.page
+    driver.get("https://example.com/a")
+    assert len(driver.find_elements(By.CSS_SELECTOR, ".card")) == 3
+
+    # 页面自己跳转（如点击链接）：DevTools推送执行上下文清空事件
+    received = threading.Event()
+    driver.on("Page.loadEventFired", lambda params: received.set())
+    with page.lock:
+        page.url = "https://example.com/b"
+    driver.execute_cdp_cmd("Page.navigate", {"url": "https://example.com/b"})
+    assert received.wait(5)
+
+    assert [card.text for card in driver.find_elements(By.CSS_SELECTOR, ".card")] == ["卡片4"]
+    assert _document_lookups(page) == 2
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+内容变更事件日志测试
+检查新内容、计数增量、缺失内容事件，offset 单调递增与段文件切分，消费者的 offset 记录，
+以及多个进程同时写同一日志
+"""
+
+import multiprocessing
+from datetime import datetime
+
+from src.common.change_log import METRICS_CHANGED, POST_CREATED, POST_MISSING, ChangeLog, ChangeLogConsumer
+from src.common.records import BilibiliDynamic, DouyinVideo
+
+
+def _dynamic(content_id, likes, day):
+    return BilibiliDynamic(content_id=content_id, like_count=likes, comment_count=1,
+                           publish_time=datetime(2024, 9, day))
+
+
+def test_capture_emits_created_changed_and_missing(tmp_path):
+    change_log = ChangeLog(str(tmp_path))
+    events = change_log.capture([_dynamic("1", 10, 5), _dynamic("2", 3, 20)], "bilibili",
+                                window=("2024-09-01", "2024-09-30"))
+    assert [(event["type"], event["content_id"]) for event in events] == [(POST_CREATED, "1"), (POST_CREATED, "2")]
+    assert events[0]["record"]["content_id"] == "1"
+
+    # 重新打开：快照和 offset 从磁盘恢复
+    change_log = ChangeLog(str(tmp_path))
+    events = change_log.capture([_dynamic("1", 15, 5), _dynamic("3", 0, 25)], "bilibili",
+                                window=("2024-09-01", "2024-09-30"))
+    assert [(event["type"], event["content_id"]) for event in events] == [
+        (METRICS_CHANGED, "1"), (POST_CREATED, "3"), (POST_MISSING, "2")]
+    assert events[0]["deltas"] == {"like_count": 5} and events[0]["metrics"]["like_count"] == 15
+    assert [event["offset"] for event in events] == [2, 3, 4]
+
+    # 范围不完整（window=None）时不报告缺失；已报告的缺失不重复，重新出现时作为恢复的新内容
+    assert change_log.capture([_dynamic("1", 15, 5)], "bilibili") == []
+    events = change_log.capture([_dynamic("2", 3, 20)], "bilibili")
+    assert events[0]["type"] == POST_CREATED and events[0]["restored"]
+
+    # 抖音按应出现的视频ID检测缺失，不影响B站内容
+    video = DouyinVideo(video_url="https://www.douyin.com/video/7", like_count=1)
+    change_log.capture([video], "douyin")
+    events = change_log.capture([], "douyin", expected_ids=["7"])
+    assert [(event["type"], event["platform"], event["content_id"]) for event in events] == [
+        (POST_MISSING, "douyin", "7")]
+
+
+def test_segments_rotate_and_consumers_track_offsets(tmp_path):
+    change_log = ChangeLog(str(tmp_path), segment_bytes=400)
+    for i in range(20):
+        change_log.append([{"type": POST_CREATED, "platform": "bilibili", "content_id": str(i)}])
+    segments = change_log.segments()
+    assert len(segments) > 3 and segments[0] == 0
+    assert [event["offset"] for event in change_log.read()] == list(range(20))
+    assert [event["content_id"] for event in change_log.read(13, limit=3)] == ["13", "14", "15"]
+
+    report = ChangeLogConsumer(change_log, "report")
+    assert [event["offset"] for event in report.poll(5)] == [0, 1, 2, 3, 4]
+    report.commit()
+    # 未提交的进度在重启后重新读取
+    assert report.poll(5)[0]["offset"] == 5
+    report = ChangeLogConsumer(ChangeLog(str(tmp_path), segment_bytes=400), "report")
+    assert report.offset == 5 and len(report.poll()) == 15
+
+    # 各消费者互不影响；tail 逐条确认
+    alerts = ChangeLogConsumer(change_log, "alerts")
+    seen = [event["offset"] for event in alerts.tail(poll_interval=0, should_stop=lambda: True)]
+    assert seen == list(range(20)) and ChangeLogConsumer(change_log, "alerts").offset == 20
+
+    change_log.append([{"type": POST_CREATED, "platform": "douyin", "content_id": "new"}])
+    assert [event["content_id"] for event in alerts.poll()] == ["new"]
+
+
+
+
+def test_torn_write_is_skipped_and_repaired(tmp_path):
+    change_log = ChangeLog(str(tmp_path))
+    change_log.append([{"type": POST_CREATED, "platform": "bilibili", "content_id": str(i)} for i in range(3)])
+    # 追加中途崩溃：最后一行只写了一半
+    path = change_log._segment_path(change_log.segments()[-1])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"offset": 3, "ts": 1.0, "type": "post_cr')
+
+    change_log = ChangeLog(str(tmp_path))
+    assert change_log.next_offset == 3
+    assert [event["offset"] for event in change_log.read()] == [0, 1, 2]
+
+    written = change_log.append([{"type": POST_CREATED, "platform": "bilibili", "content_id": "3"}])
+    assert [event["offset"] for event in written] == [3]
+    assert [event["content_id"] for event in ChangeLog(str(tmp_path)).read()] == ["0", "1", "2", "3"]
+    with open(path, encoding="utf-8") as f:
+        assert all(line.startswith('{"offset"') for line in f)
+
+
+def _append_many(log_dir, opened, worker, count):
+    change_log = ChangeLog(log_dir, segment_bytes=2000)
+    # 所有进程都在还没有事件时打开日志，内存中的 offset 都是 0
+    opened.wait()
+    for i in range(count):
+        change_log.append([{"type": POST_CREATED, "platform": "bilibili", "content_id": f"{worker}-{i}"}])
+
+
+def _capture_many(log_dir, opened, worker, count):
+    change_log = ChangeLog(log_dir, segment_bytes=2000)
+    opened.wait()
+    for i in range(count):
+        change_log.capture([_dynamic(f"{worker}-{i}", i, 5)], "bilibili")
+
+
+def test_concurrent_processes_append_without_duplicate_offsets(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    opened = context.Barrier(6)
+    processes = [context.Process(target=_append_many, args=(str(tmp_path), opened, worker, 30))
+                 for worker in range(4)]
+    processes += [context.Process(target=_capture_many, args=(str(tmp_path), opened, worker, 10))
+                  for worker in (4, 5)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert all(process.exitcode == 0 for process in processes)
+
+    change_log = ChangeLog(str(tmp_path))
+    events = list(change_log.read())
+    assert [event["offset"] for event in events] == list(range(140))
+    assert len({event["content_id"] for event in events}) == 140
+    # 快照比较也在文件锁内：两个进程写入的内容都保留在快照中，没有互相覆盖
+    events = change_log.capture([], "bilibili", expected_ids=["4-0", "4-9", "5-0", "5-9"])
+    assert sorted(event["content_id"] for event in events if event["type"] == POST_MISSING) == [
+        "4-0", "4-9", "5-0", "5-9"]
+    assert [event["offset"] for event in events] == [140, 141, 142, 143]
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+命令行启动耗时测试
+通过 python -X importtime 检查CLI启动时不加载浏览器、导出相关的重量级模块，
+并且导入耗时在（宽松的）预算以内
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent
+
+# CLI模块导入耗时预算（毫秒）：只用于发现误加载重量级模块这类明显的回退，
+# 负载较高的CI机器上可用环境变量 CLI_IMPORT_BUDGET_MS 调大，设为0时跳过
+IMPORT_BUDGET_MS = float(os.environ.get("CLI_IMPORT_BUDGET_MS", "1000"))
+
+# 启动时不允许加载的模块
+HEAVY_MODULES = ["selenium", "webdriver_manager", "pandas", "docx", "pyarrow"]
+
+
+def _import_times(statement: str) -> dict:
+    """运行 python -X importtime 并解析每个模块的累计导入耗时"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=project_root, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        times[name] = int(cumulative)
+    return times
+
+
+def test_cli_import_skips_heavy_modules():
+    times = _import_times("import src.cli")
+    loaded = [name for name in times if name.split(".")[0] in HEAVY_MODULES]
+    assert loaded == []
+
+
+def test_cli_import_within_budget():
+    if IMPORT_BUDGET_MS <= 0:
+        pytest.skip("CLI_IMPORT_BUDGET_MS=0，跳过导入耗时检查")
+    times = _import_times("import src.cli")
+    assert times["src.cli"] < IMPORT_BUDGET_MS * 1000
+
+
+def test_settings_import_has_no_side_effects():
+    statement = (
+        "import pathlib; "
+        "calls = []; "
+        "pathlib.Path.mkdir = lambda *args, **kwargs: calls.append(args); "
+        "import config.settings; "
+        "assert calls == [], calls"
+    )
+    subprocess.run([sys.executable, "-c", statement], cwd=project_root, check=True)
+
+
+def test_accounts_command_runs():
+    result = subprocess.run(
+        [sys.executable, "-m", "src.cli", "accounts"],
+        cwd=project_root, capture_output=True, text=True, check=True
+    )
+    assert "bilibili" in result.stdout
+    assert "douyin" in result.stdout
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+浏览器命令追踪测试
+用假浏览器和假时钟检查命令按类型、选择器和调用位置计数，耗时直方图，以及每页、每卡片的命令数
+"""
+
+import json
+
+import pytest
+
+from src.common.command_trace import CommandTracer, TracingDriver, TracingElement
+
+
+class FakeClock:
+    """每次读取前进 step 秒"""
+
+    def __init__(self, step=0.003):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+class NoSuchElement(Exception):
+    pass
+
+
+class FakeElement:
+    def __init__(self, fields):
+        self.fields = fields
+
+    @property
+    def text(self):
+        return self.fields.get("text", "")
+
+    @property
+    def size(self):
+        return {"height": 100, "width": 300}
+
+    def get_attribute(self, name):
+        return self.fields.get(name)
+
+    def find_element(self, by, value):
+        if value not in self.fields:
+            raise NoSuchElement(value)
+        return FakeElement({"text": self.fields[value]})
+
+
+class FakeDriver:
+    def __init__(self, cards):
+        self.cards = cards
+        self.url = None
+
+    def get(self, url):
+        self.url = url
+
+    def find_elements(self, by, value):
+        return [FakeElement(card) for card in self.cards]
+
+
+def find_like(card):
+    """先试失效的旧选择器，再回退到新选择器"""
+    for selector in (".old-like", ".like"):
+        try:
+            return card.find_element("css selector", selector).text
+        except NoSuchElement:
+            continue
+    return None
+
+
+def extract_page(driver, tracer, url):
+    driver.get(url)
+    results = []
+    for card in driver.find_elements("css selector", ".card"):
+        with tracer.card():
+            results.append((card.get_attribute("dyn-id"), find_like(card), card.size["height"]))
+    return results
+
+
+def test_commands_are_counted_by_type_selector_and_site(tmp_path):
+    tracer = CommandTracer(str(tmp_path), clock=FakeClock())
+    driver = TracingDriver(FakeDriver([{"dyn-id": "1", ".like": "12"}, {"dyn-id": "2", ".like": "3"}]), tracer)
+
+    results = extract_page(driver, tracer, "https://space.bilibili.com/1/dynamic")
+    extract_page(driver, tracer, "https://space.bilibili.com/2/dynamic")
+    assert results == [("1", "12", 100), ("2", "3", 100)]
+
+    summary = tracer.report()
+    by_command = {row["command"]: row for row in summary["by_command"]}
+    assert by_command["find_element"]["count"] == 8
+    assert by_command[".text"]["count"] == 4
+    assert by_command[".size"]["count"] == 4
+    assert by_command["get"]["count"] == 2
+    assert by_command["find_element"]["histogram"] == {"<=5ms": 8}
+
+    sites = {(row["command"], row["site"].split(" (")[0]): row["count"] for row in summary["by_site"]}
+    # 失效的回退选择器单独计数，调用位置带上外层函数
+    assert sites[("find_element(css selector='.old-like')", "extract_page > find_like")] == 4
+    assert sites[("find_element(css selector='.like')", "extract_page > find_like")] == 4
+    assert sites[("get_attribute('dyn-id')", "test_commands_are_counted_by_type_selector_and_site > extract_page")] == 4
+
+    # 每卡片：get_attribute + 两次 find_element + .text + .size；每页：get + find_elements + 2张卡片
+    assert summary["cards"] == {"count": 4, "commands_per_card": 5.0, "max": 5}
+    assert summary["pages"] == {"count": 2, "commands_per_page": 12.0, "max": 12}
+
+    with open(tmp_path / "commands.json", encoding="utf-8") as f:
+        assert json.load(f)["commands"] == 24
+    assert "find_like" in (tmp_path / "commands.txt").read_text(encoding="utf-8")
+
+
+def test_failed_commands_are_traced_and_elements_unwrapped():
+    tracer = CommandTracer(clock=FakeClock())
+    driver = TracingDriver(FakeDriver([{}]), tracer)
+    card = driver.find_elements("css selector", ".card")[0]
+    assert isinstance(card, TracingElement)
+
+    with pytest.raises(NoSuchElement):
+        card.find_element("css selector", ".missing")
+    assert {row["command"]: row["count"] for row in tracer.summary()["by_command"]} == {
+        "find_elements": 1, "find_element": 1}
+    assert TracingDriver._unwrap([card])[0] is card._element
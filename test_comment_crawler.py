@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+热门内容评论采集测试
+用本地HTTP服务模拟B站、抖音评论接口，检查游标翻页、并发上限、每条内容的采集上限、增量刷新和热门内容选取
+"""
+
+import json
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from src.analysis_service.comment_crawler import (
+    BilibiliCommentSource,
+    CommentCrawler,
+    CommentStore,
+    DouyinCommentSource,
+    top_posts,
+)
+from src.common.records import BilibiliDynamic, DouyinVideo
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """按时间倒序分页返回评论，记录同时在途的请求数"""
+
+    protocol_version = "HTTP/1.1"
+    # 内容ID → 评论数（评论ID 1..n，ID越大越新）
+    comments = {}
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with StandInHandler.lock:
+            StandInHandler.in_flight += 1
+            StandInHandler.max_in_flight = max(StandInHandler.max_in_flight, StandInHandler.in_flight)
+        time.sleep(0.01)
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path == "/x/v2/reply/main":
+            payload = self._bilibili(query)
+        else:
+            payload = self._douyin(query)
+        with StandInHandler.lock:
+            StandInHandler.in_flight -= 1
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _page(self, post_id, offset, size):
+        total = self.comments[post_id]
+        ids = list(range(total - offset, max(total - offset - size, 0), -1))
+        return ids, offset + size < total
+
+    def _bilibili(self, query):
+        assert query["type"] == "17" and query["mode"] == "2"
+        offset, size = int(query["next"]), int(query["ps"])
+        ids, more = self._page(query["oid"], offset, size)
+        replies = [{"rpid": i, "ctime": 1700000000 + i, "like": i % 5, "member": {"uname": f"用户{i}"},
+                    "content": {"message": f"评论{i}"}} for i in ids]
+        return {"code": 0, "data": {"cursor": {"next": offset + size, "is_end": not more}, "replies": replies}}
+
+    def _douyin(self, query):
+        offset, size = int(query["cursor"]), int(query["count"])
+        ids, more = self._page(query["aweme_id"], offset, size)
+        items = [{"cid": str(i), "create_time": 1700000000 + i, "digg_count": 1, "user": {"nickname": "抖音用户"},
+                  "text": f"抖音评论{i}"} for i in ids]
+        return {"status_code": 0, "comments": items, "cursor": offset + size, "has_more": int(more)}
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in():
+    StandInHandler.comments = {f"b{i}": 45 for i in range(6)}
+    StandInHandler.comments.update({f"d{i}": 30 for i in range(6)})
+    StandInHandler.max_in_flight = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    yield {"bilibili": BilibiliCommentSource(f"{base}/x/v2/reply/main"),
+           "douyin": DouyinCommentSource(f"{base}/aweme/v1/web/comment/list/")}
+    server.shutdown()
+    server.server_close()
+
+
+def test_crawl_is_concurrent_paginated_and_incremental(stand_in, tmp_path):
+    posts = [("bilibili", f"b{i}") for i in range(6)] + [("douyin", f"d{i}") for i in range(6)]
+    with CommentStore(str(tmp_path / "comments.db")) as store:
+        crawler = CommentCrawler(store, sources=stand_in, concurrency=3, per_post_limit=40, page_size=10)
+        summary = crawler.crawl(posts)
+
+        # B站每条内容在上限40条处停止，抖音30条翻完3页
+        assert summary["new_comments"] == 6 * 40 + 6 * 30 and summary["failed"] == []
+        assert summary["requests"] == 6 * 4 + 6 * 3
+        assert 1 < StandInHandler.max_in_flight <= 3
+        newest = store.comments("bilibili", "b0", limit=2)
+        assert [comment["comment_id"] for comment in newest] == ["45", "44"]
+        assert newest[0] == {"comment_id": "45", "ctime": 1700000045, "likes": 0, "author": "用户45",
+                             "text": "评论45"}
+
+        # 增量刷新：只请求新评论所在的页
+        StandInHandler.comments["b0"] = 57
+        StandInHandler.comments["d0"] = 33
+        summary = crawler.crawl(posts)
+        assert summary["new_comments"] == 12 + 3
+        assert summary["requests"] == 2 + 1 + 10
+        assert store.count("bilibili", "b0") == 52 and store.count("douyin", "d0") == 33
+
+        path = str(tmp_path / "comments.jsonl")
+        assert store.export_jsonl(path) == 12
+        with open(path, encoding="utf-8") as f:
+            first = json.loads(f.readline())
+        assert first["platform"] == "bilibili" and len(first["comments"]) == 52
+
+
+def test_top_posts_per_month_and_platform():
+    records = [
+        DouyinVideo(video_url=f"https://www.douyin.com/video/{i}", publish_time=datetime(2024, 9 + i % 2, 1),
+                    like_count=i)
+        for i in range(6)
+    ] + [
+        BilibiliDynamic(content_id="900", like_count=3, publish_time=datetime(2024, 9, 5)),
+        BilibiliDynamic(content_id="未知", like_count=99, publish_time=datetime(2024, 9, 5)),
+        BilibiliDynamic(content_id="901", like_count=99),
+    ]
+    assert top_posts(records, top_n=2) == [("bilibili", "900"), ("douyin", "4"), ("douyin", "2"),
+                                           ("douyin", "5"), ("douyin", "3")]
+    assert top_posts(records, top_n=1, month="2024-10") == [("douyin", "5")]
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+常驻爬取服务测试
+使用假的任务处理函数，验证任务队列、状态查询、取消、HTTP接口（含无效请求）和导出任务参数
+"""
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src import cli
+from src.daemon_service.crawl_daemon import (
+    CANCELLED, DONE, FAILED, CrawlDaemon, Job, create_server, run_export_job
+)
+
+
+class FakeSessions:
+    """不启动浏览器的会话"""
+
+    def close(self):
+        pass
+
+
+def _wait_for(job, statuses, timeout=5.0):
+    deadline = time.time() + timeout
+    while job.status not in statuses and time.time() < deadline:
+        time.sleep(0.01)
+    return job.status
+
+
+def test_jobs_run_in_order_and_report_results():
+    daemon = CrawlDaemon(handlers={"echo": lambda job, s: job.params["value"]}, sessions=FakeSessions())
+    daemon.start()
+    try:
+        first = daemon.submit("echo", {"value": 1})
+        second = daemon.submit("echo", {"value": 2})
+        assert _wait_for(second, {DONE}) == DONE
+        assert first.status == DONE
+        assert (first.result, second.result) == (1, 2)
+        assert first.finished_at <= second.started_at
+    finally:
+        daemon.stop()
+
+
+def test_failed_job_records_error():
+    def boom(job, sessions):
+        raise RuntimeError("页面加载失败")
+
+    daemon = CrawlDaemon(handlers={"boom": boom}, sessions=FakeSessions())
+    daemon.start()
+    try:
+        job = daemon.submit("boom")
+        assert _wait_for(job, {FAILED}) == FAILED
+        assert "页面加载失败" in job.error
+    finally:
+        daemon.stop()
+
+
+def test_cancel_pending_and_running_jobs():
+    started = threading.Event()
+
+    def slow(job, sessions):
+        started.set()
+        while not job.should_stop():
+            time.sleep(0.01)
+        return "stopped"
+
+    daemon = CrawlDaemon(handlers={"slow": slow}, sessions=FakeSessions())
+    daemon.start()
+    try:
+        running = daemon.submit("slow")
+        pending = daemon.submit("slow")
+        assert started.wait(5)
+        daemon.cancel(pending.job_id)
+        assert pending.status == CANCELLED
+        daemon.cancel(running.job_id)
+        assert _wait_for(running, {CANCELLED}) == CANCELLED
+        assert pending.started_at is None
+    finally:
+        daemon.stop()
+
+
+def test_http_interface():
+    daemon = CrawlDaemon(handlers={"echo": lambda job, s: job.params}, sessions=FakeSessions())
+    daemon.start()
+    server = create_server(daemon, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        request = urllib.request.Request(
+            f"{base}/jobs", method="POST",
+            data=json.dumps({"type": "echo", "params": {"a": 1}}).encode("utf-8")
+        )
+        with urllib.request.urlopen(request) as response:
+            job_id = json.loads(response.read())["job_id"]
+
+        _wait_for(daemon.get(job_id), {DONE})
+        with urllib.request.urlopen(f"{base}/jobs/{job_id}") as response:
+            payload = json.loads(response.read())
+        assert payload["status"] == DONE
+        assert payload["result"] == {"a": 1}
+    finally:
+        server.shutdown()
+        server.server_close()
+        daemon.stop()
+
+
+@pytest.mark.parametrize("body", [
+    {"type": ["echo"]},
+    {"type": 1},
+    {"type": "echo", "params": ["a"]},
+    ["echo"],
+    "echo",
+])
+def test_http_rejects_invalid_payload(body):
+    daemon = CrawlDaemon(handlers={"echo": lambda job, s: job.params}, sessions=FakeSessions())
+    server = create_server(daemon, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        request = urllib.request.Request(f"{base}/jobs", method="POST", data=json.dumps(body).encode("utf-8"))
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(request)
+        assert error.value.code == 400
+        assert json.loads(error.value.read())["error"]
+        assert daemon.list_jobs() == []
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_export_job_forwards_formats(monkeypatch):
+    received = []
+    monkeypatch.setattr(cli, "cmd_export", lambda args: received.append(args) or 0)
+
+    job = Job("export", {"platform": "bilibili", "formats": ["csv", "jsonl"], "parquet": True, "output_dir": "out"})
+    assert run_export_job(job, FakeSessions()) == {"exit_code": 0}
+    assert (received[0].platform, received[0].formats, received[0].parquet, received[0].output_dir) == (
+        "bilibili", ["csv", "jsonl"], True, "out")
+
+    run_export_job(Job("export", {"formats": "excel"}), FakeSessions())
+    assert (received[1].platform, received[1].formats, received[1].parquet) == ("douyin", ["excel"], False)
+
+    # 参数无效时任务失败，不会让工作线程随 argparse 退出
+    with pytest.raises(ValueError):
+        run_export_job(Job("export", {"platform": "weibo"}), FakeSessions())
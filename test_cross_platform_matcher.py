@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+跨平台内容匹配测试
+检查按阈值选取的LSH参数、低相似度内容不会大量成为候选、阈值过滤，以及簇不会经由中间内容串联
+"""
+
+from src.analysis_service.cross_platform_matcher import (
+    MinHashLSHIndex,
+    jaccard,
+    lsh_params,
+    match_cross_platform,
+    normalize_caption,
+    shingles,
+)
+from src.common.records import BilibiliDynamic, DouyinVideo
+
+
+def _text(start, length):
+    """由互不重复的汉字组成的文案片段，不同 start 的片段之间没有共同的n-gram"""
+    return "".join(chr(0x4E00 + start + i) for i in range(length))
+
+
+def _similarity(text_a, text_b):
+    return jaccard(shingles(normalize_caption(text_a)), shingles(normalize_caption(text_b)))
+
+
+def _bilibili(content_id, text):
+    return BilibiliDynamic(content_id=content_id, text_content=text)
+
+
+def _douyin(video_id, text):
+    return DouyinVideo(video_url=f"https://www.douyin.com/video/{video_id}", content_text=text)
+
+
+def test_lsh_params_follow_threshold():
+    for threshold in (0.3, 0.5, 0.8):
+        bands, rows = lsh_params(threshold, 128)
+        assert bands * rows <= 128
+        # 候选概率曲线的拐点落在阈值附近
+        assert abs((1 / bands) ** (1 / rows) - threshold) < 0.05
+    assert lsh_params(0.3, 128)[1] < lsh_params(0.8, 128)[1]
+
+    index = MinHashLSHIndex(threshold=0.3)
+    assert (index.bands, index.rows) == lsh_params(0.3, 128)
+
+
+def test_boilerplate_only_captions_are_not_matched():
+    # 60条文案共用一段活动口号，其余部分各不相同，两两相似度约0.13
+    boilerplate = _text(0, 20)
+    texts = [boilerplate + _text(1000 + i * 100, 60) for i in range(60)]
+    assert 0.1 < _similarity(texts[0], texts[1]) < 0.2
+
+    index = MinHashLSHIndex(threshold=0.3)
+    for i, text in enumerate(texts):
+        index.add(str(i), text)
+    # 旧的 64 × 2 分桶下约三分之二的内容对都会成为候选
+    assert len(index.candidate_pairs()) < 0.2 * 60 * 59 / 2
+
+    bilibili = [_bilibili(str(i), text) for i, text in enumerate(texts[:30])]
+    douyin = [_douyin(i, text) for i, text in enumerate(texts[30:])]
+    assert match_cross_platform(bilibili, douyin, threshold=0.3) == []
+
+
+def test_threshold_uses_exact_similarity():
+    shared = _text(0, 30)
+    text_a = shared + _text(100, 40)
+    text_b = shared + _text(200, 40)
+    similarity = _similarity(text_a, text_b)
+    assert 0.2 < similarity < 0.3
+
+    assert match_cross_platform([_bilibili("1", text_a)], [_douyin(1, text_b)], threshold=0.3) == []
+    clusters = match_cross_platform([_bilibili("1", text_a)], [_douyin(1, text_b)], threshold=0.2)
+    assert [pair["similarity"] for pair in clusters[0]["pairs"]] == [round(similarity, 4)]
+
+
+def test_clusters_are_not_chained_through_intermediate_posts():
+    # a ~ b、b ~ c、c ~ d 都超过阈值，但 a 与 c、d 完全不同：不能串成一个簇
+    a = _text(0, 30) + _text(100, 10)
+    b = _text(0, 30) + _text(200, 25)
+    c = _text(200, 25) + _text(300, 5)
+    d = _text(200, 25) + _text(300, 6)
+    assert _similarity(a, b) > 0.4 and _similarity(b, c) > 0.35 and _similarity(a, c) == 0
+
+    clusters = match_cross_platform([_bilibili("a", a), _bilibili("d", d)], [_douyin(2, b), _douyin(3, c)],
+                                    threshold=0.3)
+    members = [sorted(member["content_id"] for member in cluster["members"]) for cluster in clusters]
+    assert members == [["3", "d"], ["2", "a"]]
+    # 簇内每一对内容都是验证通过的相似对
+    assert all(len(cluster["pairs"]) == 1 for cluster in clusters)
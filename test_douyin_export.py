@@ -16,14 +16,14 @@ from douyin_service.douyin_data_exporter import DouyinDataExporter
 from loguru import logger
 
 
-def test_douyin_data_export():
-    """测试抖音数据导出功能"""
+def test_douyin_data_export(tmp_path):
+    """测试抖音数据导出功能（导出到临时目录，不覆盖 data/douyin_data 下的文件）"""
     
     logger.info("🚀 开始测试抖音数据导出功能...")
     
     try:
         # 创建数据导出器
-        exporter = DouyinDataExporter()
+        exporter = DouyinDataExporter(output_dir=str(tmp_path))
         
         # 解析数据
         logger.info("📊 正在解析抖音数据文件...")
@@ -53,10 +53,9 @@ def test_douyin_data_export():
             file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
             logger.info(f"  📄 {format_type.upper()}: {file_path} ({file_size} bytes)")
         
+        assert all(os.path.exists(file_path) for file_path in results.values())
         logger.success("🎉 抖音数据导出测试完成！")
         
-        return results
-        
     except Exception as e:
         logger.error(f"❌ 测试过程中发生错误: {str(e)}")
         raise
@@ -72,4 +71,7 @@ if __name__ == "__main__":
     )
     
     # 运行测试
-    test_douyin_data_export()
\ No newline at end of file
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        test_douyin_data_export(Path(output_dir))
\ No newline at end of file
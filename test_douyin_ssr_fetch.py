@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+抖音视频详情免浏览器获取测试
+使用 fixtures/douyin 下录制的视频页HTML
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from src.common.http_client import CachedHttpClient
+from src.douyin_service import ssr_fetch
+from src.douyin_service.ssr_fetch import fetch_video_stats, parse_video_page
+
+FIXTURES = Path(__file__).parent / "fixtures" / "douyin"
+VIDEO_ID = "7426523190384610587"
+EXPECTED = {
+    "likes": 128456,
+    "comments": 1832,
+    "collects": 9021,
+    "shares": 4410,
+    "publish_time": "发布时间：2024-10-20 11:00",
+    "publish_timestamp": 1729393200,
+}
+
+
+def _fixture(name):
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("name", ["video_render_data.html", "share_router_data.html"])
+def test_parse_embedded_data(name):
+    stats = parse_video_page(_fixture(name), VIDEO_ID)
+    assert {key: stats[key] for key in EXPECTED} == EXPECTED
+    assert "碰一下" in stats["description"]
+
+
+def test_related_video_not_mistaken_for_detail():
+    stats = parse_video_page(_fixture("video_render_data.html"), "7425001122334455667")
+    assert stats["likes"] == 12
+    assert parse_video_page(_fixture("video_render_data.html"), "1") is None
+
+
+def test_page_without_data_returns_none():
+    assert parse_video_page(_fixture("video_no_data.html"), VIDEO_ID) is None
+
+
+class VideoPageHandler(BaseHTTPRequestHandler):
+    """/video/<id> 返回录制的视频页，其他路径返回验证码页"""
+
+    protocol_version = "HTTP/1.1"
+    requests = 0
+
+    def do_GET(self):
+        VideoPageHandler.requests += 1
+        name = "video_render_data.html" if self.path == f"/video/{VIDEO_ID}" else "video_no_data.html"
+        body = _fixture(name).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), VideoPageHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_fetch_over_http(server, tmp_path):
+    client = CachedHttpClient(str(tmp_path))
+    assert fetch_video_stats(f"{server}/video/{VIDEO_ID}", client)["likes"] == 128456
+    assert fetch_video_stats(f"{server}/video/1", client) is None
+
+
+def test_fetch_bypasses_cache(server, tmp_path):
+    # 即使配置了视频页的缓存有效期，每次获取统计数据都重新请求
+    client = CachedHttpClient(str(tmp_path), default_ttl=3600, ttl_overrides=[(r"/video/", 6 * 3600)])
+    VideoPageHandler.requests = 0
+    for _ in range(2):
+        assert fetch_video_stats(f"{server}/video/{VIDEO_ID}", client)["likes"] == 128456
+    assert VideoPageHandler.requests == 2
+
+
+def test_browser_fallback_only_when_needed(monkeypatch):
+    from src.douyin_service import batch_video_stats
+
+    browser_calls = []
+    monkeypatch.setattr(batch_video_stats, "extract_video_stats", lambda driver, url: browser_calls.append(url) or {})
+    monkeypatch.setattr(ssr_fetch, "fetch_video_stats", lambda url: dict(EXPECTED) if url.endswith("ok") else None)
+
+    def get_driver():
+        return "driver"
+
+    assert batch_video_stats.get_video_stats("https://www.douyin.com/video/ok", get_driver)["likes"] == 128456
+    batch_video_stats.get_video_stats("https://www.douyin.com/video/blocked", get_driver)
+    assert browser_calls == ["https://www.douyin.com/video/blocked"]
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+单遍导出引擎测试
+检查记录只遍历一次、各导出目标拿到同样的有序记录流、各导出目标在自己的线程或进程中并发写入并各自计时，
+导出进程的日志回到主进程的日志文件，以及Word按月份分组
+"""
+
+import csv
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+import orjson
+from docx import Document
+from openpyxl import load_workbook
+
+from src.bilibili_service.data_exporter import DataExporter
+from src.common import log_setup
+from src.common.log_setup import log_context, setup_logging, shutdown_logging
+from src.common.records import BilibiliDynamic
+from src.export_service.export_engine import ExportEngine
+from src.export_service.sinks import Sink, available_formats, register_sink
+
+
+def _dynamic(content_id, publish_time, text):
+    return BilibiliDynamic(content_id=content_id, publish_time=publish_time, publish_time_raw=text,
+                           text_content=f"文案{content_id}", like_count=int(content_id))
+
+
+ROWS = [
+    _dynamic("1", datetime(2024, 9, 3), "9月3日"),
+    _dynamic("2", datetime(2024, 10, 20), "10月20日"),
+    _dynamic("3", None, "未知"),
+    _dynamic("4", datetime(2024, 10, 1), "10月1日"),
+]
+
+
+class ListSink(Sink):
+    def __init__(self, name):
+        super().__init__(name, name)
+        self.events = []
+
+    def open(self):
+        self.events.append("open")
+
+    def write(self, record):
+        self.events.append(record.content_id)
+
+    def close(self):
+        self.events.append("close")
+        return self.path
+
+
+class OncePerRecord(list):
+    """只允许遍历一次的记录流"""
+
+    def __init__(self, rows):
+        super().__init__(rows)
+        self.iterations = 0
+
+    def __iter__(self):
+        self.iterations += 1
+        assert self.iterations == 1, "记录流被遍历了多次"
+        return super().__iter__()
+
+
+def test_engine_feeds_every_sink_in_one_pass():
+    sinks = [ListSink("a"), ListSink("b")]
+    records = OncePerRecord(ROWS)
+    engine = ExportEngine(sinks)
+
+    assert engine.run(records) == {"a": "a", "b": "b"}
+    assert sinks[0].events == sinks[1].events == ["open", "2", "4", "1", "3", "close"]
+    assert set(engine.timings) == {"a", "b"}
+
+
+class SlowSink(ListSink):
+    """每条记录耗时固定的导出目标"""
+
+    def write(self, record):
+        time.sleep(0.02)
+        super().write(record)
+
+
+class PidSink(Sink):
+    """把写入进程的PID和记录写到文件（在子进程中运行时父进程看不到它的内存）"""
+
+    worker = "process"
+
+    def write(self, record):
+        self.count += 1
+
+    def close(self):
+        with open(self.path, "w") as f:
+            f.write(f"{os.getpid()} {self.count}")
+        return self.path
+
+
+class BrokenSink(ListSink):
+    def write(self, record):
+        raise ValueError("磁盘已满")
+
+
+def test_sinks_run_concurrently_with_their_own_timings():
+    sinks = [SlowSink("a"), SlowSink("b"), SlowSink("c")]
+    engine = ExportEngine(sinks, batch_size=1)
+    start = time.perf_counter()
+    engine.run(ROWS * 3)
+    wall = time.perf_counter() - start
+
+    assert all(sink.events == ["open"] + ["2"] * 3 + ["4"] * 3 + ["1"] * 3 + ["3"] * 3 + ["close"] for sink in sinks)
+    # 每个导出目标单独用时约 12×0.02 秒，三个并发写入，总用时明显少于三者之和
+    assert all(engine.timings[name] >= 0.24 for name in "abc")
+    assert wall < sum(engine.timings.values()) * 0.8
+
+
+def test_cpu_bound_sinks_run_in_their_own_process(tmp_path):
+    path = str(tmp_path / "pid.txt")
+    sinks = [PidSink("pid", path), ListSink("list")]
+    engine = ExportEngine(sinks)
+    assert engine.run(ROWS) == {"pid": path, "list": "list"}
+
+    pid, count = open(path).read().split()
+    assert int(pid) != os.getpid() and int(count) == 4
+    assert sinks[0].count == 4 and engine.timings["pid"] > 0
+
+    # 全部在线程中运行
+    ExportEngine([PidSink("pid", path), ListSink("list")], workers="thread").run(ROWS)
+    assert int(open(path).read().split()[0]) == os.getpid()
+
+
+def test_failing_sink_does_not_block_the_others():
+    sinks = [BrokenSink("broken"), ListSink("ok")]
+    with pytest.raises(ValueError, match="磁盘已满"):
+        ExportEngine(sinks, batch_size=1, max_pending=1).run(ROWS * 10)
+    assert sinks[1].events[-1] == "close"
+
+
+class LoggingPidSink(PidSink):
+    def close(self):
+        logging.getLogger("test.export").info("%s 写入 %d 条", self.name, self.count)
+        return super().close()
+
+
+def test_process_sink_logs_reach_the_log_file(tmp_path):
+    log_file = tmp_path / "crawler.jsonl"
+    setup_logging(run_id="run-export", console=False, log_file=str(log_file))
+    try:
+        with log_context(account="420831218"):
+            DataExporter(output_dir=str(tmp_path)).export_all_formats(ROWS)
+            ExportEngine([LoggingPidSink("pid", str(tmp_path / "pid.txt")), ListSink("list")]).run(ROWS)
+    finally:
+        shutdown_logging()
+        log_setup._process_fields.clear()
+    assert int(open(tmp_path / "pid.txt").read().split()[0]) != os.getpid()
+
+    entries = [json.loads(line) for line in log_file.read_text(encoding="utf-8").splitlines()]
+    messages = [entry["msg"] for entry in entries]
+    # Excel、Word在导出进程中写入，它们的日志与线程中的CSV、JSONL一样写入日志文件
+    for name in ("Excel文件", "Word文档", "CSV文件", "JSONL文件"):
+        assert any(message.startswith(f"✅ {name}已导出") for message in messages)
+    child = next(entry for entry in entries if entry["msg"] == "pid 写入 4 条")
+    assert (child["logger"], child["run_id"], child["account"]) == ("test.export", "run-export", "420831218")
+
+
+def test_bilibili_exporter_writes_all_formats(tmp_path):
+    results = DataExporter(output_dir=str(tmp_path)).export_all_formats(ROWS)
+    assert set(results) == {"excel", "word", "csv", "jsonl"}
+
+    sheet = load_workbook(results["excel"]).active
+    rows = list(sheet.iter_rows(values_only=True))
+    assert rows[0][:3] == ("content_id", "content_type", "text_content")
+    assert [row[0] for row in rows[1:]] == ["2", "4", "1", "3"]
+
+    with open(results["csv"], encoding="utf-8-sig", newline="") as f:
+        assert [row["content_id"] for row in csv.DictReader(f)] == ["2", "4", "1", "3"]
+
+    with open(results["jsonl"], "rb") as f:
+        lines = [orjson.loads(line) for line in f]
+    assert lines[0]["publish_time"] == "2024-10-20T00:00:00" and lines[0]["like_count"] == 2
+
+    headings = [p.text for p in Document(results["word"]).paragraphs if p.text.startswith("===")]
+    assert headings == ["=== 2024年10月 ===", "=== 2024年9月 ==="]
+
+
+def test_excel_and_word_export_concurrently_and_surface_errors(tmp_path):
+    exporter = DataExporter(output_dir=str(tmp_path))
+    results = exporter.export_all_formats(ROWS, formats=["excel", "word"])
+    assert set(results) == {"excel", "word"} and all(os.path.getsize(path) > 0 for path in results.values())
+    assert load_workbook(results["excel"]).active.max_row == 5
+
+    # Excel在导出进程中写入失败：错误在调用方抛出，Word仍然写完
+    os.remove(results["excel"])
+    os.remove(results["word"])
+    os.mkdir(results["excel"])
+    with pytest.raises(OSError):
+        exporter.export_all_formats(ROWS, formats=["excel", "word"])
+    assert os.path.getsize(results["word"]) > 0
+
+
+def test_new_sink_plugs_in_without_engine_changes(tmp_path):
+    register_sink("ids", lambda layout, path: ListSink("ids"), "{basename}_ids.txt")
+    try:
+        results = DataExporter(output_dir=str(tmp_path)).export_all_formats(ROWS, formats=["ids", "jsonl"])
+        assert set(results) == {"ids", "jsonl"}
+    finally:
+        from src.export_service import sinks
+
+        sinks._SINK_FACTORIES.pop("ids")
+    assert "ids" not in available_formats()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+HTTP缓存客户端测试
+使用本地HTTP服务模拟 ETag、Last-Modified、max-age 等响应
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.common.http_client import CachedHttpClient
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """按路径返回不同缓存头的本地服务"""
+
+    protocol_version = "HTTP/1.1"
+    requests_seen = []
+
+    def do_GET(self):
+        StandInHandler.requests_seen.append((self.path, dict(self.headers)))
+        if self.path == "/etag":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self._reply(304, b"", {"ETag": '"v1"'})
+            else:
+                self._reply(200, b"etag-body", {"ETag": '"v1"'})
+        elif self.path == "/max-age":
+            self._reply(200, b"fresh-body", {"Cache-Control": "max-age=600"})
+        elif self.path == "/no-store":
+            self._reply(200, b"secret", {"Cache-Control": "no-store"})
+        else:
+            self._reply(200, b"plain", {"Last-Modified": "Wed, 01 Oct 2025 00:00:00 GMT"})
+
+    def _reply(self, status, body, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    StandInHandler.requests_seen = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_etag_revalidation(server, tmp_path):
+    client = CachedHttpClient(str(tmp_path))
+    first = client.get(f"{server}/etag")
+    second = client.get(f"{server}/etag")
+    assert (first.from_cache, second.from_cache) == (False, True)
+    assert second.content == b"etag-body"
+    assert StandInHandler.requests_seen[-1][1].get("If-None-Match") == '"v1"'
+    assert client.stats()["revalidated"] == 1
+
+
+def test_last_modified_revalidation_header(server, tmp_path):
+    client = CachedHttpClient(str(tmp_path))
+    client.get(f"{server}/plain")
+    client.get(f"{server}/plain")
+    assert StandInHandler.requests_seen[-1][1].get("If-Modified-Since") == "Wed, 01 Oct 2025 00:00:00 GMT"
+
+
+def test_max_age_served_without_network(server, tmp_path):
+    client = CachedHttpClient(str(tmp_path))
+    client.get(f"{server}/max-age")
+    response = client.get(f"{server}/max-age")
+    assert response.text == "fresh-body"
+    assert len(StandInHandler.requests_seen) == 1
+    assert client.stats() == {"hit": 1, "revalidated": 0, "miss": 1, "uncacheable": 0}
+
+
+def test_ttl_override_and_persistence(server, tmp_path):
+    CachedHttpClient(str(tmp_path), ttl_overrides=[(r"/plain$", 3600)]).get(f"{server}/plain")
+    client = CachedHttpClient(str(tmp_path), ttl_overrides=[(r"/plain$", 3600)])
+    assert client.get(f"{server}/plain").from_cache
+    assert len(StandInHandler.requests_seen) == 1
+
+
+def test_no_store_is_not_cached(server, tmp_path):
+    client = CachedHttpClient(str(tmp_path))
+    client.get(f"{server}/no-store")
+    client.get(f"{server}/no-store")
+    assert len(StandInHandler.requests_seen) == 2
+    assert client.stats()["uncacheable"] == 2
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+无限滚动加载测试
+用假浏览器模拟按页加载的列表，检查按轮次返回新卡片、结束标记、超时重试、轮次上限和卡片被替换时的处理
+"""
+
+from src.common.infinite_scroll import JUMP_SCRIPT, WAIT_SCRIPT, InfiniteScroller
+
+
+class FakeFeed:
+    """跳到底部后按页加载卡片的列表；stalls 为前几次等待超时（模拟网络慢），end_marker 为是否显示结束标记"""
+
+    def __init__(self, total, page_size, stalls=0, end_marker=True):
+        self.cards = [f"card{i}" for i in range(page_size)]
+        self.total = total
+        self.page_size = page_size
+        self.stalls = stalls
+        self.end_marker = end_marker
+        self.calls = []
+
+    def execute_script(self, script, card_selector, container_selector):
+        assert script == JUMP_SCRIPT and card_selector == ".card" and container_selector == ".list"
+        self.calls.append("jump")
+        return len(self.cards)
+
+    def execute_async_script(self, script, card_selector, container_selector, before, timeout_ms, end_selector,
+                             loading_selector):
+        assert script == WAIT_SCRIPT and timeout_ms == 5000 and end_selector == ".no-more"
+        self.calls.append("wait")
+        if self.stalls:
+            self.stalls -= 1
+            return {"status": "timeout", "count": len(self.cards), "replaced": False, "waited_ms": 5000}
+        loaded = len(self.cards)
+        self.cards += [f"card{i}" for i in range(loaded, min(loaded + self.page_size, self.total))]
+        ended = len(self.cards) >= self.total and self.end_marker
+        status = "end" if ended else ("loaded" if len(self.cards) > before else "timeout")
+        return {"status": status, "count": len(self.cards), "replaced": False, "waited_ms": 120}
+
+    def extract(self):
+        return list(self.cards)
+
+
+def _scroller(feed, **options):
+    return InfiniteScroller(feed, ".card", container_selector=".list", end_selector=".no-more", timeout=5,
+                            **options)
+
+
+def test_batches_yield_only_new_cards_until_end_marker():
+    feed = FakeFeed(total=25, page_size=10)
+    scroller = _scroller(feed)
+    batches = list(scroller.batches(feed.extract))
+
+    assert [(batch.round_index, batch.start, len(batch.cards)) for batch in batches] == [(1, 0, 10), (2, 10, 10),
+                                                                                         (3, 20, 5)]
+    assert batches[1].cards[0] == "card10" and batches[1].waited_ms == 120
+    # 最后一批和结束标记一起出现：返回最后一批后直接结束，不再多等一轮
+    assert scroller.reached_end and feed.calls == ["jump", "wait"] * 2
+
+
+def test_slow_loads_are_retried_and_idle_rounds_end_the_feed():
+    feed = FakeFeed(total=20, page_size=10, stalls=1, end_marker=False)
+    scroller = _scroller(feed, max_idle_rounds=2)
+    batches = list(scroller.batches(feed.extract))
+
+    # 一次超时后重试成功；之后连续两轮没有新卡片视为到底
+    assert [len(batch.cards) for batch in batches] == [10, 10]
+    assert scroller.reached_end and scroller.rounds == 1 + 1 + 2
+
+    # 轮次上限
+    feed = FakeFeed(total=100, page_size=10)
+    scroller = _scroller(feed)
+    assert len(list(scroller.batches(feed.extract, max_rounds=3))) == 3
+    assert not scroller.reached_end
+
+
+def test_replaced_cards_are_returned_in_full():
+    feed = FakeFeed(total=30, page_size=10)
+    scroller = _scroller(feed)
+    batches = scroller.batches(feed.extract)
+    assert len(next(batches).cards) == 10
+
+    # 虚拟列表：旧卡片被移除、数量不变
+    def recycle(*args):
+        feed.cards = [f"card{i}" for i in range(10, 20)]
+        return {"status": "loaded", "count": 10, "replaced": True, "waited_ms": 80}
+
+    feed.execute_async_script = recycle
+    batch = next(batches)
+    assert batch.start == 0 and batch.cards[0] == "card10"
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+日志初始化测试
+检查JSON记录、上下文字段、逐卡片日志采样和延迟格式化
+"""
+
+import json
+import logging
+import threading
+
+import pytest
+
+from src.common import log_setup
+from src.common.log_setup import card_logger, log_context, setup_logging, shutdown_logging
+
+
+class FormatProbe:
+    """记录 __str__ 在哪个线程上被调用"""
+
+    def __init__(self):
+        self.threads = []
+
+    def __str__(self):
+        self.threads.append(threading.current_thread().name)
+        return "probe"
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / "crawler.jsonl"
+    setup_logging(run_id="run-1", console=False, log_file=str(path))
+    yield path
+    shutdown_logging()
+    log_setup._process_fields.clear()
+
+
+def _records(path):
+    shutdown_logging()
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_json_records_carry_context(log_file):
+    logger = logging.getLogger("test.crawl")
+    with log_context(account="420831218"):
+        logger.info("第 %d 轮提取", 3, extra={"content_id": "1001"})
+    logger.info("结束")
+
+    first, second = _records(log_file)
+    assert first["msg"] == "第 3 轮提取"
+    assert (first["run_id"], first["account"], first["content_id"]) == ("run-1", "420831218", "1001")
+    assert "account" not in second
+
+
+def test_card_messages_sampled(log_file):
+    cards = card_logger("test.crawl")
+    for i in range(30):
+        cards.info("卡片 %d", i)
+        cards.debug("调试 %d", i)
+    cards.warning("卡片出错")
+
+    messages = [record["msg"] for record in _records(log_file)]
+    assert messages == ["卡片 0", "卡片 10", "卡片 20", "卡片出错"]
+
+
+def test_formatting_deferred_to_listener(log_file):
+    kept, dropped = FormatProbe(), FormatProbe()
+    logging.getLogger("test.crawl").info("%s", kept)
+    card_logger("test.crawl").debug("%s", dropped)
+    _records(log_file)
+
+    # 主线程上只有pytest自身的日志捕获会格式化，文件日志由监听线程格式化
+    assert any(name != threading.current_thread().name for name in kept.threads)
+    assert dropped.threads == []
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+月度分析报告测试
+用少量两个平台的数据检查月度聚合、与标签索引一致的互动量、按数据哈希的聚合缓存（命中与失效），以及生成的HTML报告
+"""
+
+import os
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from src.analysis_service import monthly_report
+from src.common.records import BilibiliDynamic, DouyinVideo, engagement_of
+from src.export_service.parquet_sink import bilibili_records, douyin_records, write_parquet_dataset
+
+
+def _frame():
+    """导出文件列名的原始数据，经 _finalize_frame 统一列结构"""
+    raw = pd.DataFrame({
+        "平台": ["抖音", "抖音", "抖音", "B站", "B站", "B站"],
+        "视频URL": ["https://www.douyin.com/video/701", "https://www.douyin.com/video/702",
+                  "https://www.douyin.com/video/703", None, None, None],
+        "内容ID": [None, None, None, "11", "12", "13"],
+        "文案内容": ["十月视频一", "十月视频二", "九月视频", "十月动态", "九月动态<b>", None],
+        "发布时间": ["2025-10-01 08:30", "2025-10-15 12:00", "2025-09-20 09:00", "2025-10-03 18:00",
+                 "2025-09-01 10:00", "未知"],
+        "点赞数": [100, 10, 7, 50, "5", 1],
+        "评论数": [20, 0, 1, 5, 0, 0],
+        "转发数": [3, None, 0, 1, 2, 0],
+    })
+    raw["内容ID"] = raw["内容ID"].fillna(raw["视频URL"].str.rsplit("/", n=1).str[-1])
+    return monthly_report._finalize_frame(raw)
+
+
+def _rows(monthly):
+    return {(row.platform, row.month): (row.posts, row.engagement_total, row.engagement_median)
+            for row in monthly.itertuples()}
+
+
+def test_monthly_aggregates():
+    df = _frame()
+    # 发布时间无法解析的记录被丢弃
+    assert len(df) == 5
+    assert set(df["platform"]) == {"douyin", "bilibili"}
+
+    aggregates = monthly_report.compute_aggregates(df, top_n=1)
+    assert _rows(aggregates["monthly"]) == {
+        ("bilibili", "2025-09"): (1, 7, 7.0),
+        ("bilibili", "2025-10"): (1, 56, 56.0),
+        ("douyin", "2025-09"): (1, 8, 8.0),
+        ("douyin", "2025-10"): (2, 133, 66.5),
+    }
+    top = aggregates["top_posts"]
+    assert list(zip(top["platform"], top["month"], top["content_id"])) == [
+        ("bilibili", "2025-10", "11"), ("bilibili", "2025-09", "12"),
+        ("douyin", "2025-10", "701"), ("douyin", "2025-09", "703"),
+    ]
+
+
+def test_engagement_matches_records(tmp_path):
+    bilibili = [BilibiliDynamic(content_id="11", like_count=50, comment_count=5, repost_count=1,
+                                publish_time=datetime(2025, 10, 3))]
+    douyin = [DouyinVideo(video_url="https://www.douyin.com/video/701", like_count=100, comment_count=20,
+                          collect_count=9, share_count=3, publish_time=datetime(2025, 10, 1))]
+    dataset_dir = str(tmp_path / "parquet")
+    write_parquet_dataset(bilibili_records(bilibili) + douyin_records(douyin), dataset_dir)
+
+    # 报告中的互动量与标签索引、评论采集（engagement_of）一致，抖音包含收藏数
+    df = monthly_report.load_from_parquet(dataset_dir)
+    assert dict(zip(df["content_id"], df["engagement"])) == {
+        record.content_id: engagement_of(record) for record in bilibili + douyin}
+    assert engagement_of(douyin[0]) == 132
+
+
+def test_aggregate_cache_hit_and_invalidation(tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    df = _frame()
+    calls = []
+    compute = monthly_report.compute_aggregates
+
+    def counting_compute(frame, top_n=10):
+        calls.append(top_n)
+        return compute(frame, top_n=top_n)
+
+    monkeypatch.setattr(monthly_report, "compute_aggregates", counting_compute)
+
+    first = monthly_report.cached_aggregates(df, cache_dir, top_n=2)
+    assert len(calls) == 1 and len(os.listdir(cache_dir)) == 1
+
+    # 相同数据命中缓存，不重新计算
+    second = monthly_report.cached_aggregates(df.copy(), cache_dir, top_n=2)
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(first["monthly"], second["monthly"])
+    pd.testing.assert_frame_equal(first["top_posts"], second["top_posts"])
+
+    # 数据、Top N 或聚合版本变化时缓存失效
+    changed = df.copy()
+    changed.loc[changed.index[0], "like_count"] += 1
+    changed.loc[changed.index[0], "engagement"] += 1
+    updated = monthly_report.cached_aggregates(changed, cache_dir, top_n=2)
+    assert len(calls) == 2
+    assert _rows(updated["monthly"])[("douyin", "2025-10")][1] == 134
+
+    monthly_report.cached_aggregates(df, cache_dir, top_n=3)
+    assert len(calls) == 3
+    monkeypatch.setattr(monthly_report, "AGGREGATE_VERSION", monthly_report.AGGREGATE_VERSION + 1)
+    monthly_report.cached_aggregates(df, cache_dir, top_n=2)
+    assert len(calls) == 4 and len(os.listdir(cache_dir)) == 4
+
+    # 损坏的缓存文件被重新计算并覆盖
+    monkeypatch.setattr(monthly_report, "AGGREGATE_VERSION", monthly_report.AGGREGATE_VERSION - 1)
+    for name in os.listdir(cache_dir):
+        with open(os.path.join(cache_dir, name), "wb") as f:
+            f.write(b"")
+    monthly_report.cached_aggregates(df, cache_dir, top_n=2)
+    assert len(calls) == 5
+    monthly_report.cached_aggregates(df, cache_dir, top_n=2)
+    assert len(calls) == 5
+
+
+@pytest.mark.filterwarnings("ignore::UserWarning")
+def test_build_report_writes_html_and_charts(tmp_path):
+    output_dir = tmp_path / "report"
+    report_path = monthly_report.build_report(_frame(), str(output_dir), top_n=2)
+
+    assert report_path == str(output_dir / "index.html")
+    for filename, _, _, _ in monthly_report.CHARTS:
+        assert (output_dir / filename).stat().st_size > 0
+    assert len(os.listdir(output_dir / ".cache")) == 1
+
+    document = (output_dir / "index.html").read_text(encoding="utf-8")
+    for filename, _, title, _ in monthly_report.CHARTS:
+        assert f'<img src="{filename}" alt="{title}">' in document
+    assert "<h2>月度统计</h2>" in document and "66.5" in document
+    assert "2025-10-01" in document and "十月视频一" in document
+    # 文案中的HTML被转义
+    assert "九月动态&lt;b&gt;" in document
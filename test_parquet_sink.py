@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Parquet数据集导出测试
+写出两个平台的数据集后按分区条件读回，检查分区裁剪、列类型、重复导出时与已有记录合并，
+以及命令行 --parquet 对B站导出生效
+"""
+
+from datetime import datetime
+
+import pyarrow as pa
+
+from src import cli
+from src.bilibili_service.data_exporter import DataExporter
+from src.common.records import BilibiliDynamic, DouyinVideo
+from src.douyin_service.douyin_data_exporter import DouyinDataExporter
+from src.export_service.parquet_sink import bilibili_records, read_parquet_dataset, write_parquet_dataset
+
+BILIBILI = [
+    BilibiliDynamic(content_id="11", author="支付宝Alipay", text_content="九月动态", like_count=12,
+                    publish_time=datetime(2025, 9, 3, 10, 0)),
+    BilibiliDynamic(content_id="12", author="支付宝Alipay", text_content="十月动态", like_count=30,
+                    comment_count=2, publish_time=datetime(2025, 10, 20)),
+    BilibiliDynamic(content_id="13", text_content="没有时间"),
+]
+DOUYIN = [
+    DouyinVideo(video_url="https://www.douyin.com/video/701", content_text="十月视频", like_count=5000,
+                collect_count=7, share_count=3, publish_time=datetime(2025, 10, 1, 8, 30)),
+]
+
+
+def test_dataset_round_trip_with_partition_filter(tmp_path):
+    DataExporter(output_dir=str(tmp_path)).export_all_formats(BILIBILI, with_parquet=True, formats=["csv"])
+    DouyinDataExporter(output_dir=str(tmp_path)).export_all_formats(DOUYIN, with_parquet=True, formats=["csv"])
+    dataset_dir = str(tmp_path / "parquet")
+
+    table = read_parquet_dataset(dataset_dir, filters=[("month", "=", "2025-10")])
+    rows = sorted(table.to_pylist(), key=lambda row: row["platform"])
+    assert [(row["platform"], row["content_id"], row["like_count"]) for row in rows] == [
+        ("bilibili", "12", 30), ("douyin", "701", 5000)]
+    assert rows[1]["collect_count"] == 7 and rows[0]["collect_count"] is None
+
+    schema = table.schema
+    assert schema.field("like_count").type == pa.int64()
+    assert pa.types.is_timestamp(schema.field("publish_time").type)
+    assert pa.types.is_dictionary(schema.field("author").type)
+
+    df = read_parquet_dataset(dataset_dir, columns=["content_id", "like_count", "publish_time"],
+                              filters=[("platform", "=", "bilibili")]).to_pandas()
+    assert sorted(df["content_id"]) == ["11", "12", "13"]
+    assert str(df["like_count"].dtype) == "int64"
+    assert str(df["publish_time"].dtype).startswith("datetime64")
+
+    # 没有发布时间的记录归入 unknown 分区
+    unknown = read_parquet_dataset(dataset_dir, filters=[("month", "=", "unknown")])
+    assert unknown.column("content_id").to_pylist() == ["13"]
+
+
+def test_partial_export_merges_with_existing_month(tmp_path):
+    dataset_dir = str(tmp_path / "parquet")
+    write_parquet_dataset(bilibili_records(BILIBILI), dataset_dir)
+    DouyinDataExporter(output_dir=str(tmp_path)).export_all_formats(DOUYIN, with_parquet=True, formats=["csv"])
+
+    # 只爬取了九月初和十月下旬：这两个月已有的其他内容保留，重复的内容以本次为准
+    later = [
+        BilibiliDynamic(content_id="11", text_content="九月动态", like_count=20, publish_time=datetime(2025, 9, 3)),
+        BilibiliDynamic(content_id="14", text_content="十月新动态", like_count=3, publish_time=datetime(2025, 10, 28)),
+    ]
+    write_parquet_dataset(bilibili_records(later), dataset_dir)
+    write_parquet_dataset(bilibili_records(later), dataset_dir)
+
+    rows = read_parquet_dataset(dataset_dir, filters=[("month", "in", ["2025-09", "2025-10"])]).to_pylist()
+    assert sorted((row["platform"], row["month"], row["content_id"], row["like_count"]) for row in rows) == [
+        ("bilibili", "2025-09", "11", 20), ("bilibili", "2025-10", "12", 30), ("bilibili", "2025-10", "14", 3),
+        ("douyin", "2025-10", "701", 5000)]
+    assert sorted(read_parquet_dataset(dataset_dir).column("content_id").to_pylist()) == [
+        "11", "12", "13", "14", "701"]
+
+
+def test_export_command_writes_bilibili_parquet(tmp_path, monkeypatch):
+    txt = tmp_path / "1.txt"
+    txt.write_text(
+        "内容 1:\n  内容ID: 901\n  作者: 支付宝Alipay\n  发布时间: 10月29日\n  文案内容: 动态一\n"
+        "  内容类型: 动态\n  点赞数: 52\n  评论数: 2\n  转发数: 0\n"
+        "----------------------------------------\n",
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(cli, "ensure_dirs", lambda: None)
+    args = cli.build_parser().parse_args(["export", "bilibili", "--txt", str(txt), "--formats", "csv", "--parquet",
+                                          "--output-dir", str(tmp_path)])
+    assert args.func(args) == 0
+
+    table = read_parquet_dataset(str(tmp_path / "parquet"), filters=[("platform", "=", "bilibili")])
+    assert table.to_pylist()[0]["content_id"] == "901" and table.to_pylist()[0]["month"] == "2025-10"
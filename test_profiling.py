@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+分阶段性能分析测试
+检查 sample 模式输出speedscope/折叠栈/热点汇总，cprofile 模式输出pstats，未启用时不产生任何输出
+"""
+
+import json
+import pstats
+import time
+
+from src.common.profiling import CPROFILE, SAMPLE, StageProfiler
+
+
+def busy_loop(seconds):
+    """占用CPU一段时间"""
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(100))
+    return total
+
+
+def test_sample_mode_writes_flamegraph_files(tmp_path):
+    profiler = StageProfiler(str(tmp_path), mode=SAMPLE, interval=0.001)
+    for _ in range(2):
+        with profiler.stage("parse"):
+            busy_loop(0.05)
+            # 嵌套阶段计入外层阶段
+            with profiler.stage("inner"):
+                busy_loop(0.01)
+    summary = profiler.report()
+
+    assert set(profiler.wall_times) == {"parse"}
+    assert profiler.wall_times["parse"] >= 0.12
+
+    with open(tmp_path / "parse.speedscope.json", encoding="utf-8") as f:
+        document = json.load(f)
+    frame_names = {frame["name"] for frame in document["shared"]["frames"]}
+    assert "busy_loop" in frame_names
+    # 调用栈从进入阶段的函数开始，不包含pytest的上层帧
+    assert document["profiles"][0]["samples"][0][0] == 0
+    assert document["shared"]["frames"][0]["name"] == "test_sample_mode_writes_flamegraph_files"
+
+    folded = (tmp_path / "parse.folded").read_text(encoding="utf-8")
+    assert "busy_loop" in folded
+    assert "busy_loop" in open(summary, encoding="utf-8").read()
+    assert any("busy_loop" in row["function"] for row in profiler.hotspots())
+
+
+def test_cprofile_mode_writes_pstats(tmp_path):
+    profiler = StageProfiler(str(tmp_path), mode=CPROFILE)
+    with profiler.stage("export"):
+        busy_loop(0.02)
+    profiler.report()
+
+    stats = pstats.Stats(str(tmp_path / "export.pstats"))
+    assert any(func == "busy_loop" for _, _, func in stats.stats)
+    assert (tmp_path / "hotspots.txt").exists()
+
+
+def test_disabled_profiler_is_a_no_op(tmp_path):
+    profiler = StageProfiler()
+    with profiler.stage("parse"):
+        busy_loop(0.001)
+    assert profiler.report() is None
+    assert profiler.wall_times == {}
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+内容记录类型测试
+检查计数和时间的解析、与旧中文键字典的互转，以及导出器直接使用记录
+"""
+
+from datetime import datetime
+
+import pytest
+
+from src.bilibili_service.data_exporter import DataExporter
+from src.common.records import BilibiliDynamic, DouyinVideo, parse_count
+from src.douyin_service.douyin_data_exporter import DouyinDataExporter
+from src.export_service.parquet_sink import bilibili_records, douyin_records
+
+CARD = {
+    "内容ID": "1001", "作者": "支付宝", "内容类型": "视频", "发布时间": "10月20日 · 投稿了视频",
+    "文案内容": "碰一下", "视频描述": "活动说明", "点赞数": "1.2万", "评论数": "评论", "转发数": "35",
+    "图片链接": "https://i0.hdslb.com/a.jpg", "视频链接": "", "平台标识": "bilibili",
+}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1.2万", 12000), ("3千", 3000), ("1,024", 1024), ("2.5w", 25000), ("点赞", 0), ("", 0), (None, 0), (7, 7),
+])
+def test_parse_count(text, expected):
+    assert parse_count(text) == expected
+
+
+def test_records_are_slotted():
+    record = BilibiliDynamic.from_card(CARD)
+    assert not hasattr(record, "__dict__")
+    with pytest.raises(AttributeError):
+        record.extra = 1
+
+
+def test_bilibili_record_from_card_and_legacy_dict():
+    record = BilibiliDynamic.from_card(CARD, publish_time=datetime(2024, 10, 20), card_height=320, extract_round=2)
+    assert (record.like_count, record.comment_count, record.repost_count) == (12000, 0, 35)
+    assert (record.publish_date, record.month_key, record.export_content_type) == ("2024-10-20", "2024年10月", "视频")
+
+    legacy = record.to_dict()
+    assert legacy["卡片高度"] == "320px" and legacy["发布时间_解析"] == "2024-10-20"
+    assert BilibiliDynamic.from_dict(legacy) == record
+
+
+def test_douyin_record_from_stats():
+    stats = {"likes": 128456, "comments": 1832, "collects": 9021, "shares": 4410,
+             "publish_time": "发布时间：2024-10-20 11:00", "description": "碰一下"}
+    video = DouyinVideo.from_stats("https://www.douyin.com/video/7426523190384610587", stats)
+    assert video.content_id == "7426523190384610587"
+    assert video.publish_time == datetime(2024, 10, 20, 11, 0)
+    assert video.to_dict()["publish_time_parsed"] == "2024-10-20"
+
+
+def test_exporters_share_records(tmp_path):
+    older = BilibiliDynamic.from_card(CARD, publish_time=datetime(2024, 9, 1))
+    newer = BilibiliDynamic.from_dict({**CARD, "内容ID": "1002", "发布时间_解析": "2024-10-01"})
+    rows = DataExporter(output_dir=str(tmp_path)).normalize_contents([older, newer])
+    assert [row.content_id for row in rows] == ["1002", "1001"]
+    assert bilibili_records(rows)[0]["like_count"] == 12000
+
+    (tmp_path / "3.txt").write_text(
+        "=== 视频URL: https://www.douyin.com/video/1 ===\n点赞数: 12\n发布时间: 发布时间：2024-10-20 11:00\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "2.txt").write_text("https://www.douyin.com/video/1\n碰一下\n", encoding="utf-8")
+    exporter = DouyinDataExporter(output_dir=str(tmp_path))
+    videos = exporter.parse_douyin_data(str(tmp_path / "3.txt"), str(tmp_path / "2.txt"))
+    assert [(video.content_text, video.like_count) for video in videos] == [("碰一下", 12)]
+    assert douyin_records(videos)[0]["month"] == "2024-10"
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+会话录制与回放测试
+用内存中的假浏览器录制，再在不启动浏览器、不联网的情况下回放
+"""
+
+import json
+import urllib.request
+
+import pytest
+
+from src.common.replay import RecordingDriver, ReplayDriver, ReplayMissError, ReplayServer, load_archive
+
+PAGE_URL = "https://space.bilibili.com/420831218/dynamic"
+XHR_URL = "https://api.bilibili.com/x/polymer/web-dynamic/v1/feed/space?host_mid=420831218&offset=1001"
+
+
+class FakeElement:
+    def __init__(self, text, attributes=None):
+        self.text = text
+        self.attributes = attributes or {}
+
+    def get_attribute(self, name):
+        return self.attributes.get(name)
+
+    def find_element(self, by, value):
+        raise LookupError(f"{by}={value}")
+
+
+class FakeBrowser:
+    """模拟一个随滚动加载更多卡片的动态页"""
+
+    def __init__(self):
+        self.current_url = "about:blank"
+        self.rounds = 0
+        self.pending_xhr = []
+        self.cdp_calls = []
+        self.quitted = False
+
+    @property
+    def page_source(self):
+        cards = "".join(f'<div class="card">卡片 {i}</div>' for i in range(self.rounds + 1))
+        return f"<html><body>{cards}</body></html>"
+
+    def get(self, url):
+        self.current_url = url
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.cdp_calls.append(cmd)
+        return {}
+
+    def execute_script(self, script, *args):
+        if "__replayXhr" in script:
+            responses, self.pending_xhr = self.pending_xhr, []
+            return responses
+        if "scroll" in script:
+            self.rounds += 1
+            self.pending_xhr.append({
+                "method": "GET", "url": XHR_URL, "status": 200, "started": 1729393200000, "time": 35,
+                "headers": {"content-type": "application/json"}, "body": json.dumps({"code": 0, "round": self.rounds}),
+            })
+            return None
+        if args:
+            return args[0].text
+        return [{"height": 100, "data": {"内容ID": str(1000 + i)}} for i in range(self.rounds + 1)]
+
+    def find_elements(self, by, value):
+        return [FakeElement(f"卡片 {i}", {"data-id": str(1000 + i)}) for i in range(self.rounds + 1)]
+
+    def quit(self):
+        self.quitted = True
+
+
+def _crawl(driver):
+    """与提取循环相同的调用方式：打开页面，每轮读取卡片后滚动"""
+    driver.get(PAGE_URL)
+    seen = []
+    for _ in range(3):
+        cards = driver.execute_script("return extractVisibleCards();")
+        elements = driver.find_elements("css selector", ".card")
+        seen.append(([card["data"]["内容ID"] for card in cards],
+                     [element.get_attribute("data-id") for element in elements],
+                     driver.execute_script("return arguments[0].innerText;", elements[-1])))
+        driver.execute_script("window.scrollBy(0, 500);")
+    try:
+        elements[0].find_element("css selector", ".missing")
+    except LookupError as e:
+        seen.append(str(e))
+    return seen, driver.current_url
+
+
+@pytest.fixture
+def recording(tmp_path):
+    browser = FakeBrowser()
+    recorder = RecordingDriver(browser, str(tmp_path))
+    result = _crawl(recorder)
+    recorder.quit()
+    assert browser.quitted and browser.cdp_calls == ["Page.addScriptToEvaluateOnNewDocument"]
+    return tmp_path, result
+
+
+def test_archive_contains_pages_snapshots_and_xhr(recording):
+    archive_dir, _ = recording
+    archive = load_archive(str(archive_dir))
+
+    assert [page["url"] for page in archive["log"]["pages"]] == [PAGE_URL]
+    assert len(archive["_snapshots"]) == 3
+    last_snapshot = (archive_dir / archive["_snapshots"][-1]["file"]).read_text(encoding="utf-8")
+    assert last_snapshot.count('class="card"') == 3
+
+    entries = archive["log"]["entries"]
+    assert [entry["request"]["url"] for entry in entries] == [XHR_URL] * 3
+    assert json.loads(entries[-1]["response"]["content"]["text"]) == {"code": 0, "round": 3}
+
+
+def test_replay_reproduces_crawl_without_browser(recording):
+    archive_dir, recorded = recording
+    sleeps = []
+    replay = ReplayDriver(str(archive_dir), latency=0.05, sleep=sleeps.append)
+
+    assert _crawl(replay) == recorded
+    assert sleeps and all(delay == 0.05 for delay in sleeps)
+
+    with pytest.raises(ReplayMissError):
+        replay.execute_script("return document.title;")
+
+
+def test_replay_latency_scales_recorded_durations(recording):
+    archive_dir, _ = recording
+    sleeps = []
+    _crawl(ReplayDriver(str(archive_dir), latency_scale=0.0, sleep=sleeps.append))
+    assert sleeps == []
+
+
+def test_replay_server_serves_recorded_responses(recording):
+    archive_dir, _ = recording
+    server = ReplayServer(str(archive_dir)).start()
+    try:
+        with urllib.request.urlopen(server.url + "/x/polymer/web-dynamic/v1/feed/space?host_mid=420831218&offset=1001") as r:
+            assert json.loads(r.read()) == {"code": 0, "round": 1}
+        with urllib.request.urlopen(server.url + "/420831218/dynamic") as r:
+            assert "卡片 0" in r.read().decode("utf-8")
+        with urllib.request.urlopen(server.url + "/_snapshots/2") as r:
+            assert r.read().decode("utf-8").count('class="card"') == 3
+    finally:
+        server.stop()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+重试子系统测试
+使用假时钟，不真正等待
+"""
+
+import random
+
+from src.common.retry import CircuitBreaker, DeadLetterLog, FetchError, RetryQueue, backoff_delay
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def _queue(process, clock, tmp_path=None, **kwargs):
+    options = {
+        "max_retries": 2,
+        "base_delay": 1,
+        "max_delay": 10,
+        "breaker": CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=clock),
+        "dead_letter": DeadLetterLog(str(tmp_path / "dead.jsonl")) if tmp_path else None,
+        "clock": clock,
+        "sleep": clock.sleep,
+        "rng": random.Random(0),
+    }
+    options.update(kwargs)
+    return RetryQueue(process, **options)
+
+
+def test_backoff_bounds():
+    rng = random.Random(1)
+    for attempt in range(1, 10):
+        assert 0 <= backoff_delay(attempt, 2, 60, rng) <= min(60, 2 * 2 ** (attempt - 1))
+
+
+def test_failed_item_does_not_block_main_pass():
+    clock = FakeClock()
+    calls = []
+    failures = {"https://a.example/1": 1}
+
+    def process(url):
+        calls.append(url)
+        if failures.get(url):
+            failures[url] -= 1
+            raise FetchError("暂时失败")
+        return url[-1]
+
+    outcome = _queue(process, clock).run(["https://a.example/1", "https://b.example/2", "https://b.example/3"])
+    assert calls == ["https://a.example/1", "https://b.example/2", "https://b.example/3", "https://a.example/1"]
+    assert outcome.results == {"https://a.example/1": "1", "https://b.example/2": "2", "https://b.example/3": "3"}
+    assert outcome.retries == 1 and not outcome.dead
+
+
+def test_exhausted_item_goes_to_dead_letter(tmp_path):
+    clock = FakeClock()
+
+    def process(url):
+        raise FetchError("页面中未找到统计数据")
+
+    outcome = _queue(process, clock, tmp_path).run(["https://a.example/1"])
+    assert outcome.results == {}
+    dead = DeadLetterLog(str(tmp_path / "dead.jsonl")).read()
+    assert len(dead) == 1 and dead[0]["attempts"] == 3
+    assert "未找到统计数据" in dead[0]["error"]
+
+
+def test_circuit_breaker_defers_domain_without_spending_retries():
+    clock = FakeClock()
+    calls = []
+    down_until = 40
+
+    def process(url):
+        calls.append((clock(), url))
+        if clock() < down_until:
+            raise FetchError("连接超时")
+        return "ok"
+
+    urls = [f"https://www.douyin.com/video/{i}" for i in range(6)]
+    outcome = _queue(process, clock, max_retries=5).run(urls)
+
+    # 连续失败3次后熔断，后面的视频在熔断期内不再请求
+    assert [url for _, url in calls[:3]] == urls[:3]
+    assert all(when >= 30 for when, _ in calls[3:])
+    assert len(outcome.results) == 6 and not outcome.dead
+
+
+def test_breaker_states():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    breaker.record_failure("a")
+    assert breaker.state("a") == "closed"
+    breaker.record_failure("a")
+    assert breaker.state("a") == "open" and not breaker.allow("a")
+    clock.sleep(10)
+    assert breaker.state("a") == "half-open" and breaker.allow("a")
+    breaker.record_success("a")
+    assert breaker.state("a") == "closed"
+
+
+def test_half_open_breaker_lets_one_probe_through():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure("a")
+    clock.sleep(10)
+    # 冷却结束后只有第一个调用方去试探，其他调用方等试探结果
+    assert [breaker.allow("a") for _ in range(3)] == [True, False, False]
+    assert breaker.retry_at("a") == clock() + 10
+
+    # 试探失败：重新熔断，冷却后再放行一个
+    breaker.record_failure("a")
+    assert not breaker.allow("a")
+    clock.sleep(10)
+    assert [breaker.allow("a") for _ in range(2)] == [True, False]
+
+    # 试探没有返回结果：超时后视为丢失，放行下一个试探
+    clock.sleep(10)
+    assert breaker.allow("a") and not breaker.allow("a")
+    breaker.record_success("a")
+    assert all(breaker.allow("a") for _ in range(3))
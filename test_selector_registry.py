@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+选择器注册表测试
+用内存中的假元素统计每次查找实际尝试了几个选择器
+"""
+
+from selenium.common.exceptions import NoSuchElementException
+
+from src.common.selector_registry import SelectorRegistry
+
+IMAGE_SELECTORS = ["picture.b-img__inner img", ".bili-dyn-card-img img", "img[src*='hdslb.com']"]
+
+
+class FakeCard:
+    def __init__(self, matches):
+        self.matches = matches
+        self.lookups = []
+
+    def find_element(self, by, selector):
+        self.lookups.append(selector)
+        if selector not in self.matches:
+            raise NoSuchElementException(selector)
+        return self.matches[selector]
+
+    def find_elements(self, by, selector):
+        self.lookups.append(selector)
+        return [self.matches[selector]] if selector in self.matches else []
+
+
+def _registry(tmp_path, dead_after=20):
+    return SelectorRegistry("bilibili", {"images": IMAGE_SELECTORS, "content_id": ["[dyn-id]"]},
+                            stats_path=str(tmp_path / "selector_stats.json"), dead_after=dead_after)
+
+
+def test_learns_most_likely_selector(tmp_path):
+    registry = _registry(tmp_path)
+    card = FakeCard({"img[src*='hdslb.com']": "图片"})
+
+    assert registry.find(card, "images", "动态") == ("图片", "img[src*='hdslb.com']")
+    assert len(card.lookups) == 3
+
+    card.lookups.clear()
+    for _ in range(5):
+        registry.find(card, "images", "动态")
+    assert card.lookups == ["img[src*='hdslb.com']"] * 5
+
+
+def test_ordering_is_per_card_type(tmp_path):
+    registry = _registry(tmp_path)
+    video = FakeCard({".bili-dyn-card-img img": "封面"})
+    dynamic = FakeCard({"picture.b-img__inner img": "配图"})
+    for _ in range(3):
+        registry.find(video, "images", "视频")
+        registry.find(dynamic, "images", "动态")
+
+    assert registry.candidates("images", "视频")[0] == ".bili-dyn-card-img img"
+    assert registry.candidates("images", "动态")[0] == "picture.b-img__inner img"
+    # 没有统计的卡片类型使用汇总顺序
+    assert set(registry.candidates("images", "专栏")[:2]) == {".bili-dyn-card-img img", "picture.b-img__inner img"}
+
+
+def test_accept_rejects_empty_values(tmp_path):
+    registry = _registry(tmp_path)
+    card = FakeCard({"picture.b-img__inner img": "", ".bili-dyn-card-img img": "https://i0.hdslb.com/a.jpg"})
+    value, selector = registry.find(card, "images", accept=lambda element, _: element)
+    assert (value, selector) == ("https://i0.hdslb.com/a.jpg", ".bili-dyn-card-img img")
+
+
+def test_learned_order_persists(tmp_path):
+    registry = _registry(tmp_path)
+    card = FakeCard({"img[src*='hdslb.com']": "图片"})
+    registry.find(card, "images", "动态")
+    registry.save()
+
+    reloaded = _registry(tmp_path)
+    assert reloaded.candidates("images", "动态")[0] == "img[src*='hdslb.com']"
+
+
+def test_reports_selectors_that_stopped_matching(tmp_path):
+    registry = _registry(tmp_path, dead_after=3)
+    card = FakeCard({"[dyn-id]": "1001"})
+    registry.find(card, "content_id")
+
+    card.matches.clear()
+    for _ in range(3):
+        assert registry.find(card, "content_id") == (None, None)
+    registry.record("images", "*", ["picture.b-img__inner img"], "picture.b-img__inner img")
+
+    dead = registry.report()
+    assert [(item["field"], item["selector"], item["hits"]) for item in dead] == [("content_id", "[dyn-id]", 1)]
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+登录态会话库测试
+使用本地HTTP服务模拟B站 /x/web-interface/nav 登录态探测接口
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+pytest.importorskip("cryptography")
+
+from src.common.session_vault import SessionVault
+
+
+class NavHandler(BaseHTTPRequestHandler):
+    """Cookie中带 SESSDATA=good 时返回已登录"""
+
+    protocol_version = "HTTP/1.1"
+    probes = 0
+
+    def do_GET(self):
+        NavHandler.probes += 1
+        logged_in = "SESSDATA=good" in (self.headers.get("Cookie") or "")
+        payload = {"code": 0, "data": {"isLogin": True}} if logged_in else {"code": -101, "data": {"isLogin": False}}
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeDriver:
+    """只实现 execute_cdp_cmd 的浏览器"""
+
+    def __init__(self, cookies=None):
+        self.cookies = cookies or []
+        self.injected = []
+
+    def execute_cdp_cmd(self, cmd, args):
+        if cmd == "Network.getAllCookies":
+            return {"cookies": self.cookies}
+        if cmd == "Network.setCookies":
+            self.injected.extend(args["cookies"])
+            return {}
+        raise AssertionError(cmd)
+
+
+@pytest.fixture
+def vault(tmp_path):
+    NavHandler.probes = 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), NavHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    platforms = {
+        "bilibili": {
+            "domain": ".bilibili.com",
+            "auth_cookies": ["SESSDATA", "bili_jct"],
+            "probe_url": f"http://127.0.0.1:{httpd.server_address[1]}/x/web-interface/nav",
+        }
+    }
+    yield SessionVault(str(tmp_path / "vault"), platforms, probe_interval=600)
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _cookies(sessdata="good", expiry=None):
+    expiry = expiry or int(time.time()) + 3600
+    return [
+        {"name": "SESSDATA", "value": sessdata, "domain": ".bilibili.com", "path": "/", "expiry": expiry},
+        {"name": "bili_jct", "value": "csrf", "domain": ".bilibili.com", "path": "/"},
+    ]
+
+
+def test_cookies_encrypted_on_disk(vault, tmp_path):
+    vault.save("bilibili", _cookies())
+    raw = (tmp_path / "vault" / "bilibili__default.vault").read_bytes()
+    assert b"SESSDATA" not in raw
+    assert vault.load("bilibili")["cookies"][0]["value"] == "good"
+
+
+def test_validate_probes_once_within_interval(vault):
+    vault.save("bilibili", _cookies())
+    assert vault.validate("bilibili")
+    assert vault.validate("bilibili")
+    assert NavHandler.probes == 1
+
+
+def test_expired_cookie_rejected_without_probe(vault):
+    vault.save("bilibili", _cookies(expiry=int(time.time()) - 10))
+    assert not vault.validate("bilibili")
+    assert NavHandler.probes == 0
+
+
+def test_probe_rejects_revoked_session(vault):
+    vault.save("bilibili", _cookies(sessdata="revoked"))
+    assert not vault.validate("bilibili")
+    assert NavHandler.probes == 1
+
+
+def test_export_and_inject(vault):
+    cdp_cookies = [
+        {"name": "SESSDATA", "value": "good", "domain": ".bilibili.com", "path": "/", "expires": time.time() + 3600},
+        {"name": "bili_jct", "value": "csrf", "domain": ".bilibili.com", "path": "/", "expires": -1, "session": True},
+        {"name": "other", "value": "x", "domain": ".example.com", "path": "/", "expires": -1, "session": True},
+    ]
+    assert vault.export_from_driver(FakeDriver(cdp_cookies), "bilibili") == 2
+
+    driver = FakeDriver()
+    assert vault.inject_into_driver(driver, "bilibili")
+    assert {cookie["name"] for cookie in driver.injected} == {"SESSDATA", "bili_jct"}
+
+    session = requests.Session()
+    assert vault.inject_into_session(session, "bilibili")
+    assert session.cookies.get("SESSDATA", domain=".bilibili.com") == "good"
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+分布式任务表测试
+用共享的SQLite文件和两个独立连接模拟两台工作机，检查租约互斥、过期接手、幂等提交和重试
+"""
+
+import threading
+
+import pytest
+
+from src.common.work_queue import FAILED, PENDING, LeaseLostError, WorkQueue
+from src.daemon_service.crawl_daemon import BrowserSessions
+from src.daemon_service.crawl_worker import (
+    CrawlWorker,
+    bilibili_window_units,
+    collect_douyin_results,
+    douyin_video_units,
+    month_windows,
+)
+
+URLS = [f"https://www.douyin.com/video/{i}" for i in range(1, 6)]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _hosts(tmp_path, clock, **kwargs):
+    dsn = f"sqlite:///{tmp_path / 'work_queue.db'}"
+    return WorkQueue(dsn, lease_seconds=60, clock=clock, **kwargs), WorkQueue(dsn, lease_seconds=60, clock=clock, **kwargs)
+
+
+def test_enqueue_is_idempotent(tmp_path):
+    queue, _ = _hosts(tmp_path, FakeClock())
+    assert queue.enqueue_many(douyin_video_units(URLS)) == 5
+    assert queue.enqueue_many(douyin_video_units(URLS[:2])) == 0
+    assert queue.counts()[PENDING] == 5
+
+
+def test_leases_are_exclusive_across_hosts(tmp_path):
+    host_a, host_b = _hosts(tmp_path, FakeClock())
+    host_a.enqueue_many(douyin_video_units(URLS))
+
+    leased_a = host_a.lease("a", limit=3)
+    leased_b = host_b.lease("b", limit=3)
+    ids_a = {lease.unit_id for lease in leased_a}
+    ids_b = {lease.unit_id for lease in leased_b}
+    assert len(ids_a) == 3 and len(ids_b) == 2 and not ids_a & ids_b
+    assert host_a.lease("a") == []
+
+
+def test_expired_lease_is_taken_over_and_commit_is_idempotent(tmp_path):
+    clock = FakeClock()
+    host_a, host_b = _hosts(tmp_path, clock)
+    host_a.enqueue_many(douyin_video_units(URLS[:1]))
+    lease_a = host_a.lease("a")[0]
+
+    # 心跳续约期间其他工作机领取不到
+    clock.now += 50
+    host_a.heartbeat(lease_a)
+    clock.now += 50
+    assert host_b.lease("b") == []
+
+    # 工作机a失联，租约过期后b接手
+    clock.now += 61
+    lease_b = host_b.lease("b")[0]
+    assert lease_b.unit_id == lease_a.unit_id and lease_b.attempts == 2
+    with pytest.raises(LeaseLostError):
+        host_a.heartbeat(lease_a)
+
+    # a 的迟到结果先提交生效，b 的重复提交被忽略
+    assert host_a.complete(lease_a, {"likes": 1}) is True
+    assert host_b.complete(lease_b, {"likes": 2}) is False
+    assert [result for _, _, result in host_b.results("douyin_video")] == [{"likes": 1}]
+
+
+def test_failures_back_off_then_give_up(tmp_path):
+    clock = FakeClock()
+    queue, _ = _hosts(tmp_path, clock, max_attempts=2, retry_delay=10, retry_max_delay=10)
+    queue.enqueue_many(douyin_video_units(URLS[:1]))
+
+    assert queue.fail(queue.lease("a")[0], "FetchError: 超时") == PENDING
+    clock.now += 10.1
+    assert queue.fail(queue.lease("a")[0], "FetchError: 超时") == FAILED
+    assert queue.failures()[0]["attempts"] == 2
+
+
+def test_workers_on_two_hosts_process_each_unit_once(tmp_path):
+    host_a, host_b = _hosts(tmp_path, FakeClock())
+    host_a.enqueue_many(douyin_video_units(URLS))
+    calls = []
+    lock = threading.Lock()
+
+    def fetch(payload, sessions, should_stop):
+        with lock:
+            calls.append(payload["url"])
+        return {"likes": payload["url"].rsplit("/", 1)[-1], "publish_time": "发布时间：2024-10-20 11:00"}
+
+    workers = [CrawlWorker(queue, BrowserSessions(), {"douyin_video": fetch}, worker_id=name, heartbeat_interval=5)
+               for name, queue in (("a", host_a), ("b", host_b))]
+    threads = [threading.Thread(target=worker.run, kwargs={"exit_when_idle": True}) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(calls) == sorted(URLS)
+    videos = collect_douyin_results(host_a)
+    assert sorted(video.like_count for video in videos) == [1, 2, 3, 4, 5]
+
+
+def test_bilibili_windows_split_by_month():
+    assert month_windows("05月15日", "07月10日") == [("05月15日", "06月01日"), ("06月01日", "07月01日"),
+                                                  ("07月01日", "07月10日")]
+    units = list(bilibili_window_units("https://space.bilibili.com/1/dynamic", "10月01日", "11月01日"))
+    assert units == [("bilibili_window", "https://space.bilibili.com/1/dynamic|10月01日|11月01日",
+                      {"url": "https://space.bilibili.com/1/dynamic", "start": "10月01日", "end": "11月01日"})]